@@ -0,0 +1,303 @@
+# dashboard/api_previsao.py
+"""
+API HTTP de previsões para outras ferramentas internas: POST /api/forecast no servidor Flask do Dash.
+
+O corpo é um lote de requisições, cada uma com loja, intervalo de datas e cenário de promoção:
+
+    {"requisicoes": [
+        {"loja": 1, "data_inicio": "2015-08-01", "data_fim": "2015-08-14", "promo": "padrao"},
+        {"loja": 2, "data_inicio": "2015-08-01", "data_fim": "2015-08-07", "promo": ["2015-08-03", "2015-08-04"]}
+    ]}
+
+Cenários de promoção: "padrao" (repete o último ciclo de 14 dias da loja, como a tabela de
+previsões), "com_promo" (todos os dias), "sem_promo" (nenhum dia) ou uma lista de datas com
+promoção. A resposta traz, para cada requisição, as datas, a venda prevista por dia (zero
+nos dias em que a loja costuma fechar) e o total.
+
+As previsões usam os modelos por loja da última execução do job da tabela de previsões,
+pontuados de forma vetorizada (previsao/pontuacao.py). Cada requisição é guardada em cache
+pelo hash do cenário (loja, datas, promoção e versão dos modelos). As que faltam no cache
+entram em um agrupador: requisições HTTP que chegam a poucos milissegundos umas das outras
+(workers com threads, ver gunicorn.conf.py) são pontuadas em uma única chamada ao modelo.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from flask import jsonify, request
+
+from .previsao.pontuacao import obter_modelos_lojas, posicoes_lojas, calcular_promo_padrao, prever_lote
+
+logger = logging.getLogger(__name__)
+
+ROTA_API_PREVISAO = '/api/forecast'
+
+JANELA_AGRUPAMENTO_S = float(os.environ.get('JANELA_AGRUPAMENTO_MS', '3')) / 1000
+MAXIMO_REQUISICOES_LOTE = 1000
+MAXIMO_DIAS_REQUISICAO = 366
+TAMANHO_CACHE_CENARIOS = 20000
+CENARIOS_PROMO = ('padrao', 'com_promo', 'sem_promo')
+
+
+class RequisicaoInvalida(ValueError):
+    """Requisição da API mal formada; a rota responde 400 com a mensagem."""
+
+
+class _Pedido:
+    """Requisições de uma chamada HTTP aguardando a pontuação do lote em que foram agrupadas."""
+
+    def __init__(self, requisicoes):
+        self.requisicoes = requisicoes
+        self.concluido = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+class AgrupadorLotes:
+    """
+    Agrupa chamadas simultâneas em um único lote.
+
+    A primeira chamada que encontra a fila vazia abre uma janela de `janela_s` segundos; as
+    que chegam nesse intervalo entram no mesmo lote. Ao fim da janela, ela executa
+    `funcao_lote` com todos os itens, na ordem de chegada, e entrega a cada chamada a sua fatia.
+    """
+
+    def __init__(self, funcao_lote, janela_s=JANELA_AGRUPAMENTO_S):
+        self.funcao_lote = funcao_lote
+        self.janela_s = janela_s
+        self._lock = threading.Lock()
+        self._pendentes = []
+        self.lotes = 0
+        self.chamadas = 0
+
+    def executar(self, itens):
+        """
+        Pontua `itens` junto com as chamadas que chegarem na mesma janela.
+
+        Args:
+            itens (list): Itens desta chamada
+
+        Returns:
+            list: Resultados de funcao_lote correspondentes a `itens`, na mesma ordem
+        """
+        pedido = _Pedido(itens)
+        with self._lock:
+            self._pendentes.append(pedido)
+            lider = len(self._pendentes) == 1
+        if lider:
+            time.sleep(self.janela_s)
+            with self._lock:
+                lote, self._pendentes = self._pendentes, []
+            self._processar(lote)
+
+        pedido.concluido.wait()
+        if pedido.erro is not None:
+            raise pedido.erro
+        return pedido.resultado
+
+    def _processar(self, lote):
+        try:
+            resultados = self.funcao_lote([item for pedido in lote for item in pedido.requisicoes])
+            inicio = 0
+            for pedido in lote:
+                pedido.resultado = resultados[inicio:inicio + len(pedido.requisicoes)]
+                inicio += len(pedido.requisicoes)
+        except BaseException as erro:
+            for pedido in lote:
+                pedido.erro = erro
+        finally:
+            self.lotes += 1
+            self.chamadas += len(lote)
+            for pedido in lote:
+                pedido.concluido.set()
+
+
+def _converter_loja(valor):
+    """Id da loja como int; rejeita booleanos, números fracionários e textos não inteiros."""
+    if isinstance(valor, (bool, np.bool_)):
+        raise ValueError(f"loja deve ser um inteiro, recebido {valor!r}")
+    if isinstance(valor, (int, np.integer)):
+        return int(valor)
+    if isinstance(valor, (float, np.floating)) and float(valor).is_integer():
+        return int(valor)
+    if isinstance(valor, str) and valor.strip().lstrip('+-').isdigit():
+        return int(valor)
+    raise ValueError(f"loja deve ser um inteiro, recebido {valor!r}")
+
+
+def _converter_data(valor, campo):
+    """Data normalizada (meia-noite); rejeita valores vazios, que o pandas converte em NaT."""
+    data = pd.Timestamp(valor)
+    if pd.isna(data):
+        raise ValueError(f"{campo} vazia")
+    return data.normalize()
+
+
+def normalizar_requisicao(requisicao):
+    """
+    Valida uma requisição e a converte para a forma usada no cache e na pontuação.
+
+    Args:
+        requisicao (dict): {'loja', 'data_inicio', 'data_fim', 'promo' (opcional, padrão 'padrao')}
+
+    Returns:
+        dict: loja (int), data_inicio e data_fim (pd.Timestamp) e promo (nome do cenário ou tupla de datas ISO)
+
+    Raises:
+        RequisicaoInvalida: Se algum campo estiver ausente ou inválido
+    """
+    if not isinstance(requisicao, dict):
+        raise RequisicaoInvalida("Cada requisição deve ser um objeto com loja, data_inicio e data_fim")
+    try:
+        loja = _converter_loja(requisicao['loja'])
+        data_inicio = _converter_data(requisicao['data_inicio'], 'data_inicio')
+        data_fim = _converter_data(requisicao['data_fim'], 'data_fim')
+    except KeyError as erro:
+        raise RequisicaoInvalida(f"Campo obrigatório ausente: {erro.args[0]}") from None
+    except (TypeError, ValueError) as erro:
+        raise RequisicaoInvalida(f"Loja ou data inválida: {erro}") from None
+    if data_inicio > data_fim:
+        raise RequisicaoInvalida("data_inicio posterior a data_fim")
+    if (data_fim - data_inicio).days + 1 > MAXIMO_DIAS_REQUISICAO:
+        raise RequisicaoInvalida(f"Intervalo maior que {MAXIMO_DIAS_REQUISICAO} dias")
+
+    promo = requisicao.get('promo', 'padrao')
+    if isinstance(promo, list):
+        try:
+            promo = tuple(sorted({_converter_data(data, 'promo').strftime('%Y-%m-%d') for data in promo}))
+        except (TypeError, ValueError) as erro:
+            raise RequisicaoInvalida(f"Data de promoção inválida: {erro}") from None
+    elif promo not in CENARIOS_PROMO:
+        raise RequisicaoInvalida(f"Cenário de promoção inválido: {promo!r} (use {', '.join(CENARIOS_PROMO)} "
+                                 "ou uma lista de datas)")
+    return {'loja': loja, 'data_inicio': data_inicio, 'data_fim': data_fim, 'promo': promo}
+
+
+def hash_cenario(requisicao, versao_modelos):
+    """Chave de cache de uma requisição normalizada (muda quando o job regrava os modelos)."""
+    conteudo = json.dumps([versao_modelos, requisicao['loja'], requisicao['data_inicio'].strftime('%Y-%m-%d'),
+                           requisicao['data_fim'].strftime('%Y-%m-%d'), requisicao['promo']])
+    return hashlib.sha1(conteudo.encode()).hexdigest()
+
+
+def pontuar_requisicoes(requisicoes, pilha=None):
+    """
+    Pontua requisições normalizadas com uma única chamada vetorizada ao modelo.
+
+    Args:
+        requisicoes (list): Saídas de normalizar_requisicao
+        pilha (dict): Modelos empilhados (padrão: obter_modelos_lojas)
+
+    Returns:
+        list: Para cada requisição, {'loja', 'datas', 'previsao', 'total'}
+    """
+    pilha = pilha or obter_modelos_lojas()
+    if pilha is None:
+        raise RuntimeError("Modelos ainda não treinados: execute o job da tabela de previsões")
+
+    # Uma linha por (requisição, dia), montada sem laço sobre os dias
+    inicios = np.array([requisicao['data_inicio'].to_datetime64() for requisicao in requisicoes], dtype='datetime64[D]')
+    dias = np.array([(requisicao['data_fim'] - requisicao['data_inicio']).days + 1 for requisicao in requisicoes])
+    fins_linhas = np.cumsum(dias)
+    deslocamentos = np.arange(fins_linhas[-1]) - np.repeat(fins_linhas - dias, dias)
+    datas = np.repeat(inicios, dias) + deslocamentos.astype('timedelta64[D]')
+    posicoes = np.repeat(posicoes_lojas(pilha, [requisicao['loja'] for requisicao in requisicoes]), dias)
+
+    promo = calcular_promo_padrao(pilha, posicoes, datas)
+    for indice, requisicao in enumerate(requisicoes):
+        if requisicao['promo'] == 'padrao':
+            continue
+        trecho = slice(fins_linhas[indice] - dias[indice], fins_linhas[indice])
+        if requisicao['promo'] == 'com_promo':
+            promo[trecho] = 1
+        elif requisicao['promo'] == 'sem_promo':
+            promo[trecho] = 0
+        else:
+            promo[trecho] = np.isin(datas[trecho], np.array(requisicao['promo'], dtype='datetime64[D]'))
+
+    previsao, _ = prever_lote(pilha, posicoes, datas, promo)
+    previsao = np.round(previsao, 2)
+    textos_datas = np.datetime_as_string(datas, unit='D')
+    return [
+        {
+            'loja': requisicao['loja'],
+            'datas': textos_datas[inicio:fim].tolist(),
+            'previsao': previsao[inicio:fim].tolist(),
+            'total': round(float(previsao[inicio:fim].sum()), 2),
+        }
+        for requisicao, inicio, fim in zip(requisicoes, (fins_linhas - dias).tolist(), fins_linhas.tolist())
+    ]
+
+
+agrupador = AgrupadorLotes(pontuar_requisicoes)
+
+# {hash do cenário: resultado}, do mais antigo ao mais recente
+_cache_cenarios = OrderedDict()
+_lock_cache = threading.Lock()
+
+
+def prever_com_cache(requisicoes):
+    """
+    Resultados das requisições normalizadas, buscando no cache e agrupando as que faltam.
+
+    Returns:
+        list: Resultados na ordem das requisições
+    """
+    pilha = obter_modelos_lojas()
+    if pilha is None:
+        raise RuntimeError("Modelos ainda não treinados: execute o job da tabela de previsões")
+    posicoes_lojas(pilha, [requisicao['loja'] for requisicao in requisicoes])  # lojas inválidas falham antes do lote
+
+    chaves = [hash_cenario(requisicao, pilha['versao']) for requisicao in requisicoes]
+    with _lock_cache:
+        resultados = [_cache_cenarios.get(chave) for chave in chaves]
+        for chave, resultado in zip(chaves, resultados):
+            if resultado is not None:
+                _cache_cenarios.move_to_end(chave)
+
+    # Cenários repetidos dentro do mesmo lote são pontuados uma vez
+    faltantes = {}
+    for chave, requisicao, resultado in zip(chaves, requisicoes, resultados):
+        if resultado is None:
+            faltantes.setdefault(chave, requisicao)
+    if faltantes:
+        novos = dict(zip(faltantes, agrupador.executar(list(faltantes.values()))))
+        with _lock_cache:
+            _cache_cenarios.update(novos)
+            while len(_cache_cenarios) > TAMANHO_CACHE_CENARIOS:
+                _cache_cenarios.popitem(last=False)
+        resultados = [novos[chave] if resultado is None else resultado for chave, resultado in zip(chaves, resultados)]
+    return resultados
+
+
+def registrar_api_previsao(servidor):
+    """
+    Registra a rota POST /api/forecast no servidor Flask do aplicativo.
+
+    Args:
+        servidor (flask.Flask): Servidor do aplicativo Dash
+    """
+    @servidor.route(ROTA_API_PREVISAO, methods=['POST'])
+    def api_previsao():
+        corpo = request.get_json(silent=True)
+        requisicoes = corpo.get('requisicoes') if isinstance(corpo, dict) else corpo
+        if not isinstance(requisicoes, list) or not requisicoes:
+            return jsonify(erro="Envie {\"requisicoes\": [...]} com ao menos uma requisição"), 400
+        if len(requisicoes) > MAXIMO_REQUISICOES_LOTE:
+            return jsonify(erro=f"Máximo de {MAXIMO_REQUISICOES_LOTE} requisições por chamada"), 400
+
+        try:
+            resultados = prever_com_cache([normalizar_requisicao(requisicao) for requisicao in requisicoes])
+        except RequisicaoInvalida as erro:
+            return jsonify(erro=str(erro)), 400
+        except KeyError as erro:
+            return jsonify(erro=erro.args[0]), 404
+        except RuntimeError as erro:
+            return jsonify(erro=str(erro)), 503
+        return jsonify(resultados=resultados)
@@ -22,18 +22,13 @@ warnings.filterwarnings('ignore', category=FutureWarning, message=".*observed=Fa
 warnings.filterwarnings('ignore', category=FutureWarning, message=".*When grouping with a length-1 list-like.*")
 
 # Importar layouts e dados com caminho absoluto
-from dashboard.layouts import (
-    barra_lateral,
-    criar_layout_contextualizacao,
-    criar_layout_limpeza_dados,
-    criar_layout_analise_preliminar,
-    criar_layout_dashboard_analise,
-    criar_layout_previsao_vendas,
-    criar_layout_analise_lojas,
-    criar_layout_analise_3d
-)
+from dashboard.layouts import barra_lateral, criar_conteineres_paginas
 from dashboard.data_loader import carregar_dados, N_AMOSTRAS_PADRAO
 from dashboard.callbacks import registrar_callbacks
+from dashboard.metricas import instrumentar_callbacks
+from dashboard.concorrencia import ID_ARMAZENAMENTO_ABA, registrar_sessoes
+from dashboard.api_previsao import registrar_api_previsao
+from dashboard.tarefas_background import criar_gerenciador_background
 
 # ==============================================================================
 # Inicialização do Aplicativo
@@ -41,6 +36,9 @@ from dashboard.callbacks import registrar_callbacks
 # Configuração da porta
 port = int(os.environ.get('PORT', 8050))
 
+# Callbacks pesados rodam em processos separados (diskcache), liberando os workers
+gerenciador_background = criar_gerenciador_background()
+
 aplicativo = dash.Dash(
     __name__,
     external_stylesheets=[
@@ -55,7 +53,8 @@ aplicativo = dash.Dash(
         {"name": "viewport", "content": "width=device-width, initial-scale=1.0"}
     ],
     title='Dashboard Rossmann',
-    update_title='Atualizando...'
+    update_title='Atualizando...',
+    background_callback_manager=gerenciador_background
 )
 
 # Configuração do servidor
@@ -80,27 +79,6 @@ def get_cached_data(modo, n_amostras, data_inicio, data_fim, force_reprocess):
         force_reprocess=force_reprocess
     )
 
-# Cache para layouts
-layout_cache = {}
-
-def get_layout(pathname, dados):
-    if pathname not in layout_cache:
-        if pathname == '/':
-            layout_cache[pathname] = criar_layout_contextualizacao(dados)
-        elif pathname == '/limpeza-dados':
-            layout_cache[pathname] = criar_layout_limpeza_dados(dados)
-        elif pathname == '/analise-preliminar':
-            layout_cache[pathname] = criar_layout_analise_preliminar(dados)
-        elif pathname == '/dashboard':
-            layout_cache[pathname] = criar_layout_dashboard_analise(dados)
-        elif pathname == '/analise-lojas':
-            layout_cache[pathname] = criar_layout_analise_lojas(dados)
-        elif pathname == '/analise-3d':
-            layout_cache[pathname] = criar_layout_analise_3d(dados)
-        elif pathname == '/previsao-vendas':
-            layout_cache[pathname] = criar_layout_previsao_vendas()
-    return layout_cache[pathname]
-
 # ==============================================================================
 # Configurações de carregamento dos dados
 # ==============================================================================
@@ -131,25 +109,21 @@ initial_store = {'modo': 'amostras', 'n_amostras': 50}
 # ==============================================================================
 # Layout do Aplicativo
 # ==============================================================================
-# Carregar todos os layouts no início
+# Páginas construídas na primeira visita (callback carregar_conteudo_pagina)
 # A visibilidade será controlada por um callback que altera o 'display'
 aplicativo.layout = html.Div([
     dcc.Location(id='url', refresh=False),
     # Componente de armazenamento para o DataFrame principal
     dcc.Store(id='armazenamento-df-principal', data=initial_store),
+    # Páginas já enviadas a este navegador
+    dcc.Store(id='armazenamento-paginas-carregadas', data=[]),
+    # Identificador desta aba, enviado com os callbacks pesados (concorrencia.py)
+    dcc.Store(id=ID_ARMAZENAMENTO_ABA),
     barra_lateral,
     html.Div(
         id='conteudo-pagina',
         className='content',
-        children=[
-            html.Div(get_layout('/', dados), id='conteudo-pagina-/', style={'display': 'block'}),
-            html.Div(get_layout('/limpeza-dados', dados), id='conteudo-pagina-/limpeza-dados', style={'display': 'none'}),
-            html.Div(get_layout('/analise-preliminar', dados), id='conteudo-pagina-/analise-preliminar', style={'display': 'none'}),
-            html.Div(get_layout('/dashboard', dados), id='conteudo-pagina-/dashboard', style={'display': 'none'}),
-            html.Div(get_layout('/analise-lojas', dados), id='conteudo-pagina-/analise-lojas', style={'display': 'none'}),
-            html.Div(get_layout('/analise-3d', dados), id='conteudo-pagina-/analise-3d', style={'display': 'none'}),
-            html.Div(get_layout('/previsao-vendas', dados), id='conteudo-pagina-/previsao-vendas', style={'display': 'none'}),
-        ]
+        children=criar_conteineres_paginas()
     )
 ])
 
@@ -158,6 +132,15 @@ aplicativo.layout = html.Div([
 # ==============================================================================
 registrar_callbacks(aplicativo, dados)
 
+# Latência, CPU, bytes e erros por callback, expostos em /metrics (formato Prometheus)
+instrumentar_callbacks(aplicativo)
+
+# Cookie de sessão usado para descartar chamadas superadas dos callbacks pesados
+registrar_sessoes(server)
+
+# Previsões para outras ferramentas: POST /api/forecast (lotes agrupados e cache por cenário)
+registrar_api_previsao(server)
+
 # ==============================================================================
 # Execução do Aplicativo
 # ==============================================================================
@@ -0,0 +1,176 @@
+# dashboard/aquecimento.py
+"""
+Aquecimento do aplicativo no processo mestre do gunicorn (preload) e reinício dos
+recursos próprios de cada worker depois do fork.
+
+Com preload_app (ver gunicorn.conf.py), dashboard.app é importado uma única vez no mestre:
+dados, índices por loja e pirâmide temporal são carregados antes do fork. Em seguida,
+aquecer_aplicativo constrói os layouts de todas as páginas e executa, pelo cliente de teste
+do Flask, os callbacks iniciais de cada página com os valores padrão dos filtros, como o
+navegador faria na primeira visita. Os callbacks em segundo plano (tarefas_background.py)
+não passam pelo cliente de teste, que só registraria um job: suas funções são chamadas
+diretamente, de forma síncrona, com os mesmos valores. Isso preenche os caches de módulo
+(dataset por modo, pirâmide e série temporal, layouts) e as inicializações preguiçosas do
+pandas e do Plotly; por fim, os modelos por loja da API de previsões são carregados. Os
+workers, e os processos dos jobs criados a partir deles, herdam tudo por cópia na escrita
+(copy-on-write).
+
+Depois do fork, reiniciar_recursos_processo reabre os arquivos de log, fecha a conexão
+SQLite do gerenciador de background (o diskcache reconecta sob demanda) e zera as métricas
+registradas durante o aquecimento.
+"""
+import logging
+import time
+
+from dash.dependencies import Input, Output, State
+from dash.development.base_component import Component
+from plotly.io.json import to_json_plotly
+
+from .api_previsao import ROTA_API_PREVISAO
+from .layouts.paginas import PAGINAS, obter_layout_pagina
+from .metricas import ROTA_CALLBACKS, registro
+from .previsao.pontuacao import obter_modelos_lojas
+from .teste_carga import dividir_saidas, montar_corpo
+
+logger = logging.getLogger(__name__)
+
+PASSADAS_AQUECIMENTO = 2  # a segunda passada usa as saídas da primeira (ex.: dados base da página 3D)
+
+
+def coletar_valores_iniciais(componente, valores=None):
+    """
+    Coleta os valores iniciais das propriedades dos componentes com ID textual.
+
+    Args:
+        componente: Árvore de componentes Dash (ou lista)
+        valores (dict): Dicionário a completar
+
+    Returns:
+        dict: {'id.propriedade': valor serializável em JSON}
+    """
+    valores = {} if valores is None else valores
+    if isinstance(componente, (list, tuple)):
+        for filho in componente:
+            coletar_valores_iniciais(filho, valores)
+        return valores
+    if not isinstance(componente, Component):
+        return valores
+
+    identificador = getattr(componente, 'id', None)
+    for propriedade in componente._prop_names:
+        valor = getattr(componente, propriedade, None)
+        if isinstance(identificador, str) and propriedade != 'children' and valor is not None \
+                and not isinstance(valor, Component):
+            valores[f'{identificador}.{propriedade}'] = valor
+        if isinstance(valor, (Component, list, tuple)):
+            coletar_valores_iniciais(valor, valores)
+    return valores
+
+
+def _callbacks_da_pagina(aplicativo, ids_pagina):
+    """Callbacks do servidor com saída na página e disparados na carga inicial."""
+    for especificacao in aplicativo._callback_list:
+        if especificacao.get('clientside_function') or especificacao.get('long') \
+                or especificacao.get('prevent_initial_call'):
+            continue
+        ids_saida = {saida.rsplit('.', 1)[0] for saida in dividir_saidas(especificacao['output'])}
+        if ids_saida & ids_pagina:
+            yield especificacao
+
+
+def _achatar_dependencias(dependencias):
+    for dependencia in dependencias:
+        if isinstance(dependencia, (list, tuple)):
+            yield from _achatar_dependencias(dependencia)
+        else:
+            yield dependencia
+
+
+def _executar_callbacks_pesados(aplicativo, ids_pagina, valores):
+    """Chama de forma síncrona as funções dos callbacks em segundo plano com saída na página."""
+    for dependencias, funcao in getattr(aplicativo, '_callbacks_pesados', []):
+        achatadas = list(_achatar_dependencias(dependencias))
+        saidas = [dependencia for dependencia in achatadas if isinstance(dependencia, Output)]
+        if not {saida.component_id for saida in saidas} & ids_pagina:
+            continue
+        # Inputs e depois States, na ordem em que o Dash os passa à função
+        argumentos = [valores.get(f'{dependencia.component_id}.{dependencia.component_property}')
+                      for tipo in (Input, State) for dependencia in achatadas if type(dependencia) is tipo]
+        try:
+            resultado = funcao(lambda _progresso: None, *argumentos)
+        except Exception as erro:
+            logger.warning(f"Aquecimento: {funcao.__name__} falhou ({erro!r})")
+            continue
+        resultados = resultado if len(saidas) > 1 else [resultado]
+        for saida, valor in zip(saidas, resultados):
+            valores[f'{saida.component_id}.{saida.component_property}'] = valor
+
+
+def aquecer_aplicativo(aplicativo, dados, paginas=None):
+    """
+    Constrói os layouts e executa os callbacks iniciais das páginas com os filtros padrão.
+
+    Args:
+        aplicativo (dash.Dash): Aplicativo com os callbacks registrados
+        dados (dict): Dados carregados por carregar_dados
+        paginas (list): Páginas a aquecer (padrão: todas)
+
+    Returns:
+        dict: {página: segundos gastos}
+    """
+    cliente = aplicativo.server.test_client()
+    valores_base = coletar_valores_iniciais(aplicativo.layout)
+    tempos = {}
+    for pagina in paginas or PAGINAS:
+        inicio = time.perf_counter()
+        layout = obter_layout_pagina(pagina, dados)
+        valores = dict(valores_base)
+        coletar_valores_iniciais(layout, valores)
+        valores.update({'url.pathname': pagina, f'conteudo-pagina-{pagina}.style': {'display': 'block'}})
+        ids_pagina = {chave.rsplit('.', 1)[0] for chave in coletar_valores_iniciais(layout)}
+
+        for _ in range(PASSADAS_AQUECIMENTO):
+            for especificacao in _callbacks_da_pagina(aplicativo, ids_pagina):
+                # Valores vindos de outras saídas podem conter figuras: serializados como no Dash
+                corpo = to_json_plotly(montar_corpo(especificacao, valores))
+                resposta = cliente.post(ROTA_CALLBACKS, data=corpo, content_type='application/json')
+                if resposta.status_code == 200:
+                    for identificador, propriedades in resposta.get_json()['response'].items():
+                        for propriedade, valor in propriedades.items():
+                            valores[f'{identificador}.{propriedade}'] = valor
+                elif resposta.status_code != 204:
+                    logger.warning(f"Aquecimento: {especificacao['output']} respondeu {resposta.status_code}")
+            _executar_callbacks_pesados(aplicativo, ids_pagina, valores)
+        tempos[pagina] = time.perf_counter() - inicio
+        logger.info(f"Aquecimento da página {pagina}: {tempos[pagina]:.2f} s")
+
+    # Modelos por loja usados pela API de previsões, empilhados uma vez para todos os workers
+    inicio = time.perf_counter()
+    if obter_modelos_lojas() is not None:
+        tempos[ROTA_API_PREVISAO] = time.perf_counter() - inicio
+    return tempos
+
+
+def reiniciar_recursos_processo(aplicativo):
+    """
+    Reinicia os recursos que não podem ser compartilhados entre processos (chamar após o fork).
+
+    Args:
+        aplicativo (dash.Dash): Aplicativo herdado do processo mestre
+    """
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.FileHandler):
+            handler.acquire()
+            try:
+                if handler.stream is not None:
+                    handler.stream.close()
+                handler.stream = handler._open()
+            finally:
+                handler.release()
+
+    gerenciador = getattr(aplicativo, '_background_manager', None)
+    cache = getattr(gerenciador, 'handle', None)
+    if cache is not None and hasattr(cache, 'close'):
+        cache.close()
+
+    registro.limpar()
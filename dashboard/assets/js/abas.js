@@ -0,0 +1,18 @@
+// dashboard/assets/js/abas.js
+// Identificador da aba, enviado com os callbacks pesados (ver dashboard/concorrencia.py).
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    abas: {
+
+        // Gerado uma vez por aba (dcc.Store em memória); as navegações seguintes não o alteram.
+        // crypto.getRandomValues também está disponível fora de contextos seguros (http).
+        gerar_id_aba: function (_caminho, id_atual) {
+            if (id_atual) {
+                return window.dash_clientside.no_update;
+            }
+            const bytes = new Uint8Array(16);
+            window.crypto.getRandomValues(bytes);
+            return Array.from(bytes, function (byte) { return byte.toString(16).padStart(2, '0'); }).join('');
+        }
+    }
+});
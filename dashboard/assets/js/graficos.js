@@ -0,0 +1,15 @@
+// dashboard/assets/js/graficos.js
+// Callbacks clientside auxiliares dos gráficos.
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    graficos: {
+
+        // Largura renderizada (px) do gráfico; o servidor limita os pontos por traço a esse valor.
+        // Páginas ocultas têm largura 0, então usa a largura da janela como aproximação.
+        medir_largura_grafico: function (_gatilho, id_grafico) {
+            const elemento = document.getElementById(id_grafico);
+            const largura = elemento ? elemento.clientWidth : 0;
+            return largura > 0 ? largura : window.innerWidth;
+        }
+    }
+});
@@ -0,0 +1,190 @@
+// dashboard/assets/js/ranking_lojas.js
+// Callbacks clientside da página de Análise de Lojas.
+// O ranking completo (ordenado de forma descendente) já está no dcc.Store
+// 'armazenamento-dados-ranking'; recorte Top-N, inversão asc/desc e destaque das
+// linhas selecionadas são apenas apresentação e rodam no navegador.
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    analise_lojas: {
+
+        renderizar_tabela_ranking: function (dados_json, contagem, ids_lojas_selecionadas, lojas_especificas, ordem, metrica) {
+            if (!dados_json) {
+                return window.dash_clientside.no_update;
+            }
+
+            const ranking = ler_ranking(dados_json, ordem);
+            if (ranking.length === 0) {
+                return componente('Alert', 'dash_bootstrap_components', {
+                    children: 'Nenhuma loja encontrada para os filtros selecionados.',
+                    color: 'warning'
+                });
+            }
+
+            const nomes_cabecalho = {
+                'Sales_sum': 'Vendas Totais', 'Sales_mean': 'Vendas Médias',
+                'Customers_sum': 'Clientes Totais', 'Customers_mean': 'Clientes Médios',
+                'SalesPerCustomer_mean': 'Ticket Médio'
+            };
+            const eh_moeda = metrica && (metrica.indexOf('Sales') !== -1);
+            const selecionadas = ids_lojas_selecionadas || [];
+
+            // Decide qual subconjunto de lojas exibir (mantendo a posição original no ranking)
+            let linhas_a_exibir;
+            if (lojas_especificas && lojas_especificas.length > 0) {
+                linhas_a_exibir = ranking.filter(function (linha) { return lojas_especificas.indexOf(linha.Store) !== -1; });
+            } else {
+                linhas_a_exibir = ranking.slice(0, contagem || 10);
+            }
+
+            // Máximo para normalizar a barra de progresso (do ranking completo)
+            const valor_max_metrica = ranking.reduce(function (maximo, linha) { return Math.max(maximo, linha.Metrica); }, 0);
+            const medalhas = {1: '🥇', 2: '🥈', 3: '🥉'};
+
+            const cabecalho = componente('Thead', 'dash_html_components', {
+                children: componente('Tr', 'dash_html_components', {
+                    className: 'table-dark',
+                    children: ['#', 'Loja', 'Tipo', 'Sortimento', nomes_cabecalho[metrica] || 'Métrica'].map(function (titulo) {
+                        return componente('Th', 'dash_html_components', {children: titulo});
+                    })
+                })
+            });
+
+            const corpo = componente('Tbody', 'dash_html_components', {
+                children: linhas_a_exibir.map(function (linha) {
+                    const valor_formatado = eh_moeda
+                        ? '€ ' + formatar_numero(linha.Metrica, 2)
+                        : formatar_numero(linha.Metrica, 0);
+                    const progresso = valor_max_metrica ? (linha.Metrica / valor_max_metrica * 100) : 0;
+                    const esta_selecionada = selecionadas.indexOf(linha.Store) !== -1;
+
+                    return componente('Tr', 'dash_html_components', {
+                        id: {'type': 'linha-ranking', 'index': linha.Store},
+                        n_clicks: 0,
+                        className: esta_selecionada ? 'ranking-row ranking-row-selected' : 'ranking-row',
+                        children: [
+                            componente('Td', 'dash_html_components', {children: (medalhas[linha.Ranking] || '') + ' ' + linha.Ranking}),
+                            componente('Td', 'dash_html_components', {children: linha.Store}),
+                            componente('Td', 'dash_html_components', {children: String(linha.StoreType).toUpperCase()}),
+                            componente('Td', 'dash_html_components', {children: String(linha.Assortment).toUpperCase()}),
+                            componente('Td', 'dash_html_components', {
+                                children: [
+                                    componente('Span', 'dash_html_components', {children: valor_formatado, className: 'd-block'}),
+                                    componente('Progress', 'dash_bootstrap_components', {
+                                        value: progresso,
+                                        color: ordem === 'desc' ? 'success' : 'danger',
+                                        style: {'height': '6px'}
+                                    })
+                                ]
+                            })
+                        ]
+                    });
+                })
+            });
+
+            return componente('Table', 'dash_bootstrap_components', {
+                children: [cabecalho, corpo],
+                bordered: true, striped: true, hover: true, responsive: true,
+                className: 'mt-3'
+            });
+        },
+
+        atualizar_selecao_lojas: function (lista_n_clicks, dados_json, selecao_lojas_especificas, ordem, lista_id, ids_lojas_selecionadas, limite_lojas) {
+            const contexto = window.dash_clientside.callback_context;
+            if (!contexto.triggered || contexto.triggered.length === 0) {
+                return window.dash_clientside.no_update;
+            }
+            const id_propriedade_gatilho = contexto.triggered[0].prop_id;
+            let novos_ids_selecionados = (ids_lojas_selecionadas || []).slice();
+            const limite = limite_lojas || 2;
+
+            // Cenário 1: Seleção via dropdown de busca (sempre as últimas escolhidas, até o limite)
+            if (id_propriedade_gatilho === 'filtro-loja-especifica.value') {
+                if (selecao_lojas_especificas && selecao_lojas_especificas.length > 0) {
+                    novos_ids_selecionados = selecao_lojas_especificas.slice(-limite);
+                }
+            }
+
+            // Cenário 2: Clique na tabela
+            else if (id_propriedade_gatilho.indexOf('linha-ranking') !== -1) {
+                let id_clicado;
+                try {
+                    id_clicado = JSON.parse(id_propriedade_gatilho.split('.')[0]);
+                } catch (e) {
+                    return window.dash_clientside.no_update;
+                }
+                // Linhas recém-renderizadas chegam com n_clicks = 0 e não representam cliques reais
+                const posicao = (lista_id || []).findIndex(function (id) { return id.index === id_clicado.index; });
+                if (posicao === -1 || !lista_n_clicks[posicao]) {
+                    return window.dash_clientside.no_update;
+                }
+                const id_loja_clicada = id_clicado.index;
+                const indice_existente = novos_ids_selecionados.indexOf(id_loja_clicada);
+                if (indice_existente !== -1) {
+                    // Se já está selecionada, remove (toggle)
+                    novos_ids_selecionados.splice(indice_existente, 1);
+                } else {
+                    if (novos_ids_selecionados.length >= limite) {
+                        // Limite atingido; substitui a mais antiga (primeira) pela nova
+                        novos_ids_selecionados.shift();
+                    }
+                    novos_ids_selecionados.push(id_loja_clicada);
+                }
+            }
+
+            // Cenário 3: Filtros principais ou ordem alterados -> seleciona o topo do ranking
+            else if (id_propriedade_gatilho === 'armazenamento-dados-ranking.data' ||
+                     id_propriedade_gatilho === 'seletor-ordem-ranking.value') {
+                novos_ids_selecionados = [];
+                if (dados_json) {
+                    const ranking = ler_ranking(dados_json, ordem);
+                    if (ranking.length > 0) {
+                        novos_ids_selecionados.push(ranking[0].Store);
+                    }
+                }
+            }
+
+            return novos_ids_selecionados;
+        }
+    }
+});
+
+// Converte o JSON (orient='split') do ranking em uma lista de objetos já na ordem pedida.
+// O servidor entrega sempre a ordem descendente; a ordem ascendente é apenas a inversão.
+function ler_ranking(dados_json, ordem) {
+    const dados = JSON.parse(dados_json);
+    if (!dados || !dados.columns || !dados.data) {
+        return [];
+    }
+    const colunas = dados.columns;
+    const idx = {
+        Store: colunas.indexOf('Store'),
+        Metrica: colunas.indexOf('Métrica'),
+        StoreType: colunas.indexOf('StoreType'),
+        Assortment: colunas.indexOf('Assortment')
+    };
+    let linhas = dados.data.map(function (linha) {
+        return {
+            Store: linha[idx.Store],
+            Metrica: linha[idx.Metrica],
+            StoreType: linha[idx.StoreType],
+            Assortment: linha[idx.Assortment]
+        };
+    });
+    if (ordem === 'asc') {
+        linhas = linhas.reverse();
+    }
+    linhas.forEach(function (linha, posicao) { linha.Ranking = posicao + 1; });
+    return linhas;
+}
+
+// Equivalente ao formato Python '{:,.Nf}' (separador de milhar ',' e decimal '.')
+function formatar_numero(valor, casas_decimais) {
+    return Number(valor).toLocaleString('en-US', {
+        minimumFractionDigits: casas_decimais,
+        maximumFractionDigits: casas_decimais
+    });
+}
+
+function componente(tipo, namespace, props) {
+    return {type: tipo, namespace: namespace, props: props};
+}
@@ -0,0 +1,407 @@
+# dashboard/benchmark.py
+"""
+Benchmarks do pipeline de dados e dos callbacks mais pesados do dashboard.
+
+Para cada escala de dados sintéticos (ver dados_sinteticos.py), um processo filho com
+DIRETORIO_DADOS apontando para o conjunto gerado mede:
+  - pipeline: carregar_dados_brutos, reduzir_uso_memoria, processar_dados_brutos,
+    amostrar_por_loja e filtrar_dataframe (chamadas diretas);
+  - callbacks: atualizar_pagina_dashboard, atualizar_dados_ranking e os callbacks da
+    página 3D, chamados via /_dash-update-component no cliente de teste do Flask
+    (inclui a serialização JSON da resposta, como em produção).
+
+Cada caso registra o tempo da primeira execução (caches frios) e p50/p95 das repetições
+seguintes, além do pico de RSS do processo durante o caso. O resultado é gravado em JSON
+e pode ser comparado com uma linha de base salva; havendo regressão, o comando termina
+com código 1 (útil como verificação antes do deploy).
+
+Uso:
+    python -m dashboard.benchmark --escalas 0.1 0.5 1 --saida benchmark.json
+    python -m dashboard.benchmark --linha-base benchmark-base.json --tolerancia 0.25
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from .data_loader import DIRETORIO_BASE
+
+VERSAO_FORMATO = 1
+ESCALAS_PADRAO = (0.1, 0.5, 1.0)
+REPETICOES_PADRAO = 5
+TOLERANCIA_PADRAO = 0.25
+# Diferenças absolutas abaixo destas folgas não contam como regressão (ruído de medição)
+FOLGA_TEMPO_S = 0.005
+FOLGA_MEMORIA_MB = 16.0
+INTERVALO_AMOSTRAGEM_RSS_S = 0.005
+
+ROTA_CALLBACKS = '/_dash-update-component'
+ESTADO_DF_COMPLETO = {'modo': 'completo', 'n_amostras': 50}
+
+
+def ler_rss_bytes():
+    """RSS atual do processo (Linux: /proc/self/statm; outros sistemas: pico via getrusage)."""
+    try:
+        with open('/proc/self/statm') as arquivo:
+            return int(arquivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico if sys.platform == 'darwin' else pico * 1024
+
+
+class MonitorMemoria:
+    """Amostra o RSS do processo em uma thread enquanto o bloco `with` é executado."""
+
+    def __init__(self, intervalo=INTERVALO_AMOSTRAGEM_RSS_S):
+        self.intervalo = intervalo
+        self.inicial = self.pico = 0
+        self._parar = threading.Event()
+        self._thread = None
+
+    def _amostrar(self):
+        while not self._parar.wait(self.intervalo):
+            self.pico = max(self.pico, ler_rss_bytes())
+
+    def __enter__(self):
+        self.inicial = self.pico = ler_rss_bytes()
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._amostrar, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_):
+        self._parar.set()
+        self._thread.join()
+        self.pico = max(self.pico, ler_rss_bytes())
+        return False
+
+
+def medir_caso(nome, categoria, executar, preparar=None, repeticoes=REPETICOES_PADRAO):
+    """
+    Executa um caso uma vez com caches frios e `repeticoes` vezes em seguida, medindo tempo e memória.
+
+    Args:
+        nome (str): Nome do caso
+        categoria (str): 'pipeline' ou 'callback'
+        executar (callable): Função medida; recebe o que `preparar` retornar
+        preparar (callable): Monta os argumentos de cada execução (fora da medição)
+        repeticoes (int): Execuções após a primeira
+
+    Returns:
+        dict: Tempos (s), percentis, pico e incremento de RSS (MB) e tamanho da resposta, se houver
+    """
+    gc.collect()
+    tempos = []
+    bytes_resposta = None
+    with MonitorMemoria() as monitor:
+        for _ in range(repeticoes + 1):
+            argumentos = preparar() if preparar else ()
+            inicio = time.perf_counter()
+            retorno = executar(*argumentos)
+            tempos.append(time.perf_counter() - inicio)
+            if isinstance(retorno, (bytes, str)):
+                bytes_resposta = len(retorno)
+            del retorno, argumentos
+
+    quentes = np.array(tempos[1:] or tempos)
+    return {
+        'caso': nome,
+        'categoria': categoria,
+        'repeticoes': len(quentes),
+        'tempo_frio_s': tempos[0],
+        'p50_s': float(np.percentile(quentes, 50)),
+        'p95_s': float(np.percentile(quentes, 95)),
+        'media_s': float(quentes.mean()),
+        'min_s': float(quentes.min()),
+        'pico_rss_mb': monitor.pico / 2**20,
+        'incremento_rss_mb': (monitor.pico - monitor.inicial) / 2**20,
+        'bytes_resposta': bytes_resposta,
+    }
+
+
+def _especificacao(dependencia):
+    return {'id': dependencia.component_id, 'property': dependencia.component_property}
+
+
+def montar_corpo_callback(aplicativo, nome_callback, valores, alterados=None):
+    """
+    Monta o corpo de uma requisição /_dash-update-component para o callback registrado com esse nome.
+
+    Args:
+        aplicativo (dash.Dash): Aplicativo com os callbacks registrados
+        nome_callback (str): Nome da função do callback
+        valores (dict): {'id.propriedade': valor} das entradas e estados (ausentes = None)
+        alterados (list): Propriedades que dispararam o callback (padrão: a primeira entrada)
+
+    Returns:
+        dict: Corpo JSON da requisição
+    """
+    for chave_saida, registro in aplicativo.callback_map.items():
+        if getattr(registro.get('callback'), '__name__', None) == nome_callback:
+            break
+    else:
+        raise KeyError(f"Callback '{nome_callback}' não está registrado")
+
+    saidas = registro['output'] if isinstance(registro['output'], (list, tuple)) else [registro['output']]
+    especificacoes_saida = [_especificacao(saida) for saida in saidas]
+
+    def com_valor(dependencia):
+        return dict(dependencia, value=valores.get(f"{dependencia['id']}.{dependencia['property']}"))
+
+    entradas = [com_valor(entrada) for entrada in registro['inputs']]
+    return {
+        'output': chave_saida,
+        'outputs': especificacoes_saida if chave_saida.startswith('..') else especificacoes_saida[0],
+        'inputs': entradas,
+        'state': [com_valor(estado) for estado in registro['state']],
+        'changedPropIds': alterados or [f"{entradas[0]['id']}.{entradas[0]['property']}"],
+    }
+
+
+def chamar_callback(cliente, corpo):
+    """Envia o corpo ao cliente de teste do Flask e retorna os bytes da resposta (erro se status não for 200/204)."""
+    resposta = cliente.post(ROTA_CALLBACKS, json=corpo)
+    if resposta.status_code not in (200, 204):
+        raise RuntimeError(f"Callback {corpo['output']} respondeu {resposta.status_code}: {resposta.get_data(as_text=True)[:500]}")
+    return resposta.get_data()
+
+
+def executar_escala(escala, repeticoes, casos=None):
+    """
+    Mede todos os casos sobre o conjunto apontado por DIRETORIO_DADOS (executado no processo filho).
+
+    Args:
+        escala (float): Escala do conjunto (apenas registrada nos resultados)
+        repeticoes (int): Repetições por caso
+        casos (list): Nomes dos casos a medir (None = todos)
+
+    Returns:
+        list: Resultados de medir_caso, um por caso
+    """
+    import dash
+    import pandas as pd
+
+    from . import data_loader
+    from .callbacks import registrar_callbacks
+    from .utils import filtrar_dataframe
+
+    resultados = []
+
+    def medir(nome, categoria, executar, preparar=None):
+        if casos and nome not in casos:
+            return
+        logging.info(f"[escala {escala:g}] {nome}")
+        resultado = medir_caso(nome, categoria, executar, preparar, repeticoes)
+        resultado['escala'] = escala
+        resultados.append(resultado)
+
+    # --- Pipeline de dados ---
+    medir('carregar_dados_brutos', 'pipeline', data_loader.carregar_dados_brutos)
+    df_vendas_bruto = pd.read_parquet(data_loader.CAMINHO_ARQUIVO_TREINO_BRUTO)
+    medir('reduzir_uso_memoria', 'pipeline',
+          lambda df: data_loader.reduzir_uso_memoria(df, 'df_vendas'), lambda: (df_vendas_bruto.copy(),))
+    del df_vendas_bruto
+    medir('processar_dados_brutos', 'pipeline', lambda: data_loader.processar_dados_brutos(force_reprocess=True))
+
+    df_completo = data_loader.processar_dados_brutos(force_reprocess=False)
+    medir('amostrar_por_loja', 'pipeline', lambda: data_loader.amostrar_por_loja(df_completo, data_loader.N_AMOSTRAS_PADRAO))
+    df_principal = data_loader.get_principal_dataset(use_samples=False)
+    linhas = len(df_principal)
+    data_inicio, data_fim = df_principal['Date'].min().date().isoformat(), df_principal['Date'].max().date().isoformat()
+    inicio_ultimo_ano = (df_principal['Date'].max() - pd.Timedelta(days=364)).date().isoformat()
+    medir('filtrar_dataframe', 'pipeline',
+          lambda: filtrar_dataframe(df_principal, inicio_ultimo_ano, data_fim, ['a', 'c'], [], 'all', 'all'))
+    del df_completo
+
+    # --- Callbacks (via Flask, com o DataFrame completo) ---
+    dados = data_loader.carregar_dados(modo='amostra', n_amostras=data_loader.N_AMOSTRAS_PADRAO)
+    aplicativo = dash.Dash(__name__, suppress_callback_exceptions=True)
+    aplicativo.layout = dash.html.Div()  # o despacho dos callbacks não depende do layout real
+    registrar_callbacks(aplicativo, dados)
+    cliente = aplicativo.server.test_client()
+
+    def medir_callback(nome, valores, alterados=None):
+        corpo = montar_corpo_callback(aplicativo, nome, valores, alterados)
+        medir(nome, 'callback', lambda: chamar_callback(cliente, corpo))
+
+    medir_callback('atualizar_pagina_dashboard', {
+        'dashboard-filtro-data.start_date': data_inicio,
+        'dashboard-filtro-data.end_date': data_fim,
+        'dashboard-filtro-tipo-loja.value': [],
+        'dashboard-filtro-loja-especifica.value': [],
+        'dashboard-filtro-metrica-temporal.value': 'Sales',
+        'dashboard-filtro-feriado-estadual.value': 'all',
+        'dashboard-filtro-feriado-escolar.value': 'all',
+        'armazenamento-df-principal.data': ESTADO_DF_COMPLETO,
+    })
+    medir_callback('atualizar_dados_ranking', {
+        'url.pathname': '/analise-lojas',
+        'armazenamento-df-principal.data': ESTADO_DF_COMPLETO,
+        'filtro-data.start_date': data_inicio,
+        'filtro-data.end_date': data_fim,
+        'filtro-tipo-loja.value': [],
+        'filtro-feriado-estadual.value': 'all',
+        'filtro-feriado-escolar.value': 'all',
+        'seletor-metrica-ranking.value': 'Sales_sum',
+    })
+
+    valores_3d = {
+        'armazenamento-df-principal.data': ESTADO_DF_COMPLETO,
+        'conteudo-pagina-/analise-3d.style': {'display': 'block'},
+        'filtro-data-3d.start_date': data_inicio,
+        'filtro-data-3d.end_date': data_fim,
+        'filtro-feriado-estadual-3d.value': 'all',
+        'filtro-feriado-escolar-3d.value': 'all',
+    }
+    medir_callback('atualizar_dados_base_3d', valores_3d, alterados=['filtro-data-3d.start_date'])
+    if not casos or any(nome.endswith('_3d') for nome in casos):
+        corpo_base = montar_corpo_callback(aplicativo, 'atualizar_dados_base_3d', valores_3d, ['filtro-data-3d.start_date'])
+        dados_base_3d = json.loads(chamar_callback(cliente, corpo_base))['response']['armazenamento-dados-base-3d']['data']
+        for nome, sufixo in [('atualizar_grafico_superficie_3d', 'superficie'), ('atualizar_grafico_fatores_3d', 'fatores'),
+                             ('atualizar_grafico_promocao_3d', 'promocao'), ('atualizar_grafico_correlacao_3d', 'correlacao')]:
+            medir_callback(nome, {
+                'armazenamento-dados-base-3d.data': dados_base_3d,
+                f'filtro-tipo-loja-{sufixo}.value': [],
+                f'filtro-loja-especifica-{sufixo}.value': [],
+            })
+
+    for resultado in resultados:
+        resultado['linhas'] = linhas
+    return resultados
+
+
+def comparar_com_linha_base(resultados, linha_base, tolerancia=TOLERANCIA_PADRAO):
+    """
+    Compara p50, p95 e incremento de RSS de cada caso com a linha de base.
+
+    Args:
+        resultados (list): Resultados atuais
+        linha_base (dict): JSON de uma execução anterior
+        tolerancia (float): Aumento relativo aceito (0.25 = 25%)
+
+    Returns:
+        list: Uma entrada por (escala, caso, métrica) presente nos dois lados, com 'regressao' True/False
+    """
+    base = {(item['escala'], item['caso']): item for item in linha_base.get('resultados', [])}
+    comparacao = []
+    for resultado in resultados:
+        anterior = base.get((resultado['escala'], resultado['caso']))
+        if anterior is None:
+            continue
+        for metrica, folga in [('p50_s', FOLGA_TEMPO_S), ('p95_s', FOLGA_TEMPO_S), ('incremento_rss_mb', FOLGA_MEMORIA_MB)]:
+            atual, valor_base = resultado[metrica], anterior[metrica]
+            comparacao.append({
+                'escala': resultado['escala'],
+                'caso': resultado['caso'],
+                'metrica': metrica,
+                'atual': atual,
+                'base': valor_base,
+                'variacao': (atual - valor_base) / valor_base if valor_base else None,
+                'regressao': atual > valor_base * (1 + tolerancia) and atual - valor_base > folga,
+            })
+    return comparacao
+
+
+def _versao_git():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=DIRETORIO_BASE,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _executar_processo_filho(escala, diretorio_dados, repeticoes, casos):
+    """Roda uma escala em um processo separado (os caminhos de dados são definidos na importação)."""
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as arquivo:
+        caminho_saida = arquivo.name
+    comando = [sys.executable, '-m', 'dashboard.benchmark', '--interno-escala', str(escala),
+               '--interno-saida', caminho_saida, '--repeticoes', str(repeticoes)]
+    if casos:
+        comando += ['--casos', *casos]
+    try:
+        subprocess.run(comando, cwd=DIRETORIO_BASE, check=True,
+                       env=dict(os.environ, DIRETORIO_DADOS=str(diretorio_dados)))
+        with open(caminho_saida) as arquivo:
+            return json.load(arquivo)
+    finally:
+        os.remove(caminho_saida)
+
+
+def imprimir_resumo(resultados, comparacao):
+    print(f"\n{'escala':>7} {'caso':<34} {'frio (s)':>9} {'p50 (s)':>9} {'p95 (s)':>9} {'RSS pico (MB)':>14}")
+    for item in resultados:
+        print(f"{item['escala']:>7g} {item['caso']:<34} {item['tempo_frio_s']:>9.3f} {item['p50_s']:>9.3f} "
+              f"{item['p95_s']:>9.3f} {item['pico_rss_mb']:>14.1f}")
+    regressoes = [item for item in comparacao if item['regressao']]
+    if comparacao:
+        print(f"\nComparação com a linha de base: {len(regressoes)} regressão(ões) em {len(comparacao)} métricas")
+        for item in regressoes:
+            print(f"  REGRESSÃO escala {item['escala']:g} {item['caso']} {item['metrica']}: "
+                  f"{item['base']:.3f} -> {item['atual']:.3f} ({item['variacao']:+.0%})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do pipeline de dados e dos callbacks do dashboard.")
+    parser.add_argument('--escalas', type=float, nargs='+', default=list(ESCALAS_PADRAO),
+                        help="Escalas de lojas dos dados sintéticos (1 = 1115 lojas)")
+    parser.add_argument('--escala-anos', type=float, default=1.0, help="Escala do período dos dados sintéticos")
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES_PADRAO, help="Repetições por caso após a primeira")
+    parser.add_argument('--casos', nargs='+', default=None, help="Mede apenas estes casos")
+    parser.add_argument('--saida', default='benchmark.json', help="Arquivo JSON de resultados")
+    parser.add_argument('--linha-base', default=None, help="JSON de uma execução anterior para comparação")
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA_PADRAO, help="Aumento relativo aceito antes de acusar regressão")
+    parser.add_argument('--interno-escala', type=float, default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--interno-saida', default=None, help=argparse.SUPPRESS)
+    argumentos = parser.parse_args(argv)
+
+    if argumentos.interno_escala is not None:
+        resultados = executar_escala(argumentos.interno_escala, argumentos.repeticoes, argumentos.casos)
+        with open(argumentos.interno_saida, 'w') as arquivo:
+            json.dump(resultados, arquivo)
+        return 0
+
+    from .dados_sinteticos import gerar_dados_sinteticos
+
+    resultados = []
+    for escala in argumentos.escalas:
+        diretorio = DIRETORIO_BASE / 'dataset' / 'sinteticos' / f'lojas-{escala:g}x_anos-{argumentos.escala_anos:g}x'
+        if not (diretorio / 'brutos' / 'train.parquet').exists():
+            gerar_dados_sinteticos(escala, argumentos.escala_anos, diretorio)
+        resultados.extend(_executar_processo_filho(escala, diretorio, argumentos.repeticoes, argumentos.casos))
+
+    relatorio = {
+        'versao': VERSAO_FORMATO,
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'git': _versao_git(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'parametros': {'escalas': argumentos.escalas, 'escala_anos': argumentos.escala_anos,
+                       'repeticoes': argumentos.repeticoes, 'tolerancia': argumentos.tolerancia},
+        'resultados': resultados,
+        'comparacao': [],
+    }
+    if argumentos.linha_base:
+        with open(argumentos.linha_base) as arquivo:
+            relatorio['comparacao'] = comparar_com_linha_base(resultados, json.load(arquivo), argumentos.tolerancia)
+
+    with open(argumentos.saida, 'w') as arquivo:
+        json.dump(relatorio, arquivo, indent=2, ensure_ascii=False)
+    imprimir_resumo(resultados, relatorio['comparacao'])
+    print(f"\nResultados gravados em {argumentos.saida}")
+    return 1 if any(item['regressao'] for item in relatorio['comparacao']) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
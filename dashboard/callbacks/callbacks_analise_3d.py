@@ -8,6 +8,7 @@ from io import StringIO
 import numpy as np
 
 from ..utils import criar_figura_vazia, filtrar_dataframe_para_3d, parse_json_to_df # Importar as funções utilitárias refatoradas
+from ..tarefas_background import callback_pesado
 from ..config import VERMELHO_ROSSMANN, AZUL_ESCURO, CINZA_NEUTRO, PALETA_CORES_GRAFICO, MAPEAMENTO_DIAS_SEMANA, ORDEM_DIAS_SEMANA # Importar as novas constantes
 
 def registrar_callbacks_analise_3d(aplicativo, dados):
@@ -313,20 +314,23 @@ def registrar_callbacks_analise_3d(aplicativo, dados):
         fig, texto_analise = obter_grafico_dispersao_3d_dinamica_promocao(df_filtrado) # Refatorar nome das variáveis e função
         return fig, texto_analise, estilo
 
-    @aplicativo.callback(
+    @callback_pesado(
+        aplicativo,
         [Output('grafico-correlacao-3d', 'figure'),
          Output('analise-correlacao-3d', 'children'),
          Output('grafico-correlacao-3d', 'style')],
         [Input('armazenamento-dados-base-3d', 'data'),
          Input('filtro-tipo-loja-correlacao', 'value'),
-         Input('filtro-loja-especifica-correlacao', 'value')]
+         Input('filtro-loja-especifica-correlacao', 'value')],
+        id_progresso='progresso-correlacao-3d'
     )
-    def atualizar_grafico_correlacao_3d(dados_armazenados, tipos_loja, lojas_especificas):
+    def atualizar_grafico_correlacao_3d(definir_progresso, dados_armazenados, tipos_loja, lojas_especificas):
         """
         Callback para atualizar o gráfico de correlação 3D.
         Mostra as relações entre diferentes variáveis numéricas do dataset.
         
         Args:
+            definir_progresso: Atualiza a barra de progresso ((valor, rótulo))
             dados_armazenados: Dados JSON armazenados
             tipos_loja: Lista de tipos de loja selecionados
             lojas_especificas: Lista de lojas específicas selecionadas
@@ -337,12 +341,14 @@ def registrar_callbacks_analise_3d(aplicativo, dados):
         if not dados_armazenados:
             return dash.no_update, dash.no_update, dash.no_update
 
+        definir_progresso((10, "Lendo dados"))
         df_filtrado, figura_erro, mensagem_erro, estilo = preprocessar_dados_3d(dados_armazenados, tipos_loja, lojas_especificas)
 
         if figura_erro is not None:
             return figura_erro, mensagem_erro, estilo
 
         try:
+            definir_progresso((50, "Calculando correlações"))
             if df_filtrado.select_dtypes(include=np.number).shape[1] < 3:
                 fig = criar_figura_vazia("Dados insuficientes para gerar matriz de correlação.")
                 texto_analise = "Filtro resultou em dados insuficientes."
@@ -359,6 +365,7 @@ def registrar_callbacks_analise_3d(aplicativo, dados):
             df_corr_3d['Abs_Corr_Sales'] = abs(df_corr_3d['Sales'])
 
             # Cria o gráfico de dispersão 3D das correlações
+            definir_progresso((85, "Gerando gráfico"))
             fig = px.scatter_3d(
                 df_corr_3d,
                 x='Sales', y='Customers', z='Promo',
@@ -1,18 +1,18 @@
 # dashboard/callbacks/callbacks_analise_lojas.py
 import dash
-from dash import Input, Output, State, html, dcc
+from dash import Input, Output, State, ClientsideFunction, html, dcc
 import dash_bootstrap_components as dbc
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import statsmodels.api as sm
 from io import StringIO
-import json
 
-from ..utils import criar_figura_vazia, filtrar_dataframe # Importar as funções utilitárias refatoradas
-from ..data_loader import get_principal_dataset, N_AMOSTRAS_PADRAO
+from ..utils import criar_figura_vazia, filtrar_dataframe_compartilhado, filtrar_dataframe_loja, filtrar_dataframe_lojas, aplicar_webgl # Importar as funções utilitárias refatoradas
+from ..data_loader import get_principal_dataset, obter_atributos_loja, N_AMOSTRAS_PADRAO
+from ..comparacao_lojas import calcular_comparacao_lojas, FORMATOS_METRICAS_COMPARACAO
+from ..reducao_pontos import calcular_pontos_por_traco, reduzir_serie
 from ..config import VERMELHO_ROSSMANN, AZUL_ESCURO, CINZA_NEUTRO, MAPEAMENTO_DIAS_SEMANA, ORDEM_DIAS_SEMANA # Importar as novas constantes
-from ..config import AZUL_DESTAQUE, PALETA_CORES_GRAFICO # Importar as novas constantes
+from ..config import AZUL_DESTAQUE, PALETA_CORES_GRAFICO, LIMITE_LOJAS_COMPARACAO # Importar as novas constantes
 
 # Função auxiliar para deserializar o DataFrame do JSON
 def deserializar_df(store_data):
@@ -25,11 +25,8 @@ def deserializar_df(store_data):
         modo = store_data.get('modo', 'completo')
         n_amostras = store_data.get('n_amostras', N_AMOSTRAS_PADRAO)
         use_samples = (modo == 'amostras')
-        df = get_principal_dataset(use_samples=use_samples, n_amostras=n_amostras)
-        # Garantir que a coluna 'Date' seja datetime
-        if 'Date' in df.columns:
-            df['Date'] = pd.to_datetime(df['Date'])
-        return df
+        # O dataset do cache já vem agrupado por loja, ordenado por data e com 'Date' em datetime
+        return get_principal_dataset(use_samples=use_samples, n_amostras=n_amostras)
     # Caso contrário, assume que é JSON string
     if not store_data:
         return None
@@ -48,14 +45,12 @@ def registrar_callbacks_analise_lojas(aplicativo):
          Input('filtro-data', 'start_date'),
          Input('filtro-data', 'end_date'),
          Input('filtro-tipo-loja', 'value'),
-         Input('filtro-loja-especifica', 'value'),
          Input('filtro-feriado-estadual', 'value'),
          Input('filtro-feriado-escolar', 'value'),
-         Input('seletor-metrica-ranking', 'value'),
-         Input('seletor-ordem-ranking', 'value')]  # Novo input para centralizar a lógica
+         Input('seletor-metrica-ranking', 'value')]
     )
-    def atualizar_dados_ranking(caminho_pagina, df_principal_json, data_inicio, data_fim, tipos_loja, lojas_especificas,
-                            feriado_estadual, feriado_escolar, metrica, ordem):  # Novo parâmetro 'ordem'
+    def atualizar_dados_ranking(caminho_pagina, df_principal_json, data_inicio, data_fim, tipos_loja,
+                            feriado_estadual, feriado_escolar, metrica):
         if caminho_pagina != '/analise-lojas':
             return dash.no_update
 
@@ -67,7 +62,7 @@ def registrar_callbacks_analise_lojas(aplicativo):
         # Ranking é calculado para todas as lojas que obedecem aos filtros globais
         # Passamos None para o filtro de lojas específicas para que o ranking seja calculado
         # com base em TODOS os dados que passam pelos filtros globais, ignorando a seleção específica de lojas
-        df_filtrado = filtrar_dataframe(df_principal, data_inicio, data_fim, tipos_loja, None, feriado_estadual, feriado_escolar)
+        df_filtrado = filtrar_dataframe_compartilhado(df_principal, data_inicio, data_fim, tipos_loja, None, feriado_estadual, feriado_escolar)
 
         if df_filtrado.empty:
             return pd.DataFrame().to_json(date_format='iso', orient='split')
@@ -85,85 +80,48 @@ def registrar_callbacks_analise_lojas(aplicativo):
             'Assortment': 'first'
         }).rename(columns={coluna_metrica: 'Métrica'}).reset_index()
         
-        # --- NOVA LÓGICA CENTRALIZADA ---
-        # Ordenação e atribuição do ranking já acontecem aqui
+        # O ranking é sempre armazenado em ordem descendente. Recorte Top-N, inversão
+        # para 'Piores' e destaque das linhas são feitos no navegador (assets/js/ranking_lojas.js)
         if not df_ranking_loja.empty:
-            eh_ascendente = ordem == 'asc'
-            df_ranking_loja = df_ranking_loja.sort_values(by='Métrica', ascending=eh_ascendente)
+            df_ranking_loja = df_ranking_loja.sort_values(by='Métrica', ascending=False)
             df_ranking_loja['Ranking'] = range(1, len(df_ranking_loja) + 1)
-            
-            # Salvar uma cópia do valor numérico para cálculo de barra de progresso
-            df_ranking_loja['MetricValue'] = df_ranking_loja['Métrica'].copy()
-        # ---------------------------------
 
         return df_ranking_loja.to_json(date_format='iso', orient='split')
 
-    @aplicativo.callback(
+    # --- Callbacks de apresentação do ranking (Clientside) ---
+    aplicativo.clientside_callback(
+        ClientsideFunction(namespace='analise_lojas', function_name='renderizar_tabela_ranking'),
         Output('tabela-ranking-lojas', 'children'),
         [Input('armazenamento-dados-ranking', 'data'),
          Input('slider-contagem-ranking', 'value'),
          Input('armazenamento-id-loja-selecionada', 'data'),
-         Input('seletor-metrica-ranking', 'value'),
-         Input('filtro-loja-especifica', 'value')],
-        [State('seletor-ordem-ranking', 'value')]  # Adicionado State para acessar a ordem sem recalcular o callback
+         Input('filtro-loja-especifica', 'value'),
+         Input('seletor-ordem-ranking', 'value')],
+        [State('seletor-metrica-ranking', 'value')]
     )
-    def atualizar_tabela_ranking_lojas(dados_json, contagem, ids_lojas_selecionadas, metrica, lojas_especificas, ordem):
-        if not dados_json:
-            return dash.no_update
-
-        # O DataFrame já vem ordenado e com as colunas 'Ranking' e 'MetricValue'
-        ranking_lojas = pd.read_json(StringIO(dados_json), orient='split')
-        if ranking_lojas.empty:
-            return dbc.Alert("Nenhuma loja encontrada para os filtros selecionados.", color="warning")
-
-        nomes_cabecalho = {
-            'Sales_sum': 'Vendas Totais', 'Sales_mean': 'Vendas Médias',
-            'Customers_sum': 'Clientes Totais', 'Customers_mean': 'Clientes Médios',
-            'SalesPerCustomer_mean': 'Ticket Médio'
-        }
 
-        # Decide qual subconjunto de lojas exibir
-        df_a_exibir = ranking_lojas
-        if lojas_especificas:
-            # Filtra pelas lojas selecionadas, mas mantém a coluna 'Ranking' original
-            df_a_exibir = ranking_lojas[ranking_lojas['Store'].isin(lojas_especificas)]
-        else:
-            # Mostra o Top N
-            df_a_exibir = ranking_lojas.head(contagem)
-
-        # Formatação da métrica para exibição
-        if "Sales" in metrica or "SalesPerCustomer" in metrica:
-            df_a_exibir['Métrica'] = df_a_exibir['Métrica'].apply(lambda x: f"€ {x:,.2f}")
-        else:
-            df_a_exibir['Métrica'] = df_a_exibir['Métrica'].apply(lambda x: f"{x:,.0f}")
-
-        # Máximo para normalizar a barra de progresso (do DataFrame completo)
-        valor_max_metrica = ranking_lojas['MetricValue'].max() if not ranking_lojas.empty else 0
-        medalhas = {1: "🥇", 2: "🥈", 3: "🥉"}
-
-        cabecalho_tabela = [html.Thead(html.Tr([
-            html.Th("#"), html.Th("Loja"), html.Th("Tipo"), html.Th("Sortimento"), html.Th(nomes_cabecalho.get(metrica, "Métrica"))
-        ], className="table-dark"))]
-
-        corpo_tabela = [html.Tbody([
-            html.Tr([
-                # Coluna posição com medalhas
-                html.Td(f"{medalhas.get(rank['Ranking'], '')} {rank['Ranking']}"),
-                html.Td(rank['Store']),
-                html.Td(rank['StoreType'].upper()), html.Td(rank['Assortment'].upper()),
-                # Coluna métrica + barra de progresso
-                html.Td([
-                    html.Span(rank['Métrica'], className="d-block"),
-                    dbc.Progress(value= (rank['MetricValue']/valor_max_metrica*100) if valor_max_metrica else 0,
-                                 color='success' if ordem == 'desc' else 'danger',  # Corrigido para usar o parâmetro ordem
-                                 style={'height':'6px'})
-                ])
-            ], id={'type': 'linha-ranking', 'index': rank['Store']}, n_clicks=0,
-               className="ranking-row ranking-row-selected" if rank['Store'] in ids_lojas_selecionadas else "ranking-row")
-            for _, rank in df_a_exibir.iterrows()
-        ])]
+    aplicativo.clientside_callback(
+        ClientsideFunction(namespace='analise_lojas', function_name='atualizar_selecao_lojas'),
+        Output('armazenamento-id-loja-selecionada', 'data'),
+        [Input({'type': 'linha-ranking', 'index': dash.ALL}, 'n_clicks'),
+         Input('armazenamento-dados-ranking', 'data'),
+         Input('filtro-loja-especifica', 'value'),
+         Input('seletor-ordem-ranking', 'value')],
+        [State({'type': 'linha-ranking', 'index': dash.ALL}, 'id'),
+         State('armazenamento-id-loja-selecionada', 'data'),
+         State('armazenamento-limite-comparacao', 'data')]
+    )
 
-        return dbc.Table(cabecalho_tabela + corpo_tabela, bordered=True, striped=True, hover=True, responsive=True, className="mt-3")
+    def obter_str_ranking(df_ranking, id_loja, ordem_ranking):
+        """Retorna a posição da loja no ranking ('Xº de N') respeitando a ordem selecionada."""
+        linha = df_ranking[df_ranking['Store'] == id_loja]
+        if linha.empty:
+            return "N/A"
+        total = len(df_ranking)
+        posicao = int(linha['Ranking'].iloc[0])
+        if ordem_ranking == 'asc':
+            posicao = total - posicao + 1
+        return f"{posicao}º de {total}"
 
     # ==============================================================================
     # HELPER FUNCTIONS PARA A PÁGINA DE ANÁLISE DE LOJAS
@@ -181,16 +139,11 @@ def registrar_callbacks_analise_lojas(aplicativo):
         if df_principal is None:
             return dbc.Alert("Erro interno: Falha ao processar os dados.", color="danger")
 
-        # Para obter o StoreType para o filtro, precisamos do df original ou do df principal filtrado por data
-        tipo_loja_para_filtro = df_principal[df_principal['Store'] == id_loja]['StoreType'].iloc[0]
-
-        df_filtrado_loja = filtrar_dataframe(df_principal, data_inicio, data_fim, [tipo_loja_para_filtro], [id_loja], feriado_estadual, feriado_escolar)
+        # Fatia contígua da loja (já ordenada por data) obtida pelo índice de offsets por loja
+        df_filtrado_loja = filtrar_dataframe_loja(df_principal, id_loja, data_inicio, data_fim, feriado_estadual, feriado_escolar)
         if df_filtrado_loja.empty:
             return dbc.Alert(f"Não foram encontrados dados para a loja {id_loja} com os filtros atuais.", color="warning")
 
-        # CORREÇÃO CRÍTICA: Ordenar o DataFrame por data antes de plotar a série temporal
-        df_filtrado_loja = df_filtrado_loja.sort_values(by='Date')
-
         # Geração de cards e gráficos
         media_vendas = df_filtrado_loja['Sales'].mean()
         media_clientes = df_filtrado_loja['Customers'].mean()
@@ -215,16 +168,12 @@ def registrar_callbacks_analise_lojas(aplicativo):
         ], className="p-3"), className="mb-3")
 
         # Código para gerar o card de detalhes estáticos...
-        info_loja = df_principal[df_principal['Store'] == id_loja].iloc[0]
+        info_loja = obter_atributos_loja(df_principal, id_loja)
         str_ranking = "N/A"
         if dados_json:
             df_ranking = pd.read_json(StringIO(dados_json), orient='split')
             if not df_ranking.empty:
-                info_ranking_loja = df_ranking[df_ranking['Store'] == id_loja]
-                if not info_ranking_loja.empty:
-                    rank = info_ranking_loja['Ranking'].iloc[0]
-                    total = len(df_ranking)
-                    str_ranking = f"{rank}º de {total}"
+                str_ranking = obter_str_ranking(df_ranking, id_loja, ordem_ranking)
                     
         str_distancia = f"{info_loja['CompetitionDistance']:,.0f} m" if pd.notna(info_loja['CompetitionDistance']) else "N/A"
         status_promo2 = "Sim" if info_loja['Promo2'] == 1 else "Não"
@@ -262,7 +211,10 @@ def registrar_callbacks_analise_lojas(aplicativo):
         titulo_eixo_y = mapeamento_titulo_eixo_y.get(coluna_metrica, 'Vendas Diárias (€)')
 
         # Gráficos com layout base
-        fig_ts = px.line(df_filtrado_loja, x='Date', y=coluna_metrica, title=f'Série Temporal de {rotulo_metrica} - Loja {id_loja}')
+        # Série diária reduzida com LTTB (um ponto por pixel no máximo), preservando picos e vales
+        datas_ts, valores_ts = reduzir_serie(df_filtrado_loja['Date'], df_filtrado_loja[coluna_metrica], calcular_pontos_por_traco(1))
+        fig_ts = px.line(x=datas_ts, y=valores_ts, labels={'x': 'Date', 'y': coluna_metrica}, title=f'Série Temporal de {rotulo_metrica} - Loja {id_loja}')
+        fig_ts = aplicar_webgl(fig_ts)
         fig_ts.update_traces(line=dict(color=VERMELHO_ROSSMANN))
         fig_ts.update_layout(**layout_base, yaxis_title=titulo_eixo_y)
         
@@ -294,6 +246,7 @@ def registrar_callbacks_analise_lojas(aplicativo):
             labels={'Customers': 'Número de Clientes (por dia)', 'Sales': 'Vendas (por dia)'},
             trendline="ols", trendline_color_override=AZUL_ESCURO
         )
+        fig_dna = aplicar_webgl(fig_dna)
         fig_dna.update_layout(**layout_base)
 
         # Organiza gráficos em abas
@@ -311,10 +264,26 @@ def registrar_callbacks_analise_lojas(aplicativo):
             componente_abas
         ])
 
-    def criar_coluna_comparacao(id_loja, df_filtrado_loja, str_ranking): # Refatorar nome da função e parâmetros
-        media_vendas = df_filtrado_loja['Sales'].mean() # Refatorar nome da variable
-        media_clientes = df_filtrado_loja['Customers'].mean() # Refatorar nome da variable
-        media_ticket = df_filtrado_loja['SalesPerCustomer'].mean() if df_filtrado_loja['SalesPerCustomer'].count() > 0 else 0 # Refatorar nome da variable
+    def obter_cores_comparacao(n_lojas):
+        """Cores das lojas comparadas: vermelho/azul para as duas primeiras e o restante da paleta em seguida."""
+        cores = [VERMELHO_ROSSMANN, AZUL_ESCURO] + [c for c in PALETA_CORES_GRAFICO if c not in (VERMELHO_ROSSMANN, AZUL_ESCURO)]
+        return [cores[i % len(cores)] for i in range(n_lojas)]
+
+    def preparar_comparacao(ids_lojas, df_principal, data_inicio, data_fim, feriado_estadual, feriado_escolar, coluna_metrica):
+        """
+        Extrai as linhas de todas as lojas selecionadas em uma única leitura indexada e calcula
+        as métricas da comparação em uma única passagem agrupada.
+        Retorna (df_lojas, resultado) ou (None, None) se alguma loja não tiver dados.
+        """
+        df_lojas = filtrar_dataframe_lojas(df_principal, ids_lojas, data_inicio, data_fim, feriado_estadual, feriado_escolar)
+        if df_lojas.empty or df_lojas['Store'].nunique() < len(set(ids_lojas)):
+            return None, None
+        return df_lojas, calcular_comparacao_lojas(df_lojas, coluna_metrica)
+
+    def criar_coluna_comparacao(id_loja, metricas_loja, str_ranking): # Refatorar nome da função e parâmetros
+        media_vendas = metricas_loja['Vendas Médias/Dia'] # Refatorar nome da variable
+        media_clientes = metricas_loja['Clientes Médios/Dia'] # Refatorar nome da variable
+        media_ticket = metricas_loja['Ticket Médio'] # Refatorar nome da variable
 
         def criar_kpi(titulo, valor, eh_moeda=True): # Refatorar nome da função e parâmetro
             valor_formatado = f"€ {valor:,.2f}" if eh_moeda else f"{valor:,.0f}" # Refatorar nome da variable
@@ -392,34 +361,101 @@ def registrar_callbacks_analise_lojas(aplicativo):
             style={'backgroundColor': '#ffffff'}
         )
 
-    def gerar_comparacao_detalhada(id_loja1, id_loja2, df_filtrado1, df_filtrado2): # Refatorar nome da função e parâmetros
-        """Gera o conteúdo detalhado da comparação entre lojas."""
-        if df_filtrado1.empty or df_filtrado2.empty:
+    def gerar_comparacao_detalhada(ids_lojas, metricas): # Refatorar nome da função e parâmetros
+        """
+        Gera o conteúdo detalhado da comparação entre N lojas a partir das métricas já agregadas.
+        As diferenças percentuais são sempre relativas à última loja selecionada (referência).
+        """
+        if metricas is None or metricas.empty:
             return html.Div("Dados insuficientes para comparação.")
 
-        # Calcular métricas para comparação
-        metricas = { # Refatorar nome da variable
-            'Vendas Médias/Dia': ('Sales', 'mean', '€ {:,.2f}'),
-            'Clientes Médios/Dia': ('Customers', 'mean', '{:,.0f}'),
-            'Ticket Médio': ('SalesPerCustomer', 'mean', '€ {:,.2f}'),
-            'Vendas Totais': ('Sales', 'sum', '€ {:,.2f}')
-        }
+        id_referencia = ids_lojas[-1]
+        ids_comparadas = ids_lojas[:-1]
+        metricas = metricas.loc[ids_lojas]
 
-        metricas_loja1 = {nome: df_filtrado1[col].agg(func) for nome, (col, func, _) in metricas.items()} # Refatorar nome da variable
-        metricas_loja2 = {nome: df_filtrado2[col].agg(func) for nome, (col, func, _) in metricas.items()} # Refatorar nome da variable
+        # Diferenças percentuais de todas as lojas contra a referência, de uma só vez
+        valores_referencia = metricas.loc[id_referencia]
+        diferencas = ((metricas - valores_referencia) / valores_referencia.where(valores_referencia != 0) * 100).fillna(0) # Refatorar nome da variable
 
-        # Calcular diferenças percentuais
-        diferencas = {} # Refatorar nome da variable
-        for metrica_nome in metricas.keys(): # Refatorar nome da variable
-            val1, val2 = metricas_loja1[metrica_nome], metricas_loja2[metrica_nome] # Refatorar nome das variables
-            if val2 != 0:  # Evitar divisão por zero
-                pct_diferenca = ((val1 - val2) / val2) * 100 # Refatorar nome da variable
-                diferencas[metrica_nome] = pct_diferenca
+        tamanho_fonte_valor = '1.4rem' if len(ids_lojas) <= 3 else '1rem'
 
-        def criar_linha_metrica(nome_metrica, formato): # Refatorar nome da função e parâmetros
-            val1, val2 = metricas_loja1[nome_metrica], metricas_loja2[nome_metrica] # Refatorar nome das variables
-            pct_diferenca = diferencas.get(nome_metrica, 0) # Refatorar nome da variable
+        def criar_badge_diferenca(pct_diferenca):
             eh_positivo = pct_diferenca > 0 # Refatorar nome da variable
+            return html.Div(
+                [
+                    html.I(
+                        className=f"fas fa-arrow-{'up' if eh_positivo else 'down'}", # Usar nova variável refatorada
+                        style={
+                            'color': 'green' if eh_positivo else 'red', # Usar nova variável refatorada
+                            'fontSize': '0.8rem'
+                        }
+                    ),
+                    html.Span(
+                        f" {abs(pct_diferenca):.1f}%", # Usar nova variável refatorada
+                        style={
+                            'fontFamily': 'monospace',
+                            'fontSize': '0.9rem'
+                        }
+                    )
+                ],
+                style={
+                    'color': 'green' if eh_positivo else 'red', # Usar nova variável refatorada
+                    'fontWeight': '500',
+                    'textAlign': 'center',
+                    'backgroundColor': f"rgba({0 if eh_positivo else 255}, {255 if eh_positivo else 0}, 0, 0.1)", # Usar nova variável refatorada
+                    'borderRadius': '12px',
+                    'padding': '2px 8px',
+                    'display': 'inline-block',
+                    'margin': '0 auto'
+                }
+            )
+
+        def criar_valor_loja(id_loja, valor, formato):
+            return [
+                html.Div(
+                    formato.format(valor), # Usar nova variável refatorada
+                    style={
+                        'fontSize': tamanho_fonte_valor,
+                        'fontWeight': '500',
+                        'fontFamily': 'monospace',
+                        'color': '#2c3e50',
+                        'textAlign': 'center',
+                        'lineHeight': '1.2'
+                    }
+                ),
+                html.Div(
+                    f"Loja {id_loja}",
+                    className="text-muted text-center",
+                    style={
+                        'fontSize': '0.75rem',
+                        'marginTop': '2px'
+                    }
+                )
+            ]
+
+        def criar_linha_metrica(nome_metrica, formato): # Refatorar nome da função e parâmetros
+            if len(ids_lojas) == 2:
+                # Duas lojas: valor | diferença | valor
+                colunas = [
+                    dbc.Col(criar_valor_loja(ids_comparadas[0], metricas.at[ids_comparadas[0], nome_metrica], formato), width=5, className="pe-0"),
+                    dbc.Col(
+                        criar_badge_diferenca(diferencas.at[ids_comparadas[0], nome_metrica]),
+                        width=2,
+                        className="d-flex align-items-center justify-content-center px-0"
+                    ),
+                    dbc.Col(criar_valor_loja(id_referencia, metricas.at[id_referencia, nome_metrica], formato), width=5, className="ps-0")
+                ]
+            else:
+                # N lojas: uma coluna por loja, com a diferença contra a referência logo abaixo do valor
+                largura = max(2, 12 // len(ids_lojas))
+                colunas = []
+                for id_loja in ids_lojas:
+                    conteudo = criar_valor_loja(id_loja, metricas.at[id_loja, nome_metrica], formato)
+                    if id_loja != id_referencia:
+                        conteudo.append(html.Div(criar_badge_diferenca(diferencas.at[id_loja, nome_metrica]), className="text-center mt-1"))
+                    else:
+                        conteudo.append(html.Div("referência", className="text-muted text-center mt-1", style={'fontSize': '0.75rem'}))
+                    colunas.append(dbc.Col(conteudo, width=largura, className="mb-2"))
 
             return html.Div(
                 [
@@ -432,97 +468,7 @@ def registrar_callbacks_analise_lojas(aplicativo):
                             'fontWeight': '500'
                         }
                     ),
-                    dbc.Row(
-                        [
-                            # Valor Loja 1
-                            dbc.Col(
-                                [
-                                    html.Div(
-                                        formato.format(val1), # Usar nova variável refatorada
-                                        style={
-                                            'fontSize': '1.4rem',
-                                            'fontWeight': '500',
-                                            'fontFamily': 'monospace',
-                                            'color': '#2c3e50',
-                                            'textAlign': 'center',
-                                            'lineHeight': '1.2'
-                                        }
-                                    ),
-                                    html.Div(
-                                        f"Loja {id_loja1}",
-                                        className="text-muted text-center",
-                                        style={
-                                            'fontSize': '0.75rem',
-                                            'marginTop': '2px'
-                                        }
-                                    )
-                                ],
-                                width=5,
-                                className="pe-0"
-                            ),
-                            # Diferença Percentual
-                            dbc.Col(
-                                html.Div(
-                                    [
-                                        html.I(
-                                            className=f"fas fa-arrow-{'up' if eh_positivo else 'down'}", # Usar nova variável refatorada
-                                            style={
-                                                'color': 'green' if eh_positivo else 'red', # Usar nova variável refatorada
-                                                'fontSize': '0.8rem'
-                                            }
-                                        ),
-                                        html.Span(
-                                            f" {abs(pct_diferenca):.1f}%", # Usar nova variável refatorada
-                                            style={
-                                                'fontFamily': 'monospace',
-                                                'fontSize': '0.9rem'
-                                            }
-                                        )
-                                    ],
-                                    style={
-                                        'color': 'green' if eh_positivo else 'red', # Usar nova variável refatorada
-                                        'fontWeight': '500',
-                                        'textAlign': 'center',
-                                        'backgroundColor': f"rgba({0 if eh_positivo else 255}, {255 if eh_positivo else 0}, 0, 0.1)", # Usar nova variável refatorada
-                                        'borderRadius': '12px',
-                                        'padding': '2px 8px',
-                                        'display': 'inline-block',
-                                        'margin': '0 auto'
-                                    }
-                                ),
-                                width=2,
-                                className="d-flex align-items-center justify-content-center px-0"
-                            ),
-                            # Valor Loja 2
-                            dbc.Col(
-                                [
-                                    html.Div(
-                                        formato.format(val2), # Usar nova variável refatorada
-                                        style={
-                                            'fontSize': '1.4rem',
-                                            'fontWeight': '500',
-                                            'fontFamily': 'monospace',
-                                            'color': '#2c3e50',
-                                            'textAlign': 'center',
-                                            'lineHeight': '1.2'
-                                        }
-                                    )
-,
-                                    html.Div(
-                                        f"Loja {id_loja2}",
-                                        className="text-muted text-center",
-                                        style={
-                                            'fontSize': '0.75rem',
-                                            'marginTop': '2px'
-                                        }
-                                    )
-                                ],
-                                width=5,
-                                className="ps-0"
-                            )
-                        ],
-                        className="align-items-center g-0"
-                    )
+                    dbc.Row(colunas, className="align-items-center g-0")
                 ],
                 className="mb-3 p-2",
                 style={
@@ -536,58 +482,58 @@ def registrar_callbacks_analise_lojas(aplicativo):
         # Criar linhas de comparação para cada métrica
         linhas_comparacao = [ # Refatorar nome da variable
             criar_linha_metrica(nome, fmt)
-            for nome, (_, _, fmt) in metricas.items()
+            for nome, fmt in FORMATOS_METRICAS_COMPARACAO.items()
         ]
 
         # Análise de Desempenho
         analise_desempenho = [] # Refatorar nome da variable
 
-        # Análise de Vendas
-        diferenca_vendas = diferencas['Vendas Médias/Dia'] # Refatorar nome da variable
-        diferenca_clientes = diferencas['Clientes Médios/Dia'] # Refatorar nome da variable
-        diferenca_ticket = diferencas['Ticket Médio'] # Refatorar nome da variable
-
-        # Gerar insights automáticos baseados nas diferenças
+        # Gerar insights automáticos baseados nas diferenças (cada loja contra a referência)
         insights = [] # Refatorar nome da variable
+        for id_loja in ids_comparadas:
+            diferenca_vendas = diferencas.at[id_loja, 'Vendas Médias/Dia'] # Refatorar nome da variable
+            diferenca_clientes = diferencas.at[id_loja, 'Clientes Médios/Dia'] # Refatorar nome da variable
+            diferenca_ticket = diferencas.at[id_loja, 'Ticket Médio'] # Refatorar nome da variable
+            prefixo = f"Loja {id_loja} vs Loja {id_referencia} - " if len(ids_lojas) > 2 else ""
+
+            # Insight sobre vendas
+            if abs(diferenca_vendas) > 2:
+                insights.append(
+                    html.Li([
+                        f"{prefixo}Vendas: ",
+                        html.Span(
+                            f"{'Superioridade' if diferenca_vendas > 0 else 'Inferioridade'} de {abs(diferenca_vendas):.1f}% ",
+                            style={'color': 'green' if diferenca_vendas > 0 else 'red', 'fontWeight': '500'}
+                        ),
+                        "nas vendas médias diárias"
+                    ])
+                )
 
-        # Insight sobre vendas
-        if abs(diferenca_vendas) > 2:
-            insights.append(
-                html.Li([
-                    "Vendas: ",
-                    html.Span(
-                        f"{'Superioridade' if diferenca_vendas > 0 else 'Inferioridade'} de {abs(diferenca_vendas):.1f}% ",
-                        style={'color': 'green' if diferenca_vendas > 0 else 'red', 'fontWeight': '500'}
-                    ),
-                    "nas vendas médias diárias"
-                ])
-            )
-
-        # Insight sobre clientes
-        if abs(diferenca_clientes) > 2:
-            insights.append(
-                html.Li([
-                    "Clientes: ",
-                    html.Span(
-                        f"{'Maior' if diferenca_clientes > 0 else 'Menor'} fluxo em {abs(diferenca_clientes):.1f}% ",
-                        style={'color': 'green' if diferenca_clientes > 0 else 'red', 'fontWeight': '500'}
-                    ),
-                    "de clientes por dia"
-                ])
-            )
+            # Insight sobre clientes
+            if abs(diferenca_clientes) > 2:
+                insights.append(
+                    html.Li([
+                        f"{prefixo}Clientes: ",
+                        html.Span(
+                            f"{'Maior' if diferenca_clientes > 0 else 'Menor'} fluxo em {abs(diferenca_clientes):.1f}% ",
+                            style={'color': 'green' if diferenca_clientes > 0 else 'red', 'fontWeight': '500'}
+                        ),
+                        "de clientes por dia"
+                    ])
+                )
 
-        # Insight sobre ticket médio
-        if abs(diferenca_ticket) > 2:
-            insights.append(
-                html.Li([
-                    "Ticket: ",
-                    html.Span(
-                        f"{'Superior' if diferenca_ticket > 0 else 'Inferior'} em {abs(diferenca_ticket):.1f}% ",
-                        style={'color': 'green' if diferenca_ticket > 0 else 'red', 'fontWeight': '500'}
-                    ),
-                    "no valor médio por cliente"
-                ])
-            )
+            # Insight sobre ticket médio
+            if abs(diferenca_ticket) > 2:
+                insights.append(
+                    html.Li([
+                        f"{prefixo}Ticket: ",
+                        html.Span(
+                            f"{'Superior' if diferenca_ticket > 0 else 'Inferior'} em {abs(diferenca_ticket):.1f}% ",
+                            style={'color': 'green' if diferenca_ticket > 0 else 'red', 'fontWeight': '500'}
+                        ),
+                        "no valor médio por cliente"
+                    ])
+                )
 
         if insights:
             analise_desempenho.extend([
@@ -636,8 +582,8 @@ def registrar_callbacks_analise_lojas(aplicativo):
         ])
 
     def gerar_visualizacao_comparacao(ids_lojas, dados_json, ordem_ranking, data_inicio, data_fim, feriado_estadual, feriado_escolar, metrica_ranking, df_principal_json):
-        """Gera a visualização comparativa entre duas lojas."""
-        if len(ids_lojas) != 2:
+        """Gera a visualização comparativa entre duas ou mais lojas."""
+        if len(ids_lojas) < 2:
             return dash.no_update
 
         # Verificar se temos os dados do DataFrame principal
@@ -649,22 +595,6 @@ def registrar_callbacks_analise_lojas(aplicativo):
         if df_principal is None:
             return dbc.Alert("Erro interno: Falha ao processar os dados.", color="danger")
 
-        id_loja1, id_loja2 = ids_lojas
-
-        tipo_loja1 = df_principal[df_principal['Store'] == id_loja1]['StoreType'].iloc[0]
-        tipo_loja2 = df_principal[df_principal['Store'] == id_loja2]['StoreType'].iloc[0]
-
-        # Filtra dados para cada loja
-        df_filtrado1 = filtrar_dataframe(df_principal, data_inicio, data_fim, [tipo_loja1], [id_loja1], feriado_estadual, feriado_escolar)
-        df_filtrado2 = filtrar_dataframe(df_principal, data_inicio, data_fim, [tipo_loja2], [id_loja2], feriado_estadual, feriado_escolar)
-
-        if df_filtrado1.empty or df_filtrado2.empty:
-            return dbc.Alert("Não foram encontrados dados para uma ou ambas as lojas com os filtros atuais.", color="warning")
-
-        # CORREÇÃO CRÍTICA: Ordenar os DataFrames por data antes de plotar as séries temporais
-        df_filtrado1 = df_filtrado1.sort_values(by='Date')
-        df_filtrado2 = df_filtrado2.sort_values(by='Date')
-
         # --- Mapeamento de Métricas e Labels ---
         mapeamento_metrica = {
             'Sales_sum': 'Sales',
@@ -681,21 +611,24 @@ def registrar_callbacks_analise_lojas(aplicativo):
         coluna_metrica = mapeamento_metrica.get(metrica_ranking, 'Sales')
         rotulo_metrica = mapeamento_rotulo.get(coluna_metrica, 'Vendas')
 
+        # Uma leitura indexada para todas as lojas e uma passagem agrupada para todas as métricas
+        df_lojas, resultado = preparar_comparacao(ids_lojas, df_principal, data_inicio, data_fim, feriado_estadual, feriado_escolar, coluna_metrica)
+        if df_lojas is None:
+            return dbc.Alert("Não foram encontrados dados para uma ou mais lojas com os filtros atuais.", color="warning")
+
+        cores = dict(zip(ids_lojas, obter_cores_comparacao(len(ids_lojas))))
+        rotulos = {id_loja: f'Loja {id_loja}' for id_loja in ids_lojas}
+        # Linhas de cada loja como fatias do resultado da leitura única (agrupado por loja)
+        linhas_por_loja = dict(tuple(df_lojas.groupby('Store', sort=False)))
+
         # --- Gera Colunas de Detalhes e KPIs ---
         # Ranking de cada loja
-        str_ranking1, str_ranking2 = "N/A", "N/A"
+        strs_ranking = {id_loja: "N/A" for id_loja in ids_lojas}
         if dados_json:
             try:
                 df_ranking = pd.read_json(StringIO(dados_json), orient='split')
                 if not df_ranking.empty:
-                    total = len(df_ranking)
-                    def obter_ranking(id_loja):
-                        linha = df_ranking[df_ranking['Store'] == id_loja]
-                        if not linha.empty:
-                            return f"{int(linha['Ranking'].iloc[0])}º de {total}"
-                        return "N/A"
-                    str_ranking1 = obter_ranking(id_loja1)
-                    str_ranking2 = obter_ranking(id_loja2)
+                    strs_ranking = {id_loja: obter_str_ranking(df_ranking, id_loja, ordem_ranking) for id_loja in ids_lojas}
             except Exception:
                 pass
 
@@ -708,9 +641,10 @@ def registrar_callbacks_analise_lojas(aplicativo):
         )
 
         # Modal para mostrar a comparação detalhada
-        conteudo_comparacao = gerar_comparacao_detalhada(id_loja1, id_loja2, df_filtrado1, df_filtrado2)
+        conteudo_comparacao = gerar_comparacao_detalhada(ids_lojas, resultado['metricas'])
 
         # KPI row com o botão de comparação ao lado do título
+        largura_card = max(3, 12 // len(ids_lojas))
         linha_kpi = html.Div([
             # Título e botão na mesma linha
             dbc.Row(
@@ -734,10 +668,9 @@ def registrar_callbacks_analise_lojas(aplicativo):
             # Cards das lojas
             dbc.Row(
                 [
-                    dbc.Col(criar_coluna_comparacao(id_loja1, df_filtrado1, str_ranking1), width=6),
-                    dbc.Col(criar_coluna_comparacao(id_loja2, df_filtrado2, str_ranking2), width=6),
-                    conteudo_comparacao
-                ],
+                    dbc.Col(criar_coluna_comparacao(id_loja, resultado['metricas'].loc[id_loja], strs_ranking[id_loja]), width=largura_card)
+                    for id_loja in ids_lojas
+                ] + [conteudo_comparacao],
                 className="g-3 mb-4"
             ),
             # Botão oculto incluído em div escondida para manter callback funcionando
@@ -763,20 +696,18 @@ def registrar_callbacks_analise_lojas(aplicativo):
 
         # Série Temporal
         fig_ts = go.Figure()
-        fig_ts.add_trace(go.Scatter(
-            x=df_filtrado1['Date'],
-            y=df_filtrado1[coluna_metrica],
-            mode='lines',
-            name=f'Loja {id_loja1}',
-            line=dict(color=VERMELHO_ROSSMANN, width=2)
-        ))
-        fig_ts.add_trace(go.Scatter(
-            x=df_filtrado2['Date'],
-            y=df_filtrado2[coluna_metrica],
-            mode='lines',
-            name=f'Loja {id_loja2}',
-            line=dict(color=AZUL_ESCURO, width=2)
-        ))
+        pontos_por_traco = calcular_pontos_por_traco(len(ids_lojas))
+        for id_loja in ids_lojas:
+            df_loja = linhas_por_loja[id_loja]
+            datas_ts, valores_ts = reduzir_serie(df_loja['Date'], df_loja[coluna_metrica], pontos_por_traco)
+            fig_ts.add_trace(go.Scatter(
+                x=datas_ts,
+                y=valores_ts,
+                mode='lines',
+                name=rotulos[id_loja],
+                line=dict(color=cores[id_loja], width=2)
+            ))
+        fig_ts = aplicar_webgl(fig_ts)
         fig_ts.update_layout(
             title=f'Série Temporal de {rotulo_metrica}',
             xaxis_title='Data',
@@ -787,19 +718,15 @@ def registrar_callbacks_analise_lojas(aplicativo):
         fig_ts.update_yaxes(showgrid=True, gridwidth=1, gridcolor='#f0f0f0')
 
         # Impacto da Promoção
-        df_filtrado1['Store_ID_Label'] = f'Loja {id_loja1}'
-        df_filtrado2['Store_ID_Label'] = f'Loja {id_loja2}'
-        df_combinado = pd.concat([df_filtrado1, df_filtrado2])
+        df_combinado = df_lojas.assign(Store_ID_Label=df_lojas['Store'].map(rotulos))
         fig_promo = px.box(
             df_combinado,
             x='Promo',
             y=coluna_metrica,
             color='Store_ID_Label',
             title=f'Impacto da Promoção em {rotulo_metrica}',
-            color_discrete_map={
-                f'Loja {id_loja1}': VERMELHO_ROSSMANN,
-                f'Loja {id_loja2}': AZUL_ESCURO
-            }
+            category_orders={'Store_ID_Label': [rotulos[id_loja] for id_loja in ids_lojas]},
+            color_discrete_map={rotulos[id_loja]: cores[id_loja] for id_loja in ids_lojas}
         )
         fig_promo.update_layout(**layout_base)
         fig_promo.update_xaxes(
@@ -809,25 +736,17 @@ def registrar_callbacks_analise_lojas(aplicativo):
         )
         fig_promo.update_yaxes(title=rotulo_metrica)
 
-        # Média por Dia da Semana
-        df_dia_semana1 = df_filtrado1.groupby('DayOfWeek')[coluna_metrica].mean().reset_index()
-        df_dia_semana1['DayName'] = df_dia_semana1['DayOfWeek'].map(MAPEAMENTO_DIAS_SEMANA)
-        df_dia_semana2 = df_filtrado2.groupby('DayOfWeek')[coluna_metrica].mean().reset_index()
-        df_dia_semana2['DayName'] = df_dia_semana2['DayOfWeek'].map(MAPEAMENTO_DIAS_SEMANA)
-
+        # Média por Dia da Semana (tabela Store x DayOfWeek já calculada pelo motor de comparação)
+        df_dia_semana = resultado['dia_semana']
         fig_dia_semana = go.Figure()
-        fig_dia_semana.add_trace(go.Bar(
-            name=f'Loja {id_loja1}',
-            x=df_dia_semana1['DayName'],
-            y=df_dia_semana1[coluna_metrica],
-            marker_color=VERMELHO_ROSSMANN
-        ))
-        fig_dia_semana.add_trace(go.Bar(
-            name=f'Loja {id_loja2}',
-            x=df_dia_semana2['DayName'],
-            y=df_dia_semana2[coluna_metrica],
-            marker_color=AZUL_ESCURO
-        ))
+        for id_loja in ids_lojas:
+            medias_loja = df_dia_semana.loc[id_loja].dropna()
+            fig_dia_semana.add_trace(go.Bar(
+                name=rotulos[id_loja],
+                x=medias_loja.index.map(MAPEAMENTO_DIAS_SEMANA),
+                y=medias_loja.values,
+                marker_color=cores[id_loja]
+            ))
         fig_dia_semana.update_layout(
             barmode='group',
             title=f'Média de {rotulo_metrica} por Dia da Semana',
@@ -838,33 +757,33 @@ def registrar_callbacks_analise_lojas(aplicativo):
 
         # DNA da Loja (Comparativo)
         fig_dna_comp = go.Figure()
-        fig_dna_comp.add_trace(go.Scatter(
-            x=df_filtrado1['Customers'],
-            y=df_filtrado1['Sales'],
-            mode='markers',
-            name=f'Loja {id_loja1}',
-            marker=dict(color=VERMELHO_ROSSMANN, opacity=0.5, size=8)
-        ))
-        fig_dna_comp.add_trace(go.Scatter(
-            x=df_filtrado2['Customers'],
-            y=df_filtrado2['Sales'],
-            mode='markers',
-            name=f'Loja {id_loja2}',
-            marker=dict(color=AZUL_ESCURO, opacity=0.5, size=8)
-        ))
-
-        # Adicionar linhas de tendência
-        for df_loja, id_loja_loop, cor in [(df_filtrado1, id_loja1, VERMELHO_ROSSMANN), (df_filtrado2, id_loja2, AZUL_ESCURO)]:
-            X = sm.add_constant(df_loja['Customers'])
-            model = sm.OLS(df_loja['Sales'], X).fit()
+        for id_loja in ids_lojas:
+            df_loja = linhas_por_loja[id_loja]
             fig_dna_comp.add_trace(go.Scatter(
                 x=df_loja['Customers'],
-                y=model.predict(X),
+                y=df_loja['Sales'],
+                mode='markers',
+                name=rotulos[id_loja],
+                marker=dict(color=cores[id_loja], opacity=0.5, size=8)
+            ))
+
+        # Adicionar linhas de tendência (coeficientes de mínimos quadrados já calculados para todas as lojas)
+        tendencias = resultado['tendencias']
+        for id_loja in ids_lojas:
+            tendencia = tendencias.loc[id_loja]
+            if pd.isna(tendencia['inclinacao']):
+                continue
+            x_tendencia = [tendencia['x_min'], tendencia['x_max']]
+            fig_dna_comp.add_trace(go.Scatter(
+                x=x_tendencia,
+                y=[tendencia['intercepto'] + tendencia['inclinacao'] * x for x in x_tendencia],
                 mode='lines',
-                name=f'Tendência Loja {id_loja_loop}',
-                line=dict(color=cor, width=2, dash='dash')
+                name=f'Tendência {rotulos[id_loja]}',
+                line=dict(color=cores[id_loja], width=2, dash='dash')
             ))
 
+        fig_dna_comp = aplicar_webgl(fig_dna_comp)
+
         # Layout específico para o gráfico DNA
         layout_dna = layout_base.copy()
         layout_dna.update({
@@ -959,8 +878,8 @@ def registrar_callbacks_analise_lojas(aplicativo):
         contexto = dash.callback_context
         id_gatilho = contexto.triggered[0]['prop_id'].split('.')[0]
 
-        # Se não houver duas lojas selecionadas, não abre o modal
-        if len(ids_lojas_selecionadas) != 2:
+        # Se não houver ao menos duas lojas selecionadas, não abre o modal
+        if not ids_lojas_selecionadas or len(ids_lojas_selecionadas) < 2:
             return False, None
 
         # Usar a função auxiliar para deserializar o DataFrame
@@ -968,20 +887,9 @@ def registrar_callbacks_analise_lojas(aplicativo):
         if df_principal is None:
             return False, dbc.Alert("Erro interno: DataFrame principal não encontrado.", color="danger")
 
-        # Obtém os IDs das lojas selecionadas
-        id_loja1, id_loja2 = ids_lojas_selecionadas
-
-        # Obtém os tipos das lojas
-        tipo_loja1 = df_principal[df_principal['Store'] == id_loja1]['StoreType'].iloc[0]
-        tipo_loja2 = df_principal[df_principal['Store'] == id_loja2]['StoreType'].iloc[0]
-
-        # Filtra dados para cada loja
-        df_filtrado1 = filtrar_dataframe(df_principal, data_inicio, data_fim, [tipo_loja1], [id_loja1], feriado_estadual, feriado_escolar)
-        df_filtrado2 = filtrar_dataframe(df_principal, data_inicio, data_fim, [tipo_loja2], [id_loja2], feriado_estadual, feriado_escolar)
-
-        # CORREÇÃO CRÍTICA: Ordenar os DataFrames por data antes de plotar as séries temporais
-        df_filtrado1 = df_filtrado1.sort_values(by='Date')
-        df_filtrado2 = df_filtrado2.sort_values(by='Date')
+        # Uma leitura indexada e uma passagem agrupada para todas as lojas selecionadas
+        _, resultado = preparar_comparacao(ids_lojas_selecionadas, df_principal, data_inicio, data_fim, feriado_estadual, feriado_escolar, 'Sales')
+        metricas = resultado['metricas'] if resultado is not None else None
 
         # Gera o conteúdo do modal
         conteudo_modal = [
@@ -1001,7 +909,7 @@ def registrar_callbacks_analise_lojas(aplicativo):
                 [
                     # Métricas Comparativas
                     html.Div(
-                        gerar_comparacao_detalhada(id_loja1, id_loja2, df_filtrado1, df_filtrado2),
+                        gerar_comparacao_detalhada(ids_lojas_selecionadas, metricas),
                         style={'marginBottom': '1rem'}
                     )
                 ]
@@ -1032,87 +940,36 @@ def registrar_callbacks_analise_lojas(aplicativo):
         return deve_abrir, conteudo_modal
 
     @aplicativo.callback(
-        [Output('conteudo-detalhe-loja', 'children'),
-         Output('armazenamento-id-loja-selecionada', 'data')],
-        [Input({'type': 'linha-ranking', 'index': dash.ALL}, 'n_clicks'),
+        Output('conteudo-detalhe-loja', 'children'),
+        [Input('armazenamento-id-loja-selecionada', 'data'),
          Input('armazenamento-dados-ranking', 'data'),
-         Input('filtro-loja-especifica', 'value'),
          Input('armazenamento-df-principal', 'data')],
-        [State({'type': 'linha-ranking', 'index': dash.ALL}, 'id'),
-         State('armazenamento-id-loja-selecionada', 'data'),
-         State('filtro-data', 'start_date'), State('filtro-data', 'end_date'),
-         State('filtro-tipo-loja', 'value'),
+        [State('filtro-data', 'start_date'), State('filtro-data', 'end_date'),
          State('filtro-feriado-estadual', 'value'), State('filtro-feriado-escolar', 'value'),
          State('seletor-metrica-ranking', 'value'),
          State('seletor-ordem-ranking', 'value')]
     )
-    def atualizar_detalhes_loja_e_selecao(lista_n_clicks, dados_json, selecao_lojas_especificas, df_principal_json,
-                                           lista_id, ids_lojas_selecionadas, data_inicio, data_fim,
-                                           tipos_loja, feriado_estadual, feriado_escolar, metrica_ranking,
-                                           ordem_ranking):
-        contexto = dash.callback_context
-        id_propriedade_gatilho = contexto.triggered[0]['prop_id']
-        
-        # Inicializa a lista se for None
-        if ids_lojas_selecionadas is None:
-            ids_lojas_selecionadas = []
-        novos_ids_selecionados = ids_lojas_selecionadas.copy()
-
-        # Cenário 1: Seleção via dropdown de busca
-        if id_propriedade_gatilho == 'filtro-loja-especifica.value':
-            # Sempre queremos as duas últimas escolhidas no dropdown
-            if selecao_lojas_especificas:
-                if len(selecao_lojas_especificas) > 2:
-                    novos_ids_selecionados = selecao_lojas_especificas[-2:]
-                else:
-                    novos_ids_selecionados = selecao_lojas_especificas.copy()
-
-        # Cenário 2: Clique na tabela
-        elif 'linha-ranking' in id_propriedade_gatilho:
-            try:
-                id_clicado = json.loads(id_propriedade_gatilho.split('.')[0])
-                id_loja_clicada = id_clicado['index']
-                if id_loja_clicada in novos_ids_selecionados:
-                    # Se já está selecionada, remove (toggle)
-                    novos_ids_selecionados.remove(id_loja_clicada)
-                else:
-                    if len(novos_ids_selecionados) < 2:
-                        novos_ids_selecionados.append(id_loja_clicada)
-                    else:
-                        # Já existem duas lojas; substitui a mais antiga (primeira) pela nova
-                        novos_ids_selecionados.pop(0)
-                        novos_ids_selecionados.append(id_loja_clicada)
-            except (json.JSONDecodeError, IndexError, TypeError):
-                pass
-
-        # Cenário 3: Filtros principais (data, tipo) foram alterados
-        elif id_propriedade_gatilho == 'armazenamento-dados-ranking.data':
-            # Limpa seleção para evitar mostrar uma loja que não pertence ao novo ranking
-            novos_ids_selecionados = []
-            if dados_json:
-                df_ranking = pd.read_json(StringIO(dados_json), orient='split')
-                if not df_ranking.empty and len(df_ranking) > 0:
-                    # O ranking já vem ordenado do callback anterior
-                    loja_topo = df_ranking.iloc[0]
-                    novos_ids_selecionados.append(loja_topo['Store'])
+    def atualizar_detalhes_loja(ids_lojas_selecionadas, dados_json, df_principal_json,
+                                data_inicio, data_fim, feriado_estadual, feriado_escolar,
+                                metrica_ranking, ordem_ranking):
+        # A seleção em si é resolvida no navegador (atualizar_selecao_lojas); aqui só renderizamos os detalhes
+        ids_lojas_selecionadas = ids_lojas_selecionadas or []
 
         # Usar a função auxiliar para deserializar o DataFrame
         df_principal = deserializar_df(df_principal_json)
         if df_principal is None:
-            conteudo = dbc.Alert("Erro interno: DataFrame principal não encontrado.", color="danger")
-            return conteudo, novos_ids_selecionados
+            return dbc.Alert("Erro interno: DataFrame principal não encontrado.", color="danger")
 
         # Decide qual view renderizar
-        if len(novos_ids_selecionados) == 2:
-            conteudo = gerar_visualizacao_comparacao(novos_ids_selecionados, dados_json, ordem_ranking, data_inicio, data_fim, feriado_estadual, feriado_escolar, metrica_ranking, df_principal_json)
-        elif len(novos_ids_selecionados) == 1:
-            conteudo = gerar_visualizacao_loja_unica(novos_ids_selecionados[0], dados_json, ordem_ranking, data_inicio, data_fim, feriado_estadual, feriado_escolar, metrica_ranking, df_principal_json)
+        if len(ids_lojas_selecionadas) >= 2:
+            conteudo = gerar_visualizacao_comparacao(ids_lojas_selecionadas, dados_json, ordem_ranking, data_inicio, data_fim, feriado_estadual, feriado_escolar, metrica_ranking, df_principal_json)
+        elif len(ids_lojas_selecionadas) == 1:
+            conteudo = gerar_visualizacao_loja_unica(ids_lojas_selecionadas[0], dados_json, ordem_ranking, data_inicio, data_fim, feriado_estadual, feriado_escolar, metrica_ranking, df_principal_json)
         else:
             conteudo = html.Div([
                 html.I(className="fas fa-tasks me-2"),
-                html.H5("Selecione até duas lojas", className="d-inline-block"),
+                html.H5(f"Selecione até {LIMITE_LOJAS_COMPARACAO} lojas", className="d-inline-block"),
                 html.P("Clique em uma loja no ranking ou use a busca para ver os detalhes.", className="text-muted")
             ], className="text-center mt-5")
 
-        return conteudo, novos_ids_selecionados
-
+        return conteudo
@@ -3,10 +3,9 @@ from dash import Input, Output, html
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
-import statsmodels.api as sm
 import pandas as pd
 
-from ..utils import criar_figura_vazia, parse_json_to_df # Importar as funções utilitárias refatoradas
+from ..utils import criar_figura_vazia, parse_json_to_df, aplicar_webgl # Importar as funções utilitárias refatoradas
 from ..config import VERMELHO_ROSSMANN, CINZA_NEUTRO, AZUL_DESTAQUE # Importar as novas constantes
 from ..data_loader import get_data_states
 
@@ -71,7 +70,7 @@ def registrar_callbacks_analise_preliminar(aplicativo, dados): # Refatorar nome
             tamanho_amostra = min(len(df_principal), 5000) # Refatorar nome da variável, usar df_principal
             df_amostra = df_principal.sample(n=tamanho_amostra, random_state=42) # Refatorar nome da variável, usar df_principal
 
-            fig = px.scatter(df_amostra, x=col_x, y=col_y, title=f'Dispersão: {col_x} vs {col_y}', color_discrete_sequence=[VERMELHO_ROSSMANN], render_mode='webgl') # Usar df_amostra e constante refatorada
+            fig = px.scatter(df_amostra, x=col_x, y=col_y, title=f'Dispersão: {col_x} vs {col_y}', color_discrete_sequence=[VERMELHO_ROSSMANN]) # Usar df_amostra e constante refatorada
             fig.update_layout(
                 **LAYOUT_GRAFICO_COMUM, # Usar constante refatorada
                 plot_bgcolor='white'
@@ -79,12 +78,15 @@ def registrar_callbacks_analise_preliminar(aplicativo, dados): # Refatorar nome
 
             df_temp = df_amostra[[col_x, col_y]].dropna() # Refatorar nome da variável
             if not df_temp.empty:
+                # statsmodels (com scipy) custa ~0,5 s de importação: carregado só no primeiro clique
+                import statsmodels.api as sm
                 X = sm.add_constant(df_temp[col_x])
                 model = sm.OLS(df_temp[col_y], X)
                 results = model.fit()
                 fig.add_trace(go.Scatter(x=df_temp[col_x], y=results.predict(X), mode='lines', name='Linha de Tendência', line=dict(color=AZUL_DESTAQUE, width=3))) # Usar constante refatorada
 
-            return fig
+            # Amostra de até 5000 pontos: acima do limite os traços passam para WebGL
+            return aplicar_webgl(fig)
         except Exception as e:
             return criar_figura_vazia(f"Erro ao gerar gráfico de dispersão: {e}") # Usar a função refatorada
 
@@ -1,11 +1,18 @@
 # dashboard/callbacks/callbacks_dashboard_geral.py
-from dash import Input, Output, State, html
+import threading
+import weakref
+
+from dash import Input, Output, State, ClientsideFunction, html
 import dash
+import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import dash_bootstrap_components as dbc
 
-from ..utils import criar_figura_vazia, filtrar_dataframe, parse_json_to_df
+from ..utils import criar_figura_vazia, filtrar_dataframe_compartilhado, parse_json_to_df, aplicar_webgl
+from ..piramide_temporal import consultar_piramide
+from ..reducao_pontos import calcular_pontos_por_traco, reduzir_serie_larga, recortar_intervalo_x
+from ..tarefas_background import callback_pesado
 from ..config import (
     VERMELHO_ROSSMANN, AZUL_ESCURO, CINZA_NEUTRO, AZUL_DESTAQUE, VERDE_DESTAQUE,
     PALETA_CORES_GRAFICO, MAPEAMENTO_DIAS_SEMANA, ORDEM_DIAS_SEMANA,
@@ -24,42 +31,49 @@ ROUTULOS_EIXO_Y = {
     'SalesPerCustomer': 'Ticket Médio'
 }
 
+# Séries agregadas (formato largo) do gráfico temporal, reaproveitadas nos re-renders de zoom:
+# {(id do DataFrame, filtros...): (weakref do DataFrame, df_largo)}
+_serie_temporal_cache = {}
+_lock_serie_temporal = threading.Lock()  # workers com várias threads (gunicorn.conf.py)
+TAMANHO_MAXIMO_CACHE_SERIE_TEMPORAL = 16
+
 def registrar_callbacks_dashboard_geral(aplicativo, dados):
     df_principal = dados["df_principal"]
 
     # --- Funções Auxiliares de Geração de Gráficos (Dashboard) ---
-    def obter_grafico_serie_temporal(df_filtrado, tipo_granularidade, metrica, texto_rotulo_eixo_y, texto_titulo_eixo_y, lojas_especificas_selecionadas):
-        df_temporal = df_filtrado.copy()
-
-        chave_agrupamento = 'Store' if lojas_especificas_selecionadas else 'StoreType'
+    def obter_serie_temporal_larga(df_principal, tipo_granularidade, metrica, data_inicio, data_fim, tipos_loja, lojas_especificas, feriado_estadual, feriado_escolar):
+        """Lê a métrica do nível pedido da pirâmide temporal em formato largo (índice = período, uma coluna por série)."""
+        if not data_inicio or not data_fim or pd.to_datetime(data_inicio) > pd.to_datetime(data_fim):
+            return pd.DataFrame()
+
+        nivel = tipo_granularidade if tipo_granularidade in ('M', 'W') else 'D'
+        df_largo = consultar_piramide(df_principal, nivel, metrica, data_inicio, data_fim, tipos_loja, lojas_especificas, feriado_estadual, feriado_escolar)
+        if nivel == 'D' and not df_largo.empty:
+            df_largo = df_largo.rolling(window=7, center=True, min_periods=1).mean()
+        return df_largo
+
+    def obter_grafico_serie_temporal(df_largo, tipo_granularidade, texto_rotulo_eixo_y, texto_titulo_eixo_y, lojas_especificas_selecionadas, largura_px=None, dados_relayout=None, revisao_ui=None):
         entidade_titulo = "Loja" if lojas_especificas_selecionadas else "Tipo de Loja"
+        sufixo_titulo = {'M': 'Mensal', 'W': 'Semanal'}.get(tipo_granularidade, 'Diária (Suavizado 7 dias)')
+        chave_agrupamento = df_largo.columns.name
 
-        if tipo_granularidade == 'M':
-            df_temporal['Date_Period'] = df_temporal['Date'].dt.to_period('M').dt.to_timestamp()
-            sufixo_titulo = 'Mensal'
-        elif tipo_granularidade == 'W':
-            df_temporal['Date_Period'] = df_temporal['Date'].dt.to_period('W').dt.to_timestamp()
-            sufixo_titulo = 'Semanal'
-        else:
-            sufixo_titulo = 'Diária (Suavizado 7 dias)'
-
-        if tipo_granularidade != 'D':
-            df_agrupado = df_temporal.groupby(['Date_Period', chave_agrupamento], observed=False)[metrica].mean().reset_index()
-            df_agrupado.rename(columns={metrica: 'Value'}, inplace=True)
-        else:
-            metrica_diaria = df_filtrado.groupby(['Date', chave_agrupamento], observed=False)[metrica].mean().unstack()
-            metrica_suavizada = metrica_diaria.rolling(window=7, center=True, min_periods=1).mean()
-            df_agrupado = metrica_suavizada.stack().reset_index(name='Value')
-            df_agrupado.rename(columns={'Date': 'Date_Period'}, inplace=True)
+        # Com zoom, apenas o intervalo visível é reduzido, recuperando a resolução total ao aproximar
+        df_visivel, intervalo_x = recortar_intervalo_x(df_largo, dados_relayout)
+        n_pontos = calcular_pontos_por_traco(df_largo.shape[1], largura_px)
+        df_agrupado = reduzir_serie_larga(df_visivel, n_pontos)
 
-        fig = px.line(df_agrupado, x='Date_Period', y='Value', color=chave_agrupamento, title=f'{texto_rotulo_eixo_y} por {entidade_titulo} ({sufixo_titulo})')
+        fig = aplicar_webgl(px.line(df_agrupado, x='Date_Period', y='Value', color=chave_agrupamento, title=f'{texto_rotulo_eixo_y} por {entidade_titulo} ({sufixo_titulo})'))
         fig.update_layout(
             height=ALTURA_GRAFICO_LARGURA_TOTAL,
             xaxis_title=f'Período ({sufixo_titulo})',
             yaxis_title=texto_titulo_eixo_y,
             plot_bgcolor='rgba(0,0,0,0)',
-            paper_bgcolor='rgba(0,0,0,0)'
+            paper_bgcolor='rgba(0,0,0,0)',
+            # Mesma revisão entre re-renders de zoom (preserva legenda); filtros novos reiniciam o zoom
+            uirevision=revisao_ui
         )
+        if intervalo_x is not None:
+            fig.update_xaxes(range=intervalo_x)
         texto_analise = f"O gráfico exibe a tendência de {texto_rotulo_eixo_y} por {entidade_titulo}. Ele permite observar a performance relativa e a sazonalidade de cada categoria ao longo do tempo, na granularidade selecionada ({sufixo_titulo})."
         return fig, texto_analise
 
@@ -193,6 +207,7 @@ def registrar_callbacks_dashboard_geral(aplicativo, dados):
             },
             size_max=60 # Define o tamanho máximo da bolha para não poluir o gráfico
         )
+        fig = aplicar_webgl(fig)
 
         fig.update_layout(height=ALTURA_GRAFICO, xaxis_title="Distância do Concorrente (metros)", yaxis_title=f"Média de {texto_rotulo_eixo_y}")
         texto_analise = f"Cada bolha representa uma loja. O gráfico mostra a relação entre a {texto_rotulo_eixo_y} (eixo y) e a distância do concorrente (eixo x). O tamanho da bolha indica o volume médio de clientes. É útil para identificar se lojas mais isoladas realmente performam melhor e para encontrar lojas atípicas (ex: perto de concorrentes, mas com alto volume e vendas)."
@@ -370,7 +385,8 @@ def registrar_callbacks_dashboard_geral(aplicativo, dados):
         return fig, texto_analise
 
     # --- Callback Principal do Dashboard ---
-    @aplicativo.callback(
+    @callback_pesado(
+        aplicativo,
         [
             Output('linha-kpi-dashboard', 'children'),
             Output('alerta-vendas-clientes-zero', 'children'),
@@ -410,9 +426,10 @@ def registrar_callbacks_dashboard_geral(aplicativo, dados):
             Input('dashboard-filtro-feriado-estadual', 'value'),
             Input('dashboard-filtro-feriado-escolar', 'value'),
             Input('armazenamento-df-principal', 'data')
-        ]
+        ],
+        id_progresso='progresso-dashboard'
     )
-    def atualizar_pagina_dashboard(data_inicio, data_fim, tipos_loja_selecionados, lojas_especificas_selecionadas, metrica_temporal, feriado_estadual_selecionado, feriado_escolar_selecionado, df_principal_json):
+    def atualizar_pagina_dashboard(definir_progresso, data_inicio, data_fim, tipos_loja_selecionados, lojas_especificas_selecionadas, metrica_temporal, feriado_estadual_selecionado, feriado_escolar_selecionado, df_principal_json):
         # Leitura dinâmica do df_principal a partir do dcc.Store
         try:
             df_principal = parse_json_to_df(df_principal_json)
@@ -456,7 +473,8 @@ def registrar_callbacks_dashboard_geral(aplicativo, dados):
         if not all([metrica_temporal, feriado_estadual_selecionado, feriado_escolar_selecionado]):
             return dash.no_update # Evita erros durante a inicialização
 
-        df_filtrado = filtrar_dataframe(df_principal, data_inicio, data_fim, tipos_loja_selecionados, lojas_especificas_selecionadas, feriado_estadual_selecionado, feriado_escolar_selecionado)
+        definir_progresso((5, "Filtrando dados"))
+        df_filtrado = filtrar_dataframe_compartilhado(df_principal, data_inicio, data_fim, tipos_loja_selecionados, lojas_especificas_selecionadas, feriado_estadual_selecionado, feriado_escolar_selecionado)
 
         if df_filtrado.empty:
             figura_vazia = criar_figura_vazia("Sem dados para os filtros selecionados")
@@ -496,56 +514,39 @@ def registrar_callbacks_dashboard_geral(aplicativo, dados):
         rotulo_eixo_y = ROUTULOS_EIXO_Y[metrica_temporal]
 
         # Gera os KPIs
+        definir_progresso((15, "Calculando KPIs"))
         linha_kpis = gerar_kpis(df_filtrado)
         linha_kpis_tipo_loja = gerar_kpis_por_tipo_loja(df_filtrado)
 
         # Verifica se há lojas com vendas ou clientes zerados
         alerta_zero_filhos, estilo_alerta_zero = verificar_valores_zero(df_filtrado)
 
-        # A variável filtro_loja_especifica_ativo não é mais necessária para o obter_grafico_serie_temporal,
-        # pois a lógica de qual agrupamento usar foi movida para dentro da função.
-        fig_vendas_clientes_mensal, analise_mensal_text = obter_grafico_media_mensal(df_filtrado, metrica_temporal, rotulo_eixo_y, titulo_eixo_y)
-        fig_vendas_clientes_anual, analise_vendas_clientes_anual_text = obter_grafico_media_anual(df_filtrado, metrica_temporal, rotulo_eixo_y, titulo_eixo_y)
-        fig_promocao_tipo_loja, analise_promocao_tipo_loja_text = obter_grafico_promocao_tipo_loja(df_filtrado, metrica_temporal, rotulo_eixo_y, titulo_eixo_y)
-        fig_dia_semana, analise_dia_semana_text = obter_grafico_dia_semana(df_filtrado, metrica_temporal, rotulo_eixo_y, titulo_eixo_y)
-        fig_dia, analise_dia_text = obter_grafico_dia_do_mes(df_filtrado, metrica_temporal, rotulo_eixo_y, titulo_eixo_y)
-        fig_impacto_promocao_tipo_loja_boxplot, analise_impacto_promocao_tipo_loja_boxplot_text = obter_boxplot_promocao_tipo_loja(df_filtrado, metrica_temporal, rotulo_eixo_y, titulo_eixo_y)
-        fig_impacto_promocao_geral_boxplot, analise_impacto_promocao_boxplot_text = obter_boxplot_promocao_geral(df_filtrado, metrica_temporal, rotulo_eixo_y, titulo_eixo_y)
-        fig_impacto_promocao_geral_hist, analise_impacto_promocao_hist_text = obter_histograma_promocao_geral(df_filtrado, metrica_temporal, rotulo_eixo_y, titulo_eixo_y)
-        fig_impacto_distancia_concorrencia, analise_impacto_distancia_concorrencia_text = obter_grafico_impacto_distancia_concorrencia(df_filtrado, metrica_temporal, rotulo_eixo_y, titulo_eixo_y)
-        fig_impacto_promo2, analise_impacto_promo2_text = obter_grafico_impacto_promo2(df_filtrado, metrica_temporal, rotulo_eixo_y, titulo_eixo_y)
-        fig_impacto_sortimento, analise_impacto_sortimento_text = obter_grafico_impacto_sortimento(df_filtrado, metrica_temporal, rotulo_eixo_y, titulo_eixo_y)
-        fig_vendas_por_tipo_feriado, analise_vendas_por_tipo_feriado_text = obter_grafico_tipo_feriado(df_filtrado, metrica_temporal, rotulo_eixo_y, titulo_eixo_y)
+        # Cada função retorna (figura, texto de análise), na mesma ordem dos Outputs do callback
+        funcoes_graficos = [
+            obter_grafico_media_mensal,                   # grafico-vendas-clientes-mensal-dashboard
+            obter_grafico_media_anual,                    # grafico-vendas-clientes-anual-dashboard
+            obter_grafico_promocao_tipo_loja,             # grafico-promocao-por-tipo-loja-dashboard
+            obter_grafico_dia_semana,                     # grafico-dia-semana-dashboard
+            obter_grafico_dia_do_mes,                     # grafico-dia-dashboard
+            obter_boxplot_promocao_tipo_loja,             # grafico-impacto-promocao-por-tipo-loja-boxplot
+            obter_boxplot_promocao_geral,                 # grafico-impacto-promocao-geral-boxplot
+            obter_histograma_promocao_geral,              # grafico-impacto-promocao-geral-hist
+            obter_grafico_impacto_distancia_concorrencia, # grafico-impacto-distancia-concorrencia
+            obter_grafico_impacto_promo2,                 # grafico-impacto-promo2
+            obter_grafico_impacto_sortimento,             # grafico-impacto-sortimento
+            obter_grafico_tipo_feriado                    # grafico-vendas-por-tipo-feriado
+        ]
+        figuras_e_analises = []
+        for posicao, funcao_grafico in enumerate(funcoes_graficos):
+            definir_progresso((20 + 80 * posicao // len(funcoes_graficos), f"Gerando gráficos ({posicao + 1}/{len(funcoes_graficos)})"))
+            figuras_e_analises.extend(funcao_grafico(df_filtrado, metrica_temporal, rotulo_eixo_y, titulo_eixo_y))
 
         return (
             linha_kpis,                                    # linha-kpi-dashboard
             alerta_zero_filhos,                            # alerta-vendas-clientes-zero children
             estilo_alerta_zero,                            # alerta-vendas-clientes-zero style
             linha_kpis_tipo_loja,                          # linha-kpi-tipo-loja
-            fig_vendas_clientes_mensal,                    # grafico-vendas-clientes-mensal-dashboard
-            analise_mensal_text,                           # analise-vendas-clientes-mensal
-            fig_vendas_clientes_anual,                     # grafico-vendas-clientes-anual-dashboard
-            analise_vendas_clientes_anual_text,            # analise-vendas-clientes-anual
-            fig_promocao_tipo_loja,                        # grafico-promocao-por-tipo-loja-dashboard
-            analise_promocao_tipo_loja_text,               # analise-promocao-por-tipo-loja-dashboard
-            fig_dia_semana,                                # grafico-dia-semana-dashboard
-            analise_dia_semana_text,                       # analise-dia-semana
-            fig_dia,                                       # grafico-dia-dashboard
-            analise_dia_text,                              # analise-dia
-            fig_impacto_promocao_tipo_loja_boxplot,        # grafico-impacto-promocao-por-tipo-loja-boxplot
-            analise_impacto_promocao_tipo_loja_boxplot_text, # analise-impacto-promocao-por-tipo-loja-boxplot
-            fig_impacto_promocao_geral_boxplot,            # grafico-impacto-promocao-geral-boxplot
-            analise_impacto_promocao_boxplot_text,         # analise-impacto-promocao-boxplot
-            fig_impacto_promocao_geral_hist,               # grafico-impacto-promocao-geral-hist
-            analise_impacto_promocao_hist_text,            # analise-impacto-promocao-hist
-            fig_impacto_distancia_concorrencia,            # grafico-impacto-distancia-concorrencia
-            analise_impacto_distancia_concorrencia_text,   # analise-impacto-distancia-concorrencia
-            fig_impacto_promo2,                            # grafico-impacto-promo2
-            analise_impacto_promo2_text,                   # analise-impacto-promo2
-            fig_impacto_sortimento,                        # grafico-impacto-sortimento
-            analise_impacto_sortimento_text,               # analise-impacto-sortimento
-            fig_vendas_por_tipo_feriado,                   # grafico-vendas-por-tipo-feriado
-            analise_vendas_por_tipo_feriado_text           # analise-vendas-por-tipo-feriado
+            *figuras_e_analises
         )
 
     # --- Callbacks de Análise de Comportamento ---
@@ -572,7 +573,7 @@ def registrar_callbacks_dashboard_geral(aplicativo, dados):
             return dash.no_update, dash.no_update
 
         # Aplica os filtros globais ANTES de passar para a função do gráfico
-        df_filtrado_global = filtrar_dataframe(df_principal, data_inicio, data_fim, tipos_loja, lojas_especificas, feriado_estadual, feriado_escolar)
+        df_filtrado_global = filtrar_dataframe_compartilhado(df_principal, data_inicio, data_fim, tipos_loja, lojas_especificas, feriado_estadual, feriado_escolar)
 
         if df_filtrado_global.empty: # Verifica se há dados após o filtro
             return criar_figura_vazia("Sem dados para os filtros selecionados."), "Não há dados disponíveis para os filtros selecionados."
@@ -603,7 +604,7 @@ def registrar_callbacks_dashboard_geral(aplicativo, dados):
             return dash.no_update, dash.no_update
 
         # Aplica os filtros globais ANTES de passar para a função do gráfico
-        df_filtrado_global = filtrar_dataframe(df_principal, data_inicio, data_fim, tipos_loja, lojas_especificas, feriado_estadual, feriado_escolar)
+        df_filtrado_global = filtrar_dataframe_compartilhado(df_principal, data_inicio, data_fim, tipos_loja, lojas_especificas, feriado_estadual, feriado_escolar)
 
         if df_filtrado_global.empty: # Verifica se há dados após o filtro
             return criar_figura_vazia("Sem dados para os filtros selecionados."), "Não há dados disponíveis para os filtros selecionados."
@@ -622,31 +623,69 @@ def registrar_callbacks_dashboard_geral(aplicativo, dados):
          Input('dashboard-filtro-tipo-loja', 'value'),
          Input('dashboard-filtro-loja-especifica', 'value'),
          Input('dashboard-filtro-feriado-estadual', 'value'),
-         Input('dashboard-filtro-feriado-escolar', 'value')]
+         Input('dashboard-filtro-feriado-escolar', 'value'),
+         Input('grafico-vendas-clientes-tempo-dashboard', 'relayoutData')],
+        [State('largura-grafico-serie-temporal', 'data')]
     )
-    def atualizar_grafico_serie_temporal(df_principal_json, granularidade, metrica, data_inicio, data_fim, tipos_loja, lojas_especificas, feriado_estadual, feriado_escolar):
+    def atualizar_grafico_serie_temporal(df_principal_json, granularidade, metrica, data_inicio, data_fim, tipos_loja, lojas_especificas, feriado_estadual, feriado_escolar, dados_relayout, largura_px):
+        """Atualiza o gráfico de tendências temporais, respeitando os filtros globais."""
         if not df_principal_json:
             return dash.no_update, dash.no_update
+
+        id_gatilho = dash.callback_context.triggered[0]['prop_id'].split('.')[0] if dash.callback_context.triggered else None
+        disparado_por_zoom = id_gatilho == 'grafico-vendas-clientes-tempo-dashboard'
+        if disparado_por_zoom:
+            # Só interessa mudança no eixo x (zoom, pan ou reset); autosize e zoom no eixo y não mudam os dados
+            if not dados_relayout or not any(chave.startswith('xaxis.') for chave in dados_relayout):
+                return dash.no_update, dash.no_update
+        else:
+            # Filtros mudaram: o gráfico volta ao intervalo completo
+            dados_relayout = None
+
         try:
             df_principal = parse_json_to_df(df_principal_json)
         except:
             df_principal = dados["df_principal"]
-        """Atualiza o gráfico de tendências temporais, respeitando os filtros globais."""
-        # O filtro de granularidade é independente, mas os dados base já são filtrados globalmente
-        df_filtrado = filtrar_dataframe(df_principal, data_inicio, data_fim, tipos_loja, lojas_especificas, feriado_estadual, feriado_escolar)
 
-        if df_filtrado.empty:
-            return criar_figura_vazia("Sem dados para o período selecionado."), "Não há dados disponíveis para os filtros selecionados."
+        lojas_especificas = lojas_especificas or []
+        chave_cache = (id(df_principal), granularidade, metrica, data_inicio, data_fim, tuple(tipos_loja or []),
+                       tuple(lojas_especificas), feriado_estadual, feriado_escolar)
+        with _lock_serie_temporal:
+            registro = _serie_temporal_cache.get(chave_cache)
+        # O id() de um DataFrame já coletado pode ser reaproveitado: a entrada só vale para o mesmo objeto
+        df_largo = registro[1] if registro is not None and registro[0]() is df_principal else None
+        if df_largo is None:
+            # Cada granularidade lê um nível pronto da pirâmide temporal, já restrito aos filtros globais
+            df_largo = obter_serie_temporal_larga(df_principal, granularidade, metrica, data_inicio, data_fim, tipos_loja, lojas_especificas, feriado_estadual, feriado_escolar)
+
+            if df_largo.empty:
+                return criar_figura_vazia("Sem dados para o período selecionado."), "Não há dados disponíveis para os filtros selecionados."
+
+            with _lock_serie_temporal:
+                while len(_serie_temporal_cache) >= TAMANHO_MAXIMO_CACHE_SERIE_TEMPORAL:
+                    _serie_temporal_cache.pop(next(iter(_serie_temporal_cache)))
+                _serie_temporal_cache[chave_cache] = (weakref.ref(df_principal), df_largo)
 
         titulo_eixo_y = TITULOS_EIXO_Y[metrica]
         rotulo_eixo_y = ROUTULOS_EIXO_Y[metrica]
 
         # Passa a informação se lojas específicas foram selecionadas para a lógica de agrupamento dentro da função
-        return obter_grafico_serie_temporal(
-            df_filtrado,
+        fig, texto_analise = obter_grafico_serie_temporal(
+            df_largo,
             granularidade,
-            metrica,
             rotulo_eixo_y,
             titulo_eixo_y,
-            len(lojas_especificas) > 0 # Booleano para indicar se é para agrupar por loja ou tipo de loja
-        )
\ No newline at end of file
+            len(lojas_especificas) > 0, # Booleano para indicar se é para agrupar por loja ou tipo de loja
+            largura_px,
+            dados_relayout,
+            repr(chave_cache[1:])
+        )
+        return fig, (dash.no_update if disparado_por_zoom else texto_analise)
+
+    # Largura renderizada do gráfico de série temporal (limita os pontos por traço do LTTB)
+    aplicativo.clientside_callback(
+        ClientsideFunction(namespace='graficos', function_name='medir_largura_grafico'),
+        Output('largura-grafico-serie-temporal', 'data'),
+        [Input('filtro-granularidade', 'value')],
+        [State('grafico-vendas-clientes-tempo-dashboard', 'id')]
+    )
@@ -1,10 +1,12 @@
 # dashboard/callbacks/callbacks_gerais.py
-from dash import Input, Output, html, dcc, State, callback, ctx
+from dash import Input, Output, html, dcc, State, callback, ctx, ClientsideFunction
 import dash
 import pandas as pd
 
 from ..config import AZUL_DESTAQUE, VERDE_DESTAQUE, DESCRICOES_COLUNAS # Importar DESCRICOES_COLUNAS
 from ..utils import filtrar_dataframe
+from ..layouts.paginas import PAGINAS, obter_layout_pagina
+from ..concorrencia import ID_ARMAZENAMENTO_ABA
 
 def registrar_callbacks_gerais(aplicativo, dados):
     df_principal = dados["df_principal"]
@@ -49,16 +51,26 @@ def registrar_callbacks_gerais(aplicativo, dados):
 
         return classe_barra_lateral, classe_conteudo, estado_aplicar, classe_icone, src_logo
 
-    # --- Callback Principal para Navegação entre Páginas (Modo Pré-carregado) ---
-    PAGINAS = [
-        "/",
-        "/limpeza-dados",
-        "/analise-preliminar",
-        "/dashboard",
-        "/analise-lojas",
-        "/analise-3d",
-        "/previsao-vendas",
-    ]
+    # --- Callbacks Principais para Navegação entre Páginas (Páginas sob Demanda) ---
+    @aplicativo.callback(
+        [Output(f'conteudo-pagina-{pagina}', 'children') for pagina in PAGINAS] +
+        [Output('armazenamento-paginas-carregadas', 'data')],
+        [Input('url', 'pathname')],
+        [State('armazenamento-paginas-carregadas', 'data')]
+    )
+    def carregar_conteudo_pagina(caminho_pagina, paginas_carregadas):
+        """
+        Envia o conteúdo de uma página na primeira vez que ela é visitada.
+        Nas visitas seguintes o conteúdo já está no navegador e só a visibilidade muda.
+        """
+        pagina = caminho_pagina if caminho_pagina in PAGINAS else PAGINAS[0]
+        paginas_carregadas = paginas_carregadas or []
+        if pagina in paginas_carregadas:
+            raise dash.exceptions.PreventUpdate
+
+        conteudos = [dash.no_update] * len(PAGINAS)
+        conteudos[PAGINAS.index(pagina)] = obter_layout_pagina(pagina, dados)
+        return conteudos + [paginas_carregadas + [pagina]]
 
     @aplicativo.callback(
         [Output(f'conteudo-pagina-{pagina}', 'style') for pagina in PAGINAS],
@@ -80,6 +92,15 @@ def registrar_callbacks_gerais(aplicativo, dados):
 
         return estilos
 
+    # --- Identificador da Aba (Clientside) ---
+    # Cada aba descarta apenas as próprias chamadas superadas dos callbacks pesados
+    aplicativo.clientside_callback(
+        ClientsideFunction(namespace='abas', function_name='gerar_id_aba'),
+        Output(ID_ARMAZENAMENTO_ABA, 'data'),
+        [Input('url', 'pathname')],
+        [State(ID_ARMAZENAMENTO_ABA, 'data')]
+    )
+
     # --- Callback para Tela Cheia (Clientside) ---
     aplicativo.clientside_callback(
         """
@@ -2,6 +2,7 @@ from dash.dependencies import Input, Output, State
 import plotly.graph_objects as go
 from ..data_loader import get_data_states, N_AMOSTRAS_PADRAO
 from ..config import CINZA_NEUTRO, VERMELHO_ROSSMANN
+from ..tarefas_background import callback_pesado
 
 
 def registrar_callbacks_limpeza_dados(aplicativo, dados):
@@ -35,13 +36,15 @@ def registrar_callbacks_limpeza_dados(aplicativo, dados):
         # Armazenar apenas a configuração de exibição para o store
         return {'modo': modo, 'n_amostras': n_amostras_int}
 
-    @aplicativo.callback(
+    @callback_pesado(
+        aplicativo,
         Output('grafico-impacto-media', 'figure'),
         Output('grafico-impacto-contagem', 'figure'),
         Input('seletor-modo-dados', 'value'),
-        Input('input-numero-amostras', 'value')
+        Input('input-numero-amostras', 'value'),
+        id_progresso='progresso-limpeza'
     )
-    def update_graficos_limpeza(modo, n_amostras):
+    def update_graficos_limpeza(definir_progresso, modo, n_amostras):
         use_samples = (modo == 'amostras')
         # Validar número de amostras
         try:
@@ -51,12 +54,14 @@ def registrar_callbacks_limpeza_dados(aplicativo, dados):
             n_amostras_int = N_AMOSTRAS_PADRAO
 
         # Obter os três estados dos dados
+        definir_progresso((10, "Carregando dados"))
         states = get_data_states(use_samples=use_samples, n_amostras=n_amostras_int)
         df_antes = states['antes']
         df_depois = states['depois']
         df_amostrado = states['amostrado']
 
         # --- Gráfico de Média de Vendas ---
+        definir_progresso((70, "Gerando gráficos"))
         media_antes = df_antes['Sales'].mean() if 'Sales' in df_antes else 0
         media_depois = df_depois['Sales'].mean() if 'Sales' in df_depois else 0
         media_amostra = df_amostrado['Sales'].mean() if use_samples and 'Sales' in df_amostrado else None
@@ -0,0 +1,172 @@
+# dashboard/callbacks/callbacks_previsao_vendas.py
+import dash
+from dash import Input, Output, State
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from ..utils import criar_figura_vazia
+from ..data_loader import get_principal_dataset, extrair_loja
+from ..config import AZUL_ESCURO, VERMELHO_ROSSMANN, CINZA_NEUTRO, PALETA_CORES_GRAFICO
+from ..previsao.comum import HORIZONTE_PREVISAO
+from ..previsao.modelos_loja import MODELO_RIDGE
+from ..previsao.tabela_previsoes import obter_tabela_previsoes, filtrar_previsoes, carregar_metricas_lojas
+from ..previsao.simulador_promocoes import obter_base_simulacao, montar_plano_promocoes, simular_promocoes
+from ..previsao.backtest import carregar_backtest
+from ..layouts.layout_previsao_vendas import calcular_periodo_simulador, criar_card_backtest, criar_cards_resumo_modelos
+
+SEMANAS_HISTORICO_PREVISAO = 12  # histórico exibido antes do início da previsão
+PAGINA_PREVISAO = '/previsao-vendas'
+ESTILO_VISIVEL = {'display': 'block'}
+ESTILO_OCULTO = {'display': 'none'}
+
+def registrar_callbacks_previsao_vendas(aplicativo):
+    """Registra os callbacks da página de previsão de vendas (somente leitura das previsões pré-calculadas)."""
+
+    @aplicativo.callback(
+        [Output('alerta-previsoes-nao-geradas', 'style'),
+         Output('conteudo-previsoes', 'style'),
+         Output('resumo-modelos-previsao', 'children'),
+         Output('seletor-loja-previsao', 'options'),
+         Output('seletor-loja-previsao', 'value'),
+         Output('simulador-promo-datas', 'min_date_allowed'),
+         Output('simulador-promo-datas', 'max_date_allowed'),
+         Output('simulador-promo-datas', 'start_date'),
+         Output('simulador-promo-datas', 'end_date'),
+         Output('simulador-promo-tipos', 'options'),
+         Output('simulador-promo-tipos', 'value'),
+         Output('linha-backtest-previsao', 'children')],
+        [Input('url', 'pathname')],
+        [State('seletor-loja-previsao', 'value'),
+         State('simulador-promo-datas', 'start_date'),
+         State('simulador-promo-datas', 'end_date'),
+         State('simulador-promo-tipos', 'value')]
+    )
+    def atualizar_conteudo_previsoes(caminho_pagina, loja_atual, inicio_atual, fim_atual, tipos_atuais):
+        """
+        Preenche a página com a versão atual dos arquivos do job a cada exibição: o layout da
+        página fica em cache (e no navegador), mas a tabela, as métricas e o backtest mudam a cada execução.
+        As seleções do usuário são mantidas quando continuam válidas.
+        """
+        if caminho_pagina != PAGINA_PREVISAO:
+            raise dash.exceptions.PreventUpdate
+
+        tabela_previsoes = obter_tabela_previsoes()
+        df_metricas = carregar_metricas_lojas()
+        if tabela_previsoes is None or df_metricas is None or not tabela_previsoes['indice']:
+            return [ESTILO_VISIVEL, ESTILO_OCULTO] + [dash.no_update] * 10
+
+        lojas = sorted(tabela_previsoes['indice'])
+        loja = loja_atual if loja_atual in tabela_previsoes['indice'] else lojas[0]
+        minimo, maximo, inicio_padrao, fim_padrao = calcular_periodo_simulador(tabela_previsoes)
+        # Datas ISO (AAAA-MM-DD...) comparam como texto
+        periodo_valido = inicio_atual and fim_atual and minimo <= inicio_atual[:10] <= fim_atual[:10] <= maximo
+        inicio, fim = (inicio_atual, fim_atual) if periodo_valido else (inicio_padrao, fim_padrao)
+        tipos = sorted(set(tabela_previsoes['tipos'].values()))
+        tipos_selecionados = [tipo for tipo in tipos_atuais or [] if tipo in tipos] or tipos
+
+        df_backtest = carregar_backtest()
+        backtest = criar_card_backtest(df_backtest) if df_backtest is not None and not df_backtest.empty else None
+        return [
+            ESTILO_OCULTO, ESTILO_VISIVEL,
+            criar_cards_resumo_modelos(df_metricas),
+            [{'label': f'Loja {id_loja}', 'value': id_loja} for id_loja in lojas], loja,
+            minimo, maximo, inicio, fim,
+            [{'label': tipo, 'value': tipo} for tipo in tipos], tipos_selecionados,
+            backtest,
+        ]
+
+    @aplicativo.callback(
+        [Output('grafico-previsao-loja', 'figure'),
+         Output('analise-previsao-loja', 'children')],
+        [Input('seletor-loja-previsao', 'value')]
+    )
+    def atualizar_grafico_previsao_loja(id_loja):
+        if id_loja is None:
+            return dash.no_update, dash.no_update
+
+        tabela_previsoes = obter_tabela_previsoes()
+        df_metricas = carregar_metricas_lojas()
+        if tabela_previsoes is None or df_metricas is None or not len(tabela_previsoes['datas']):
+            return criar_figura_vazia("Previsões ainda não geradas."), "Execute o job da tabela de previsões."
+
+        # Fatia da loja na tabela mapeada em memória (sem ler a tabela inteira)
+        datas = tabela_previsoes['datas']
+        previsao_loja = filtrar_previsoes(datas.min(), datas.max(), None, [id_loja])
+        metricas_loja = df_metricas[df_metricas['Store'] == id_loja]
+        if previsao_loja.empty or metricas_loja.empty:
+            return criar_figura_vazia(f"Sem previsão para a loja {id_loja}."), "Loja sem previsão na tabela atual."
+        metricas_loja = metricas_loja.iloc[0]
+
+        # Histórico recente da loja: fatia contígua do dataset completo (já ordenado por loja e data)
+        inicio_previsao = previsao_loja['Date'].min()
+        historico = extrair_loja(get_principal_dataset(use_samples=False), id_loja,
+                                 inicio_previsao - pd.Timedelta(weeks=SEMANAS_HISTORICO_PREVISAO))
+
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=historico['Date'], y=historico['Sales'], mode='lines',
+                                 name='Vendas', line=dict(color=AZUL_ESCURO)))
+        # Intervalo de 80% (P10-P90): a faixa preenche o espaço entre as duas linhas
+        fig.add_trace(go.Scatter(x=previsao_loja['Date'], y=previsao_loja['P90'], mode='lines',
+                                 line=dict(width=0), showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=previsao_loja['Date'], y=previsao_loja['P10'], mode='lines',
+                                 line=dict(width=0), fill='tonexty', fillcolor='rgba(227, 0, 27, 0.15)',
+                                 name='Intervalo de 80%', hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=previsao_loja['Date'], y=previsao_loja['Previsao'], mode='lines+markers',
+                                 name='Previsão', line=dict(color=VERMELHO_ROSSMANN)))
+        modelo_alternativo = 'PrevisaoIngenuo' if metricas_loja['Modelo'] == MODELO_RIDGE else 'PrevisaoRidge'
+        fig.add_trace(go.Scatter(x=previsao_loja['Date'], y=previsao_loja[modelo_alternativo], mode='lines',
+                                 name='Modelo alternativo', line=dict(color=CINZA_NEUTRO, dash='dot')))
+        fig.update_layout(title=f"Vendas e Previsão das Próximas 6 Semanas - Loja {id_loja}",
+                          xaxis_title="Data", yaxis_title="Vendas (€)", hovermode='x unified')
+
+        nome_modelo = "regressão Ridge (calendário e promoções)" if metricas_loja['Modelo'] == MODELO_RIDGE \
+            else "ingênuo sazonal (média por dia da semana)"
+        total_previsto = previsao_loja['Previsao'].sum()
+        historico_recente = historico[historico['Date'] >= inicio_previsao - pd.Timedelta(days=HORIZONTE_PREVISAO)]
+        variacao = total_previsto / historico_recente['Sales'].sum() - 1 if not historico_recente.empty else 0
+        texto_analise = (
+            f"Modelo usado: {nome_modelo}, com RMSPE de {metricas_loja['RMSPE']:.1%} nas últimas 6 semanas de validação. "
+            f"Vendas previstas para o período: €{total_previsto:,.0f} ({variacao:+.1%} em relação às últimas 6 semanas observadas)."
+        )
+        return fig, texto_analise
+
+    @aplicativo.callback(
+        [Output('grafico-simulador-promo', 'figure'),
+         Output('analise-simulador-promo', 'children')],
+        [Input('simulador-promo-datas', 'start_date'),
+         Input('simulador-promo-datas', 'end_date'),
+         Input('simulador-promo-tipos', 'value'),
+         Input('simulador-promo-acao', 'value')]
+    )
+    def atualizar_simulador_promocoes(data_inicio, data_fim, tipos_loja, promo):
+        if not data_inicio or not data_fim or not tipos_loja or promo is None:
+            return criar_figura_vazia("Selecione o período e os tipos de loja."), "Plano de promoções incompleto."
+        base = obter_base_simulacao()
+        if base is None:
+            return criar_figura_vazia("Previsões ainda não geradas."), "Execute o job da tabela de previsões."
+
+        # Plano aplicado a todas as lojas dos tipos escolhidos; só a coluna de promoção é recalculada
+        lojas = base['pilha']['lojas'][pd.Series(base['tipos']).isin(tipos_loja).to_numpy()]
+        plano = montar_plano_promocoes(lojas, pd.date_range(data_inicio, data_fim), promo=promo)
+        _, df_tipos = simular_promocoes(plano)
+
+        fig = px.bar(
+            df_tipos, x='StoreType', y='Diferenca', color='StoreType',
+            color_discrete_sequence=PALETA_CORES_GRAFICO,
+            text=df_tipos['DiferencaPercentual'].map(lambda valor: f'{valor:+.1%}'),
+            labels={'StoreType': 'Tipo de Loja', 'Diferenca': 'Diferença nas vendas previstas (€)'},
+            title="Simulador de Promoções: Efeito Previsto por Tipo de Loja"
+        )
+        fig.update_layout(showlegend=False)
+
+        total = df_tipos[['VendasBase', 'Diferenca', 'DiasAlterados']].sum()
+        acao = "com promoção" if promo else "sem promoção"
+        variacao = total['Diferenca'] / total['VendasBase'] if total['VendasBase'] > 0 else 0
+        texto_analise = (
+            f"Com {len(lojas)} lojas {acao} de {pd.Timestamp(data_inicio):%d/%m} a {pd.Timestamp(data_fim):%d/%m} "
+            f"({int(total['DiasAlterados'])} dias-loja alterados em relação ao calendário padrão), as vendas previstas "
+            f"no horizonte mudam em €{total['Diferenca']:+,.0f} ({variacao:+.1%}). Lojas cujo modelo escolhido é o "
+            f"ingênuo sazonal não respondem a promoções."
+        )
+        return fig, texto_analise
@@ -0,0 +1,100 @@
+# dashboard/comparacao_lojas.py
+"""
+Motor de comparação entre lojas.
+
+Recebe as linhas de N lojas (tipicamente obtidas com uma única leitura indexada via
+extrair_lojas/filtrar_dataframe_lojas) e calcula todas as métricas da comparação em
+um único groupby por (Store, DayOfWeek). Os agregados por loja (KPIs e linha de
+tendência Vendas x Clientes) são derivados desse mesmo resultado, de modo que
+comparar 10 lojas custa praticamente o mesmo que comparar duas.
+"""
+import numpy as np
+import pandas as pd
+
+# Nome da métrica -> formato de exibição (ordem usada nas tabelas/cartões de comparação)
+FORMATOS_METRICAS_COMPARACAO = {
+    'Vendas Médias/Dia': '€ {:,.2f}',
+    'Clientes Médios/Dia': '{:,.0f}',
+    'Ticket Médio': '€ {:,.2f}',
+    'Vendas Totais': '€ {:,.2f}'
+}
+
+
+def calcular_comparacao_lojas(df_lojas, coluna_metrica='Sales'):
+    """
+    Calcula métricas, médias por dia da semana e tendência Vendas x Clientes de várias lojas.
+
+    Args:
+        df_lojas (pd.DataFrame): Linhas das lojas a comparar (colunas Store, DayOfWeek, Sales, Customers, SalesPerCustomer)
+        coluna_metrica (str): Coluna usada no gráfico por dia da semana
+
+    Returns:
+        dict: {
+            'metricas': DataFrame indexado por Store com as colunas de FORMATOS_METRICAS_COMPARACAO,
+            'dia_semana': DataFrame Store x DayOfWeek com a média de coluna_metrica,
+            'tendencias': DataFrame indexado por Store com inclinacao, intercepto, x_min e x_max
+        }
+    """
+    vendas = df_lojas['Sales'].to_numpy(dtype=np.float64, na_value=np.nan)
+    clientes = df_lojas['Customers'].to_numpy(dtype=np.float64, na_value=np.nan)
+    ticket = df_lojas['SalesPerCustomer'].to_numpy(dtype=np.float64, na_value=np.nan)
+    metrica = df_lojas[coluna_metrica].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    # A regressão usa apenas os pares (Clientes, Vendas) completos, como o OLS faria
+    par_valido = ~(np.isnan(vendas) | np.isnan(clientes))
+    x_par = np.where(par_valido, clientes, 0.0)
+    y_par = np.where(par_valido, vendas, 0.0)
+
+    auxiliar = pd.DataFrame({
+        'Store': df_lojas['Store'].to_numpy(),
+        'DayOfWeek': df_lojas['DayOfWeek'].to_numpy(),
+        'vendas': vendas,
+        'clientes': clientes,
+        'ticket': ticket,
+        'metrica': metrica,
+        'par_valido': par_valido.astype(np.float64),
+        'x': x_par,
+        'y': y_par,
+        'xx': x_par * x_par,
+        'xy': x_par * y_par,
+        'x_extremo': np.where(par_valido, clientes, np.nan),
+    })
+
+    # Passagem única: todos os agregados por (loja, dia da semana)
+    grupos = auxiliar.groupby(['Store', 'DayOfWeek'], sort=True).agg(
+        soma_vendas=('vendas', 'sum'), n_vendas=('vendas', 'count'),
+        soma_clientes=('clientes', 'sum'), n_clientes=('clientes', 'count'),
+        soma_ticket=('ticket', 'sum'), n_ticket=('ticket', 'count'),
+        soma_metrica=('metrica', 'sum'), n_metrica=('metrica', 'count'),
+        n_par=('par_valido', 'sum'), soma_x=('x', 'sum'), soma_y=('y', 'sum'),
+        soma_xx=('xx', 'sum'), soma_xy=('xy', 'sum'),
+        x_min=('x_extremo', 'min'), x_max=('x_extremo', 'max'),
+    )
+
+    # Média por dia da semana (tabela Store x DayOfWeek)
+    dia_semana = (grupos['soma_metrica'] / grupos['n_metrica'].replace(0, np.nan)).unstack('DayOfWeek')
+
+    # Agregados por loja derivados do resultado agrupado (poucas linhas: lojas x 7)
+    por_loja = grupos.drop(columns=['x_min', 'x_max']).groupby(level='Store').sum()
+    extremos = grupos[['x_min', 'x_max']].groupby(level='Store').agg({'x_min': 'min', 'x_max': 'max'})
+
+    metricas = pd.DataFrame({
+        'Vendas Médias/Dia': por_loja['soma_vendas'] / por_loja['n_vendas'].replace(0, np.nan),
+        'Clientes Médios/Dia': por_loja['soma_clientes'] / por_loja['n_clientes'].replace(0, np.nan),
+        'Ticket Médio': (por_loja['soma_ticket'] / por_loja['n_ticket'].replace(0, np.nan)).fillna(0),
+        'Vendas Totais': por_loja['soma_vendas'],
+    })
+
+    # Mínimos quadrados fechados: b = (nΣxy - ΣxΣy) / (nΣx² - (Σx)²), a = (Σy - bΣx) / n
+    n = por_loja['n_par']
+    denominador = n * por_loja['soma_xx'] - por_loja['soma_x'] ** 2
+    inclinacao = (n * por_loja['soma_xy'] - por_loja['soma_x'] * por_loja['soma_y']) / denominador.replace(0, np.nan)
+    intercepto = (por_loja['soma_y'] - inclinacao * por_loja['soma_x']) / n.replace(0, np.nan)
+    tendencias = pd.DataFrame({
+        'inclinacao': inclinacao,
+        'intercepto': intercepto,
+        'x_min': extremos['x_min'],
+        'x_max': extremos['x_max'],
+    })
+
+    return {'metricas': metricas, 'dia_semana': dia_semana, 'tendencias': tendencias}
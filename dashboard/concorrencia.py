@@ -0,0 +1,202 @@
+# dashboard/concorrencia.py
+"""
+Deduplicação de computações idênticas e descarte de requisições superadas.
+
+Execução única (single-flight): requisições simultâneas com a mesma chave de computação
+(ex.: os três callbacks do dashboard que filtram o mesmo estado de filtros, ou dois
+analistas com os mesmos filtros) compartilham uma única execução em andamento. Nada é
+guardado depois que a execução termina; o cache de resultados continua a cargo dos
+caches de cada módulo.
+
+Gerações por aba: cada navegador recebe um cookie de sessão e cada aba gera um
+identificador próprio, guardado em memória no dcc.Store ID_ARMAZENAMENTO_ABA e enviado com
+os callbacks pesados. Cada chamada registra uma nova geração para (sessão, aba, callback):
+quando o analista muda os filtros antes de a resposta anterior chegar, a chamada antiga
+percebe, no próximo ponto de verificação, que foi superada e termina com ComputacaoObsoleta
+(204 sem atualização), liberando o worker. Abas diferentes do mesmo navegador, que
+compartilham o cookie, não se superam. A geração fica em arquivos em DIRETORIO_GERACOES para ser vista por
+todos os workers do gunicorn; a execução única vale dentro de cada processo.
+"""
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from dash.exceptions import PreventUpdate
+from flask import g, has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+NOME_COOKIE_SESSAO = 'sessao_dashboard'
+ID_ARMAZENAMENTO_ABA = 'id-aba'
+DURACAO_COOKIE_SESSAO_S = 30 * 24 * 3600
+DIRETORIO_GERACOES = Path(os.environ.get('DIRETORIO_GERACOES', Path(tempfile.gettempdir()) / 'rossmann-geracoes'))
+IDADE_MAXIMA_GERACOES_S = 24 * 3600
+
+_PADRAO_IDENTIFICADOR = re.compile(r'^[0-9a-f]{32}$')  # sessão e aba
+
+# {chave: _Execucao} das computações em andamento neste processo
+_execucoes_em_andamento = {}
+_lock_execucoes = threading.Lock()
+
+
+class ComputacaoObsoleta(PreventUpdate):
+    """A chamada foi superada por outra mais recente da mesma sessão; o Dash responde 204."""
+
+
+class _Execucao:
+    """Resultado (ou erro) de uma computação em andamento, aguardado pelas requisições duplicadas."""
+
+    def __init__(self):
+        self.concluida = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+
+def executar_uma_vez(chave, funcao, *argumentos, **argumentos_nomeados):
+    """
+    Executa `funcao` uma única vez por chave entre as chamadas simultâneas deste processo.
+
+    A primeira chamada calcula; as que chegam enquanto ela roda esperam e recebem o mesmo
+    objeto, que portanto deve ser tratado como somente leitura. Se a execução compartilhada
+    for descartada por ComputacaoObsoleta (a sessão que a iniciou seguiu adiante), quem
+    estava esperando tenta de novo.
+
+    Args:
+        chave (hashable): Chave normalizada da computação (ver normalizar_chave)
+        funcao (callable): Computação a executar
+        *argumentos, **argumentos_nomeados: Repassados para `funcao`
+
+    Returns:
+        O resultado de `funcao`
+    """
+    while True:
+        with _lock_execucoes:
+            execucao = _execucoes_em_andamento.get(chave)
+            lider = execucao is None
+            if lider:
+                execucao = _Execucao()
+                _execucoes_em_andamento[chave] = execucao
+
+        if lider:
+            try:
+                execucao.resultado = funcao(*argumentos, **argumentos_nomeados)
+                return execucao.resultado
+            except BaseException as erro:
+                execucao.erro = erro
+                raise
+            finally:
+                with _lock_execucoes:
+                    _execucoes_em_andamento.pop(chave, None)
+                execucao.concluida.set()
+
+        execucao.concluida.wait()
+        if isinstance(execucao.erro, ComputacaoObsoleta):
+            continue
+        if execucao.erro is not None:
+            raise execucao.erro
+        return execucao.resultado
+
+
+def normalizar_chave(valor):
+    """
+    Converte argumentos de callback (listas, dicts, valores JSON) em uma chave hashable.
+
+    Listas viram tuplas na mesma ordem e dicts viram tuplas de pares ordenados pela chave.
+    """
+    if isinstance(valor, dict):
+        return tuple(sorted((chave, normalizar_chave(item)) for chave, item in valor.items()))
+    if isinstance(valor, (list, tuple)):
+        return tuple(normalizar_chave(item) for item in valor)
+    return valor
+
+
+# --- Sessões e gerações ---
+def registrar_sessoes(servidor):
+    """
+    Atribui um identificador de sessão (cookie) a cada navegador que acessa o servidor Flask.
+
+    Args:
+        servidor (flask.Flask): Servidor do aplicativo Dash
+    """
+    DIRETORIO_GERACOES.mkdir(parents=True, exist_ok=True)
+    _remover_geracoes_antigas()
+
+    @servidor.before_request
+    def identificar_sessao():
+        sessao = request.cookies.get(NOME_COOKIE_SESSAO, '')
+        g.sessao_nova = not _PADRAO_IDENTIFICADOR.match(sessao)
+        g.sessao_dashboard = uuid.uuid4().hex if g.sessao_nova else sessao
+
+    @servidor.after_request
+    def gravar_cookie_sessao(resposta):
+        if g.get('sessao_nova'):
+            resposta.set_cookie(NOME_COOKIE_SESSAO, g.sessao_dashboard, max_age=DURACAO_COOKIE_SESSAO_S,
+                                httponly=True, samesite='Lax')
+        return resposta
+
+
+def _remover_geracoes_antigas():
+    """Apaga os arquivos de geração de sessões inativas há mais de IDADE_MAXIMA_GERACOES_S."""
+    limite = time.time() - IDADE_MAXIMA_GERACOES_S
+    for caminho in DIRETORIO_GERACOES.glob('*.geracao'):
+        try:
+            if caminho.stat().st_mtime < limite:
+                caminho.unlink()
+        except OSError:
+            pass
+
+
+def iniciar_geracao(nome_callback, aba=None):
+    """
+    Registra uma nova geração do callback para a sessão e a aba da requisição atual.
+
+    Args:
+        nome_callback (str): Nome do callback
+        aba (str): Identificador da aba (valor de ID_ARMAZENAMENTO_ABA); sem ele, as chamadas
+                   de todas as abas do navegador compartilham a geração
+
+    Returns:
+        tuple ou None: (caminho do arquivo, marcador) a passar para verificar_geracao;
+        None fora de uma requisição com sessão (ex.: jobs em segundo plano)
+    """
+    sessao = g.get('sessao_dashboard') if has_request_context() else None
+    if sessao is None:
+        return None
+    if isinstance(aba, str) and _PADRAO_IDENTIFICADOR.match(aba):
+        sessao = f'{sessao}-{aba}'
+    caminho = DIRETORIO_GERACOES / f'{sessao}-{nome_callback}.geracao'
+    marcador = f'{time.time_ns()}-{os.getpid()}-{threading.get_ident()}'
+    temporario = caminho.with_suffix(f'.{marcador}.tmp')
+    try:
+        temporario.write_text(marcador)
+        os.replace(temporario, caminho)
+    except OSError as erro:
+        logger.warning(f"Não foi possível registrar a geração em {caminho}: {erro}")
+        return None
+    return caminho, marcador
+
+
+def verificar_geracao(geracao):
+    """
+    Interrompe a computação se uma chamada mais recente da mesma aba já começou.
+
+    Args:
+        geracao (tuple ou None): Retorno de iniciar_geracao
+
+    Raises:
+        ComputacaoObsoleta: Se a geração registrada não é mais a desta chamada
+    """
+    if geracao is None:
+        return
+    caminho, marcador = geracao
+    try:
+        atual = caminho.read_text()
+    except OSError:
+        return
+    if atual != marcador:
+        raise ComputacaoObsoleta()
@@ -22,6 +22,17 @@ ORDEM_DIAS_SEMANA = list(MAPEAMENTO_DIAS_SEMANA.values())
 # --- Constantes de Gráficos ---
 ALTURA_GRAFICO, ALTURA_GRAFICO_LARGURA_TOTAL = 450, 550
 
+# --- Redução de Pontos (LTTB) das Séries Temporais ---
+LARGURA_GRAFICO_PADRAO_PX = 1200 # Usada quando a largura renderizada do gráfico não é conhecida
+ORCAMENTO_PONTOS_FIGURA = 20000 # Total de pontos por figura, dividido entre os traços
+PONTOS_MINIMOS_POR_TRACO = 150
+
+# --- Renderização WebGL ---
+LIMITE_PONTOS_WEBGL = 1000 # Acima deste total de pontos por figura, traços de dispersão/linha usam Scattergl
+
+# --- Análise de Lojas ---
+LIMITE_LOJAS_COMPARACAO = 10 # Máximo de lojas selecionadas ao mesmo tempo na comparação
+
 # --- Colunas para Gráficos ---
 COLUNAS_NUMERICAS_VENDAS = ['Store', 'DayOfWeek', 'Sales', 'Customers', 'Open', 'Promo', 'SchoolHoliday']
 COLUNAS_NUMERICAS_LOJAS_PARA_PLOTAR = ['Store', 'CompetitionDistance', 'CompetitionOpenSinceMonth', 'CompetitionOpenSinceYear', 'Promo2', 'Promo2SinceWeek', 'Promo2SinceYear']
@@ -0,0 +1,309 @@
+# dashboard/dados_sinteticos.py
+"""
+Gerador de dados sintéticos com o formato do dataset da Rossmann (train.parquet e store.parquet).
+
+Reproduz o esquema original e as principais regularidades dos dados reais: nível de vendas
+próprio de cada loja (dependente do tipo e sortimento), sazonalidade semanal e anual,
+promoções em semanas alternadas, feriados estaduais 'a'/'b'/'c' (e '0'), férias escolares
+por estado, domingos e feriados fechados, reformas de loja e abertura de concorrentes.
+
+A escala multiplica o número de lojas (1115 na base) e o período (31/07/2015 para trás,
+942 dias na base). A geração é feita em blocos de lojas e gravada incrementalmente em
+Parquet, então mesmo escalas altas cabem na memória de um notebook.
+
+Uso:
+    python -m dashboard.dados_sinteticos --escala-lojas 10 --escala-anos 2
+    DIRETORIO_DADOS=dataset/sinteticos/lojas-10x_anos-2x python dashboard/app.py
+"""
+import argparse
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .data_loader import DIRETORIO_BASE
+
+N_LOJAS_BASE = 1115
+DATA_FIM_BASE = pd.Timestamp('2015-07-31')
+N_DIAS_BASE = 942  # 01/01/2013 a 31/07/2015
+N_ESTADOS = 12
+CELULAS_POR_BLOCO = 1_000_000  # lojas x dias gerados de cada vez
+
+# Distribuições do store.parquet original
+PROPORCOES_TIPO_LOJA = {'a': 0.54, 'b': 0.015, 'c': 0.133, 'd': 0.312}
+PROPORCOES_SORTIMENTO = {'a': 0.53, 'b': 0.008, 'c': 0.462}
+PROPORCOES_PROMO_INTERVAL = {'Jan,Apr,Jul,Oct': 0.59, 'Feb,May,Aug,Nov': 0.23, 'Mar,Jun,Sept,Dec': 0.18}
+
+# Nível relativo de clientes e ticket médio típico por tipo de loja
+FATOR_CLIENTES_TIPO = {'a': 1.0, 'b': 2.4, 'c': 1.0, 'd': 0.75}
+TICKET_MEDIO_TIPO = {'a': 8.8, 'b': 5.1, 'c': 8.6, 'd': 11.2}
+
+# Segunda a domingo
+FATOR_DIA_SEMANA = np.array([1.18, 1.03, 0.97, 0.97, 1.03, 0.85, 1.0])
+# Janeiro a dezembro
+FATOR_MES = np.array([0.93, 0.95, 0.98, 1.0, 1.0, 1.01, 1.02, 0.99, 0.98, 0.99, 1.03, 1.25])
+
+
+def calcular_pascoa(ano):
+    """Data do domingo de Páscoa (algoritmo de Meeus/Jones/Butcher)."""
+    a, b, c = ano % 19, ano // 100, ano % 100
+    d, e = b // 4, b % 4
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = c // 4, c % 4
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes = (h + l - 7 * m + 114) // 31
+    dia = (h + l - 7 * m + 114) % 31 + 1
+    return pd.Timestamp(year=ano, month=mes, day=dia)
+
+
+def gerar_lojas(n_lojas, rng):
+    """
+    Gera a tabela de lojas com o esquema de store.parquet.
+
+    Args:
+        n_lojas (int): Número de lojas
+        rng (np.random.Generator): Gerador aleatório
+
+    Returns:
+        pd.DataFrame: Store, StoreType, Assortment, CompetitionDistance, CompetitionOpenSinceMonth,
+            CompetitionOpenSinceYear, Promo2, Promo2SinceWeek, Promo2SinceYear, PromoInterval
+    """
+    tipos = rng.choice(list(PROPORCOES_TIPO_LOJA), n_lojas, p=list(PROPORCOES_TIPO_LOJA.values()))
+    sortimentos = rng.choice(list(PROPORCOES_SORTIMENTO), n_lojas, p=list(PROPORCOES_SORTIMENTO.values()))
+    # No dataset real, o sortimento 'b' (extra) aparece quase só nas lojas do tipo 'b'
+    sortimentos = np.where(tipos == 'b', rng.choice(['a', 'b', 'c'], n_lojas, p=[0.4, 0.5, 0.1]),
+                           np.where(sortimentos == 'b', 'a', sortimentos))
+
+    distancia = np.clip(np.round(rng.lognormal(np.log(2300), 1.1, n_lojas), -1), 20, 75860)
+    distancia[rng.random(n_lojas) < 0.003] = np.nan
+
+    tem_abertura = rng.random(n_lojas) < 0.68
+    ano_abertura = np.clip(np.round(2015 - rng.exponential(6.5, n_lojas)), 1961, 2015)
+    ano_abertura[rng.random(n_lojas) < 0.003] = 1900
+    mes_abertura = rng.integers(1, 13, n_lojas).astype(float)
+
+    promo2 = (rng.random(n_lojas) < 0.51).astype(np.int64)
+    semana_promo2 = rng.integers(1, 51, n_lojas).astype(float)
+    ano_promo2 = rng.integers(2009, 2016, n_lojas).astype(float)
+    intervalo = rng.choice(list(PROPORCOES_PROMO_INTERVAL), n_lojas, p=list(PROPORCOES_PROMO_INTERVAL.values()))
+
+    return pd.DataFrame({
+        'Store': np.arange(1, n_lojas + 1, dtype=np.int64),
+        'StoreType': tipos,
+        'Assortment': sortimentos,
+        'CompetitionDistance': distancia,
+        'CompetitionOpenSinceMonth': np.where(tem_abertura, mes_abertura, np.nan),
+        'CompetitionOpenSinceYear': np.where(tem_abertura, ano_abertura, np.nan),
+        'Promo2': promo2,
+        'Promo2SinceWeek': np.where(promo2 == 1, semana_promo2, np.nan),
+        'Promo2SinceYear': np.where(promo2 == 1, ano_promo2, np.nan),
+        'PromoInterval': pd.Series(np.where(promo2 == 1, intervalo, None), dtype=object),
+    })
+
+
+def gerar_calendario(datas, rng):
+    """
+    Gera feriados (códigos '0', 'a', 'b', 'c') e férias escolares por estado.
+
+    Args:
+        datas (pd.DatetimeIndex): Dias do período
+        rng (np.random.Generator): Gerador aleatório
+
+    Returns:
+        tuple: (feriados, ferias_escolares), matrizes (N_ESTADOS, n_dias) de str e int
+    """
+    n_dias = len(datas)
+    feriados = np.full((N_ESTADOS, n_dias), '0', dtype='<U1')
+    ferias = np.zeros((N_ESTADOS, n_dias), dtype=np.int64)
+    posicao = pd.Series(np.arange(n_dias), index=datas)
+
+    def marcar(matriz, estados, dia, valor):
+        if dia in posicao.index:
+            matriz[estados, posicao[dia]] = valor
+
+    def marcar_intervalo(estado, inicio, n):
+        for dia in pd.date_range(inicio, periods=n):
+            marcar(ferias, [estado], dia, 1)
+
+    todos = list(range(N_ESTADOS))
+    # Feriados estaduais (apenas parte dos estados), sorteados uma vez para todo o período
+    estados_por_feriado = {nome: rng.choice(N_ESTADOS, n, replace=False).tolist()
+                           for nome, n in [('reis', 3), ('corpus', 6), ('assuncao', 2), ('reforma', 5), ('todos_santos', 5)]}
+    inicio_verao = rng.integers(0, 6, N_ESTADOS)  # semanas de deslocamento das férias de verão
+
+    for ano in range(datas[0].year, datas[-1].year + 1):
+        pascoa = calcular_pascoa(ano)
+        # 'a': feriados públicos; 'b': Páscoa; 'c': Natal
+        for mes, dia in [(1, 1), (5, 1), (10, 3)]:
+            marcar(feriados, todos, pd.Timestamp(year=ano, month=mes, day=dia), 'a')
+        for deslocamento in (39, 50):  # Ascensão e Pentecostes
+            marcar(feriados, todos, pascoa + pd.Timedelta(days=deslocamento), 'a')
+        for deslocamento in (-2, 1):  # Sexta-feira Santa e segunda de Páscoa
+            marcar(feriados, todos, pascoa + pd.Timedelta(days=deslocamento), 'b')
+        for dia in (25, 26):
+            marcar(feriados, todos, pd.Timestamp(year=ano, month=12, day=dia), 'c')
+        marcar(feriados, estados_por_feriado['reis'], pd.Timestamp(year=ano, month=1, day=6), 'a')
+        marcar(feriados, estados_por_feriado['corpus'], pascoa + pd.Timedelta(days=60), 'a')
+        marcar(feriados, estados_por_feriado['assuncao'], pd.Timestamp(year=ano, month=8, day=15), 'a')
+        marcar(feriados, estados_por_feriado['reforma'], pd.Timestamp(year=ano, month=10, day=31), 'a')
+        marcar(feriados, estados_por_feriado['todos_santos'], pd.Timestamp(year=ano, month=11, day=1), 'a')
+
+        for estado in todos:
+            marcar_intervalo(estado, pascoa - pd.Timedelta(days=7), 14)
+            marcar_intervalo(estado, pd.Timestamp(year=ano, month=6, day=22) + pd.Timedelta(weeks=int(inicio_verao[estado])), 42)
+            marcar_intervalo(estado, pd.Timestamp(year=ano, month=10, day=int(rng.integers(5, 25))), int(rng.integers(7, 15)))
+            marcar_intervalo(estado, pd.Timestamp(year=ano, month=12, day=22), 16)
+
+    return feriados, ferias
+
+
+def gerar_vendas_bloco(df_lojas, datas, feriados, ferias, rng):
+    """
+    Gera as vendas diárias (esquema de train.parquet) de um bloco de lojas.
+
+    Args:
+        df_lojas (pd.DataFrame): Lojas do bloco (saída de gerar_lojas com a coluna auxiliar 'Estado')
+        datas (pd.DatetimeIndex): Dias do período
+        feriados (np.ndarray): Códigos de feriado por estado e dia
+        ferias (np.ndarray): Férias escolares por estado e dia
+        rng (np.random.Generator): Gerador aleatório
+
+    Returns:
+        pd.DataFrame: Store, DayOfWeek, Date, Sales, Customers, Open, Promo, StateHoliday, SchoolHoliday
+    """
+    n_lojas, n_dias = len(df_lojas), len(datas)
+    dia_semana = datas.dayofweek.to_numpy()  # 0 = segunda
+    estado = df_lojas['Estado'].to_numpy()
+    tipos = df_lojas['StoreType'].to_numpy()
+
+    feriado_loja = feriados[estado]
+    eh_feriado = feriado_loja != '0'
+    ferias_loja = ferias[estado]
+
+    # Promoção da rede: semanas alternadas, de segunda a sexta, fora de feriados
+    semana = (datas - datas[0]).days.to_numpy() // 7
+    promo = ((semana % 2 == 0) & (dia_semana < 5))[None, :] & ~eh_feriado
+
+    # Aberturas: domingos e feriados fechados (exceto lojas do tipo 'b' e algumas poucas),
+    # reformas de ~6 meses em parte das lojas e fechamentos aleatórios
+    abre_domingo = (tipos == 'b') | (rng.random(n_lojas) < 0.02)
+    aberta = np.ones((n_lojas, n_dias), dtype=bool)
+    aberta &= ~((dia_semana == 6)[None, :] & ~abre_domingo[:, None])
+    aberta &= ~(eh_feriado & ~(abre_domingo[:, None] & (rng.random((n_lojas, n_dias)) < 0.4)))
+    em_reforma = rng.random(n_lojas) < 0.15
+    inicio_reforma = rng.integers(0, max(1, n_dias - 184), n_lojas)
+    dias = np.arange(n_dias)
+    aberta &= ~(em_reforma[:, None] & (dias[None, :] >= inicio_reforma[:, None]) & (dias[None, :] < inicio_reforma[:, None] + 184))
+    aberta &= rng.random((n_lojas, n_dias)) >= 0.003
+
+    # Nível de clientes e ticket médio próprios de cada loja
+    clientes_base = rng.lognormal(np.log(700), 0.35, n_lojas) * np.vectorize(FATOR_CLIENTES_TIPO.get)(tipos)
+    clientes_base *= np.where(df_lojas['Assortment'].to_numpy() == 'c', 1.05, 1.0)
+    ticket_base = np.vectorize(TICKET_MEDIO_TIPO.get)(tipos) * rng.normal(1.0, 0.1, n_lojas)
+
+    # Concorrente aberto dentro do período reduz o movimento a partir da abertura
+    abertura_concorrente = pd.to_datetime(dict(
+        year=df_lojas['CompetitionOpenSinceYear'].fillna(1900).astype(int),
+        month=df_lojas['CompetitionOpenSinceMonth'].fillna(1).astype(int), day=1)).to_numpy()
+    efeito_concorrente = np.where(datas.to_numpy()[None, :] >= abertura_concorrente[:, None], 0.92, 1.0)
+    efeito_concorrente = np.where((abertura_concorrente < datas.to_numpy()[0])[:, None], 1.0, efeito_concorrente)
+
+    vespera_feriado = np.zeros_like(eh_feriado)
+    vespera_feriado[:, :-1] = eh_feriado[:, 1:]
+    anos_desde_inicio = (datas - datas[0]).days.to_numpy() / 365.25
+
+    fator_dia = (FATOR_DIA_SEMANA[dia_semana] * FATOR_MES[datas.month.to_numpy() - 1] * (1 + 0.01 * anos_desde_inicio))[None, :]
+    clientes = (clientes_base[:, None] * fator_dia * efeito_concorrente
+                * np.where(promo, 1.15, 1.0) * np.where(vespera_feriado, 1.12, 1.0) * np.where(ferias_loja == 1, 1.02, 1.0)
+                * rng.lognormal(0.0, 0.12, (n_lojas, n_dias)))
+    ticket = ticket_base[:, None] * np.where(promo, 1.08, 1.0) * rng.lognormal(0.0, 0.05, (n_lojas, n_dias))
+    clientes = np.where(aberta, np.round(clientes), 0).astype(np.int64)
+    vendas = np.where(aberta, np.round(clientes * ticket), 0).astype(np.int64)
+
+    return pd.DataFrame({
+        'Store': np.repeat(df_lojas['Store'].to_numpy(), n_dias),
+        'DayOfWeek': np.tile(dia_semana + 1, n_lojas).astype(np.int64),
+        'Date': np.tile(datas.to_numpy(), n_lojas),
+        'Sales': vendas.ravel(),
+        'Customers': clientes.ravel(),
+        'Open': aberta.ravel().astype(np.int64),
+        'Promo': promo.ravel().astype(np.int64),
+        'StateHoliday': feriado_loja.ravel().astype(object),
+        'SchoolHoliday': ferias_loja.ravel(),
+    })
+
+
+def gerar_dados_sinteticos(escala_lojas=1.0, escala_anos=1.0, diretorio_saida=None, semente=42, sobrescrever=False):
+    """
+    Gera e grava train.parquet e store.parquet sintéticos.
+
+    Args:
+        escala_lojas (float): Multiplicador do número de lojas (1 = 1115 lojas)
+        escala_anos (float): Multiplicador do período (1 = 942 dias terminando em 31/07/2015)
+        diretorio_saida (str ou Path): Diretório base (os arquivos vão para <diretorio>/brutos/).
+            Padrão: dataset/sinteticos/lojas-<x>x_anos-<y>x
+        semente (int): Semente para reprodutibilidade
+        sobrescrever (bool): Se False, não substitui arquivos existentes
+
+    Returns:
+        Path: Diretório base gerado (use como DIRETORIO_DADOS para carregar no dashboard)
+    """
+    if diretorio_saida is None:
+        diretorio_saida = DIRETORIO_BASE / 'dataset' / 'sinteticos' / f'lojas-{escala_lojas:g}x_anos-{escala_anos:g}x'
+    diretorio_saida = Path(diretorio_saida)
+    diretorio_brutos = diretorio_saida / 'brutos'
+    caminho_treino, caminho_lojas = diretorio_brutos / 'train.parquet', diretorio_brutos / 'store.parquet'
+    if not sobrescrever and (caminho_treino.exists() or caminho_lojas.exists()):
+        raise FileExistsError(f"Já existem dados em {diretorio_brutos}; use sobrescrever=True (--sobrescrever) para substituí-los")
+    diretorio_brutos.mkdir(parents=True, exist_ok=True)
+
+    rng = np.random.default_rng(semente)
+    n_lojas = max(1, int(round(N_LOJAS_BASE * escala_lojas)))
+    n_dias = max(7, int(round(N_DIAS_BASE * escala_anos)))
+    datas = pd.date_range(end=DATA_FIM_BASE, periods=n_dias, freq='D')
+
+    df_lojas = gerar_lojas(n_lojas, rng)
+    df_lojas.to_parquet(caminho_lojas, index=False)
+    feriados, ferias = gerar_calendario(datas, rng)
+    estados = rng.integers(0, N_ESTADOS, n_lojas)
+
+    lojas_por_bloco = max(1, CELULAS_POR_BLOCO // n_dias)
+    logging.info(f"Gerando {n_lojas} lojas x {n_dias} dias ({n_lojas * n_dias:,} linhas) em {diretorio_brutos}")
+    escritor = None
+    try:
+        for inicio in range(0, n_lojas, lojas_por_bloco):
+            bloco = df_lojas.iloc[inicio:inicio + lojas_por_bloco].assign(Estado=estados[inicio:inicio + lojas_por_bloco])
+            tabela = pa.Table.from_pandas(gerar_vendas_bloco(bloco, datas, feriados, ferias, rng), preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(caminho_treino, tabela.schema)
+            escritor.write_table(tabela)
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+    logging.info(f"Dados sintéticos gravados: {caminho_treino} e {caminho_lojas}")
+    return diretorio_saida
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera train.parquet/store.parquet sintéticos no formato Rossmann.")
+    parser.add_argument('--escala-lojas', type=float, default=1.0, help="Multiplicador do número de lojas (1 = 1115)")
+    parser.add_argument('--escala-anos', type=float, default=1.0, help="Multiplicador do período (1 = 942 dias)")
+    parser.add_argument('--saida', default=None, help="Diretório base de saída (arquivos em <saida>/brutos/)")
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--sobrescrever', action='store_true', help="Substitui arquivos existentes")
+    argumentos = parser.parse_args(argv)
+
+    diretorio = gerar_dados_sinteticos(argumentos.escala_lojas, argumentos.escala_anos, argumentos.saida,
+                                       argumentos.semente, argumentos.sobrescrever)
+    print(f"Para usar no dashboard: DIRETORIO_DADOS={diretorio} python dashboard/app.py")
+
+
+if __name__ == '__main__':
+    main()
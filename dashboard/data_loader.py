@@ -4,6 +4,7 @@ from pathlib import Path
 import os
 import logging
 import time
+import weakref
 
 # Configuração do logging
 logging.basicConfig(
@@ -18,7 +19,8 @@ logging.basicConfig(
 # Define constantes globais
 # Diretório base do projeto
 DIRETORIO_BASE = Path(__file__).resolve().parent.parent
-DIRETORIO_DADOS = DIRETORIO_BASE / "dataset"
+# Pode ser apontado para outro conjunto (ex.: dados sintéticos) pela variável de ambiente DIRETORIO_DADOS
+DIRETORIO_DADOS = Path(os.environ.get("DIRETORIO_DADOS", DIRETORIO_BASE / "dataset"))
 
 # Caminhos para dados brutos
 CAMINHO_ARQUIVO_TREINO_BRUTO = DIRETORIO_DADOS / "brutos" / "train.parquet"
@@ -31,6 +33,7 @@ CAMINHO_ARQUIVO_PROCESSADO = DIRETORIO_DADOS / "processados" / "df_completo_proc
 N_AMOSTRAS_PADRAO = 50
 
 _principal_cache = {}
+_indice_lojas_cache = {}
 
 def verificar_diretorios():
     """Verifica se todos os diretórios necessários existem e os cria se não existirem."""
@@ -332,6 +335,24 @@ def filtrar_por_data(df, data_inicio=None, data_fim=None):
     return df_filtrado
 
 
+def calcular_versao_dados(*parametros):
+    """
+    Identifica a versão do conjunto carregado: diretório de dados, parâmetros de carregamento
+    e momento da última gravação do Parquet processado.
+
+    Args:
+        *parametros: Parâmetros de carregamento (modo, amostras, datas)
+
+    Returns:
+        str: Versão usada como chave dos caches que dependem do conjunto (ex.: layouts)
+    """
+    try:
+        modificacao = CAMINHO_ARQUIVO_PROCESSADO.stat().st_mtime_ns
+    except OSError:
+        modificacao = 0
+    return '|'.join(str(parte) for parte in (DIRETORIO_DADOS, *parametros, modificacao))
+
+
 def carregar_dados(
     modo='amostra',
     n_amostras=N_AMOSTRAS_PADRAO,
@@ -376,7 +397,8 @@ def carregar_dados(
         "df_vendas_antes_preprocessamento": pd.DataFrame(),
         "df_vendas_depois_preprocessamento": pd.DataFrame(),
             "df_lojas_tratado": pd.DataFrame(),
-            "df_principal_json": "{}"
+            "df_principal_json": "{}",
+            "versao": calcular_versao_dados(modo, n_amostras, data_inicio, data_fim)
         }
     
     # Métricas sobre o dataset completo
@@ -429,7 +451,8 @@ def carregar_dados(
         "media_vendas_depois": media_vendas_reduzido,
         "df_vendas_antes_preprocessamento": df_vendas_antes_preprocessamento,
         "df_vendas_depois_preprocessamento": df_vendas_depois_preprocessamento,
-        "df_lojas_tratado": df_lojas_tratado
+        "df_lojas_tratado": df_lojas_tratado,
+        "versao": calcular_versao_dados(modo, n_amostras, data_inicio, data_fim)
     }
     
     # Converte o DataFrame principal para JSON para armazenar no dcc.Store
@@ -468,6 +491,7 @@ def get_data_states(use_samples=False, n_amostras=N_AMOSTRAS_PADRAO, random_stat
 def get_principal_dataset(use_samples=False, n_amostras=N_AMOSTRAS_PADRAO, random_state=42):
     """
     Retorna o DataFrame principal (limpo ou amostrado) em memória, cacheado para evitar recálculos.
+    O DataFrame é agrupado por loja e ordenado por data, com o índice de lojas já construído.
     """
     key = (use_samples, n_amostras)
     if key in _principal_cache:
@@ -481,6 +505,144 @@ def get_principal_dataset(use_samples=False, n_amostras=N_AMOSTRAS_PADRAO, rando
         df_princ = amostrar_por_loja(df_base, n_amostras=n_amostras, random_state=random_state)
     else:
         df_princ = df_base
+
+    if df_princ is not None and not df_princ.empty:
+        df_princ = ordenar_por_loja_e_data(df_princ)
+        obter_indice_lojas(df_princ)
         
     _principal_cache[key] = df_princ
-    return df_princ
\ No newline at end of file
+    return df_princ
+
+
+def ordenar_por_loja_e_data(df):
+    """
+    Reordena o DataFrame para que as linhas de cada loja fiquem contíguas e em ordem de data.
+    
+    Args:
+        df (pd.DataFrame): DataFrame com as colunas 'Store' e 'Date'
+        
+    Returns:
+        pd.DataFrame: DataFrame ordenado por (Store, Date) com índice posicional (0..n-1)
+    """
+    if 'Date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['Date']):
+        df = df.assign(Date=pd.to_datetime(df['Date']))
+    return df.sort_values(['Store', 'Date'], kind='mergesort').reset_index(drop=True)
+
+
+def construir_indice_lojas(df):
+    """
+    Constrói o índice de offsets loja -> (início, fim) de um DataFrame ordenado por (Store, Date).
+    
+    Args:
+        df (pd.DataFrame): DataFrame já ordenado por ordenar_por_loja_e_data
+        
+    Returns:
+        dict: {id_loja: (inicio, fim)} com posições para uso em df.iloc[inicio:fim]
+    """
+    lojas = df['Store'].to_numpy()
+    if len(lojas) == 0:
+        return {}
+    if np.any(lojas[1:] < lojas[:-1]):
+        raise ValueError("DataFrame não está agrupado por loja; use ordenar_por_loja_e_data antes de indexar")
+
+    mudancas = np.flatnonzero(lojas[1:] != lojas[:-1]) + 1
+    inicios = np.concatenate(([0], mudancas))
+    fins = np.concatenate((mudancas, [len(lojas)]))
+    return dict(zip(lojas[inicios].tolist(), zip(inicios.tolist(), fins.tolist())))
+
+
+def obter_indice_lojas(df):
+    """
+    Retorna o índice de offsets por loja do DataFrame, construindo-o apenas na primeira chamada.
+    O cache é associado ao objeto DataFrame e descartado quando ele deixa de existir.
+    """
+    chave = id(df)
+    registro = _indice_lojas_cache.get(chave)
+    if registro is not None and registro[0]() is df:
+        return registro[1]
+
+    indice = construir_indice_lojas(df)
+    _indice_lojas_cache[chave] = (weakref.ref(df, lambda _ref, chave=chave: _indice_lojas_cache.pop(chave, None)), indice)
+    return indice
+
+
+def _limites_loja(df, indice, id_loja, data_inicio=None, data_fim=None):
+    """Retorna (inicio, fim) posicionais da loja, restritos à janela de datas se informada."""
+    limites = indice.get(id_loja)
+    if limites is None:
+        return None
+    inicio, fim = limites
+
+    # Como as datas estão ordenadas dentro da loja, a janela é obtida por busca binária
+    if data_inicio is not None or data_fim is not None:
+        datas_loja = df['Date'].to_numpy()[limites[0]:limites[1]]
+        if data_inicio is not None:
+            inicio = limites[0] + int(np.searchsorted(datas_loja, pd.Timestamp(data_inicio).to_datetime64(), side='left'))
+        if data_fim is not None:
+            fim = limites[0] + int(np.searchsorted(datas_loja, pd.Timestamp(data_fim).to_datetime64(), side='right'))
+
+    return inicio, max(inicio, fim)
+
+
+def extrair_loja(df, id_loja, data_inicio=None, data_fim=None):
+    """
+    Retorna as linhas de uma loja como uma fatia contígua (sem cópia) do DataFrame principal.
+    
+    Args:
+        df (pd.DataFrame): DataFrame ordenado por (Store, Date)
+        id_loja (int): Identificador da loja
+        data_inicio (str ou datetime): Início opcional da janela de datas (inclusivo)
+        data_fim (str ou datetime): Fim opcional da janela de datas (inclusivo)
+        
+    Returns:
+        pd.DataFrame: Fatia da loja (vazia se a loja não existir no DataFrame)
+    """
+    limites = _limites_loja(df, obter_indice_lojas(df), id_loja, data_inicio, data_fim)
+    if limites is None:
+        return df.iloc[0:0]
+    return df.iloc[limites[0]:limites[1]]
+
+
+def extrair_lojas(df, ids_lojas, data_inicio=None, data_fim=None):
+    """
+    Extrai as linhas de várias lojas com uma única leitura indexada (take) do DataFrame principal.
+    
+    Args:
+        df (pd.DataFrame): DataFrame ordenado por (Store, Date)
+        ids_lojas (list): Identificadores das lojas
+        data_inicio (str ou datetime): Início opcional da janela de datas (inclusivo)
+        data_fim (str ou datetime): Fim opcional da janela de datas (inclusivo)
+        
+    Returns:
+        pd.DataFrame: Linhas das lojas, agrupadas por loja (em ordem crescente de ID) e ordenadas por data
+    """
+    indice = obter_indice_lojas(df)
+    inicios, fins = [], []
+    for id_loja in sorted(set(ids_lojas)):
+        limites = _limites_loja(df, indice, id_loja, data_inicio, data_fim)
+        if limites is not None:
+            inicios.append(limites[0])
+            fins.append(limites[1])
+
+    if not inicios:
+        return df.iloc[0:0]
+
+    # Concatena os intervalos [inicio, fim) de todas as lojas em um único vetor de posições
+    inicios = np.asarray(inicios, dtype=np.int64)
+    comprimentos = np.asarray(fins, dtype=np.int64) - inicios
+    deslocamentos = np.repeat(inicios - np.concatenate(([0], np.cumsum(comprimentos)[:-1])), comprimentos)
+    posicoes = np.arange(comprimentos.sum(), dtype=np.int64) + deslocamentos
+    return df.take(posicoes)
+
+
+def obter_atributos_loja(df, id_loja):
+    """
+    Retorna a primeira linha da loja (atributos estáticos como StoreType, Assortment, etc.).
+    
+    Returns:
+        pd.Series ou None: Linha da loja ou None se a loja não existir no DataFrame
+    """
+    limites = obter_indice_lojas(df).get(id_loja)
+    if limites is None:
+        return None
+    return df.iloc[limites[0]]
\ No newline at end of file
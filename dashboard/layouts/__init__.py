@@ -11,6 +11,7 @@ outros módulos como app.py e callbacks.py.
 Importa e expõe:
 1. Componentes compartilhados (barra lateral, cards, etc.)
 2. Layouts específicos de cada página
+3. Construção sob demanda das páginas (contêineres vazios e cache por versão dos dados)
 """
 
 # Importação de Componentes Compartilhados
@@ -19,6 +20,7 @@ from .componentes_compartilhados import (
     armazenamento_estado_barra_lateral,
     criar_card_grafico,
     criar_card_grafico_3d,
+    criar_barra_progresso,
     criar_botoes_cabecalho,
     criar_card_filtros,
     criar_card_filtros_3d,
@@ -32,4 +34,7 @@ from .layout_analise_preliminar import criar_layout_analise_preliminar
 from .layout_dashboard_geral import criar_layout_dashboard_analise
 from .layout_analise_lojas import criar_layout_analise_lojas
 from .layout_analise_3d import criar_layout_analise_3d
-from .layout_previsao_vendas import criar_layout_previsao_vendas
\ No newline at end of file
+from .layout_previsao_vendas import criar_layout_previsao_vendas
+
+# Construção sob demanda das páginas
+from .paginas import PAGINAS, obter_layout_pagina, criar_conteineres_paginas
@@ -4,6 +4,7 @@ from dash import dcc, html
 # Importar as constantes com os novos nomes
 from ..utils import criar_figura_vazia, criar_icone_informacao # Refatorar nomes de funções
 from ..config import AZUL_ESCURO, ALTURA_GRAFICO
+from ..tarefas_background import ESTILO_PROGRESSO_OCULTO
 
 def gerar_titulo_secao(titulo, subtitulo): # Refatorar nome da função
     """Gera um título de seção padronizado com subtítulo."""
@@ -80,7 +81,7 @@ def criar_card_grafico(id_grafico, id_analise, largura_md=6, classe_card="", con
         className="graph-card-col" # Refatorar classe CSS
     )
 
-def criar_card_grafico_3d(id_grafico, titulo, id_analise=None, children=None): # Refatorar nome da função e parâmetros
+def criar_card_grafico_3d(id_grafico, titulo, id_analise=None, children=None, id_progresso=None): # Refatorar nome da função e parâmetros
     """Cria um card customizado para os gráficos 3D."""
     filhos_corpo_card = [ # Refatorar nome da variável
         dcc.Loading(children=[dcc.Graph(
@@ -102,6 +103,10 @@ def criar_card_grafico_3d(id_grafico, titulo, id_analise=None, children=None): #
         ], className="mt-3 p-3 analise-text-box") # Refatorar classe CSS
         filhos_corpo_card.append(caixa_analise) # Usar nova variável refatorada
 
+    if id_progresso:
+        # Barra de progresso do callback em segundo plano, logo acima do gráfico
+        filhos_corpo_card.insert(0, criar_barra_progresso(id_progresso))
+
     if children:
         # Adiciona elementos extras (como dropdown) no início do corpo do card
         filhos_corpo_card.insert(0, children) # Usar nova variável refatorada
@@ -122,6 +127,11 @@ def criar_card_grafico_3d(id_grafico, titulo, id_analise=None, children=None): #
 # COMPONENTES REUTILIZÁVEIS
 # ==============================================================================
 
+def criar_barra_progresso(id_barra):
+    """Barra de progresso de um callback em segundo plano (oculta fora da execução)."""
+    return dbc.Progress(id=id_barra, value=0, label='', striped=True, animated=True,
+                        className="my-2", style=ESTILO_PROGRESSO_OCULTO)
+
 def criar_botoes_cabecalho(nome_pagina): # Refatorar nome da função e parâmetro
     """Cria os botões de ação do cabeçalho da página (REUTILIZÁVEL)."""
     return html.Div([
@@ -38,6 +38,7 @@ def criar_layout_analise_3d(dados): # Refatorar nome da função e parâmetro
                     id_grafico='grafico-correlacao-3d', # Refatorar ID
                     titulo="Análise de Correlação 3D: Vendas vs. Clientes vs. Promoções",
                     id_analise='analise-correlacao-3d', # Refatorar ID
+                    id_progresso='progresso-correlacao-3d',
                     children=html.Div([
                         dbc.Row([
                             dbc.Col([
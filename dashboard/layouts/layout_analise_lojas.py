@@ -1,6 +1,7 @@
 import dash_bootstrap_components as dbc
 from dash import dcc, html
 
+from ..config import LIMITE_LOJAS_COMPARACAO
 from .componentes_compartilhados import criar_botoes_cabecalho, criar_card_filtros_analise_lojas # Refatorar nomes de módulos e funções
 
 def criar_layout_analise_lojas(dados): # Refatorar nome da função e parâmetro
@@ -71,7 +72,7 @@ def criar_layout_analise_lojas(dados): # Refatorar nome da função e parâmetro
                     [
                         dbc.CardHeader(html.H5("Ranking de Lojas", className="card-title fw-bold m-0")),
                         dbc.CardBody([
-                            html.P("Selecione uma loja na tabela para ver seus detalhes ao lado. Se clicar em duas, os dados das duas serão comparados.", className="card-subtitle mb-3 text-muted"),
+                            html.P(f"Selecione uma loja na tabela para ver seus detalhes ao lado. Se clicar em mais de uma (até {LIMITE_LOJAS_COMPARACAO}), os dados serão comparados.", className="card-subtitle mb-3 text-muted"),
                             dcc.Loading(type="circle", children=html.Div(id="tabela-ranking-lojas")) # Refatorar ID
                         ])
                     ], className="custom-card"
@@ -102,6 +103,7 @@ def criar_layout_analise_lojas(dados): # Refatorar nome da função e parâmetro
 
         # Stores para gerenciamento de estado da página
         dcc.Store(id='armazenamento-dados-ranking'), # Refatorar ID
-        dcc.Store(id='armazenamento-id-loja-selecionada', data=[]) # Refatorar ID
+        dcc.Store(id='armazenamento-id-loja-selecionada', data=[]), # Refatorar ID
+        dcc.Store(id='armazenamento-limite-comparacao', data=LIMITE_LOJAS_COMPARACAO)
 
     ], fluid=True, className="p-4 page-content")
\ No newline at end of file
@@ -1,7 +1,7 @@
 import dash_bootstrap_components as dbc
 from dash import dcc, html
 
-from .componentes_compartilhados import criar_card_filtros, criar_card_grafico
+from .componentes_compartilhados import criar_card_filtros, criar_card_grafico, criar_barra_progresso
 from ..utils import criar_icone_informacao
 
 def criar_layout_dashboard_analise(dados):
@@ -22,6 +22,7 @@ def criar_layout_dashboard_analise(dados):
             ], className="d-flex align-items-center"),
         ], className="d-flex justify-content-between align-items-center mb-4"),
         card_filtros,
+        criar_barra_progresso('progresso-dashboard'),
 
         html.H3("KPIs Globais de Desempenho", className="section-subtitle mt-4"),
         dbc.Row(id='linha-kpi-dashboard', className='mb-4 g-4'),
@@ -53,7 +54,9 @@ def criar_layout_dashboard_analise(dados):
                         inputClassName="radio-input-custom"
                     ),
                 ], className="mb-4")
-            )
+            ),
+            # Largura renderizada do gráfico acima, medida no navegador (limite de pontos por traço)
+            dcc.Store(id='largura-grafico-serie-temporal')
         ], className='mb-4'),
         dbc.Row([
             criar_card_grafico('grafico-vendas-clientes-mensal-dashboard', 'analise-vendas-clientes-mensal', 6),
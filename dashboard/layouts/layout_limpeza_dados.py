@@ -3,7 +3,7 @@ from dash import dcc, html
 import plotly.express as px
 import pandas as pd
 
-from .componentes_compartilhados import criar_botoes_cabecalho # Refatorar nome do módulo e da função
+from .componentes_compartilhados import criar_botoes_cabecalho, criar_barra_progresso # Refatorar nome do módulo e da função
 from ..config import VERMELHO_ROSSMANN, FUNDO_CINZA_CLARO, AZUL_ESCURO, CINZA_NEUTRO
 from ..data_loader import CAMINHO_ARQUIVO_LOJAS_BRUTO, reduzir_uso_memoria  # para análise de valores ausentes e memória
 
@@ -117,6 +117,7 @@ def criar_layout_limpeza_dados(dados): # Refatorar nome da função e parâmetro
                     * **Tratamento de Lojas Fechadas:** A decisão mais impactante foi a remoção dos {registros_removidos:,.0f} registros diários onde as lojas estavam fechadas (`Open == 0`), de um total de {registros_originais:,.0f} registros originais. Isso garante que a análise se concentre apenas nos dias de operação efetiva.
                     * **Tratamento de Dados Faltantes em `store_df`:** Preenchemos valores ausentes (`NaN`) em colunas como `CompetitionDistance` (com a média da coluna) e em campos relacionados a `Promo2` e `CompetitionOpenSince` (com 0, indicando "não aplicável" ou "desconhecido" para facilitar a modelagem futura).
                 """, className="mb-4"),
+                criar_barra_progresso('progresso-limpeza'),
                 dbc.Row([
                     dbc.Col(dcc.Graph(id='grafico-impacto-media'), md=6),
                     dbc.Col(dcc.Graph(id='grafico-impacto-contagem'), md=6)
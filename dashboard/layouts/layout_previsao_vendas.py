@@ -1,30 +1,167 @@
 import dash_bootstrap_components as dbc
-from dash import html
+from dash import dcc, html
+import numpy as np
+import plotly.express as px
 
-from .componentes_compartilhados import criar_botoes_cabecalho # Refatorar nome do módulo e da função
+from .componentes_compartilhados import criar_botoes_cabecalho, criar_card_grafico # Refatorar nome do módulo e da função
+from ..previsao.modelos_loja import MODELO_RIDGE
+from ..config import ALTURA_GRAFICO, PALETA_CORES_GRAFICO
+
+NOMES_MODELOS = {'ridge': 'Ridge por loja', 'ingenuo_sazonal': 'Ingênuo sazonal', 'global': 'Global (gradient boosting)'}
+
+def criar_cards_resumo_modelos(df_metricas):
+    """Cria os KPIs de resumo dos modelos por loja (lojas, erro de validação e modelo escolhido)."""
+    dados_kpi = [
+        {"title": "Lojas com Previsão", "value": f"{len(df_metricas):,}"},
+        {"title": "RMSPE Mediano (validação)", "value": f"{df_metricas['RMSPE'].median():.1%}"},
+        {"title": "Lojas com Regressão", "value": f"{(df_metricas['Modelo'] == MODELO_RIDGE).mean():.0%}"},
+        {"title": "Histórico até", "value": df_metricas['UltimaData'].max().strftime('%d/%m/%Y')},
+    ]
+    return dbc.Row([
+        dbc.Col(
+            dbc.Card(
+                dbc.CardBody([
+                    html.H6(kpi["title"], className="kpi-title text-muted"),
+                    html.H3(kpi["value"], className="kpi-value fw-bold"),
+                ]),
+                className="kpi-card h-100 text-center shadow-sm"
+            ),
+            width=True
+        ) for kpi in dados_kpi
+    ], className="mb-4 g-4")
+
+def criar_card_backtest(df_backtest):
+    """Cria o card com o RMSPE total de cada modelo por data de corte do backtest."""
+    df_total = df_backtest[df_backtest['Nivel'] == 'total'].sort_values('Corte')
+    fig = px.line(
+        df_total.assign(Modelo=df_total['Modelo'].map(NOMES_MODELOS).fillna(df_total['Modelo'])),
+        x='Corte', y='RMSPE', color='Modelo', markers=True,
+        color_discrete_sequence=PALETA_CORES_GRAFICO,
+        labels={'Corte': 'Data de corte', 'RMSPE': 'RMSPE (6 semanas seguintes)'},
+        title="Backtest com Origem Móvel: RMSPE por Data de Corte"
+    )
+    fig.update_layout(height=ALTURA_GRAFICO, yaxis_tickformat='.1%', hovermode='x unified')
+    medias = df_total.groupby('Modelo')['RMSPE'].mean().sort_values()
+    melhor = medias.index[0]
+    return dbc.Col(
+        dbc.Card(
+            dbc.CardBody([
+                dcc.Graph(figure=fig, config={'displayModeBar': False}),
+                html.Div([
+                    html.P([
+                        html.I(className="fas fa-lightbulb me-2"),
+                        html.Strong("Análise: "),
+                        f"Em {df_total['Corte'].nunique()} cortes, o menor erro médio é do modelo "
+                        f"{NOMES_MODELOS.get(melhor, melhor)} (RMSPE médio de {medias.iloc[0]:.1%})."
+                    ])
+                ], className="analise-text-box mt-3")
+            ]),
+            className="custom-card"
+        ),
+        md=12,
+        className="graph-card-col"
+    )
+
+def calcular_periodo_simulador(tabela_previsoes):
+    """Limites do período do simulador (horizonte da tabela) e período padrão: a 2ª semana prevista."""
+    datas = tabela_previsoes['datas']
+    inicio, fim = np.datetime64(datas.min(), 'D'), np.datetime64(datas.max(), 'D')
+    return str(inicio), str(fim), str(min(inicio + 7, fim)), str(min(inicio + 13, fim))
+
+def criar_controles_simulador():
+    """Cria os controles do simulador de promoções; período e tipos vêm da tabela ao exibir a página."""
+    return dbc.Row([
+        dbc.Col([
+            dbc.Label("Período do plano:", className="fw-bold"),
+            dcc.DatePickerRange(
+                id='simulador-promo-datas',
+                display_format='DD/MM/YYYY',
+                className="date-picker-custom w-100"
+            )
+        ], md=4),
+        dbc.Col([
+            dbc.Label("Tipo(s) de Loja:", className="fw-bold"),
+            dcc.Dropdown(
+                id='simulador-promo-tipos',
+                options=[],
+                multi=True,
+                className="dash-dropdown"
+            )
+        ], md=4),
+        dbc.Col([
+            dbc.Label("Ação:", className="fw-bold"),
+            dbc.RadioItems(
+                id='simulador-promo-acao',
+                options=[{'label': 'Com promoção', 'value': 1}, {'label': 'Sem promoção', 'value': 0}],
+                value=1,
+                inline=True
+            )
+        ], md=4),
+    ], className="mb-3")
 
 def criar_layout_previsao_vendas(): # Refatorar nome da função
+    """
+    Layout fixo da página de previsão. As partes que dependem dos arquivos do job (KPIs, lojas,
+    período do simulador e backtest) são preenchidas por atualizar_conteudo_previsoes sempre que a
+    página é exibida, então um job executado com o servidor no ar aparece sem reiniciar os workers.
+    """
     nome_pagina = "previsao-vendas" # Refatorar nome da variável
-    return dbc.Container(
+    cabecalho = dbc.Row(
         [
-            # Cabeçalho da Página
-            dbc.Row(
-                [
-                    dbc.Col(html.H1("Modelagem e Previsão de Vendas", className="page-title"), md=8),
-                    dbc.Col(criar_botoes_cabecalho(nome_pagina), md=4, className="d-flex justify-content-end"), # Usar nova função e variável refatorada
-                ],
-                align="center",
-                className="mb-4"
-            ),
-            dbc.Alert(
-                [
-                    html.I(className="fas fa-tools me-2"),
-                    html.Strong("Página em Construção: "),
-                    "Esta seção abrigará os resultados dos modelos de Machine Learning para prever as vendas futuras."
-                ],
-                color="info"
+            dbc.Col(html.H1("Modelagem e Previsão de Vendas", className="page-title"), md=8),
+            dbc.Col(criar_botoes_cabecalho(nome_pagina), md=4, className="d-flex justify-content-end"), # Usar nova função e variável refatorada
+        ],
+        align="center",
+        className="mb-4"
+    )
+
+    # As previsões são geradas fora do dashboard; a página apenas lê a tabela materializada
+    alerta_sem_previsoes = dbc.Alert(
+        [
+            html.I(className="fas fa-tools me-2"),
+            html.Strong("Previsões ainda não geradas: "),
+            "execute ",
+            html.Code("python -m dashboard.previsao.tabela_previsoes"),
+            " para treinar os modelos por loja e gerar a tabela de previsões das próximas 6 semanas."
+        ],
+        id='alerta-previsoes-nao-geradas',
+        color="info",
+        style={'display': 'none'}
+    )
+
+    seletor_loja = dbc.Row([
+        dbc.Col([
+            dbc.Label("Loja:", className="fw-bold"),
+            dcc.Dropdown(
+                id='seletor-loja-previsao',
+                options=[],
+                clearable=False,
+                className="dash-dropdown"
             )
+        ], md=4)
+    ], className="mb-3")
+
+    conteudo = html.Div(
+        [
+            html.Div(id='resumo-modelos-previsao'),
+            dbc.Row([
+                criar_card_grafico('grafico-previsao-loja', 'analise-previsao-loja', largura_md=12,
+                                   controles_extras=seletor_loja)
+            ], className="mb-4"),
+            # Simulador de promoções (python -m dashboard.previsao.simulador_promocoes na linha de comando)
+            dbc.Row([
+                criar_card_grafico('grafico-simulador-promo', 'analise-simulador-promo', largura_md=12,
+                                   controles_extras=criar_controles_simulador())
+            ], className="mb-4"),
+            # Resultado do backtest (python -m dashboard.previsao.backtest), quando disponível
+            dbc.Row(id='linha-backtest-previsao', className="mb-4"),
         ],
+        id='conteudo-previsoes',
+        style={'display': 'none'}
+    )
+
+    return dbc.Container(
+        [cabecalho, alerta_sem_previsoes, conteudo],
         fluid=True,
         className="p-4 page-content"
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,60 @@
+from dash import html
+
+from .layout_contextualizacao import criar_layout_contextualizacao
+from .layout_limpeza_dados import criar_layout_limpeza_dados
+from .layout_analise_preliminar import criar_layout_analise_preliminar
+from .layout_dashboard_geral import criar_layout_dashboard_analise
+from .layout_analise_lojas import criar_layout_analise_lojas
+from .layout_analise_3d import criar_layout_analise_3d
+from .layout_previsao_vendas import criar_layout_previsao_vendas
+from ..concorrencia import executar_uma_vez
+
+# ==============================================================================
+# Páginas construídas sob demanda
+# ==============================================================================
+# Caminho da página -> função que constrói o layout a partir dos dados carregados
+CONSTRUTORES_PAGINAS = {
+    '/': criar_layout_contextualizacao,
+    '/limpeza-dados': criar_layout_limpeza_dados,
+    '/analise-preliminar': criar_layout_analise_preliminar,
+    '/dashboard': criar_layout_dashboard_analise,
+    '/analise-lojas': criar_layout_analise_lojas,
+    '/analise-3d': criar_layout_analise_3d,
+    '/previsao-vendas': lambda dados: criar_layout_previsao_vendas(),
+}
+PAGINAS = list(CONSTRUTORES_PAGINAS)
+
+# {(caminho da página, versão dos dados): layout}
+_layout_cache = {}
+
+
+def obter_layout_pagina(caminho_pagina, dados):
+    """
+    Retorna o layout da página, construído na primeira visita e reaproveitado enquanto
+    a versão dos dados carregados não mudar.
+
+    Args:
+        caminho_pagina (str): Caminho da página (uma das PAGINAS)
+        dados (dict): Dados carregados por carregar_dados
+
+    Returns:
+        Componente Dash com o conteúdo da página
+    """
+    chave = (caminho_pagina, dados.get('versao'))
+    layout = _layout_cache.get(chave)
+    if layout is None:
+        # Visitas simultâneas à mesma página constroem o layout uma única vez
+        layout = executar_uma_vez(('layout',) + chave, CONSTRUTORES_PAGINAS[caminho_pagina], dados)
+        _layout_cache[chave] = layout
+    return layout
+
+
+def criar_conteineres_paginas(pagina_inicial='/'):
+    """
+    Cria um contêiner vazio por página. O conteúdo é preenchido pelo callback
+    carregar_conteudo_pagina na primeira visita e só a página visível fica com display 'block'.
+    """
+    return [
+        html.Div(id=f'conteudo-pagina-{pagina}', style={'display': 'block' if pagina == pagina_inicial else 'none'})
+        for pagina in PAGINAS
+    ]
@@ -0,0 +1,229 @@
+# dashboard/metricas.py
+"""
+Instrumentação dos callbacks do Dash com exposição em formato texto do Prometheus.
+
+Cada requisição a /_dash-update-component é medida no servidor Flask (tempo de parede,
+tempo de CPU da thread, bytes de entrada e de saída, status) e registrada por callback
+em histogramas. A rota /metrics devolve os valores no formato de exposição do Prometheus.
+
+Com vários workers (gunicorn), cada processo tem seus próprios contadores. Se a variável
+de ambiente DIRETORIO_METRICAS estiver definida, cada worker grava periodicamente um
+retrato dos seus contadores nesse diretório e /metrics soma os retratos de todos eles.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+from flask import Response, g, request
+
+logger = logging.getLogger(__name__)
+
+ROTA_CALLBACKS = '/_dash-update-component'
+ROTA_METRICAS = '/metrics'
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LIMITES_BYTES = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Nome da métrica -> (descrição, limites dos baldes)
+HISTOGRAMAS = {
+    'dash_callback_latencia_segundos': ('Tempo de parede do callback no servidor', LIMITES_SEGUNDOS),
+    'dash_callback_cpu_segundos': ('Tempo de CPU da thread que executou o callback', LIMITES_SEGUNDOS),
+    'dash_callback_entrada_bytes': ('Tamanho do corpo da requisição do callback', LIMITES_BYTES),
+    'dash_callback_saida_bytes': ('Tamanho da resposta do callback', LIMITES_BYTES),
+}
+CONTADORES = {
+    'dash_callback_chamadas_total': 'Chamadas de callback por status HTTP',
+    'dash_callback_erros_total': 'Chamadas de callback que terminaram em erro (status >= 500)',
+}
+
+INTERVALO_GRAVACAO_SEGUNDOS = 1.0
+
+
+class RegistroMetricas:
+    """Histogramas e contadores por callback, protegidos por lock (seguro para workers com threads)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # {(nome_metrica, callback): [contagens por balde..., soma, total]}
+        self.histogramas = {}
+        # {(nome_metrica, callback, status): valor}
+        self.contadores = {}
+
+    def observar(self, nome, callback, valor):
+        limites = HISTOGRAMAS[nome][1]
+        with self._lock:
+            estado = self.histogramas.get((nome, callback))
+            if estado is None:
+                estado = [0] * len(limites) + [0.0, 0]
+                self.histogramas[(nome, callback)] = estado
+            for posicao, limite in enumerate(limites):
+                if valor <= limite:
+                    estado[posicao] += 1
+                    break
+            estado[-2] += valor
+            estado[-1] += 1
+
+    def incrementar(self, nome, callback, status=''):
+        with self._lock:
+            chave = (nome, callback, status)
+            self.contadores[chave] = self.contadores.get(chave, 0) + 1
+
+    def limpar(self):
+        """Zera os contadores (ex.: no worker recém-criado, descartando o que o processo mestre registrou)."""
+        with self._lock:
+            self.histogramas = {}
+            self.contadores = {}
+
+    def retrato(self):
+        """Cópia serializável do estado atual."""
+        with self._lock:
+            return {
+                'histogramas': [[nome, callback, list(estado)] for (nome, callback), estado in self.histogramas.items()],
+                'contadores': [[nome, callback, status, valor] for (nome, callback, status), valor in self.contadores.items()],
+            }
+
+
+def combinar_retratos(retratos):
+    """Soma os retratos de vários processos em um único estado."""
+    histogramas, contadores = {}, {}
+    for retrato in retratos:
+        for nome, callback, estado in retrato.get('histogramas', []):
+            if nome not in HISTOGRAMAS:
+                continue
+            atual = histogramas.setdefault((nome, callback), [0] * len(estado))
+            for posicao, valor in enumerate(estado):
+                atual[posicao] += valor
+        for nome, callback, status, valor in retrato.get('contadores', []):
+            contadores[(nome, callback, status)] = contadores.get((nome, callback, status), 0) + valor
+    return histogramas, contadores
+
+
+def _escapar_rotulo(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def formatar_prometheus(histogramas, contadores):
+    """Gera o texto no formato de exposição do Prometheus (versão 0.0.4)."""
+    linhas = []
+    for nome, (descricao, limites) in HISTOGRAMAS.items():
+        linhas.append(f'# HELP {nome} {descricao}')
+        linhas.append(f'# TYPE {nome} histogram')
+        for (nome_hist, callback), estado in sorted(histogramas.items()):
+            if nome_hist != nome:
+                continue
+            rotulo = f'callback="{_escapar_rotulo(callback)}"'
+            acumulado = 0
+            for limite, contagem in zip(limites, estado):
+                acumulado += contagem
+                linhas.append(f'{nome}_bucket{{{rotulo},le="{limite:g}"}} {acumulado}')
+            linhas.append(f'{nome}_bucket{{{rotulo},le="+Inf"}} {estado[-1]}')
+            linhas.append(f'{nome}_sum{{{rotulo}}} {estado[-2]:.6f}')
+            linhas.append(f'{nome}_count{{{rotulo}}} {estado[-1]}')
+    for nome, descricao in CONTADORES.items():
+        linhas.append(f'# HELP {nome} {descricao}')
+        linhas.append(f'# TYPE {nome} counter')
+        for (nome_contador, callback, status), valor in sorted(contadores.items()):
+            if nome_contador != nome:
+                continue
+            rotulos = f'callback="{_escapar_rotulo(callback)}"'
+            if status:
+                rotulos += f',status="{status}"'
+            linhas.append(f'{nome}{{{rotulos}}} {valor}')
+    return '\n'.join(linhas) + '\n'
+
+
+registro = RegistroMetricas()
+
+
+def _nome_callback(aplicativo, corpo):
+    """
+    Identifica o callback pelo nome da função registrada. Saídas que não correspondem a
+    nenhum callback viram 'desconhecido' para não criar rótulos arbitrários.
+    """
+    saida = corpo.get('output') if isinstance(corpo, dict) else None
+    entrada_mapa = aplicativo.callback_map.get(saida) if saida else None
+    if not entrada_mapa:
+        return 'desconhecido'
+    return getattr(entrada_mapa.get('callback'), '__name__', None) or saida
+
+
+def instrumentar_callbacks(aplicativo, diretorio_metricas=None, apenas_local=None):
+    """
+    Registra a medição dos callbacks e a rota /metrics no servidor Flask do aplicativo.
+
+    Args:
+        aplicativo (dash.Dash): Aplicativo com os callbacks já registrados
+        diretorio_metricas (str): Diretório compartilhado entre workers (padrão: env DIRETORIO_METRICAS)
+        apenas_local (bool): Se True, /metrics só responde a requisições de loopback
+            (padrão: True, a menos que METRICAS_PERMITIR_REMOTO=true)
+    """
+    servidor = aplicativo.server
+    diretorio = diretorio_metricas if diretorio_metricas is not None else os.environ.get('DIRETORIO_METRICAS')
+    if apenas_local is None:
+        apenas_local = os.environ.get('METRICAS_PERMITIR_REMOTO', 'False').lower() != 'true'
+    if diretorio:
+        os.makedirs(diretorio, exist_ok=True)
+    ultima_gravacao = [0.0]
+
+    def gravar_retrato(forcar=False):
+        """Grava o retrato deste processo no diretório compartilhado (no máximo uma vez por intervalo)."""
+        agora = time.monotonic()
+        if not diretorio or (not forcar and agora - ultima_gravacao[0] < INTERVALO_GRAVACAO_SEGUNDOS):
+            return
+        ultima_gravacao[0] = agora
+        caminho = os.path.join(diretorio, f'metricas-{os.getpid()}.json')
+        try:
+            with open(caminho + '.tmp', 'w') as arquivo:
+                json.dump(registro.retrato(), arquivo)
+            os.replace(caminho + '.tmp', caminho)
+        except OSError as erro:
+            logger.warning(f"Não foi possível gravar as métricas em {caminho}: {erro}")
+
+    @servidor.before_request
+    def iniciar_medicao():
+        if request.path.endswith(ROTA_CALLBACKS):
+            g.inicio_callback = (time.perf_counter(), time.thread_time())
+
+    @servidor.after_request
+    def registrar_medicao(resposta):
+        inicio = g.pop('inicio_callback', None)
+        if inicio is None:
+            return resposta
+        latencia = time.perf_counter() - inicio[0]
+        cpu = time.thread_time() - inicio[1]
+
+        callback = _nome_callback(aplicativo, request.get_json(silent=True))
+        bytes_entrada = request.content_length or len(request.get_data(cache=True))
+        bytes_saida = resposta.calculate_content_length() or 0
+
+        registro.observar('dash_callback_latencia_segundos', callback, latencia)
+        registro.observar('dash_callback_cpu_segundos', callback, cpu)
+        registro.observar('dash_callback_entrada_bytes', callback, bytes_entrada)
+        registro.observar('dash_callback_saida_bytes', callback, bytes_saida)
+        registro.incrementar('dash_callback_chamadas_total', callback, str(resposta.status_code))
+        if resposta.status_code >= 500:
+            registro.incrementar('dash_callback_erros_total', callback)
+        gravar_retrato()
+        return resposta
+
+    @servidor.route(ROTA_METRICAS)
+    def expor_metricas():
+        if apenas_local and request.remote_addr not in ('127.0.0.1', '::1', None):
+            return Response('Acesso permitido apenas localmente.\n', status=403, mimetype='text/plain')
+
+        retratos = [registro.retrato()]
+        if diretorio:
+            gravar_retrato(forcar=True)
+            retratos = []
+            for nome_arquivo in os.listdir(diretorio):
+                if not (nome_arquivo.startswith('metricas-') and nome_arquivo.endswith('.json')):
+                    continue
+                try:
+                    with open(os.path.join(diretorio, nome_arquivo)) as arquivo:
+                        retratos.append(json.load(arquivo))
+                except (OSError, ValueError):
+                    continue
+        return Response(formatar_prometheus(*combinar_retratos(retratos)),
+                        content_type='text/plain; version=0.0.4; charset=utf-8')
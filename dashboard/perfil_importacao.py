@@ -0,0 +1,150 @@
+# dashboard/perfil_importacao.py
+"""
+Relatório do tempo de importação do caminho de inicialização do dashboard.
+
+Executa `python -X importtime -c "import dashboard.app"` em um processo filho (o mesmo
+caminho percorrido por cada worker do gunicorn antes de atender a primeira requisição) e
+resume a saída: tempo total, tempo próprio somado por pacote de topo (sem dupla contagem),
+módulos do próprio dashboard e os módulos com maior tempo acumulado.
+
+Também lê um log já capturado na inicialização real, por exemplo:
+    PYTHONPROFILEIMPORTTIME=1 gunicorn dashboard.app:server 2> boot.log
+    python -m dashboard.perfil_importacao --arquivo boot.log
+
+Uso:
+    python -m dashboard.perfil_importacao --saida importacao.json
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+DIRETORIO_BASE = Path(__file__).resolve().parent.parent
+MODULO_PADRAO = 'dashboard.app'
+TOP_PADRAO = 20
+
+# "import time:       338 |      65082 |       plotly.express"
+_PADRAO_LINHA = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)\s*$')
+
+
+def executar_importtime(modulo=MODULO_PADRAO):
+    """
+    Importa o módulo em um processo filho com -X importtime.
+
+    Args:
+        modulo (str): Módulo a importar
+
+    Returns:
+        tuple: (saída de erro do processo com as linhas do importtime, tempo de parede em segundos)
+    """
+    ambiente = dict(os.environ)
+    ambiente['PYTHONPATH'] = os.pathsep.join(filter(None, [str(DIRETORIO_BASE), ambiente.get('PYTHONPATH')]))
+    inicio = time.perf_counter()
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+                              cwd=DIRETORIO_BASE, env=ambiente, capture_output=True, text=True)
+    duracao = time.perf_counter() - inicio
+    if processo.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {modulo}:\n{processo.stderr[-2000:]}")
+    return processo.stderr, duracao
+
+
+def ler_importtime(texto):
+    """
+    Extrai os registros do importtime; linhas que não são do importtime são ignoradas.
+
+    Returns:
+        list: [{'modulo', 'proprio_ms', 'acumulado_ms', 'nivel'}] na ordem da saída
+    """
+    registros = []
+    for linha in texto.splitlines():
+        correspondencia = _PADRAO_LINHA.match(linha)
+        if correspondencia is None:
+            continue
+        proprio, acumulado, recuo, modulo = correspondencia.groups()
+        registros.append({
+            'modulo': modulo,
+            'proprio_ms': int(proprio) / 1000,
+            'acumulado_ms': int(acumulado) / 1000,
+            'nivel': (len(recuo) - 1) // 2,
+        })
+    return registros
+
+
+def resumir_importacoes(registros, top=TOP_PADRAO):
+    """
+    Agrega os registros do importtime.
+
+    Args:
+        registros (list): Saída de ler_importtime
+        top (int): Quantidade de módulos no ranking por tempo acumulado
+
+    Returns:
+        dict: total, tempo por pacote de topo, módulos do dashboard e ranking por tempo acumulado
+    """
+    por_pacote = defaultdict(float)
+    for registro in registros:
+        por_pacote[registro['modulo'].split('.')[0]] += registro['proprio_ms']
+    total_ms = sum(registro['acumulado_ms'] for registro in registros if registro['nivel'] == 0)
+    return {
+        'total_ms': total_ms,
+        'modulos_importados': len(registros),
+        'por_pacote_ms': dict(sorted(por_pacote.items(), key=lambda item: -item[1])),
+        'dashboard': [registro for registro in registros if registro['modulo'].startswith('dashboard')],
+        'maiores_acumulados': sorted(registros, key=lambda registro: -registro['acumulado_ms'])[:top],
+    }
+
+
+def imprimir_resumo(resumo, top=TOP_PADRAO):
+    print(f"\nImportação: {resumo['total_ms']:.0f} ms em {resumo['modulos_importados']} módulos")
+    print(f"\n{'pacote':<32} {'próprio (ms)':>12} {'%':>6}")
+    for pacote, tempo in list(resumo['por_pacote_ms'].items())[:top]:
+        print(f"{pacote:<32} {tempo:>12.1f} {tempo / resumo['total_ms']:>6.1%}")
+    print(f"\n{'módulo do dashboard':<52} {'próprio (ms)':>12} {'acumulado (ms)':>15}")
+    for registro in sorted(resumo['dashboard'], key=lambda registro: -registro['acumulado_ms']):
+        print(f"{registro['modulo']:<52} {registro['proprio_ms']:>12.1f} {registro['acumulado_ms']:>15.1f}")
+    print(f"\n{'maiores tempos acumulados':<52} {'próprio (ms)':>12} {'acumulado (ms)':>15}")
+    for registro in resumo['maiores_acumulados']:
+        nome = '  ' * registro['nivel'] + registro['modulo']
+        print(f"{nome:<52} {registro['proprio_ms']:>12.1f} {registro['acumulado_ms']:>15.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Relatório do tempo de importação na inicialização do dashboard.")
+    parser.add_argument('--modulo', default=MODULO_PADRAO, help="Módulo importado (padrão: dashboard.app)")
+    parser.add_argument('--arquivo', default=None,
+                        help="Log já capturado com PYTHONPROFILEIMPORTTIME=1 (em vez de importar agora)")
+    parser.add_argument('--top', type=int, default=TOP_PADRAO, help="Linhas por tabela")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON com o resumo")
+    argumentos = parser.parse_args(argv)
+
+    if argumentos.arquivo:
+        texto = Path(argumentos.arquivo).read_text(errors='replace')
+        duracao = None
+    else:
+        texto, duracao = executar_importtime(argumentos.modulo)
+
+    registros = ler_importtime(texto)
+    if not registros:
+        print("Nenhuma linha do importtime encontrada.", file=sys.stderr)
+        return 1
+
+    resumo = resumir_importacoes(registros, argumentos.top)
+    resumo['processo_s'] = duracao
+    imprimir_resumo(resumo, argumentos.top)
+    if duracao is not None:
+        print(f"\nProcesso filho (interpretador + importação): {duracao:.2f} s")
+
+    if argumentos.saida:
+        with open(argumentos.saida, 'w') as arquivo:
+            json.dump(resumo, arquivo, indent=2, ensure_ascii=False)
+        print(f"\nResumo gravado em {argumentos.saida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,197 @@
+# dashboard/piramide_temporal.py
+"""
+Pirâmide de agregação temporal (diária, semana ISO, mês e ano) por loja e por tipo de loja.
+
+Cada nível guarda somas e contagens das métricas por (período, entidade, StateHoliday,
+SchoolHoliday), de modo que a média de qualquer recorte (tipos de loja, lojas, feriados)
+é obtida exatamente somando somas e contagens. Períodos cortados pelo intervalo de datas
+são recompostos a partir do nível diário, então o resultado é idêntico a agrupar as
+linhas brutas filtradas.
+
+O nível diário por loja não é materializado: ele é o próprio DataFrame principal,
+lido pelo índice de offsets por loja (extrair_lojas).
+"""
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from .data_loader import extrair_lojas
+
+NIVEIS_PIRAMIDE = ('D', 'W', 'M', 'Y')
+METRICAS_PIRAMIDE = ('Sales', 'Customers', 'SalesPerCustomer')
+
+_piramide_cache = {}
+
+
+def calcular_inicio_periodo(datas, nivel):
+    """
+    Retorna o início do período (dia, segunda-feira da semana ISO, 1º do mês ou 1º de janeiro).
+
+    Args:
+        datas (pd.Series): Datas (datetime64)
+        nivel (str): 'D', 'W', 'M' ou 'Y'
+
+    Returns:
+        pd.Series: Início do período de cada data (datetime64[ns])
+    """
+    if nivel == 'D':
+        return datas
+    if nivel == 'W':
+        return datas - pd.to_timedelta(datas.dt.dayofweek, unit='D')
+    unidade = 'datetime64[M]' if nivel == 'M' else 'datetime64[Y]'
+    return pd.Series(datas.to_numpy().astype(unidade).astype('datetime64[ns]'), index=datas.index)
+
+
+def calcular_fim_periodo(inicios, nivel):
+    """Retorna o último dia de cada período a partir do seu início."""
+    if nivel == 'D':
+        return inicios
+    if nivel == 'W':
+        return inicios + pd.Timedelta(days=6)
+    unidade = 'datetime64[M]' if nivel == 'M' else 'datetime64[Y]'
+    proximo = (inicios.to_numpy().astype(unidade) + 1).astype('datetime64[ns]')
+    return pd.Series(proximo, index=inicios.index) - pd.Timedelta(days=1)
+
+
+def _chaves_entidade(entidade):
+    """Colunas de agrupamento além do período: a entidade, o tipo de loja e os feriados."""
+    chaves = ['Store', 'StoreType'] if entidade == 'Store' else ['StoreType']
+    return chaves + ['StateHoliday', 'SchoolHoliday']
+
+
+def agregar_linhas(df_linhas, nivel, entidade):
+    """
+    Agrega linhas brutas (uma por loja e dia) em somas e contagens por período e entidade.
+
+    Args:
+        df_linhas (pd.DataFrame): Linhas do DataFrame principal
+        nivel (str): 'D', 'W', 'M' ou 'Y'
+        entidade (str): 'Store' ou 'StoreType'
+
+    Returns:
+        pd.DataFrame: Colunas Period, chaves da entidade, soma_<métrica> e n_<métrica>
+    """
+    periodo = calcular_inicio_periodo(df_linhas['Date'], nivel).rename('Period')
+    chaves = [periodo] + [df_linhas[coluna] for coluna in _chaves_entidade(entidade)]
+    agregacoes = {}
+    for metrica in METRICAS_PIRAMIDE:
+        agregacoes[f'soma_{metrica}'] = (metrica, 'sum')
+        agregacoes[f'n_{metrica}'] = (metrica, 'count')
+    nivel_df = df_linhas.groupby(chaves, observed=True, sort=True).agg(**agregacoes).reset_index()
+    colunas_soma = [f'soma_{metrica}' for metrica in METRICAS_PIRAMIDE]
+    nivel_df[colunas_soma] = nivel_df[colunas_soma].astype(np.float64)
+    return nivel_df
+
+
+def reagregar_nivel(nivel_df, nivel, entidade):
+    """Sobe linhas já agregadas (ex.: nível diário) para um nível mais grosso, somando somas e contagens."""
+    periodo = calcular_inicio_periodo(nivel_df['Period'], nivel).rename('Period')
+    chaves = [periodo] + [nivel_df[coluna] for coluna in _chaves_entidade(entidade)]
+    colunas_valores = [coluna for coluna in nivel_df.columns if coluna.startswith(('soma_', 'n_'))]
+    return nivel_df.groupby(chaves, observed=True, sort=True)[colunas_valores].sum().reset_index()
+
+
+def obter_nivel_piramide(df, entidade, nivel):
+    """
+    Retorna um nível da pirâmide do DataFrame, construindo-o apenas na primeira chamada.
+    O cache é associado ao objeto DataFrame e descartado quando ele deixa de existir.
+
+    Args:
+        df (pd.DataFrame): DataFrame principal
+        entidade (str): 'Store' (níveis W, M e Y) ou 'StoreType' (todos os níveis)
+        nivel (str): 'D', 'W', 'M' ou 'Y'
+
+    Returns:
+        pd.DataFrame: Nível ordenado por período
+    """
+    if entidade == 'Store' and nivel == 'D':
+        raise ValueError("O nível diário por loja é o próprio DataFrame principal; use extrair_lojas")
+
+    chave = id(df)
+    registro = _piramide_cache.get(chave)
+    if registro is None or registro[0]() is not df:
+        registro = (weakref.ref(df, lambda _ref, chave=chave: _piramide_cache.pop(chave, None)), {})
+        _piramide_cache[chave] = registro
+    niveis = registro[1]
+
+    if (entidade, nivel) not in niveis:
+        if entidade == 'StoreType' and nivel != 'D':
+            # Níveis por tipo de loja sobem a partir do diário por tipo (bem menor que as linhas brutas)
+            niveis[(entidade, nivel)] = reagregar_nivel(obter_nivel_piramide(df, 'StoreType', 'D'), nivel, entidade)
+        else:
+            niveis[(entidade, nivel)] = agregar_linhas(df, nivel, entidade)
+    return niveis[(entidade, nivel)]
+
+
+def consultar_piramide(df, nivel, metrica, data_inicio, data_fim, tipos_loja=None, lojas_especificas=None,
+                       feriado_estadual='all', feriado_escolar='all'):
+    """
+    Média da métrica por período e entidade (loja, se houver lojas específicas; senão tipo de loja).
+    Equivale a filtrar_dataframe seguido de groupby([período, entidade]).mean().unstack().
+
+    Args:
+        df (pd.DataFrame): DataFrame principal
+        nivel (str): 'D', 'W', 'M' ou 'Y'
+        metrica (str): 'Sales', 'Customers' ou 'SalesPerCustomer'
+        data_inicio, data_fim: Intervalo de datas (inclusivo)
+        tipos_loja (list): Tipos de loja a manter (vazio/None = todos)
+        lojas_especificas (list): Lojas a manter (vazio/None = agrupa por tipo de loja)
+        feriado_estadual (str): Código do feriado estadual ou 'all'
+        feriado_escolar (str): '0', '1' ou 'all'
+
+    Returns:
+        pd.DataFrame: Formato largo (índice 'Date_Period', uma coluna por entidade); vazio se não houver dados
+    """
+    inicio, fim = pd.to_datetime(data_inicio), pd.to_datetime(data_fim)
+    entidade = 'Store' if lojas_especificas else 'StoreType'
+
+    if entidade == 'Store':
+        linhas_lojas = extrair_lojas(df, lojas_especificas, inicio, fim)
+        if nivel == 'D':
+            partes = [agregar_linhas(linhas_lojas, 'D', entidade)]
+        else:
+            nivel_df = obter_nivel_piramide(df, entidade, nivel)
+            nivel_df = nivel_df[nivel_df['Store'].isin(lojas_especificas)]
+            # Períodos cortados pelo intervalo são recompostos a partir das linhas brutas
+            inicio_linhas = calcular_inicio_periodo(linhas_lojas['Date'], nivel)
+            parcial = (inicio_linhas < inicio) | (calcular_fim_periodo(inicio_linhas, nivel) > fim)
+            partes = [_periodos_completos(nivel_df, nivel, inicio, fim),
+                      agregar_linhas(linhas_lojas[parcial.to_numpy()], nivel, entidade)]
+    else:
+        nivel_df = obter_nivel_piramide(df, entidade, nivel)
+        partes = [_periodos_completos(nivel_df, nivel, inicio, fim)]
+        if nivel != 'D':
+            diario = obter_nivel_piramide(df, entidade, 'D')
+            diario = diario[(diario['Period'] >= inicio) & (diario['Period'] <= fim)]
+            inicio_diario = calcular_inicio_periodo(diario['Period'], nivel)
+            parcial = (inicio_diario < inicio) | (calcular_fim_periodo(inicio_diario, nivel) > fim)
+            partes.append(reagregar_nivel(diario[parcial.to_numpy()], nivel, entidade))
+
+    recorte = pd.concat(partes, ignore_index=True)
+    if tipos_loja:
+        recorte = recorte[recorte['StoreType'].isin(tipos_loja)]
+    if feriado_estadual != 'all':
+        recorte = recorte[recorte['StateHoliday'] == feriado_estadual]
+    if feriado_escolar != 'all':
+        recorte = recorte[recorte['SchoolHoliday'] == int(feriado_escolar)]
+    if recorte.empty:
+        return pd.DataFrame()
+
+    # Soma de somas / soma de contagens: média exata para qualquer combinação de filtros
+    totais = recorte.groupby(['Period', entidade], observed=True)[[f'soma_{metrica}', f'n_{metrica}']].sum()
+    medias = (totais[f'soma_{metrica}'] / totais[f'n_{metrica}'].replace(0, np.nan)).unstack(entidade)
+    if entidade == 'StoreType' and isinstance(df['StoreType'].dtype, pd.CategoricalDtype):
+        # Mantém todas as categorias como colunas, como o groupby(observed=False) das linhas brutas
+        medias = medias.reindex(columns=pd.CategoricalIndex(df['StoreType'].cat.categories, name='StoreType'))
+    medias.index.name = 'Date_Period'
+    medias.columns.name = entidade
+    return medias
+
+
+def _periodos_completos(nivel_df, nivel, inicio, fim):
+    """Linhas do nível cujos períodos estão inteiramente dentro de [inicio, fim]."""
+    posicao_inicio = nivel_df['Period'].searchsorted(inicio, side='left')
+    posicao_fim = nivel_df['Period'].searchsorted(fim, side='right')
+    candidatos = nivel_df.iloc[posicao_inicio:posicao_fim]
+    return candidatos[calcular_fim_periodo(candidatos['Period'], nivel) <= fim]
@@ -0,0 +1,34 @@
+# dashboard/previsao/__init__.py
+"""
+Previsão de vendas: modelos treinados fora do dashboard (jobs de linha de comando) e
+leitura dos resultados pela página "Previsão de Vendas".
+
+Os módulos não importam bibliotecas de modelagem no topo, para não pesar na inicialização
+dos workers (ver dashboard/perfil_importacao.py).
+"""
+from .comum import DIRETORIO_PREVISAO, HORIZONTE_PREVISAO, calcular_rmspe
+from .modelos_loja import treinar_modelos_lojas, carregar_modelo_loja
+from .tabela_previsoes import (
+    atualizar_tabela_previsoes,
+    carregar_metricas_lojas,
+    obter_tabela_previsoes,
+    filtrar_previsoes,
+)
+from .registro_modelos import (
+    registrar_modelo,
+    carregar_modelo,
+    obter_modelo_ativo,
+    ler_manifesto_registro,
+)
+from .pontuacao import obter_modelos_lojas, prever_lote
+from .simulador_promocoes import montar_plano_promocoes, simular_promocoes
+from .modelo_global import (
+    obter_modelo_global,
+    prever_modelo_global,
+    construir_grade_futura,
+)
+from .atributos_historicos import (
+    atualizar_atributos_historicos,
+    carregar_atributos_historicos,
+)
+from .backtest import executar_backtest, carregar_backtest
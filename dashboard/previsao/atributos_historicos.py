@@ -0,0 +1,267 @@
+# dashboard/previsao/atributos_historicos.py
+"""
+Repositório de atributos históricos por loja e dia (defasagens, médias móveis e eventos).
+
+Atributos calculados para cada (Store, Date) de loja aberta:
+- VendasLag7, VendasLag14, VendasLag364: vendas do mesmo dia da semana 1, 2 e 52 semanas
+  antes (o lag anual usa 364 dias para manter o dia da semana; NaN se a loja estava
+  fechada ou sem histórico);
+- MediaMovel7, MediaMovel28, MediaMovel91: média das vendas dos dias abertos na janela
+  anterior (sem incluir o próprio dia);
+- DiasDesdePromo: dias desde o último dia com promoção (0 no próprio dia da promoção);
+- DiasAteFeriado: dias até o próximo feriado estadual.
+As distâncias até eventos são limitadas a 60 dias (60 = nenhum evento no intervalo). Perto
+do fim do histórico, DiasAteFeriado ainda não é conhecido e fica NaN.
+
+O cálculo é vetorizado: o histórico de todas as lojas vira uma grade densa loja x dia
+(inclusive dias fechados, lidos dos dados brutos), onde as defasagens são deslocamentos de
+colunas, as janelas móveis são diferenças de somas acumuladas e os eventos usam acumulados
+de máximo/mínimo. O resultado fica em partes Parquet listadas em um manifesto versionado.
+Quando chegam novas datas, uma nova parte recebe essas datas e os últimos 60 dias já
+gravados, cujo DiasAteFeriado pode depender delas. Só a janela de histórico necessária entra
+no cálculo, e na leitura cada data vem da parte mais recente que a contém.
+
+Uso:
+    python -m dashboard.previsao.atributos_historicos [--reconstruir]
+"""
+import argparse
+import json
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow.dataset as ds
+
+from ..data_loader import carregar_dados_brutos, processar_dados_brutos, calcular_versao_dados
+from .comum import DIRETORIO_PREVISAO, gravar_json_atomico, gravar_parquet_atomico
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_ATRIBUTOS_HISTORICOS = DIRETORIO_PREVISAO / "atributos_historicos"
+VERSAO_ESQUEMA_ATRIBUTOS = 1  # incrementar ao mudar as definições: força a reconstrução completa
+
+DEFASAGENS_VENDAS = (7, 14, 364)  # múltiplos de 7 mantêm o mesmo dia da semana
+JANELAS_MEDIA_MOVEL = (7, 28, 91)
+LIMITE_DIAS_EVENTO = 60  # teto de DiasDesdePromo/DiasAteFeriado e janela revista a cada atualização
+COLUNAS_ATRIBUTOS_HISTORICOS = (
+    [f'VendasLag{dias}' for dias in DEFASAGENS_VENDAS]
+    + [f'MediaMovel{janela}' for janela in JANELAS_MEDIA_MOVEL]
+    + ['DiasDesdePromo', 'DiasAteFeriado']
+)
+# Histórico necessário antes da primeira data calculada em uma atualização incremental
+DIAS_HISTORICO_NECESSARIO = max(max(DEFASAGENS_VENDAS), max(JANELAS_MEDIA_MOVEL)) + 1
+
+
+# ==============================================================================
+# Cálculo vetorizado
+# ==============================================================================
+def _media_janela_anterior(vendas, janela):
+    """Média dos valores não nulos em [dia - janela, dia - 1] de cada linha da grade."""
+    n_lojas = vendas.shape[0]
+    presentes = ~np.isnan(vendas)
+    # Somas acumuladas com uma coluna zero à esquerda: soma[:, d] = total até o dia d - 1
+    somas = np.concatenate([np.zeros((n_lojas, 1)), np.cumsum(np.where(presentes, vendas, 0.0), axis=1)], axis=1)
+    contagens = np.concatenate([np.zeros((n_lojas, 1), dtype=np.int64), np.cumsum(presentes, axis=1)], axis=1)
+    fim = np.arange(vendas.shape[1])
+    inicio = np.maximum(fim - janela, 0)
+    total = somas[:, fim] - somas[:, inicio]
+    quantidade = contagens[:, fim] - contagens[:, inicio]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(quantidade > 0, total / quantidade, np.nan)
+
+
+def calcular_atributos_historicos(df_vendas, data_inicio=None):
+    """
+    Calcula os atributos históricos dos dias de loja aberta.
+
+    Args:
+        df_vendas (pd.DataFrame): Store, Date, Sales, Promo, StateHoliday e, se houver, Open
+                                  (dados brutos com dias fechados dão feriados e lags mais completos)
+        data_inicio (pd.Timestamp): Primeira data devolvida (as anteriores servem só de histórico)
+
+    Returns:
+        pd.DataFrame: Store, Date e COLUNAS_ATRIBUTOS_HISTORICOS (float32), ordenado por (Store, Date)
+    """
+    datas = pd.DatetimeIndex(df_vendas['Date'])
+    data_base = datas.min()
+    dias = (datas - data_base).days.to_numpy()
+    lojas, posicao_loja = np.unique(df_vendas['Store'].to_numpy(), return_inverse=True)
+    forma = (len(lojas), int(dias.max()) + 1)
+    aberta = df_vendas['Open'].to_numpy() == 1 if 'Open' in df_vendas.columns else np.ones(len(df_vendas), dtype=bool)
+
+    # Grade densa loja x dia (dias ausentes ficam NaN/False)
+    vendas = np.full(forma, np.nan)
+    vendas[posicao_loja, dias] = np.where(aberta, df_vendas['Sales'].to_numpy(dtype=np.float64), np.nan)
+    promo = np.zeros(forma, dtype=bool)
+    promo[posicao_loja, dias] = df_vendas['Promo'].to_numpy() == 1
+    feriado = np.zeros(forma, dtype=bool)
+    feriado[posicao_loja, dias] = df_vendas['StateHoliday'].astype(str).to_numpy() != '0'
+
+    grades = []
+    for defasagem in DEFASAGENS_VENDAS:
+        deslocada = np.full(forma, np.nan)
+        deslocada[:, defasagem:] = vendas[:, :-defasagem]
+        grades.append(deslocada)
+    grades.extend(_media_janela_anterior(vendas, janela) for janela in JANELAS_MEDIA_MOVEL)
+
+    # Distâncias até eventos: limitadas ao teto e NaN quando a grade não cobre o intervalo inteiro
+    indices_dias = np.arange(forma[1])
+    ultimo_promo = np.maximum.accumulate(np.where(promo, indices_dias, -forma[1]), axis=1)
+    dias_desde_promo = np.minimum(indices_dias - ultimo_promo, LIMITE_DIAS_EVENTO).astype(np.float64)
+    dias_desde_promo[:, indices_dias < LIMITE_DIAS_EVENTO] = np.where(
+        ultimo_promo[:, indices_dias < LIMITE_DIAS_EVENTO] >= 0, dias_desde_promo[:, indices_dias < LIMITE_DIAS_EVENTO], np.nan)
+    grades.append(dias_desde_promo)
+    proximo_feriado = np.minimum.accumulate(np.where(feriado, indices_dias, 2 * forma[1])[:, ::-1], axis=1)[:, ::-1]
+    dias_ate_feriado = np.minimum(proximo_feriado - indices_dias, LIMITE_DIAS_EVENTO).astype(np.float64)
+    sem_cobertura = indices_dias > forma[1] - 1 - LIMITE_DIAS_EVENTO
+    dias_ate_feriado[:, sem_cobertura] = np.where(
+        proximo_feriado[:, sem_cobertura] < forma[1], dias_ate_feriado[:, sem_cobertura], np.nan)
+    grades.append(dias_ate_feriado)
+
+    # Volta da grade para as linhas de loja aberta, na ordem (Store, Date)
+    selecionadas = aberta.copy()
+    if data_inicio is not None:
+        selecionadas &= datas >= pd.Timestamp(data_inicio)
+    ordem = np.lexsort((dias[selecionadas], posicao_loja[selecionadas]))
+    linhas_loja = posicao_loja[selecionadas][ordem]
+    linhas_dia = dias[selecionadas][ordem]
+    atributos = pd.DataFrame({
+        'Store': lojas[linhas_loja],
+        'Date': data_base + pd.to_timedelta(linhas_dia, unit='D'),
+    })
+    for coluna, grade in zip(COLUNAS_ATRIBUTOS_HISTORICOS, grades):
+        atributos[coluna] = grade[linhas_loja, linhas_dia].astype(np.float32)
+    return atributos
+
+
+# ==============================================================================
+# Persistência incremental
+# ==============================================================================
+def _ler_manifesto(diretorio):
+    try:
+        with open(diretorio / 'manifesto.json') as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+
+def _carregar_vendas():
+    """Dados brutos (com dias fechados); sem eles, o dataset processado (só dias abertos)."""
+    df_vendas, _ = carregar_dados_brutos()
+    if df_vendas is None:
+        df_vendas = processar_dados_brutos()
+    if df_vendas is None or df_vendas.empty:
+        raise RuntimeError("Sem dados de vendas para calcular os atributos históricos")
+    return df_vendas
+
+
+def atualizar_atributos_historicos(df_vendas=None, diretorio=DIRETORIO_ATRIBUTOS_HISTORICOS, reconstruir=False):
+    """
+    Estende o repositório com as datas posteriores à última gravada (ou o reconstrói do zero).
+
+    A nova parte começa LIMITE_DIAS_EVENTO dias antes da última data gravada e substitui,
+    na leitura, as linhas dessas datas nas partes anteriores.
+
+    A reconstrução completa acontece também quando não há manifesto ou a versão do esquema mudou.
+
+    Args:
+        df_vendas (pd.DataFrame): Vendas (padrão: dados brutos)
+        diretorio (Path): Diretório das partes Parquet e do manifesto
+        reconstruir (bool): Ignora as partes existentes
+
+    Returns:
+        int: Linhas gravadas na nova parte
+    """
+    if df_vendas is None:
+        df_vendas = _carregar_vendas()
+    diretorio.mkdir(parents=True, exist_ok=True)
+    manifesto = _ler_manifesto(diretorio)
+    if reconstruir or manifesto is None or manifesto.get('versao_esquema') != VERSAO_ESQUEMA_ATRIBUTOS:
+        for parte in diretorio.glob('parte-*.parquet'):
+            parte.unlink()
+        manifesto = {'versao_esquema': VERSAO_ESQUEMA_ATRIBUTOS, 'colunas': COLUNAS_ATRIBUTOS_HISTORICOS,
+                     'ultima_data': None, 'partes': []}
+
+    ultima_data = pd.Timestamp(manifesto['ultima_data']) if manifesto['ultima_data'] else None
+    nova_ultima_data = pd.Timestamp(df_vendas['Date'].max())
+    if ultima_data is not None and nova_ultima_data <= ultima_data:
+        logger.info(f"Atributos históricos já atualizados até {ultima_data.date()}")
+        return 0
+
+    inicio = time.perf_counter()
+    if ultima_data is None:
+        primeira_data = pd.Timestamp(df_vendas['Date'].min())
+        atributos = calcular_atributos_historicos(df_vendas)
+    else:
+        # Só o histórico necessário para as datas recalculadas entra na grade
+        primeira_data = ultima_data - pd.Timedelta(days=LIMITE_DIAS_EVENTO - 1)
+        janela = df_vendas[df_vendas['Date'] >= primeira_data - pd.Timedelta(days=DIAS_HISTORICO_NECESSARIO)]
+        atributos = calcular_atributos_historicos(janela, data_inicio=primeira_data)
+
+    nome_parte = f"parte-{primeira_data:%Y%m%d}-{nova_ultima_data:%Y%m%d}.parquet"
+    gravar_parquet_atomico(atributos, diretorio / nome_parte)
+    # A parte só passa a ser lida depois de entrar no manifesto
+    manifesto['partes'].append({'arquivo': nome_parte, 'data_inicio': primeira_data.isoformat()})
+    manifesto['ultima_data'] = nova_ultima_data.isoformat()
+    manifesto['versao_dados'] = calcular_versao_dados('brutos', nova_ultima_data.date())
+    gravar_json_atomico(manifesto, diretorio / 'manifesto.json')
+    logger.info(f"Atributos históricos: {len(atributos):,} linhas gravadas em {nome_parte} "
+                f"({time.perf_counter() - inicio:.1f} s)")
+    return len(atributos)
+
+
+def carregar_atributos_historicos(lojas=None, data_inicio=None, data_fim=None, colunas=None,
+                                  diretorio=DIRETORIO_ATRIBUTOS_HISTORICOS):
+    """
+    Lê os atributos do repositório, filtrando lojas, datas e colunas já na leitura do Parquet.
+
+    Args:
+        lojas (list): IDs das lojas (padrão: todas)
+        data_inicio, data_fim (str ou datetime): Intervalo de datas (inclusivo)
+        colunas (list): Atributos desejados (padrão: todos); Store e Date sempre vêm
+        diretorio (Path): Diretório do repositório
+
+    Returns:
+        pd.DataFrame: Store, Date e os atributos, ordenado por (Store, Date); None se o repositório não existir
+    """
+    manifesto = _ler_manifesto(diretorio)
+    if manifesto is None or not manifesto['partes']:
+        return None
+
+    condicoes = []
+    if lojas is not None:
+        condicoes.append(ds.field('Store').isin(list(lojas)))
+    if data_inicio is not None:
+        condicoes.append(ds.field('Date') >= pd.Timestamp(data_inicio))
+    if data_fim is not None:
+        condicoes.append(ds.field('Date') <= pd.Timestamp(data_fim))
+
+    colunas = ['Store', 'Date'] + list(colunas or COLUNAS_ATRIBUTOS_HISTORICOS)
+    partes = manifesto['partes']
+    tabelas = []
+    for posicao, parte in enumerate(partes):
+        # Cada parte vale até o início da parte seguinte, que a revisa
+        condicoes_parte = list(condicoes)
+        if posicao + 1 < len(partes):
+            condicoes_parte.append(ds.field('Date') < pd.Timestamp(partes[posicao + 1]['data_inicio']))
+        filtro = None
+        for condicao in condicoes_parte:
+            filtro = condicao if filtro is None else filtro & condicao
+        dataset = ds.dataset(str(diretorio / parte['arquivo']), format='parquet')
+        tabelas.append(dataset.to_table(columns=colunas, filter=filtro).to_pandas())
+    return pd.concat(tabelas, ignore_index=True).sort_values(['Store', 'Date'], kind='mergesort').reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Atualiza o repositório de atributos históricos por loja e dia.")
+    parser.add_argument('--reconstruir', action='store_true', help="Recalcula todo o histórico")
+    argumentos = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    linhas = atualizar_atributos_historicos(reconstruir=argumentos.reconstruir)
+    print(f"{linhas:,} linhas gravadas em {time.perf_counter() - inicio:.1f} s ({DIRETORIO_ATRIBUTOS_HISTORICOS})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,254 @@
+# dashboard/previsao/backtest.py
+"""
+Backtest com origem móvel: avalia os modelos como na competição da Rossmann (RMSPE em
+horizontes de 6 semanas), repetindo treino e validação em vários cortes de data.
+
+Para cada corte, os modelos são treinados com o histórico até a data do corte e avaliados
+nos 42 dias seguintes. Modelos avaliados:
+- ingenuo_sazonal e ridge: os modelos por loja de modelos_loja;
+- global: o HistGradientBoosting de modelo_global.
+
+Os dados são preparados uma única vez em arrays NumPy: ordenados por (Store, Date) para os
+modelos por loja e por Date para o modelo global, cuja matriz float32 é montada uma vez.
+Treino e validação de cada corte são fatias desses arrays (views, sem cópia), localizadas
+por busca binária nas datas. As tarefas (corte x família de modelos) rodam em um pool de
+processos. Os arrays chegam aos processos pelo initializer: com fork (padrão no Linux) são
+herdados sem cópia, e nos demais sistemas são serializados uma vez por processo.
+
+RMSPE e MAPE são calculados por loja, por tipo de loja e no total (np.bincount) e gravados
+em uma tabela lida pela página de previsão.
+
+Uso:
+    python -m dashboard.previsao.backtest --cortes 6 --processos 4
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from ..data_loader import processar_dados_brutos, ordenar_por_loja_e_data, construir_indice_lojas
+from .comum import (DIRETORIO_PREVISAO, HORIZONTE_PREVISAO, calcular_erros_por_grupo, indicador_feriado_estadual,
+                    gravar_parquet_atomico, ler_parquet_em_cache)
+from .modelos_loja import (MINIMO_REGISTROS_TREINO, MODELO_RIDGE, MODELO_INGENUO, montar_atributos_loja,
+                           calcular_base_sazonal, ajustar_ridge, prever_ridge)
+from .modelo_global import (calcular_niveis_lojas, montar_matriz_atributos, ajustar_modelo_global,
+                            adicionar_atributos_historicos)
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_BACKTEST = DIRETORIO_PREVISAO / "backtest.parquet"
+MODELO_GLOBAL = 'global'
+FAMILIAS_MODELOS = ('lojas', 'global')  # 'lojas' avalia ingenuo_sazonal e ridge na mesma passada
+N_CORTES_PADRAO = 6
+HISTORICO_MINIMO_DIAS = 365  # o primeiro corte deixa pelo menos um ano de treino
+
+# Arrays compartilhados com os processos do pool (preenchidos por _inicializar_processo)
+_dados_processo = {}
+
+
+def calcular_cortes(datas, n_cortes=N_CORTES_PADRAO, horizonte=HORIZONTE_PREVISAO, passo=None):
+    """
+    Datas de corte, da mais recente (horizonte dias antes do fim) para trás, a cada 'passo' dias.
+
+    Returns:
+        list: Cortes em ordem cronológica com pelo menos HISTORICO_MINIMO_DIAS de treino
+    """
+    inicio, fim = pd.Timestamp(datas.min()), pd.Timestamp(datas.max())
+    passo = passo or horizonte
+    cortes = [fim - pd.Timedelta(days=horizonte + passo * i) for i in range(n_cortes)]
+    return sorted(corte for corte in cortes if corte - inicio >= pd.Timedelta(days=HISTORICO_MINIMO_DIAS))
+
+
+def preparar_dados_backtest(df, primeiro_corte):
+    """
+    Converte o dataset nos arrays usados pelas tarefas (montados uma única vez).
+
+    Args:
+        df (pd.DataFrame): Dataset processado
+        primeiro_corte (pd.Timestamp): Corte mais antigo; o nível das lojas do modelo global usa só
+                                       o histórico até ele, para ser o mesmo em todos os cortes sem vazamento
+
+    Returns:
+        dict: Arrays por (Store, Date), índice de lojas e arrays/matriz por Date
+    """
+    df_lojas = ordenar_por_loja_e_data(df)
+    tipos = df_lojas['StoreType'].astype(str).to_numpy()
+    dados = {
+        'lojas': {
+            'Store': df_lojas['Store'].to_numpy(),
+            'Date': df_lojas['Date'].to_numpy(),
+            'DayOfWeek': df_lojas['DayOfWeek'].to_numpy(dtype=np.int64),
+            'Sales': df_lojas['Sales'].to_numpy(dtype=np.float64),
+            'Promo': df_lojas['Promo'].to_numpy(),
+            'StateHoliday': indicador_feriado_estadual(df_lojas['StateHoliday']),
+            'SchoolHoliday': df_lojas['SchoolHoliday'].to_numpy(),
+            'StoreType': tipos,
+            'indice': construir_indice_lojas(df_lojas),
+        }
+    }
+
+    # Modelo global: linhas em ordem de data, para que o treino de cada corte seja um prefixo.
+    # VendasLag364 (repositório de atributos históricos) só usa vendas anteriores ao horizonte
+    ordem = np.argsort(df_lojas['Date'].to_numpy(), kind='stable')
+    df_datas = adicionar_atributos_historicos(df_lojas).iloc[ordem]
+    antes_primeiro_corte = (df_datas['Date'] <= primeiro_corte).to_numpy()
+    niveis = calcular_niveis_lojas(df_datas['Store'].to_numpy()[antes_primeiro_corte],
+                                   df_datas['Sales'].to_numpy()[antes_primeiro_corte])
+    dados['global'] = {
+        'Store': df_datas['Store'].to_numpy(),
+        'Date': df_datas['Date'].to_numpy(),
+        'Sales': df_datas['Sales'].to_numpy(dtype=np.float64),
+        'StoreType': tipos[ordem],
+        'matriz': montar_matriz_atributos(df_datas, niveis),
+    }
+    return dados
+
+
+def _inicializar_processo(dados):
+    _dados_processo.clear()
+    _dados_processo.update(dados)
+
+
+def _avaliar_lojas(corte, fim_validacao):
+    """Ingênuo sazonal e Ridge de cada loja no corte (treino e validação são fatias da loja)."""
+    dados = _dados_processo['lojas']
+    datas = dados['Date']
+    posicoes, previsto_ridge, previsto_ingenuo = [], [], []
+    for inicio, fim in dados['indice'].values():
+        datas_loja = datas[inicio:fim]
+        fim_treino = inicio + np.searchsorted(datas_loja, corte, side='right')
+        fim_val = inicio + np.searchsorted(datas_loja, fim_validacao, side='right')
+        if fim_treino - inicio < MINIMO_REGISTROS_TREINO or fim_val == fim_treino:
+            continue
+        fatia = slice(inicio, fim_val)
+        atributos = montar_atributos_loja(datas[fatia], dados['DayOfWeek'][fatia], dados['Promo'][fatia],
+                                          dados['StateHoliday'][fatia], dados['SchoolHoliday'][fatia])
+        n_treino = fim_treino - inicio
+        coeficientes, intercepto = ajustar_ridge(atributos[:n_treino], dados['Sales'][inicio:fim_treino])
+        previsto_ridge.append(prever_ridge(atributos[n_treino:], coeficientes, intercepto))
+        base = calcular_base_sazonal(datas[inicio:fim_treino], dados['DayOfWeek'][inicio:fim_treino],
+                                     dados['Sales'][inicio:fim_treino])
+        previsto_ingenuo.append(np.nan_to_num(base[dados['DayOfWeek'][fim_treino:fim_val] - 1], nan=0.0))
+        posicoes.append(np.arange(fim_treino, fim_val))
+
+    if not posicoes:
+        return {}
+    posicoes = np.concatenate(posicoes)
+    return {
+        MODELO_RIDGE: (dados, posicoes, np.concatenate(previsto_ridge)),
+        MODELO_INGENUO: (dados, posicoes, np.concatenate(previsto_ingenuo)),
+    }
+
+
+def _avaliar_global(corte, fim_validacao):
+    """Modelo global treinado com o prefixo de datas até o corte."""
+    dados = _dados_processo['global']
+    fim_treino = np.searchsorted(dados['Date'], corte, side='right')
+    fim_val = np.searchsorted(dados['Date'], fim_validacao, side='right')
+    if fim_val == fim_treino:
+        return {}
+    estimador = ajustar_modelo_global(dados['matriz'][:fim_treino], dados['Sales'][:fim_treino])
+    previsto = np.expm1(estimador.predict(dados['matriz'][fim_treino:fim_val])).clip(min=0)
+    return {MODELO_GLOBAL: (dados, np.arange(fim_treino, fim_val), previsto)}
+
+
+def avaliar_corte(familia, corte, horizonte=HORIZONTE_PREVISAO):
+    """
+    Treina e avalia uma família de modelos em um corte (executado em um processo do pool).
+
+    Returns:
+        pd.DataFrame: Modelo, Corte, Nivel ('loja', 'tipo', 'total'), Chave, RMSPE, MAPE e N
+    """
+    corte = np.datetime64(corte)
+    fim_validacao = corte + np.timedelta64(horizonte, 'D')
+    avaliacoes = _avaliar_lojas(corte, fim_validacao) if familia == 'lojas' else _avaliar_global(corte, fim_validacao)
+
+    tabelas = []
+    for modelo, (dados, posicoes, previsto) in avaliacoes.items():
+        reais = dados['Sales'][posicoes]
+        for nivel, grupos in (('loja', dados['Store'][posicoes]), ('tipo', dados['StoreType'][posicoes]),
+                              ('total', np.zeros(len(posicoes), dtype=np.int8))):
+            erros = calcular_erros_por_grupo(grupos, reais, previsto)
+            erros['Chave'] = erros['Chave'].astype(str) if nivel != 'total' else 'Total'
+            erros.insert(0, 'Nivel', nivel)
+            tabelas.append(erros.assign(Modelo=modelo, Corte=pd.Timestamp(corte)))
+    return pd.concat(tabelas, ignore_index=True) if tabelas else pd.DataFrame()
+
+
+def executar_backtest(df=None, n_cortes=N_CORTES_PADRAO, passo=None, horizonte=HORIZONTE_PREVISAO,
+                      familias=FAMILIAS_MODELOS, processos=None, caminho=CAMINHO_BACKTEST):
+    """
+    Executa todos os cortes em paralelo e grava a tabela de resultados.
+
+    Args:
+        df (pd.DataFrame): Dataset processado (padrão: processar_dados_brutos)
+        n_cortes (int): Número de cortes
+        passo (int): Dias entre cortes (padrão: o horizonte)
+        horizonte (int): Dias avaliados após cada corte
+        familias (tuple): 'lojas' e/ou 'global'
+        processos (int): Processos do pool (padrão: nº de CPUs; 1 executa no próprio processo)
+        caminho (Path): Parquet de saída
+
+    Returns:
+        pd.DataFrame: Resultados por modelo, corte e nível
+    """
+    if df is None:
+        df = processar_dados_brutos()
+    if df is None or df.empty:
+        raise RuntimeError("Dataset processado indisponível para o backtest")
+
+    cortes = calcular_cortes(df['Date'], n_cortes, horizonte, passo)
+    if not cortes:
+        raise ValueError(f"Histórico curto demais para {n_cortes} cortes com {HISTORICO_MINIMO_DIAS} dias de treino")
+    inicio = time.perf_counter()
+    dados = preparar_dados_backtest(df, cortes[0])
+    logger.info(f"Backtest: dados preparados em {time.perf_counter() - inicio:.1f} s; "
+                f"cortes {cortes[0].date()} a {cortes[-1].date()}")
+
+    # Tarefas mais longas (modelo global) primeiro, para não ficarem para o fim do pool
+    tarefas = [(familia, corte) for familia in sorted(familias, key=lambda f: f != 'global') for corte in cortes]
+    processos = min(processos or os.cpu_count() or 1, len(tarefas))
+    if processos == 1:
+        _inicializar_processo(dados)
+        resultados = [avaliar_corte(familia, corte, horizonte) for familia, corte in tarefas]
+    else:
+        with ProcessPoolExecutor(max_workers=processos, initializer=_inicializar_processo, initargs=(dados,)) as executor:
+            resultados = list(executor.map(avaliar_corte, *zip(*tarefas), [horizonte] * len(tarefas)))
+
+    df_resultados = pd.concat(resultados, ignore_index=True)
+    df_resultados = df_resultados[['Modelo', 'Corte', 'Nivel', 'Chave', 'RMSPE', 'MAPE', 'N']]
+    gravar_parquet_atomico(df_resultados, caminho)
+    logger.info(f"Backtest: {len(tarefas)} tarefas em {time.perf_counter() - inicio:.1f} s ({processos} processos)")
+    return df_resultados
+
+
+def carregar_backtest():
+    """Resultados do último backtest (None se ainda não executado)."""
+    return ler_parquet_em_cache(CAMINHO_BACKTEST)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest com origem móvel (RMSPE em horizontes de 6 semanas).")
+    parser.add_argument('--cortes', type=int, default=N_CORTES_PADRAO, help="Número de cortes (padrão: 6)")
+    parser.add_argument('--passo', type=int, default=None, help="Dias entre cortes (padrão: 42)")
+    parser.add_argument('--modelos', nargs='+', choices=FAMILIAS_MODELOS, default=list(FAMILIAS_MODELOS))
+    parser.add_argument('--processos', type=int, default=None, help="Processos em paralelo (padrão: nº de CPUs)")
+    argumentos = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    df_resultados = executar_backtest(n_cortes=argumentos.cortes, passo=argumentos.passo,
+                                      familias=tuple(argumentos.modelos), processos=argumentos.processos)
+    total = df_resultados[df_resultados['Nivel'] == 'total']
+    print(total.pivot(index='Corte', columns='Modelo', values='RMSPE').to_string(float_format='{:.4f}'.format))
+    print("\nRMSPE médio por tipo de loja:")
+    por_tipo = df_resultados[df_resultados['Nivel'] == 'tipo']
+    print(por_tipo.pivot_table(index='Chave', columns='Modelo', values='RMSPE').to_string(float_format='{:.4f}'.format))
+    print(f"\nBacktest em {time.perf_counter() - inicio:.1f} s; resultados em {CAMINHO_BACKTEST}")
+
+
+if __name__ == '__main__':
+    main()
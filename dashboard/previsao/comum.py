@@ -0,0 +1,161 @@
+# dashboard/previsao/comum.py
+"""
+Constantes e funções compartilhadas pelos módulos de previsão: diretórios dos artefatos,
+horizonte, métrica da competição (RMSPE), atributos de calendário, calendário futuro e
+gravação/leitura dos artefatos.
+"""
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ..data_loader import DIRETORIO_DADOS
+
+# Artefatos gerados pelos jobs de previsão (modelos, previsões), ao lado dos dados de origem
+DIRETORIO_PREVISAO = Path(os.environ.get("DIRETORIO_PREVISAO", DIRETORIO_DADOS / "previsao"))
+
+HORIZONTE_PREVISAO = 42  # 6 semanas, como na competição da Rossmann
+CICLO_PROMO_DIAS = 14    # as promoções da rede se repetem em semanas alternadas
+SEMANAS_BASE_SAZONAL = 4  # semanas usadas pelo ingênuo sazonal e para detectar os dias abertos
+
+# {caminho: (mtime_ns, DataFrame)} dos Parquet lidos por ler_parquet_em_cache
+_parquets_cache = {}
+
+
+def calcular_rmspe(reais, previstos):
+    """
+    Raiz do erro percentual quadrático médio, ignorando dias com venda zero (como na competição).
+
+    Args:
+        reais (array-like): Vendas observadas
+        previstos (array-like): Vendas previstas
+
+    Returns:
+        float: RMSPE (NaN se não houver dias com venda)
+    """
+    reais = np.asarray(reais, dtype=np.float64)
+    previstos = np.asarray(previstos, dtype=np.float64)
+    mascara = reais > 0
+    if not mascara.any():
+        return np.nan
+    return float(np.sqrt(np.mean(((reais[mascara] - previstos[mascara]) / reais[mascara]) ** 2)))
+
+
+def calcular_erros_por_grupo(grupos, reais, previstos):
+    """
+    RMSPE e MAPE por grupo (ex.: loja ou tipo de loja) em uma única passada vetorizada.
+
+    Dias com venda zero são ignorados, como em calcular_rmspe.
+
+    Args:
+        grupos (np.ndarray): Grupo de cada linha
+        reais, previstos (np.ndarray): Vendas observadas e previstas
+
+    Returns:
+        pd.DataFrame: Chave, RMSPE, MAPE e N (dias avaliados) por grupo
+    """
+    reais = np.asarray(reais, dtype=np.float64)
+    mascara = reais > 0
+    chaves, posicoes = np.unique(np.asarray(grupos)[mascara], return_inverse=True)
+    erro_relativo = (reais[mascara] - np.asarray(previstos, dtype=np.float64)[mascara]) / reais[mascara]
+    contagens = np.bincount(posicoes, minlength=len(chaves))
+    return pd.DataFrame({
+        'Chave': chaves,
+        'RMSPE': np.sqrt(np.bincount(posicoes, weights=erro_relativo ** 2, minlength=len(chaves)) / contagens),
+        'MAPE': np.bincount(posicoes, weights=np.abs(erro_relativo), minlength=len(chaves)) / contagens,
+        'N': contagens,
+    })
+
+
+def indicador_feriado_estadual(coluna):
+    """Converte StateHoliday ('0'/'a'/'b'/'c', categórica ou numérica) em 0/1."""
+    return (coluna.astype(str) != '0').to_numpy(dtype=np.uint8)
+
+
+def construir_calendario_futuro(df_loja, horizonte=HORIZONTE_PREVISAO):
+    """
+    Calendário dos próximos dias de uma loja a partir do seu histórico.
+
+    As promoções repetem o ciclo de 14 dias observado no fim do histórico. Feriados futuros
+    não são conhecidos e ficam zerados.
+
+    Args:
+        df_loja (pd.DataFrame): Histórico de uma loja ordenado por data (Date, Promo)
+        horizonte (int): Número de dias a prever
+
+    Returns:
+        pd.DataFrame: Date, DayOfWeek, Promo, StateHoliday, SchoolHoliday
+    """
+    ultima_data = df_loja['Date'].iloc[-1]
+    datas = pd.date_range(ultima_data + pd.Timedelta(days=1), periods=horizonte, freq='D')
+    dias_apos_fim = np.arange(1, horizonte + 1)
+    # Data equivalente no último ciclo observado (mesmo dia do ciclo de 14 dias)
+    voltas = (dias_apos_fim - 1) // CICLO_PROMO_DIAS + 1
+    datas_referencia = datas - pd.to_timedelta(voltas * CICLO_PROMO_DIAS, unit='D')
+    promo_historica = pd.Series(df_loja['Promo'].to_numpy(), index=df_loja['Date'].to_numpy())
+    promo = promo_historica.reindex(datas_referencia).fillna(0).to_numpy(dtype=np.uint8)
+    return pd.DataFrame({
+        'Date': datas,
+        'DayOfWeek': (datas.dayofweek + 1).to_numpy(dtype=np.uint8),
+        'Promo': promo,
+        'StateHoliday': '0',
+        'SchoolHoliday': np.zeros(horizonte, dtype=np.uint8),
+    })
+
+
+# ==============================================================================
+# Gravação e leitura dos artefatos
+# ==============================================================================
+def gravar_atomico(caminho, gravar):
+    """
+    Grava um arquivo em um temporário ao lado do destino e o substitui de uma vez com os.replace.
+
+    Leitores nunca veem um arquivo parcial; se a gravação falhar, o temporário é removido e o
+    arquivo anterior continua intacto.
+
+    Args:
+        caminho (str ou Path): Arquivo de destino
+        gravar (callable): Recebe o caminho temporário (com a mesma extensão do destino) e grava nele
+    """
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_name(f'.{caminho.stem}.{os.getpid()}.tmp{caminho.suffix}')
+    try:
+        gravar(temporario)
+        os.replace(temporario, caminho)
+    except BaseException:
+        temporario.unlink(missing_ok=True)
+        raise
+
+
+def gravar_parquet_atomico(df, caminho):
+    """Grava o DataFrame em Parquet com gravar_atomico."""
+    gravar_atomico(caminho, lambda temporario: df.to_parquet(temporario, index=False))
+
+
+def gravar_json_atomico(dados, caminho):
+    """Grava um manifesto JSON com gravar_atomico."""
+    def gravar(temporario):
+        with open(temporario, 'w') as arquivo:
+            json.dump(dados, arquivo, indent=2, ensure_ascii=False)
+    gravar_atomico(caminho, gravar)
+
+
+def ler_parquet_em_cache(caminho):
+    """
+    Lê um Parquet de resultados, relendo apenas quando o arquivo for regravado.
+
+    Returns:
+        pd.DataFrame: Conteúdo do arquivo (None se ele não existir)
+    """
+    try:
+        modificacao = os.stat(caminho).st_mtime_ns
+    except OSError:
+        return None
+    registro = _parquets_cache.get(caminho)
+    if registro is None or registro[0] != modificacao:
+        registro = (modificacao, pd.read_parquet(caminho))
+        _parquets_cache[caminho] = registro
+    return registro[1]
@@ -0,0 +1,168 @@
+# dashboard/previsao/intervalos_bootstrap.py
+"""
+Intervalos de previsão por bootstrap dos resíduos de cada loja.
+
+Os resíduos do modelo escolhido (log(1 + vendas) observado menos ajustado, no último ano
+do histórico) de todas as lojas ficam em um único array float32 gravado em .npy, com um
+índice de offsets por loja. Os processos do pool abrem esse arquivo com mmap: as páginas
+são compartilhadas pelo cache do sistema operacional e nada é copiado para os workers.
+
+Para cada loja são sorteadas N_REPLICAS trajetórias de resíduos por blocos móveis de 7
+dias (preserva a correlação entre dias próximos) e somadas ao log da previsão pontual.
+Os quantis 10%, 50% e 90% de cada dia vão para a tabela de previsões; os do total da loja
+no horizonte vão para a tabela de métricas. Cada loja usa um gerador próprio semeado com
+(SEMENTE_BOOTSTRAP, loja): o resultado não depende do número de processos nem da divisão
+em blocos, e o trabalho cresce linearmente com o número de lojas.
+"""
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ..data_loader import construir_indice_lojas
+from .comum import DIRETORIO_PREVISAO, gravar_atomico
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_RESIDUOS = DIRETORIO_PREVISAO / "residuos_lojas.npy"
+CAMINHO_INDICE_RESIDUOS = DIRETORIO_PREVISAO / "residuos_lojas_indice.npy"
+
+N_REPLICAS = 1000
+TAMANHO_BLOCO_DIAS = 7
+SEMENTE_BOOTSTRAP = 42
+QUANTIS = (0.1, 0.5, 0.9)
+MINIMO_RESIDUOS = 28  # abaixo disso a loja fica sem intervalo
+BLOCOS_POR_PROCESSO = 4
+
+# Resíduos mapeados no processo do pool (abertos uma vez pelo inicializador)
+_residuos_processo = None
+
+
+def gravar_residuos(residuos_novos, lojas_mantidas=(), diretorio=DIRETORIO_PREVISAO):
+    """
+    Grava o array único de resíduos e o índice por loja, reaproveitando os resíduos anteriores.
+
+    Args:
+        residuos_novos (dict): {loja: resíduos} das lojas retreinadas nesta execução
+        lojas_mantidas (iterable): Lojas inalteradas cujos resíduos vêm do arquivo anterior
+        diretorio (Path): Diretório de saída
+
+    Returns:
+        dict: {loja: (inicio, fim)} no array gravado
+    """
+    diretorio = Path(diretorio)
+    caminho_residuos = diretorio / CAMINHO_RESIDUOS.name
+    caminho_indice = diretorio / CAMINHO_INDICE_RESIDUOS.name
+    partes = dict(residuos_novos)
+    lojas_mantidas = set(lojas_mantidas) - set(partes)
+    if lojas_mantidas:
+        anteriores = np.load(caminho_residuos, mmap_mode='r')
+        indice_anterior = {int(loja): (int(inicio), int(fim)) for loja, inicio, fim in np.load(caminho_indice)}
+        for loja in lojas_mantidas:
+            if loja in indice_anterior:
+                inicio, fim = indice_anterior[loja]
+                partes[loja] = np.array(anteriores[inicio:fim])
+
+    lojas = sorted(partes)
+    tamanhos = np.array([len(partes[loja]) for loja in lojas], dtype=np.int64)
+    fins = np.cumsum(tamanhos)
+    indice = np.column_stack([np.asarray(lojas, dtype=np.int64), fins - tamanhos, fins])
+    residuos = np.concatenate([np.asarray(partes[loja], dtype=np.float32) for loja in lojas] or [np.empty(0, np.float32)])
+
+    for caminho, array in ((caminho_residuos, residuos), (caminho_indice, indice)):
+        gravar_atomico(caminho, lambda temporario: np.save(temporario, array))
+    return {int(loja): (int(inicio), int(fim)) for loja, inicio, fim in indice}
+
+
+def amostrar_bootstrap(previsao, residuos, gerador, n_replicas=N_REPLICAS, tamanho_bloco=TAMANHO_BLOCO_DIAS):
+    """
+    Trajetórias de vendas por bootstrap de blocos móveis dos resíduos em log.
+
+    Args:
+        previsao (np.ndarray): Previsão pontual dos dias do horizonte (em ordem de data)
+        residuos (np.ndarray): Resíduos da loja em log(1 + vendas), em ordem de data
+        gerador (np.random.Generator): Gerador da loja
+        n_replicas (int): Número de trajetórias
+        tamanho_bloco (int): Dias consecutivos de cada bloco sorteado
+
+    Returns:
+        np.ndarray: Vendas simuladas (n_replicas x dias)
+    """
+    dias = len(previsao)
+    tamanho_bloco = min(tamanho_bloco, len(residuos))
+    n_blocos = -(-dias // tamanho_bloco)
+    inicios = gerador.integers(0, len(residuos) - tamanho_bloco + 1, size=(n_replicas, n_blocos))
+    posicoes = (inicios[:, :, None] + np.arange(tamanho_bloco)).reshape(n_replicas, -1)[:, :dias]
+    return np.expm1(np.log1p(previsao) + residuos[posicoes]).clip(min=0)
+
+
+def _abrir_residuos(caminho_residuos):
+    """Inicializador do pool: mapeia o array de resíduos uma vez por processo."""
+    global _residuos_processo
+    _residuos_processo = np.load(caminho_residuos, mmap_mode='r')
+
+
+def _intervalos_bloco(tarefas, n_replicas, tamanho_bloco, semente):
+    """Quantis diários e do total para as lojas de um bloco (executado em um processo do pool)."""
+    resultados = []
+    for loja, previsao, inicio, fim in tarefas:
+        residuos = np.asarray(_residuos_processo[inicio:fim], dtype=np.float64)
+        if len(residuos) < MINIMO_RESIDUOS or not len(previsao):
+            resultados.append((loja, None, None))
+            continue
+        gerador = np.random.default_rng([semente, loja])
+        amostras = amostrar_bootstrap(previsao, residuos, gerador, n_replicas, tamanho_bloco)
+        resultados.append((loja, np.quantile(amostras, QUANTIS, axis=0).astype(np.float32),
+                           np.quantile(amostras.sum(axis=1), QUANTIS)))
+    return resultados
+
+
+def calcular_intervalos_bootstrap(df_previsoes, indice_residuos, processos=None, diretorio=DIRETORIO_PREVISAO,
+                                  n_replicas=N_REPLICAS, tamanho_bloco=TAMANHO_BLOCO_DIAS, semente=SEMENTE_BOOTSTRAP):
+    """
+    Quantis P10/P50/P90 por dia e do total no horizonte para as lojas das previsões.
+
+    Args:
+        df_previsoes (pd.DataFrame): Store, Date e Previsao, agrupado por loja e ordenado por data
+        indice_residuos (dict): {loja: (inicio, fim)} de gravar_residuos
+        processos (int): Processos do pool (padrão: número de CPUs; 1 calcula no próprio processo)
+        diretorio (Path): Diretório do array de resíduos
+        n_replicas, tamanho_bloco, semente: Parâmetros do bootstrap
+
+    Returns:
+        tuple: (array n_linhas x 3 com P10/P50/P90 de cada linha, DataFrame Store, TotalP10, TotalP50, TotalP90)
+    """
+    inicio_calculo = time.perf_counter()
+    previsao = df_previsoes['Previsao'].to_numpy(dtype=np.float64)
+    indice = construir_indice_lojas(df_previsoes)
+    tarefas = [(loja, previsao[inicio:fim], *indice_residuos.get(loja, (0, 0)))
+               for loja, (inicio, fim) in indice.items()]
+    processos = processos or os.cpu_count() or 1
+    n_blocos = max(1, min(len(tarefas), processos * BLOCOS_POR_PROCESSO))
+    blocos = [tarefas[grupo[0]:grupo[-1] + 1] for grupo in np.array_split(np.arange(len(tarefas)), n_blocos) if len(grupo)]
+    argumentos = (n_replicas, tamanho_bloco, semente)
+    caminho_residuos = str(Path(diretorio) / CAMINHO_RESIDUOS.name)
+    if processos == 1 or len(blocos) <= 1:
+        _abrir_residuos(caminho_residuos)
+        resultados = [_intervalos_bloco(bloco, *argumentos) for bloco in blocos]
+    else:
+        with ProcessPoolExecutor(max_workers=min(processos, len(blocos)), initializer=_abrir_residuos,
+                                 initargs=(caminho_residuos,)) as executor:
+            resultados = list(executor.map(_intervalos_bloco, blocos, *[[valor] * len(blocos) for valor in argumentos]))
+
+    quantis_linhas = np.full((len(previsao), len(QUANTIS)), np.nan, dtype=np.float32)
+    totais = []
+    for (loja, quantis, quantis_total), (inicio, fim) in zip((item for bloco in resultados for item in bloco),
+                                                             indice.values()):
+        if quantis is not None:
+            quantis_linhas[inicio:fim] = quantis.T
+        totais.append([loja, *(quantis_total if quantis_total is not None else [np.nan] * len(QUANTIS))])
+
+    logger.info(f"Intervalos de {len(tarefas)} lojas ({n_replicas} réplicas) em "
+                f"{time.perf_counter() - inicio_calculo:.1f} s ({processos} processos)")
+    df_totais = pd.DataFrame(totais, columns=['Store', 'TotalP10', 'TotalP50', 'TotalP90'])
+    return quantis_linhas, df_totais.astype({'Store': np.int64})
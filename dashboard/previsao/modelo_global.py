@@ -0,0 +1,309 @@
+# dashboard/previsao/modelo_global.py
+"""
+Modelo global de vendas: um único HistGradientBoostingRegressor para todas as lojas.
+
+Usa as colunas criadas por processar_dados_brutos (calendário, promoções, tipo, sortimento
+e concorrência), o nível de vendas de cada loja (média de log(1 + vendas) no treino), que
+substitui o ID da loja como atributo, e as vendas do mesmo dia da semana um ano antes
+(VendasLag364). No histórico, VendasLag364 é lida do repositório de atributos históricos
+(atributos_historicos); na grade futura, que o repositório não cobre, vem das vendas do
+histórico com a mesma definição. As defasagens curtas e as médias móveis não entram: nos
+dias mais distantes da origem da previsão elas dependeriam de vendas ainda não observadas.
+A matriz de atributos é montada em uma única passada vetorizada, direto em um array float32
+contíguo, tanto no treino quanto na previsão em lote.
+
+O modelo ajustado fica no registro de modelos (ver registro_modelos), identificado pela
+versão dos dados (calcular_versao_dados) e pelos hiperparâmetros: é treinado uma vez por
+versão e carregado pelos processos seguintes só no primeiro uso.
+
+Uso:
+    python -m dashboard.previsao.modelo_global
+"""
+import argparse
+import hashlib
+import logging
+import pickle
+import time
+
+import numpy as np
+import pandas as pd
+
+from ..data_loader import processar_dados_brutos, calcular_versao_dados
+from .comum import HORIZONTE_PREVISAO, CICLO_PROMO_DIAS, calcular_rmspe
+from .atributos_historicos import DIRETORIO_ATRIBUTOS_HISTORICOS, atualizar_atributos_historicos, carregar_atributos_historicos
+from .registro_modelos import DIRETORIO_REGISTRO_MODELOS, TIPO_MODELO_GLOBAL, carregar_modelo, registrar_modelo
+
+logger = logging.getLogger(__name__)
+
+DIAS_GRADE_FUTURA = 48  # período do conjunto de teste da competição (01/08 a 17/09/2015)
+
+# (coluna, categorias fixas ou None para numérica)
+ATRIBUTOS_MODELO_GLOBAL = [
+    ('DayOfWeek', None),
+    ('Day', None),
+    ('Month', None),
+    ('WeekOfYear', None),
+    ('Promo', None),
+    ('SchoolHoliday', None),
+    ('StateHoliday', ['0', 'a', 'b', 'c']),
+    ('StoreType', ['a', 'b', 'c', 'd']),
+    ('Assortment', ['a', 'b', 'c']),
+    ('CompetitionDistance', None),
+    ('Promo2', None),
+    ('NivelLoja', None),
+    ('VendasLag364', None),
+]
+# Atributos lidos do repositório de atributos históricos (conhecidos em todo o horizonte)
+ATRIBUTOS_HISTORICOS_GLOBAL = ['VendasLag364']
+DIAS_DEFASAGEM_ANUAL = 364
+COLUNAS_MODELO_GLOBAL = [coluna for coluna, _ in ATRIBUTOS_MODELO_GLOBAL]
+CATEGORICAS_MODELO_GLOBAL = np.array([categorias is not None for _, categorias in ATRIBUTOS_MODELO_GLOBAL])
+
+PARAMETROS_MODELO_GLOBAL = {
+    'max_iter': 200,
+    'learning_rate': 0.15,
+    'max_leaf_nodes': 31,
+    'min_samples_leaf': 40,
+    'l2_regularization': 1.0,
+    'early_stopping': False,
+    'random_state': 42,
+}
+
+
+# ==============================================================================
+# Atributos
+# ==============================================================================
+def calcular_niveis_lojas(lojas, vendas):
+    """
+    Nível de vendas de cada loja: média de log(1 + vendas), indexada pelo ID da loja.
+
+    Returns:
+        np.ndarray: float32 de tamanho max(loja) + 1 (NaN para IDs sem histórico)
+    """
+    lojas = np.asarray(lojas, dtype=np.int64)
+    somas = np.bincount(lojas, weights=np.log1p(np.asarray(vendas, dtype=np.float64)))
+    contagens = np.bincount(lojas, minlength=len(somas))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(contagens > 0, somas / contagens, np.nan).astype(np.float32)
+
+
+def adicionar_atributos_historicos(df, diretorio=DIRETORIO_ATRIBUTOS_HISTORICOS):
+    """
+    Acrescenta ATRIBUTOS_HISTORICOS_GLOBAL às linhas do histórico, lidos do repositório de atributos.
+
+    O repositório é atualizado antes (de forma incremental) se ainda não cobrir as datas de df.
+
+    Args:
+        df (pd.DataFrame): Linhas do histórico (Store, Date, ...)
+        diretorio (Path): Diretório do repositório de atributos históricos
+
+    Returns:
+        pd.DataFrame: df com as colunas acrescentadas, na mesma ordem de linhas (NaN sem histórico)
+    """
+    data_inicio, data_fim = df['Date'].min(), df['Date'].max()
+    ler = lambda: carregar_atributos_historicos(data_inicio=data_inicio, data_fim=data_fim,
+                                                colunas=ATRIBUTOS_HISTORICOS_GLOBAL, diretorio=diretorio)
+    atributos = ler()
+    if atributos is None or atributos['Date'].max() < data_fim:
+        atualizar_atributos_historicos(diretorio=diretorio)
+        atributos = ler()
+    if atributos is None:
+        raise RuntimeError("Repositório de atributos históricos indisponível para o modelo global")
+    resultado = df.drop(columns=ATRIBUTOS_HISTORICOS_GLOBAL, errors='ignore').merge(atributos, on=['Store', 'Date'], how='left')
+    resultado.index = df.index
+    return resultado
+
+
+def montar_matriz_atributos(df, niveis_lojas):
+    """
+    Monta a matriz de atributos do modelo global em um array float32 contíguo.
+
+    Cada coluna é escrita diretamente a partir do array da coluna de origem; categorias
+    viram códigos inteiros fixos (desconhecidas ficam NaN, tratadas como ausentes).
+
+    Args:
+        df (pd.DataFrame): Linhas a pontuar com as colunas de ATRIBUTOS_MODELO_GLOBAL (exceto NivelLoja) e 'Store'
+                           (no histórico, VendasLag364 vem de adicionar_atributos_historicos)
+        niveis_lojas (np.ndarray): Saída de calcular_niveis_lojas
+
+    Returns:
+        np.ndarray: Matriz (len(df) x len(COLUNAS_MODELO_GLOBAL)) float32, ordem C
+    """
+    matriz = np.empty((len(df), len(ATRIBUTOS_MODELO_GLOBAL)), dtype=np.float32)
+    for posicao, (coluna, categorias) in enumerate(ATRIBUTOS_MODELO_GLOBAL):
+        if coluna == 'NivelLoja':
+            lojas = df['Store'].to_numpy(dtype=np.int64)
+            conhecida = lojas < len(niveis_lojas)
+            matriz[:, posicao] = np.where(conhecida, niveis_lojas[np.where(conhecida, lojas, 0)], np.nan)
+        elif categorias is not None:
+            codigos = pd.Categorical(df[coluna].astype(str), categories=categorias).codes
+            matriz[:, posicao] = np.where(codigos >= 0, codigos, np.nan)
+        else:
+            matriz[:, posicao] = df[coluna].to_numpy(dtype=np.float32, na_value=np.nan)
+    return matriz
+
+
+def construir_grade_futura(df, dias=DIAS_GRADE_FUTURA):
+    """
+    Monta todas as combinações loja x dia após o fim do histórico, com os atributos de cada loja.
+
+    As promoções repetem o último ciclo de 14 dias de cada loja; feriados futuros ficam zerados.
+    VendasLag364 é a venda da loja 364 dias antes (NaN se a loja não abriu nesse dia), como no
+    repositório de atributos históricos.
+
+    Args:
+        df (pd.DataFrame): Dataset processado (todas as lojas)
+        dias (int): Dias a partir do dia seguinte à última data do histórico
+
+    Returns:
+        pd.DataFrame: Uma linha por (Store, Date) com as colunas usadas por montar_matriz_atributos
+    """
+    ultima_data = df['Date'].max()
+    datas = pd.date_range(ultima_data + pd.Timedelta(days=1), periods=dias, freq='D')
+    atributos_lojas = df.drop_duplicates('Store', keep='last').sort_values('Store')
+    lojas = atributos_lojas['Store'].to_numpy()
+
+    # Promoções dos últimos 14 dias, uma linha por loja e uma coluna por dia do ciclo
+    janela = pd.date_range(ultima_data - pd.Timedelta(days=CICLO_PROMO_DIAS - 1), ultima_data, freq='D')
+    recentes = df[df['Date'] >= janela[0]]
+    ciclo = np.zeros((len(lojas), CICLO_PROMO_DIAS), dtype=np.uint8)
+    ciclo[np.searchsorted(lojas, recentes['Store'].to_numpy()),
+          (recentes['Date'] - janela[0]).dt.days.to_numpy()] = recentes['Promo'].to_numpy()
+
+    n_lojas, n_dias = len(lojas), len(datas)
+    grade = pd.DataFrame({
+        'Store': np.repeat(lojas, n_dias),
+        'Date': np.tile(datas.to_numpy(), n_lojas),
+        'Promo': ciclo[:, np.arange(n_dias) % CICLO_PROMO_DIAS].ravel(),
+        'StateHoliday': '0',
+        'SchoolHoliday': np.uint8(0),
+    })
+    datas_grade = pd.DatetimeIndex(grade['Date'])
+    grade['DayOfWeek'] = datas_grade.dayofweek + 1
+    grade['Day'] = datas_grade.day
+    grade['Month'] = datas_grade.month
+    grade['WeekOfYear'] = datas_grade.isocalendar().week.to_numpy()
+    for coluna in ('StoreType', 'Assortment', 'CompetitionDistance', 'Promo2'):
+        grade[coluna] = np.repeat(atributos_lojas[coluna].to_numpy(), n_dias)
+    vendas_ano_anterior = df[['Store', 'Date', 'Sales']].assign(Date=df['Date'] + pd.Timedelta(days=DIAS_DEFASAGEM_ANUAL))
+    grade['VendasLag364'] = grade[['Store', 'Date']].merge(vendas_ano_anterior, on=['Store', 'Date'], how='left')[
+        'Sales'].to_numpy(dtype=np.float64)
+    return grade
+
+
+# ==============================================================================
+# Treino, cache em disco e previsão
+# ==============================================================================
+def ajustar_modelo_global(matriz, vendas):
+    """Ajusta o HistGradientBoostingRegressor sobre log(1 + vendas)."""
+    from sklearn.ensemble import HistGradientBoostingRegressor  # fora do caminho de inicialização do dashboard
+    modelo = HistGradientBoostingRegressor(categorical_features=CATEGORICAS_MODELO_GLOBAL, **PARAMETROS_MODELO_GLOBAL)
+    return modelo.fit(matriz, np.log1p(vendas))
+
+
+def treinar_modelo_global(df, horizonte_validacao=HORIZONTE_PREVISAO):
+    """
+    Treina o modelo global, medindo antes o RMSPE nas últimas semanas do histórico.
+
+    Args:
+        df (pd.DataFrame): Dataset processado, com as colunas de adicionar_atributos_historicos
+        horizonte_validacao (int): Dias finais usados na validação (0 para não validar)
+
+    Returns:
+        dict: estimador, níveis das lojas, colunas e RMSPE de validação
+    """
+    vendas = df['Sales'].to_numpy(dtype=np.float64)
+    lojas = df['Store'].to_numpy()
+    rmspe_validacao = np.nan
+    if horizonte_validacao:
+        validacao = (df['Date'] > df['Date'].max() - pd.Timedelta(days=horizonte_validacao)).to_numpy()
+        niveis = calcular_niveis_lojas(lojas[~validacao], vendas[~validacao])
+        matriz = montar_matriz_atributos(df, niveis)
+        estimador = ajustar_modelo_global(matriz[~validacao], vendas[~validacao])
+        rmspe_validacao = calcular_rmspe(vendas[validacao], np.expm1(estimador.predict(matriz[validacao])))
+        logger.info(f"Modelo global: RMSPE de validação ({horizonte_validacao} dias) = {rmspe_validacao:.4f}")
+
+    niveis = calcular_niveis_lojas(lojas, vendas)
+    estimador = ajustar_modelo_global(montar_matriz_atributos(df, niveis), vendas)
+    return {
+        'estimador': estimador,
+        'niveis_lojas': niveis,
+        'colunas': COLUNAS_MODELO_GLOBAL,
+        'rmspe_validacao': rmspe_validacao,
+        'ultima_data': df['Date'].max(),
+    }
+
+
+def chave_modelo_global(versao_dados):
+    """Identifica o arquivo do modelo pela versão dos dados e pelos hiperparâmetros."""
+    conteudo = repr((versao_dados, COLUNAS_MODELO_GLOBAL, sorted(PARAMETROS_MODELO_GLOBAL.items())))
+    return hashlib.sha1(conteudo.encode()).hexdigest()[:16]
+
+
+def obter_modelo_global(df=None, versao_dados=None, diretorio=DIRETORIO_REGISTRO_MODELOS):
+    """
+    Retorna o modelo global da versão atual dos dados, treinando-o apenas se ainda não estiver no registro.
+
+    Args:
+        df (pd.DataFrame): Dataset processado (padrão: processar_dados_brutos, lido só se for treinar)
+        versao_dados (str): Versão dos dados (padrão: calcular_versao_dados('completo'))
+        diretorio (Path): Diretório do registro de modelos
+
+    Returns:
+        dict: Saída de treinar_modelo_global
+    """
+    versao_dados = versao_dados or calcular_versao_dados('completo')
+    id_modelo = f"{TIPO_MODELO_GLOBAL}-{chave_modelo_global(versao_dados)}"
+    modelo = carregar_modelo(id_modelo, diretorio)
+    if modelo is not None:
+        return modelo
+
+    if df is None:
+        df = processar_dados_brutos()
+    inicio = time.perf_counter()
+    modelo = treinar_modelo_global(adicionar_atributos_historicos(df))
+    modelo['versao_dados'] = versao_dados
+    logger.info(f"Modelo global treinado em {time.perf_counter() - inicio:.1f} s")
+
+    def gravar(caminho):
+        with open(caminho, 'wb') as arquivo:
+            pickle.dump(modelo, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+
+    esquema = {'colunas': COLUNAS_MODELO_GLOBAL, 'categorias': dict(ATRIBUTOS_MODELO_GLOBAL),
+               'parametros': PARAMETROS_MODELO_GLOBAL}
+    registrar_modelo(id_modelo, TIPO_MODELO_GLOBAL, 'modelo.pkl', gravar, versao_dados,
+                     {'rmspe_validacao': float(modelo['rmspe_validacao'])}, esquema, diretorio, objeto=modelo)
+    return modelo
+
+
+def prever_modelo_global(modelo, df):
+    """
+    Previsão em lote para todas as linhas de df (ex.: saída de construir_grade_futura).
+
+    Returns:
+        np.ndarray: Vendas previstas (float32), na ordem das linhas
+    """
+    matriz = montar_matriz_atributos(df, modelo['niveis_lojas'])
+    return np.expm1(modelo['estimador'].predict(matriz)).clip(min=0).astype(np.float32)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Treina (ou carrega do disco) o modelo global e mede a previsão em lote.")
+    parser.add_argument('--dias', type=int, default=DIAS_GRADE_FUTURA, help="Dias da grade futura (padrão: 48)")
+    argumentos = parser.parse_args(argv)
+
+    df = processar_dados_brutos()
+    inicio = time.perf_counter()
+    modelo = obter_modelo_global(df)
+    print(f"Modelo global pronto em {time.perf_counter() - inicio:.1f} s "
+          f"(RMSPE de validação: {modelo['rmspe_validacao']:.4f})")
+
+    grade = construir_grade_futura(df, argumentos.dias)
+    inicio = time.perf_counter()
+    previsoes = prever_modelo_global(modelo, grade)
+    print(f"Previsão em lote: {len(previsoes):,} linhas ({grade['Store'].nunique()} lojas x {argumentos.dias} dias) "
+          f"em {time.perf_counter() - inicio:.3f} s")
+
+
+if __name__ == '__main__':
+    main()
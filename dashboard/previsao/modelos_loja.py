@@ -0,0 +1,344 @@
+# dashboard/previsao/modelos_loja.py
+"""
+Modelos de previsão por loja e geração das previsões de 6 semanas exibidas no dashboard.
+
+Cada loja recebe dois modelos leves:
+- ingênuo sazonal: média das vendas de cada dia da semana nas últimas 4 semanas;
+- regressão Ridge sobre log(1 + vendas) com atributos de calendário e promoção
+  (dia da semana, mês, dia do mês, feriados, promoção e tendência).
+
+As últimas 6 semanas de cada loja servem de validação (RMSPE, como na competição) e o
+modelo com menor erro é usado na previsão, depois de reajustado com todo o histórico.
+O treino é distribuído entre os núcleos por um pool de processos: as lojas são agrupadas
+em blocos contíguos do dataset ordenado por (Store, Date) e cada processo grava os
+artefatos das suas lojas. A tabela de previsões lida pelo dashboard é montada por
+tabela_previsoes, que retreina só as lojas com dados novos.
+
+Uso (equivale a python -m dashboard.previsao.tabela_previsoes --completo):
+    python -m dashboard.previsao.modelos_loja --processos 8
+"""
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ..data_loader import processar_dados_brutos, ordenar_por_loja_e_data, construir_indice_lojas
+from .comum import (DIRETORIO_PREVISAO, HORIZONTE_PREVISAO, SEMANAS_BASE_SAZONAL, calcular_rmspe,
+                    indicador_feriado_estadual, construir_calendario_futuro, gravar_json_atomico)
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_MODELOS_LOJAS = DIRETORIO_PREVISAO / "modelos_lojas"
+
+ALFA_RIDGE = 1.0
+MINIMO_REGISTROS_TREINO = 60  # abaixo disso a loja usa apenas o ingênuo sazonal
+BLOCOS_POR_PROCESSO = 4  # blocos menores equilibram lojas com históricos de tamanhos diferentes
+JANELA_RESIDUOS_DIAS = 364  # último ano do histórico: resíduos usados nos intervalos de previsão
+DATA_ORIGEM_TENDENCIA = pd.Timestamp('2013-01-01')
+
+COLUNAS_ATRIBUTOS_LOJA = (
+    [f'dia_semana_{dia}' for dia in range(1, 8)]
+    + [f'mes_{mes}' for mes in range(1, 13)]
+    + ['promo', 'feriado_estadual', 'feriado_escolar', 'dia_mes_seno', 'dia_mes_cosseno', 'tendencia']
+)
+COLUNAS_TREINO = ['Store', 'Date', 'DayOfWeek', 'Sales', 'Promo', 'StateHoliday', 'SchoolHoliday']
+
+MODELO_RIDGE = 'ridge'
+MODELO_INGENUO = 'ingenuo_sazonal'
+
+# ==============================================================================
+# Atributos e modelos de uma loja
+# ==============================================================================
+def montar_atributos_loja(datas, dias_semana, promo, feriado_estadual, feriado_escolar):
+    """
+    Monta a matriz de atributos de calendário e promoção (uma linha por dia).
+
+    Args:
+        datas (pd.DatetimeIndex ou pd.Series): Datas
+        dias_semana, promo, feriado_estadual, feriado_escolar (array-like): Colunas já numéricas (0/1, 1-7)
+
+    Returns:
+        np.ndarray: Matriz float64 (n_dias x len(COLUNAS_ATRIBUTOS_LOJA))
+    """
+    datas = pd.DatetimeIndex(datas)
+    n = len(datas)
+    atributos = np.zeros((n, len(COLUNAS_ATRIBUTOS_LOJA)))
+    linhas = np.arange(n)
+    atributos[linhas, np.asarray(dias_semana, dtype=np.int64) - 1] = 1
+    atributos[linhas, 7 + datas.month.to_numpy() - 1] = 1
+    atributos[:, 19] = promo
+    atributos[:, 20] = feriado_estadual
+    atributos[:, 21] = feriado_escolar
+    angulo = 2 * np.pi * (datas.day.to_numpy() - 1) / 31
+    atributos[:, 22] = np.sin(angulo)
+    atributos[:, 23] = np.cos(angulo)
+    atributos[:, 24] = (datas - DATA_ORIGEM_TENDENCIA).days.to_numpy() / 365.25
+    return atributos
+
+
+def calcular_base_sazonal(datas, dias_semana, vendas, semanas=SEMANAS_BASE_SAZONAL):
+    """
+    Média das vendas por dia da semana nas últimas semanas do histórico.
+
+    Returns:
+        np.ndarray: 7 valores (segunda a domingo); NaN nos dias em que a loja não abriu
+    """
+    datas = pd.DatetimeIndex(datas)
+    recentes = datas > datas[-1] - pd.Timedelta(weeks=semanas)
+    dias = np.asarray(dias_semana, dtype=np.int64)[recentes] - 1
+    somas = np.bincount(dias, weights=np.asarray(vendas, dtype=np.float64)[recentes], minlength=7)
+    contagens = np.bincount(dias, minlength=7)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(contagens > 0, somas / contagens, np.nan)
+
+
+def ajustar_ridge(atributos, vendas, alfa=ALFA_RIDGE):
+    """Ajusta a Ridge sobre log(1 + vendas) e devolve (coeficientes, intercepto)."""
+    from sklearn.linear_model import Ridge  # importado só no treino, fora do caminho de inicialização do dashboard
+    modelo = Ridge(alpha=alfa).fit(atributos, np.log1p(vendas))
+    return modelo.coef_, float(modelo.intercept_)
+
+
+def prever_ridge(atributos, coeficientes, intercepto):
+    """Vendas previstas pela regressão (a partir dos coeficientes salvos)."""
+    return np.expm1(atributos @ coeficientes + intercepto).clip(min=0)
+
+
+def treinar_modelo_loja(df_loja, horizonte=HORIZONTE_PREVISAO, alfa=ALFA_RIDGE):
+    """
+    Valida os dois modelos nas últimas semanas da loja, escolhe o melhor e reajusta com todo o histórico.
+
+    Args:
+        df_loja (pd.DataFrame): Histórico da loja ordenado por data (COLUNAS_TREINO, StateHoliday já 0/1)
+        horizonte (int): Dias usados na validação
+        alfa (float): Regularização da Ridge
+
+    Returns:
+        dict: coeficientes, intercepto, base_sazonal, modelo escolhido, RMSPE de validação e
+              resíduos em log(1 + vendas) do modelo escolhido no último ano (não gravados no artefato)
+    """
+    datas = pd.DatetimeIndex(df_loja['Date'])
+    vendas = df_loja['Sales'].to_numpy(dtype=np.float64)
+    dias_semana = df_loja['DayOfWeek'].to_numpy()
+    atributos = montar_atributos_loja(datas, dias_semana, df_loja['Promo'].to_numpy(),
+                                      df_loja['StateHoliday'].to_numpy(), df_loja['SchoolHoliday'].to_numpy())
+
+    validacao = datas > datas[-1] - pd.Timedelta(days=horizonte)
+    n_treino = int((~validacao).sum())
+    rmspe_ridge = rmspe_ingenuo = np.nan
+    if n_treino >= MINIMO_REGISTROS_TREINO and validacao.any():
+        coeficientes, intercepto = ajustar_ridge(atributos[~validacao], vendas[~validacao], alfa)
+        rmspe_ridge = calcular_rmspe(vendas[validacao], prever_ridge(atributos[validacao], coeficientes, intercepto))
+        base = calcular_base_sazonal(datas[~validacao], dias_semana[~validacao], vendas[~validacao])
+        previsto_ingenuo = base[dias_semana[validacao] - 1]
+        # Dia da semana sem vendas recentes no treino: ingênuo não tem referência (erro máximo)
+        rmspe_ingenuo = calcular_rmspe(vendas[validacao], np.nan_to_num(previsto_ingenuo, nan=0.0))
+
+    if len(vendas) >= MINIMO_REGISTROS_TREINO:
+        coeficientes, intercepto = ajustar_ridge(atributos, vendas, alfa)
+    else:
+        coeficientes, intercepto = np.zeros(len(COLUNAS_ATRIBUTOS_LOJA)), float(np.log1p(vendas.mean()))
+
+    usar_ridge = not np.isnan(rmspe_ridge) and (np.isnan(rmspe_ingenuo) or rmspe_ridge <= rmspe_ingenuo)
+    base_sazonal = calcular_base_sazonal(datas, dias_semana, vendas)
+    recentes = datas > datas[-1] - pd.Timedelta(days=JANELA_RESIDUOS_DIAS)
+    if usar_ridge:
+        ajustado = prever_ridge(atributos[recentes], coeficientes, intercepto)
+    else:
+        ajustado = base_sazonal[dias_semana[recentes] - 1]
+    with np.errstate(invalid='ignore'):
+        residuos = np.log1p(vendas[recentes]) - np.log1p(ajustado)
+    return {
+        'coeficientes': np.asarray(coeficientes, dtype=np.float64),
+        'intercepto': intercepto,
+        'base_sazonal': base_sazonal,
+        'modelo': MODELO_RIDGE if usar_ridge else MODELO_INGENUO,
+        'rmspe_ridge': rmspe_ridge,
+        'rmspe_ingenuo': rmspe_ingenuo,
+        'registros': len(vendas),
+        'ultima_data': datas[-1],
+        'residuos': residuos[np.isfinite(residuos)].astype(np.float32),
+    }
+
+
+def prever_loja(modelo, calendario):
+    """
+    Previsões dos dois modelos para um calendário futuro.
+
+    Dias da semana sem vendas nas últimas semanas (ex.: domingos) são considerados fechados.
+
+    Args:
+        modelo (dict): Saída de treinar_modelo_loja (ou artefato carregado)
+        calendario (pd.DataFrame): Saída de construir_calendario_futuro
+
+    Returns:
+        pd.DataFrame: Date, PrevisaoRidge, PrevisaoIngenuo, Previsao (só dias abertos)
+    """
+    dias_semana = calendario['DayOfWeek'].to_numpy(dtype=np.int64)
+    base = modelo['base_sazonal'][dias_semana - 1]
+    aberto = ~np.isnan(base)
+    atributos = montar_atributos_loja(calendario['Date'], dias_semana, calendario['Promo'].to_numpy(),
+                                      indicador_feriado_estadual(calendario['StateHoliday']),
+                                      calendario['SchoolHoliday'].to_numpy())
+    previsto_ridge = prever_ridge(atributos, modelo['coeficientes'], modelo['intercepto'])
+    previsoes = pd.DataFrame({
+        'Date': calendario['Date'].to_numpy(),
+        'Promo': calendario['Promo'].to_numpy(),
+        'PrevisaoRidge': previsto_ridge.astype(np.float32),
+        'PrevisaoIngenuo': base.astype(np.float32),
+    })[aberto]
+    previsoes['Previsao'] = previsoes['PrevisaoRidge' if modelo['modelo'] == MODELO_RIDGE else 'PrevisaoIngenuo']
+    return previsoes
+
+
+# ==============================================================================
+# Artefatos
+# ==============================================================================
+def caminho_modelo_loja(id_loja, diretorio=DIRETORIO_MODELOS_LOJAS):
+    return Path(diretorio) / f'loja_{int(id_loja):05d}.npz'
+
+
+def salvar_modelo_loja(id_loja, modelo, diretorio=DIRETORIO_MODELOS_LOJAS):
+    """Grava os parâmetros da loja em um .npz (algumas centenas de bytes)."""
+    np.savez(
+        caminho_modelo_loja(id_loja, diretorio),
+        coeficientes=modelo['coeficientes'],
+        intercepto=np.float64(modelo['intercepto']),
+        base_sazonal=modelo['base_sazonal'],
+        modelo=np.array(modelo['modelo']),
+        rmspe=np.array([modelo['rmspe_ridge'], modelo['rmspe_ingenuo']]),
+        ultima_data=np.datetime64(modelo['ultima_data'], 'D'),
+    )
+
+
+def carregar_modelo_loja(id_loja, diretorio=DIRETORIO_MODELOS_LOJAS):
+    """Lê o artefato gravado por salvar_modelo_loja no mesmo formato de treinar_modelo_loja."""
+    with np.load(caminho_modelo_loja(id_loja, diretorio)) as arquivo:
+        return {
+            'coeficientes': arquivo['coeficientes'],
+            'intercepto': float(arquivo['intercepto']),
+            'base_sazonal': arquivo['base_sazonal'],
+            'modelo': str(arquivo['modelo']),
+            'rmspe_ridge': float(arquivo['rmspe'][0]),
+            'rmspe_ingenuo': float(arquivo['rmspe'][1]),
+            'ultima_data': pd.Timestamp(arquivo['ultima_data'][()]),
+        }
+
+
+# ==============================================================================
+# Treino em paralelo
+# ==============================================================================
+def _treinar_bloco(df_bloco, diretorio_modelos, horizonte, alfa, dias):
+    """Treina, grava e prevê as lojas de um bloco contíguo (executado em um processo do pool)."""
+    metricas, previsoes, residuos = [], [], {}
+    for id_loja, (inicio, fim) in construir_indice_lojas(df_bloco).items():
+        df_loja = df_bloco.iloc[inicio:fim]
+        modelo = treinar_modelo_loja(df_loja, horizonte, alfa)
+        salvar_modelo_loja(id_loja, modelo, diretorio_modelos)
+        previsao = prever_loja(modelo, construir_calendario_futuro(df_loja, dias))
+        previsao.insert(0, 'Store', id_loja)
+        previsoes.append(previsao)
+        residuos[id_loja] = modelo['residuos']
+        rmspe_escolhido = modelo['rmspe_ridge'] if modelo['modelo'] == MODELO_RIDGE else modelo['rmspe_ingenuo']
+        metricas.append({
+            'Store': id_loja, 'Modelo': modelo['modelo'], 'RMSPE': rmspe_escolhido,
+            'RMSPE_Ridge': modelo['rmspe_ridge'], 'RMSPE_Ingenuo': modelo['rmspe_ingenuo'],
+            'Registros': modelo['registros'], 'UltimaData': modelo['ultima_data'],
+        })
+    return metricas, previsoes, residuos
+
+
+def dividir_blocos_lojas(indice, n_blocos):
+    """
+    Divide as lojas em blocos de lojas consecutivas, cada um uma fatia contígua do dataset ordenado.
+
+    Args:
+        indice (dict): {loja: (inicio, fim)} de construir_indice_lojas
+        n_blocos (int): Número desejado de blocos
+
+    Returns:
+        list: [(inicio, fim)] posicionais de cada bloco
+    """
+    lojas = sorted(indice)
+    return [(indice[grupo[0]][0], indice[grupo[-1]][1])
+            for grupo in np.array_split(np.asarray(lojas), min(n_blocos, len(lojas))) if len(grupo)]
+
+
+def treinar_modelos_lojas(df=None, processos=None, horizonte=HORIZONTE_PREVISAO, alfa=ALFA_RIDGE,
+                          diretorio_modelos=DIRETORIO_MODELOS_LOJAS, lojas=None, dias=None):
+    """
+    Treina os modelos das lojas em paralelo, grava os artefatos e prevê os próximos dias.
+
+    As tabelas de previsões e métricas são montadas e gravadas por tabela_previsoes, que
+    chama esta função só com as lojas cujos dados mudaram.
+
+    Args:
+        df (pd.DataFrame): Dataset processado (padrão: processar_dados_brutos, todas as lojas)
+        processos (int): Processos do pool (padrão: número de CPUs; 1 treina no próprio processo)
+        horizonte (int): Dias usados na validação
+        alfa (float): Regularização da Ridge
+        diretorio_modelos (Path): Diretório dos artefatos por loja
+        lojas (iterable): Lojas a treinar (padrão: todas as lojas do dataset)
+        dias (int): Dias previstos (padrão: o horizonte de validação)
+
+    Returns:
+        tuple: (previsões, métricas por loja, {loja: resíduos do modelo escolhido})
+    """
+    inicio_treino = time.perf_counter()
+    if df is None:
+        df = processar_dados_brutos()
+    if df is None or df.empty:
+        raise RuntimeError("Dataset processado indisponível para treinar os modelos")
+    if lojas is not None:
+        df = df[df['Store'].isin(list(lojas))]
+        if df.empty:
+            return pd.DataFrame(), pd.DataFrame(), {}
+
+    diretorio_modelos = Path(diretorio_modelos)
+    diretorio_modelos.mkdir(parents=True, exist_ok=True)
+
+    # Só as colunas usadas, já numéricas: os blocos enviados aos processos ficam pequenos
+    df_treino = ordenar_por_loja_e_data(df[COLUNAS_TREINO])
+    df_treino['StateHoliday'] = indicador_feriado_estadual(df_treino['StateHoliday'])
+    tipos_loja = df.drop_duplicates('Store').set_index('Store')['StoreType'].astype(str)
+
+    processos = processos or os.cpu_count() or 1
+    blocos = [df_treino.iloc[inicio:fim]
+              for inicio, fim in dividir_blocos_lojas(construir_indice_lojas(df_treino), processos * BLOCOS_POR_PROCESSO)]
+    argumentos = (diretorio_modelos, horizonte, alfa, dias or horizonte)
+    if processos == 1 or len(blocos) == 1:
+        resultados = [_treinar_bloco(bloco, *argumentos) for bloco in blocos]
+    else:
+        with ProcessPoolExecutor(max_workers=min(processos, len(blocos))) as executor:
+            resultados = list(executor.map(_treinar_bloco, blocos, *[[valor] * len(blocos) for valor in argumentos]))
+
+    df_metricas = pd.DataFrame([linha for metricas, _, _ in resultados for linha in metricas])
+    df_metricas.insert(1, 'StoreType', df_metricas['Store'].map(tipos_loja))
+    df_previsoes = pd.concat([previsao for _, previsoes, _ in resultados for previsao in previsoes], ignore_index=True)
+    residuos = {loja: valores for _, _, residuos_bloco in resultados for loja, valores in residuos_bloco.items()}
+
+    gravar_json_atomico({
+        'colunas_atributos': COLUNAS_ATRIBUTOS_LOJA,
+        'alfa_ridge': alfa,
+        'horizonte': horizonte,
+        'treinado_em': pd.Timestamp.now().isoformat(timespec='seconds'),
+    }, diretorio_modelos / 'manifesto.json')
+
+    logger.info(f"Modelos de {len(df_metricas)} lojas treinados em {time.perf_counter() - inicio_treino:.1f} s "
+                f"({processos} processos, {len(blocos)} blocos)")
+    return df_previsoes, df_metricas, residuos
+
+
+def main(argv=None):
+    """Mantido por compatibilidade: retreina todas as lojas e regrava a tabela de previsões."""
+    from .tabela_previsoes import main as main_tabela_previsoes
+    main_tabela_previsoes(['--completo', *(sys.argv[1:] if argv is None else argv)])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+# dashboard/previsao/pontuacao.py
+"""
+Pontuação vetorizada dos modelos por loja: qualquer conjunto de (loja, data, promoção)
+é previsto em uma única operação matricial, sem laço por loja.
+
+Os parâmetros das lojas ficam em arrays indexados pela posição da loja: coeficientes e
+interceptos da Ridge, médias do ingênuo sazonal por dia da semana, modelo escolhido e
+último dia do histórico. Eles vêm do pacote do registro de modelos, mapeado em memória (sem
+cópia por worker); sem registro, os artefatos .npz de cada loja são lidos e empilhados. A
+pilha é montada uma vez por execução do job da tabela de previsões (o manifesto da tabela
+é a versão) e reaproveitada pelo processo.
+
+O ciclo de promoções usado no cenário padrão vem da própria tabela materializada: os
+14 primeiros dias previstos de cada loja repetem o último ciclo observado.
+"""
+import logging
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .comum import CICLO_PROMO_DIAS, indicador_feriado_estadual
+from .modelos_loja import DIRETORIO_MODELOS_LOJAS, montar_atributos_loja
+from .registro_modelos import DIRETORIO_REGISTRO_MODELOS, TIPO_MODELOS_LOJAS, empacotar_modelos_lojas, obter_modelo_ativo
+from .tabela_previsoes import CAMINHO_MANIFESTO_PREVISOES, carregar_metricas_lojas, obter_tabela_previsoes
+
+logger = logging.getLogger(__name__)
+
+# Pilha de modelos do processo: {'versao', 'lojas', 'coeficientes', ...}
+_modelos_cache = {}
+_lock_modelos = threading.Lock()
+
+
+def desempacotar_modelos_lojas(pacote):
+    """
+    Arrays da pilha como visões sobre o pacote do registro (nada é copiado do mapa em memória).
+
+    Args:
+        pacote (np.ndarray): Array estruturado DTYPE_MODELOS_LOJAS
+
+    Returns:
+        dict: 'lojas' (ordenadas), 'coeficientes' (n x 25), 'interceptos', 'bases_sazonais' (n x 7),
+              'usar_ridge', 'ultima_data', 'rmspe'
+    """
+    campos = {'lojas': 'loja', 'coeficientes': 'coeficientes', 'interceptos': 'intercepto',
+              'bases_sazonais': 'base_sazonal', 'usar_ridge': 'usar_ridge', 'ultima_data': 'ultima_data',
+              'rmspe': 'rmspe'}
+    return {chave: np.asarray(pacote[campo]) for chave, campo in campos.items()}
+
+
+def empilhar_modelos_lojas(lojas, diretorio_modelos=DIRETORIO_MODELOS_LOJAS):
+    """
+    Lê os artefatos das lojas e os empilha em arrays indexados pela posição da loja.
+
+    Args:
+        lojas (array-like): Lojas a carregar
+        diretorio_modelos (Path): Diretório dos artefatos .npz
+
+    Returns:
+        dict: 'lojas' (ordenadas), 'coeficientes' (n x 25), 'interceptos', 'bases_sazonais' (n x 7),
+              'usar_ridge', 'ultima_data', 'rmspe'
+    """
+    return desempacotar_modelos_lojas(empacotar_modelos_lojas(lojas, diretorio_modelos))
+
+
+def extrair_ciclos_promo(pilha, tabela_previsoes):
+    """
+    Ciclo de promoções de 14 dias de cada loja a partir dos primeiros dias da tabela de previsões.
+
+    Args:
+        pilha (dict): Saída de empilhar_modelos_lojas
+        tabela_previsoes (dict): Saída de obter_tabela_previsoes
+
+    Returns:
+        np.ndarray: uint8 (n_lojas x 14); posição k = k+1 dias após o fim do histórico, módulo 14
+    """
+    ciclos = np.zeros((len(pilha['lojas']), CICLO_PROMO_DIAS), dtype=np.uint8)
+    tabela = tabela_previsoes['tabela']
+    lojas = tabela.column('Store').to_numpy()
+    posicoes = np.searchsorted(pilha['lojas'], lojas).clip(max=len(pilha['lojas']) - 1)
+    conhecidas = pilha['lojas'][posicoes] == lojas
+    deslocamentos = (tabela_previsoes['datas'] - pilha['ultima_data'][posicoes]) // np.timedelta64(1, 'D') - 1
+    mascara = conhecidas & (deslocamentos >= 0) & (deslocamentos < CICLO_PROMO_DIAS)
+    ciclos[posicoes[mascara], deslocamentos[mascara]] = tabela.column('Promo').to_numpy()[mascara]
+    return ciclos
+
+
+def obter_modelos_lojas():
+    """
+    Pilha de modelos da última execução do job da tabela de previsões, montada uma vez por versão.
+
+    Returns:
+        dict: Saída de desempacotar_modelos_lojas com 'ciclos_promo', 'versao' e 'id_modelo';
+              None se o job ainda não rodou
+    """
+    try:
+        versao = str(os.stat(CAMINHO_MANIFESTO_PREVISOES).st_mtime_ns)
+    except OSError:
+        return None
+    with _lock_modelos:
+        if _modelos_cache.get('versao') != versao:
+            df_metricas = carregar_metricas_lojas()
+            tabela_previsoes = obter_tabela_previsoes()
+            if df_metricas is None or tabela_previsoes is None:
+                return None
+            ativo = obter_modelo_ativo(TIPO_MODELOS_LOJAS, DIRETORIO_REGISTRO_MODELOS)
+            if ativo is not None:
+                entrada, pacote = ativo
+                pilha = desempacotar_modelos_lojas(pacote)
+                pilha['id_modelo'] = entrada['id']
+            else:
+                # Tabela gerada antes do registro de modelos: lê um .npz por loja
+                pilha = empilhar_modelos_lojas(df_metricas['Store'].to_numpy(),
+                                               CAMINHO_MANIFESTO_PREVISOES.parent / DIRETORIO_MODELOS_LOJAS.name)
+                pilha['id_modelo'] = None
+            pilha['ciclos_promo'] = extrair_ciclos_promo(pilha, tabela_previsoes)
+            pilha['versao'] = versao
+            _modelos_cache.clear()
+            _modelos_cache.update(pilha)
+            logger.info(f"Modelos de {len(pilha['lojas'])} lojas prontos para pontuação vetorizada "
+                        f"({pilha['id_modelo'] or 'artefatos por loja'})")
+        return dict(_modelos_cache)
+
+
+def posicoes_lojas(pilha, lojas):
+    """
+    Posição de cada loja na pilha.
+
+    Raises:
+        KeyError: Se alguma loja não tiver modelo
+    """
+    lojas = np.asarray(lojas, dtype=np.int64)
+    posicoes = np.searchsorted(pilha['lojas'], lojas).clip(max=len(pilha['lojas']) - 1)
+    desconhecidas = pilha['lojas'][posicoes] != lojas
+    if desconhecidas.any():
+        raise KeyError(f"Lojas sem modelo: {sorted(set(lojas[desconhecidas].tolist()))[:10]}")
+    return posicoes
+
+
+def calcular_promo_padrao(pilha, posicoes, datas):
+    """Promoção de cada (loja, data) no cenário padrão: repetição do último ciclo de 14 dias da loja."""
+    datas = np.asarray(datas, dtype='datetime64[ns]')
+    deslocamentos = (datas - pilha['ultima_data'][posicoes]) // np.timedelta64(1, 'D') - 1
+    return pilha['ciclos_promo'][posicoes, deslocamentos % CICLO_PROMO_DIAS]
+
+
+def prever_lote(pilha, posicoes, datas, promo, feriado_estadual=None, feriado_escolar=None):
+    """
+    Previsão vetorizada de vendas para linhas (loja, data) de quaisquer lojas.
+
+    Cada linha usa o modelo escolhido da sua loja. Dias da semana em que a loja não abriu nas
+    últimas semanas do histórico (ex.: domingos) são previstos como fechados (venda zero).
+
+    Args:
+        pilha (dict): Saída de obter_modelos_lojas
+        posicoes (np.ndarray): Posição da loja de cada linha (posicoes_lojas)
+        datas (array-like): Data de cada linha
+        promo (array-like): Promoção (0/1) de cada linha
+        feriado_estadual (array-like): StateHoliday ('0'/'a'/...) ou 0/1 (padrão: sem feriado)
+        feriado_escolar (array-like): SchoolHoliday 0/1 (padrão: sem feriado)
+
+    Returns:
+        tuple: (previsão float64, aberto bool) por linha
+    """
+    datas = pd.DatetimeIndex(datas)
+    n = len(datas)
+    dias_semana = (datas.dayofweek + 1).to_numpy()
+    if feriado_estadual is None:
+        feriado_estadual = np.zeros(n, dtype=np.uint8)
+    elif not np.issubdtype(np.asarray(feriado_estadual).dtype, np.number):
+        feriado_estadual = indicador_feriado_estadual(pd.Series(feriado_estadual))
+    if feriado_escolar is None:
+        feriado_escolar = np.zeros(n, dtype=np.uint8)
+
+    atributos = montar_atributos_loja(datas, dias_semana, promo, feriado_estadual, feriado_escolar)
+    previsto_ridge = np.expm1(np.einsum('ij,ij->i', atributos, pilha['coeficientes'][posicoes])
+                              + pilha['interceptos'][posicoes]).clip(min=0)
+    base = pilha['bases_sazonais'][posicoes, dias_semana - 1]
+    aberto = ~np.isnan(base)
+    previsao = np.where(pilha['usar_ridge'][posicoes], previsto_ridge, base)
+    previsao[~aberto] = 0.0
+    return previsao, aberto
@@ -0,0 +1,282 @@
+# dashboard/previsao/reconciliacao.py
+"""
+Reconciliação hierárquica das previsões: loja -> tipo de loja / sortimento -> rede.
+
+As previsões por loja são treinadas de forma independente e não somam exatamente às
+previsões de cada tipo de loja, de cada sortimento ou da rede. Este módulo monta a matriz
+de soma S (esparsa, uma linha por série e uma coluna por loja) e devolve previsões
+coerentes em todos os níveis, em uma única passada sobre todas as séries:
+
+- bottom_up: soma das previsões das lojas (ỹ = S·b);
+- mint_shrink: combinação de traço mínimo (MinT) com a covariância dos resíduos
+  encolhida em direção à diagonal (Schäfer-Strimmer, como no pacote hts).
+
+As séries agregadas recebem previsões base próprias: o mesmo modelo por loja
+(treinar_modelo_loja) ajustado à soma das vendas do grupo, com a fração de lojas em
+promoção como atributo. A MinT usa a forma de projeção ỹ = ŷ - W·U·(U'·W·U)^-1·U'·ŷ, em
+que U' = [I | -A] reúne as restrições de agregação (A esparsa). Com W = λ·D + (1-λ)·Σ, o
+produto W·U sai de E'(E·U) e o λ de identidades sobre a matriz de Gram T x T dos resíduos:
+nenhuma matriz n x n entre as 1.115+ séries é formada.
+
+A projeção MinT pode deixar previsões negativas ou diferentes de zero em dias de loja
+fechada. Depois dela, as lojas são zeradas nos dias fechados e limitadas a zero por baixo,
+e os níveis agregados são refeitos como S·b: as previsões continuam coerentes, mas deixam
+de ser exatamente a MinT quando alguma correção é aplicada.
+
+Uso:
+    python -m dashboard.previsao.reconciliacao --metodo mint_shrink
+"""
+import argparse
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from ..data_loader import processar_dados_brutos
+from .comum import DIRETORIO_PREVISAO, gravar_parquet_atomico, indicador_feriado_estadual, ler_parquet_em_cache
+from .modelos_loja import JANELA_RESIDUOS_DIAS, prever_loja, treinar_modelo_loja
+from .pontuacao import obter_modelos_lojas, posicoes_lojas, prever_lote
+from .tabela_previsoes import obter_tabela_previsoes
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_PREVISOES_RECONCILIADAS = DIRETORIO_PREVISAO / "previsoes_reconciliadas.parquet"
+
+METODOS_RECONCILIACAO = ('bottom_up', 'mint_shrink')
+NIVEIS_HIERARQUIA = ('total', 'tipo', 'sortimento', 'loja')
+
+
+def construir_matriz_soma(lojas, tipos, sortimentos):
+    """
+    Matriz de soma da hierarquia agrupada: rede, tipos de loja, sortimentos e lojas.
+
+    Args:
+        lojas (array-like): Lojas (colunas de S, na ordem informada)
+        tipos, sortimentos (array-like): StoreType e Assortment de cada loja
+
+    Returns:
+        tuple: (S esparsa CSR n_series x n_lojas, DataFrame Nivel/Chave de cada linha)
+    """
+    lojas = np.asarray(lojas)
+    m = len(lojas)
+    blocos, rotulos = [sparse.csr_matrix(np.ones((1, m)))], [('total', 'total')]
+    for nivel, grupos in (('tipo', np.asarray(tipos).astype(str)), ('sortimento', np.asarray(sortimentos).astype(str))):
+        chaves, posicoes = np.unique(grupos, return_inverse=True)
+        blocos.append(sparse.csr_matrix((np.ones(m), (posicoes, np.arange(m))), shape=(len(chaves), m)))
+        rotulos += [(nivel, chave) for chave in chaves]
+    blocos.append(sparse.identity(m, format='csr'))
+    rotulos += [('loja', str(loja)) for loja in lojas]
+    return sparse.vstack(blocos, format='csr'), pd.DataFrame(rotulos, columns=['Nivel', 'Chave'])
+
+
+def estimar_lambda_encolhimento(residuos):
+    """
+    Intensidade de encolhimento da correlação dos resíduos em direção a zero (Schäfer-Strimmer).
+
+    Calculada sem formar a matriz de correlação n x n: as somas sobre os pares (i, j) saem
+    da matriz de Gram T x T e de somas por linha dos resíduos padronizados.
+
+    Args:
+        residuos (np.ndarray): Resíduos (T dias x n séries)
+
+    Returns:
+        float: λ entre 0 e 1
+    """
+    t = residuos.shape[0]
+    desvios = np.sqrt((residuos ** 2).mean(axis=0))
+    padronizados = np.divide(residuos, desvios, out=np.zeros_like(residuos), where=desvios > 0)
+    quadrados = padronizados ** 2
+    gram = padronizados @ padronizados.T
+    diagonal_xtx = quadrados.sum(axis=0)  # Σ_t x_ti², diagonal de X'X
+    # Σ_{i≠j} Σ_t x_ti² x_tj² e Σ_{i≠j} (Σ_t x_ti x_tj)²
+    soma_produtos_quadrados = (quadrados.sum(axis=1) ** 2).sum() - (quadrados ** 2).sum()
+    soma_xtx_quadrado = (gram ** 2).sum() - (diagonal_xtx ** 2).sum()
+    soma_variancias = (soma_produtos_quadrados - soma_xtx_quadrado / t) / (t * (t - 1))
+    soma_correlacoes = soma_xtx_quadrado / t ** 2
+    if soma_correlacoes <= 0:
+        return 1.0
+    return float(np.clip(soma_variancias / soma_correlacoes, 0.0, 1.0))
+
+
+def reconciliar(previsoes_base, matriz_soma, metodo='mint_shrink', residuos=None, abertas=None):
+    """
+    Previsões coerentes em todos os níveis a partir das previsões base.
+
+    Na MinT, as lojas são zeradas nos dias fechados e limitadas a zero, e os níveis agregados
+    são refeitos como S·b (ver o docstring do módulo).
+
+    Args:
+        previsoes_base (np.ndarray): Previsões base (n_series x dias), linhas na ordem de matriz_soma
+        matriz_soma (sparse): S (n_series x n_lojas); as n_lojas últimas linhas são as lojas
+        metodo (str): 'bottom_up' ou 'mint_shrink'
+        residuos (np.ndarray): Resíduos no histórico (T x n_series), necessários para mint_shrink
+        abertas (np.ndarray): Máscara booleana n_lojas x dias dos dias de loja aberta (padrão: todos)
+
+    Returns:
+        tuple: (previsões reconciliadas n_series x dias, λ usado ou None)
+    """
+    n, m = matriz_soma.shape
+    n_agregadas = n - m
+    if metodo == 'bottom_up':
+        return matriz_soma @ previsoes_base[n_agregadas:], None
+    if metodo != 'mint_shrink':
+        raise ValueError(f"Método de reconciliação desconhecido: {metodo}")
+
+    # U' = [I | -A]: restrições de agregação (U'·ỹ = 0 para previsões coerentes)
+    restricoes = sparse.hstack([sparse.identity(n_agregadas, format='csr'), -matriz_soma[:n_agregadas]], format='csr')
+    restricoes_t = restricoes.T.tocsr()
+    t = residuos.shape[0]
+    lambda_ = estimar_lambda_encolhimento(residuos)
+    variancias = (residuos ** 2).mean(axis=0)
+    # W·U = λ·D·U + (1 - λ)·E'(E·U)/T, sem formar W
+    w_u = lambda_ * restricoes_t.multiply(variancias[:, None]).toarray() \
+        + (1 - lambda_) * (residuos.T @ (restricoes_t.T @ residuos.T).T) / t
+    ajuste = w_u @ np.linalg.solve(restricoes @ w_u, restricoes @ previsoes_base)
+    lojas_reconciliadas = (previsoes_base[n_agregadas:] - ajuste[n_agregadas:]).clip(min=0)
+    if abertas is not None:
+        lojas_reconciliadas[~abertas] = 0
+    return matriz_soma @ lojas_reconciliadas, lambda_
+
+
+def _agregar_por_grupo(matriz_soma_agregada, df, datas, lojas):
+    """Somas diárias por série agregada de vendas, lojas abertas, promoções e feriados (produto esparso)."""
+    colunas_lojas = pd.Index(lojas)
+    linhas = datas.get_indexer(df['Date'])
+    colunas = colunas_lojas.get_indexer(df['Store'])
+    grade = lambda valores: sparse.csr_matrix((valores, (colunas, linhas)), shape=(len(colunas_lojas), len(datas)))
+    return {
+        'Sales': matriz_soma_agregada @ grade(df['Sales'].to_numpy(dtype=np.float64)),
+        'Abertas': matriz_soma_agregada @ grade(np.ones(len(df))),
+        'Promo': matriz_soma_agregada @ grade(df['Promo'].to_numpy(dtype=np.float64)),
+        'StateHoliday': matriz_soma_agregada @ grade(indicador_feriado_estadual(df['StateHoliday']).astype(np.float64)),
+        'SchoolHoliday': matriz_soma_agregada @ grade(df['SchoolHoliday'].to_numpy(dtype=np.float64)),
+    }
+
+
+def _calendario_agregado(datas, agregados, linha):
+    """Histórico de uma série agregada no formato de treinar_modelo_loja (só dias com lojas abertas)."""
+    abertas = np.asarray(agregados['Abertas'][linha].todense()).ravel()
+    dias = abertas > 0
+    fracao = lambda coluna: np.asarray(agregados[coluna][linha].todense()).ravel()[dias] / abertas[dias]
+    return pd.DataFrame({
+        'Date': datas[dias],
+        'DayOfWeek': (datas[dias].dayofweek + 1).to_numpy(),
+        'Sales': np.asarray(agregados['Sales'][linha].todense()).ravel()[dias],
+        'Promo': fracao('Promo'),
+        'StateHoliday': (fracao('StateHoliday') >= 0.5).astype(np.uint8),  # feriado da maioria das lojas
+        'SchoolHoliday': fracao('SchoolHoliday'),
+    })
+
+
+def _prever_agregado(modelo, datas, promo):
+    """Previsão de uma série agregada para datas quaisquer (zero nos dias sem lojas abertas)."""
+    calendario = pd.DataFrame({'Date': datas, 'DayOfWeek': (datas.dayofweek + 1).to_numpy(), 'Promo': promo,
+                               'StateHoliday': 0, 'SchoolHoliday': 0})
+    previsoes = prever_loja(modelo, calendario)
+    return previsoes.set_index('Date')['Previsao'].reindex(datas, fill_value=0).to_numpy(dtype=np.float64)
+
+
+def reconciliar_previsoes(df=None, metodo='mint_shrink', diretorio=DIRETORIO_PREVISAO):
+    """
+    Reconcilia a tabela de previsões por loja com previsões base de tipo de loja, sortimento e rede.
+
+    Args:
+        df (pd.DataFrame): Dataset processado (padrão: processar_dados_brutos, todas as lojas)
+        metodo (str): 'bottom_up' ou 'mint_shrink'
+        diretorio (Path): Diretório de saída
+
+    Returns:
+        pd.DataFrame: Nivel, Chave, Date, PrevisaoBase e PrevisaoReconciliada
+    """
+    inicio = time.perf_counter()
+    pilha = obter_modelos_lojas()
+    tabela_previsoes = obter_tabela_previsoes()
+    if pilha is None or tabela_previsoes is None:
+        raise RuntimeError("Tabela de previsões ainda não gerada: execute o job da tabela de previsões")
+    if df is None:
+        df = processar_dados_brutos()
+
+    lojas = pilha['lojas']
+    atributos_lojas = df.drop_duplicates('Store').set_index('Store').reindex(lojas)
+    matriz_soma, rotulos = construir_matriz_soma(lojas, atributos_lojas['StoreType'], atributos_lojas['Assortment'])
+    n_agregadas = len(rotulos) - len(lojas)
+    agregada = matriz_soma[:n_agregadas]
+
+    # Previsões base das lojas: tabela materializada em grade densa (zero nos dias fechados)
+    tabela = tabela_previsoes['tabela']
+    datas_futuras = pd.date_range(tabela_previsoes['datas'].min(), tabela_previsoes['datas'].max(), freq='D')
+    df_futuro = pd.DataFrame({'Store': tabela.column('Store').to_numpy(), 'Date': tabela_previsoes['datas'],
+                              'Previsao': tabela.column('Previsao').to_numpy(), 'Promo': tabela.column('Promo').to_numpy()})
+    colunas = posicoes_lojas(pilha, df_futuro['Store'])
+    linhas = datas_futuras.get_indexer(df_futuro['Date'])
+    base_lojas = np.zeros((len(lojas), len(datas_futuras)))
+    base_lojas[colunas, linhas] = df_futuro['Previsao'].to_numpy()
+    promo_futura = sparse.csr_matrix((df_futuro['Promo'].to_numpy(dtype=np.float64), (colunas, linhas)),
+                                     shape=base_lojas.shape)
+    abertas_futuras = sparse.csr_matrix((np.ones(len(df_futuro)), (colunas, linhas)), shape=base_lojas.shape)
+    fracao_promo_futura = np.asarray((agregada @ promo_futura).todense()) \
+        / np.maximum(np.asarray((agregada @ abertas_futuras).todense()), 1)
+
+    # Resíduos das lojas no último ano: vendas menos o ajuste dos modelos empilhados (uma chamada vetorizada)
+    datas_historico = pd.date_range(df['Date'].max() - pd.Timedelta(days=JANELA_RESIDUOS_DIAS - 1), df['Date'].max())
+    df_janela = df[(df['Date'] >= datas_historico[0]) & df['Store'].isin(lojas)]
+    posicoes = posicoes_lojas(pilha, df_janela['Store'])
+    ajustado, _ = prever_lote(pilha, posicoes, df_janela['Date'], df_janela['Promo'].to_numpy(),
+                              df_janela['StateHoliday'].to_numpy(), df_janela['SchoolHoliday'].to_numpy())
+    residuos = np.zeros((len(datas_historico), len(rotulos)))
+    residuos[datas_historico.get_indexer(df_janela['Date']), n_agregadas + posicoes] = \
+        df_janela['Sales'].to_numpy(dtype=np.float64) - ajustado
+
+    # Séries agregadas: modelo próprio, previsão base e resíduos no mesmo período
+    datas_completas = pd.date_range(df['Date'].min(), df['Date'].max(), freq='D')
+    df_grade = df[['Store', 'Date', 'Sales', 'Promo', 'StateHoliday', 'SchoolHoliday']]
+    agregados = _agregar_por_grupo(agregada, df_grade, datas_completas, lojas)
+    base = np.zeros((len(rotulos), len(datas_futuras)))
+    base[n_agregadas:] = base_lojas
+    for linha in range(n_agregadas):
+        historico = _calendario_agregado(datas_completas, agregados, linha)
+        modelo = treinar_modelo_loja(historico)
+        base[linha] = _prever_agregado(modelo, datas_futuras, fracao_promo_futura[linha])
+        janela = historico[historico['Date'] >= datas_historico[0]]
+        ajustado_agregado = prever_loja(modelo, janela.assign(StateHoliday=janela['StateHoliday'].astype(str)))
+        ajustado_agregado = ajustado_agregado.set_index('Date')['Previsao'].reindex(janela['Date'], fill_value=0)
+        residuos[datas_historico.get_indexer(janela['Date']), linha] = \
+            janela['Sales'].to_numpy() - ajustado_agregado.to_numpy(dtype=np.float64)
+
+    reconciliadas, lambda_ = reconciliar(base, matriz_soma, metodo, residuos, abertas_futuras.toarray() > 0)
+    df_reconciliadas = pd.DataFrame({
+        'Nivel': np.repeat(rotulos['Nivel'].to_numpy(), len(datas_futuras)),
+        'Chave': np.repeat(rotulos['Chave'].to_numpy(), len(datas_futuras)),
+        'Date': np.tile(datas_futuras.to_numpy(), len(rotulos)),
+        'PrevisaoBase': base.ravel().astype(np.float32),
+        'PrevisaoReconciliada': reconciliadas.ravel().astype(np.float32),
+    })
+    df_reconciliadas.attrs['lambda'] = lambda_
+    gravar_parquet_atomico(df_reconciliadas, os.path.join(diretorio, CAMINHO_PREVISOES_RECONCILIADAS.name))
+    logger.info(f"{len(rotulos)} séries reconciliadas ({metodo}) em {time.perf_counter() - inicio:.1f} s"
+                + (f", λ = {lambda_:.3f}" if lambda_ is not None else ""))
+    return df_reconciliadas
+
+
+def carregar_previsoes_reconciliadas():
+    """Previsões reconciliadas por nível e data (None se ainda não geradas)."""
+    return ler_parquet_em_cache(CAMINHO_PREVISOES_RECONCILIADAS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reconcilia as previsões por loja, tipo de loja, sortimento e rede.")
+    parser.add_argument('--metodo', choices=METODOS_RECONCILIACAO, default='mint_shrink', help="Método (padrão: mint_shrink)")
+    argumentos = parser.parse_args(argv)
+
+    df_reconciliadas = reconciliar_previsoes(metodo=argumentos.metodo)
+    totais = df_reconciliadas[df_reconciliadas['Nivel'] != 'loja'].groupby(['Nivel', 'Chave'], sort=False)[
+        ['PrevisaoBase', 'PrevisaoReconciliada']].sum()
+    print(totais.to_string(float_format=lambda valor: f'{valor:,.0f}'))
+    print(f"Previsões reconciliadas gravadas em {CAMINHO_PREVISOES_RECONCILIADAS}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+# dashboard/previsao/registro_modelos.py
+"""
+Registro local de modelos: artefatos versionados com um manifesto, carregados sob demanda.
+
+Cada modelo registrado fica em um subdiretório do registro e tem uma entrada no manifesto
+(manifesto.json) com identificador, tipo, versão dos dados, métricas e esquema de atributos.
+O manifesto também aponta o modelo ativo de cada tipo; versões antigas além de
+VERSOES_MANTIDAS são apagadas (processos que ainda as usam mantêm os arquivos abertos).
+
+- Modelos por loja: os parâmetros das 1.115 lojas (Ridge, ingênuo sazonal, modelo escolhido)
+  são empacotados em um único array estruturado .npy. Os workers o abrem com mmap: iniciam
+  sem ler um arquivo por loja e compartilham as páginas pelo cache do sistema operacional.
+- Modelo global (árvores): pickle carregado só no primeiro uso.
+
+Os artefatos carregados ficam em um LRU de TAMANHO_CACHE_MODELOS entradas por processo.
+
+Uso:
+    python -m dashboard.previsao.registro_modelos
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .comum import DIRETORIO_PREVISAO, gravar_atomico, gravar_json_atomico
+from .modelos_loja import COLUNAS_ATRIBUTOS_LOJA, DIRETORIO_MODELOS_LOJAS, MODELO_RIDGE, carregar_modelo_loja
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_REGISTRO_MODELOS = DIRETORIO_PREVISAO / "registro_modelos"
+NOME_MANIFESTO_REGISTRO = "manifesto.json"
+
+TIPO_MODELOS_LOJAS = 'lojas'
+TIPO_MODELO_GLOBAL = 'global'
+VERSOES_MANTIDAS = 3
+TAMANHO_CACHE_MODELOS = int(os.environ.get('TAMANHO_CACHE_MODELOS', '4'))
+
+# Um registro por loja, na ordem das lojas: o pacote inteiro é um único array mapeável
+DTYPE_MODELOS_LOJAS = np.dtype([
+    ('loja', np.int64),
+    ('coeficientes', np.float64, (len(COLUNAS_ATRIBUTOS_LOJA),)),
+    ('intercepto', np.float64),
+    ('base_sazonal', np.float64, (7,)),
+    ('usar_ridge', np.bool_),
+    ('ultima_data', 'datetime64[ns]'),
+    ('rmspe', np.float64),
+])
+
+# {caminho do manifesto: (mtime_ns, manifesto)}
+_manifestos_cache = {}
+# {(diretório, id do modelo): artefato}, do menos ao mais recentemente usado
+_modelos_carregados = OrderedDict()
+_lock_modelos = threading.Lock()
+
+
+# ==============================================================================
+# Manifesto
+# ==============================================================================
+def ler_manifesto_registro(diretorio=DIRETORIO_REGISTRO_MODELOS):
+    """
+    Manifesto do registro, relido apenas quando o arquivo for regravado.
+
+    Returns:
+        dict: {'ativos': {tipo: id}, 'modelos': {id: entrada}} (vazio se o registro não existir)
+    """
+    caminho = Path(diretorio) / NOME_MANIFESTO_REGISTRO
+    try:
+        modificacao = os.stat(caminho).st_mtime_ns
+    except OSError:
+        return {'ativos': {}, 'modelos': {}}
+    registro = _manifestos_cache.get(caminho)
+    if registro is None or registro[0] != modificacao:
+        with open(caminho) as arquivo:
+            registro = (modificacao, json.load(arquivo))
+        _manifestos_cache[caminho] = registro
+    return registro[1]
+
+
+def registrar_modelo(id_modelo, tipo, arquivo, gravar, versao_dados, metricas, esquema_atributos,
+                     diretorio=DIRETORIO_REGISTRO_MODELOS, objeto=None):
+    """
+    Grava um artefato no registro e o torna o modelo ativo do seu tipo.
+
+    Args:
+        id_modelo (str): Identificador (o mesmo id regrava o artefato)
+        tipo (str): TIPO_MODELOS_LOJAS ou TIPO_MODELO_GLOBAL
+        arquivo (str): Nome do artefato ('.npy' é mapeado em memória, '.pkl' lido com pickle)
+        gravar (callable): Recebe o caminho temporário e grava o artefato nele
+        versao_dados (str): Versão dos dados de treino
+        metricas (dict): Métricas de validação
+        esquema_atributos (dict): Colunas e tipos esperados pelo modelo
+        diretorio (Path): Diretório do registro
+        objeto: Artefato já em memória, guardado no LRU para evitar relê-lo no mesmo processo
+
+    Returns:
+        dict: Entrada do manifesto
+    """
+    diretorio = Path(diretorio)
+    diretorio_modelo = diretorio / id_modelo
+    diretorio_modelo.mkdir(parents=True, exist_ok=True)
+    caminho = diretorio_modelo / arquivo
+    gravar_atomico(caminho, gravar)
+
+    manifesto = ler_manifesto_registro(diretorio)
+    manifesto = {'ativos': dict(manifesto['ativos']), 'modelos': dict(manifesto['modelos'])}
+    entrada = {
+        'id': id_modelo,
+        'tipo': tipo,
+        'arquivo': arquivo,
+        'versao_dados': versao_dados,
+        'metricas': metricas,
+        'esquema_atributos': esquema_atributos,
+        'registrado_em': pd.Timestamp.now().isoformat(timespec='seconds'),
+    }
+    manifesto['modelos'].pop(id_modelo, None)
+    manifesto['modelos'][id_modelo] = entrada
+    manifesto['ativos'][tipo] = id_modelo
+
+    # Só as versões mais recentes de cada tipo ficam em disco
+    ids_tipo = [id_ for id_, outra in manifesto['modelos'].items() if outra['tipo'] == tipo]
+    for id_antigo in ids_tipo[:-VERSOES_MANTIDAS]:
+        del manifesto['modelos'][id_antigo]
+        shutil.rmtree(diretorio / id_antigo, ignore_errors=True)
+    gravar_json_atomico(manifesto, diretorio / NOME_MANIFESTO_REGISTRO)
+
+    with _lock_modelos:
+        _modelos_carregados.pop((str(diretorio), id_modelo), None)
+        if objeto is not None:
+            _guardar_no_cache((str(diretorio), id_modelo), objeto)
+    logger.info(f"Modelo {id_modelo} ({tipo}) registrado em {diretorio}")
+    return entrada
+
+
+# ==============================================================================
+# Carga sob demanda
+# ==============================================================================
+def _guardar_no_cache(chave, artefato):
+    _modelos_carregados[chave] = artefato
+    _modelos_carregados.move_to_end(chave)
+    while len(_modelos_carregados) > TAMANHO_CACHE_MODELOS:
+        _modelos_carregados.popitem(last=False)
+
+
+def carregar_modelo(id_modelo, diretorio=DIRETORIO_REGISTRO_MODELOS):
+    """
+    Artefato de um modelo registrado, lido no primeiro uso e mantido no LRU do processo.
+
+    Returns:
+        Array mapeado em memória (.npy) ou objeto do pickle (.pkl); None se o id não estiver registrado
+    """
+    diretorio = Path(diretorio)
+    chave = (str(diretorio), id_modelo)
+    with _lock_modelos:
+        artefato = _modelos_carregados.get(chave)
+        if artefato is not None:
+            _modelos_carregados.move_to_end(chave)
+            return artefato
+        entrada = ler_manifesto_registro(diretorio)['modelos'].get(id_modelo)
+        if entrada is None:
+            return None
+        caminho = diretorio / id_modelo / entrada['arquivo']
+        if caminho.suffix == '.npy':
+            artefato = np.load(caminho, mmap_mode='r')
+        else:
+            with open(caminho, 'rb') as arquivo:
+                artefato = pickle.load(arquivo)
+        _guardar_no_cache(chave, artefato)
+        logger.info(f"Modelo {id_modelo} carregado do registro")
+        return artefato
+
+
+def obter_modelo_ativo(tipo, diretorio=DIRETORIO_REGISTRO_MODELOS):
+    """
+    Modelo ativo de um tipo.
+
+    Returns:
+        tuple: (entrada do manifesto, artefato) ou None se nenhum modelo do tipo foi registrado
+    """
+    manifesto = ler_manifesto_registro(diretorio)
+    id_modelo = manifesto['ativos'].get(tipo)
+    if id_modelo is None or id_modelo not in manifesto['modelos']:
+        return None
+    artefato = carregar_modelo(id_modelo, diretorio)
+    return (manifesto['modelos'][id_modelo], artefato) if artefato is not None else None
+
+
+# ==============================================================================
+# Modelos por loja
+# ==============================================================================
+def empacotar_modelos_lojas(lojas, diretorio_modelos=DIRETORIO_MODELOS_LOJAS):
+    """
+    Lê os artefatos .npz das lojas e os empacota em um único array estruturado.
+
+    Args:
+        lojas (array-like): Lojas a empacotar
+        diretorio_modelos (Path): Diretório dos artefatos por loja
+
+    Returns:
+        np.ndarray: DTYPE_MODELOS_LOJAS, um registro por loja em ordem crescente de loja
+    """
+    lojas = np.unique(np.asarray(lojas, dtype=np.int64))
+    pacote = np.zeros(len(lojas), dtype=DTYPE_MODELOS_LOJAS)
+    pacote['loja'] = lojas
+    for posicao, id_loja in enumerate(lojas):
+        modelo = carregar_modelo_loja(id_loja, diretorio_modelos)
+        usar_ridge = modelo['modelo'] == MODELO_RIDGE
+        pacote[posicao] = (id_loja, modelo['coeficientes'], modelo['intercepto'], modelo['base_sazonal'], usar_ridge,
+                           modelo['ultima_data'].to_datetime64(),
+                           modelo['rmspe_ridge'] if usar_ridge else modelo['rmspe_ingenuo'])
+    return pacote
+
+
+def registrar_modelos_lojas(lojas, versao_dados, parametros, diretorio_modelos=DIRETORIO_MODELOS_LOJAS,
+                            diretorio=DIRETORIO_REGISTRO_MODELOS):
+    """
+    Empacota os modelos das lojas e os registra como o modelo por loja ativo.
+
+    Args:
+        lojas (array-like): Lojas com artefato em diretorio_modelos
+        versao_dados (str): Versão dos dados de treino (ex.: hash das impressões das lojas)
+        parametros (dict): Hiperparâmetros do treino, parte do id
+        diretorio_modelos (Path): Diretório dos artefatos .npz por loja
+        diretorio (Path): Diretório do registro
+
+    Returns:
+        dict: Entrada do manifesto
+    """
+    pacote = empacotar_modelos_lojas(lojas, diretorio_modelos)
+    conteudo = json.dumps([versao_dados, parametros], sort_keys=True)
+    id_modelo = f"{TIPO_MODELOS_LOJAS}-{hashlib.sha1(conteudo.encode()).hexdigest()[:12]}"
+    metricas = {
+        'lojas': int(len(pacote)),
+        'lojas_ridge': int(pacote['usar_ridge'].sum()),
+        'rmspe_mediano': float(np.nanmedian(pacote['rmspe'])) if len(pacote) else None,
+    }
+    esquema = {'colunas_atributos': list(COLUNAS_ATRIBUTOS_LOJA), 'campos': list(DTYPE_MODELOS_LOJAS.names),
+               'parametros': parametros}
+    return registrar_modelo(id_modelo, TIPO_MODELOS_LOJAS, 'modelos_lojas.npy', lambda caminho: np.save(caminho, pacote),
+                            versao_dados, metricas, esquema, diretorio)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lista os modelos do registro local.")
+    parser.add_argument('--diretorio', default=str(DIRETORIO_REGISTRO_MODELOS), help="Diretório do registro")
+    argumentos = parser.parse_args(argv)
+
+    manifesto = ler_manifesto_registro(argumentos.diretorio)
+    if not manifesto['modelos']:
+        raise SystemExit(f"Nenhum modelo registrado em {argumentos.diretorio}")
+    linhas = [{
+        'Id': id_modelo,
+        'Tipo': entrada['tipo'],
+        'Ativo': '*' if manifesto['ativos'].get(entrada['tipo']) == id_modelo else '',
+        'VersaoDados': str(entrada['versao_dados'])[:16],
+        'RegistradoEm': entrada['registrado_em'],
+        'Metricas': ', '.join(f'{nome}={valor:.4g}' if isinstance(valor, float) else f'{nome}={valor}'
+                              for nome, valor in entrada['metricas'].items()),
+    } for id_modelo, entrada in manifesto['modelos'].items()]
+    print(pd.DataFrame(linhas).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,190 @@
+# dashboard/previsao/simulador_promocoes.py
+"""
+Simulador de promoções: "e se estas lojas fizerem promoção nestes dias?".
+
+O cenário é um calendário de promoções que substitui o calendário padrão da tabela de
+previsões para algumas lojas e datas. A simulação não retreina nada nem remonta a
+matriz de atributos. A base (log da previsão da Ridge, previsão do modelo escolhido e
+promoção padrão de cada linha da tabela) é calculada uma vez por versão dos modelos. Cada
+cenário só corrige a coluna de promoção das linhas alteradas: como a Ridge é linear em
+log(1 + vendas), a correção é o coeficiente de promoção da loja vezes a diferença de
+promoção. Lojas cujo modelo escolhido é o ingênuo sazonal não respondem a promoções.
+
+O resultado é a diferença entre cenário e base por loja e por tipo de loja, no horizonte
+da tabela de previsões.
+
+Uso:
+    python -m dashboard.previsao.simulador_promocoes --inicio 2015-08-10 --fim 2015-08-16 --tipos a c
+"""
+import argparse
+import logging
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .modelos_loja import COLUNAS_ATRIBUTOS_LOJA, montar_atributos_loja
+from .pontuacao import obter_modelos_lojas, posicoes_lojas
+from .tabela_previsoes import obter_tabela_previsoes
+
+logger = logging.getLogger(__name__)
+
+COLUNA_PROMO = COLUNAS_ATRIBUTOS_LOJA.index('promo')
+
+# Base da simulação por versão dos modelos: {'versao', 'chaves', 'posicoes', ...}
+_base_cache = {}
+_lock_base = threading.Lock()
+
+
+def _chaves_linhas(lojas, datas):
+    """Chave ordenável (loja, dia) para casar linhas do cenário com a tabela ordenada por (Store, Date)."""
+    dias = np.asarray(datas, dtype='datetime64[D]').astype(np.int64)
+    return np.asarray(lojas, dtype=np.int64) * 100_000 + dias
+
+
+def obter_base_simulacao():
+    """
+    Linhas da tabela de previsões com a previsão base já decomposta, montadas uma vez por versão.
+
+    Returns:
+        dict: 'chaves', 'posicoes', 'promo', 'log_ridge', 'previsao', 'usar_ridge' e 'pilha' por linha;
+              None se a tabela ainda não foi gerada
+    """
+    pilha = obter_modelos_lojas()
+    if pilha is None:
+        return None
+    with _lock_base:
+        if _base_cache.get('versao') != pilha['versao']:
+            tabela_previsoes = obter_tabela_previsoes()
+            tabela = tabela_previsoes['tabela']
+            lojas = tabela.column('Store').to_numpy()
+            datas = pd.DatetimeIndex(tabela_previsoes['datas'])
+            posicoes = posicoes_lojas(pilha, lojas)
+            promo = tabela.column('Promo').to_numpy().astype(np.int8)
+            atributos = montar_atributos_loja(datas, (datas.dayofweek + 1).to_numpy(), promo,
+                                              np.zeros(len(datas)), tabela.column('SchoolHoliday').to_numpy())
+            log_ridge = np.einsum('ij,ij->i', atributos, pilha['coeficientes'][posicoes]) + pilha['interceptos'][posicoes]
+            usar_ridge = pilha['usar_ridge'][posicoes]
+            _base_cache.clear()
+            _base_cache.update({
+                'versao': pilha['versao'],
+                'pilha': pilha,
+                'chaves': _chaves_linhas(lojas, datas),
+                'posicoes': posicoes,
+                'promo': promo,
+                'log_ridge': log_ridge,
+                'previsao': np.where(usar_ridge, np.expm1(log_ridge).clip(min=0),
+                                     tabela.column('PrevisaoIngenuo').to_numpy()),
+                'usar_ridge': usar_ridge,
+                'tipos': np.array([tabela_previsoes['tipos'][loja] for loja in pilha['lojas'].tolist()]),
+            })
+        return dict(_base_cache)
+
+
+def montar_plano_promocoes(lojas, datas, promo=1):
+    """
+    Calendário de promoções com o mesmo valor para todas as combinações de lojas e datas.
+
+    Args:
+        lojas (array-like): Lojas do plano
+        datas (array-like): Datas do plano
+        promo (int): 1 para promoção, 0 para retirar a promoção
+
+    Returns:
+        pd.DataFrame: Store, Date, Promo
+    """
+    lojas = np.asarray(lojas, dtype=np.int64)
+    datas = pd.DatetimeIndex(datas)
+    return pd.DataFrame({
+        'Store': np.repeat(lojas, len(datas)),
+        'Date': np.tile(datas.to_numpy(), len(lojas)),
+        'Promo': np.full(len(lojas) * len(datas), promo, dtype=np.int8),
+    })
+
+
+def simular_promocoes(calendario):
+    """
+    Diferença de vendas previstas entre o calendário de promoções informado e o padrão.
+
+    Linhas do calendário fora do horizonte da tabela ou em dias em que a loja não abre são
+    ignoradas; as demais lojas e datas mantêm o calendário padrão.
+
+    Args:
+        calendario (pd.DataFrame): Store, Date, Promo (0/1) das lojas e datas alteradas
+
+    Returns:
+        tuple: (diferenças por loja, diferenças por tipo de loja) como DataFrames com
+               VendasBase, VendasCenario, Diferenca, DiferencaPercentual e DiasAlterados
+    """
+    base = obter_base_simulacao()
+    if base is None:
+        raise RuntimeError("Tabela de previsões ainda não gerada: execute o job da tabela de previsões")
+    pilha = base['pilha']
+    n_lojas = len(pilha['lojas'])
+
+    # Linhas da tabela afetadas pelo cenário (busca binária nas chaves ordenadas)
+    chaves = _chaves_linhas(calendario['Store'].to_numpy(), calendario['Date'].to_numpy())
+    linhas = np.searchsorted(base['chaves'], chaves).clip(max=len(base['chaves']) - 1)
+    encontradas = base['chaves'][linhas] == chaves
+    linhas = linhas[encontradas]
+    promo_cenario = calendario['Promo'].to_numpy(dtype=np.int8)[encontradas]
+    alteradas = promo_cenario != base['promo'][linhas]
+    linhas, diferenca_promo = linhas[alteradas], (promo_cenario - base['promo'][linhas])[alteradas]
+
+    # Correção só da coluna de promoção nas linhas alteradas das lojas com Ridge
+    posicoes = base['posicoes'][linhas]
+    log_cenario = base['log_ridge'][linhas] + pilha['coeficientes'][posicoes, COLUNA_PROMO] * diferenca_promo
+    previsao_cenario = np.where(base['usar_ridge'][linhas], np.expm1(log_cenario).clip(min=0),
+                                base['previsao'][linhas])
+    diferenca = np.bincount(posicoes, weights=previsao_cenario - base['previsao'][linhas], minlength=n_lojas)
+    dias_alterados = np.bincount(posicoes, minlength=n_lojas)
+
+    lojas_cenario = np.unique(posicoes_lojas(pilha, np.unique(calendario['Store'].to_numpy())))
+    vendas_base = np.bincount(base['posicoes'], weights=base['previsao'], minlength=n_lojas)
+    df_lojas = pd.DataFrame({
+        'Store': pilha['lojas'][lojas_cenario],
+        'StoreType': base['tipos'][lojas_cenario],
+        'VendasBase': vendas_base[lojas_cenario],
+        'VendasCenario': vendas_base[lojas_cenario] + diferenca[lojas_cenario],
+        'Diferenca': diferenca[lojas_cenario],
+        'DiasAlterados': dias_alterados[lojas_cenario],
+    })
+    df_tipos = df_lojas.groupby('StoreType', as_index=False)[['VendasBase', 'VendasCenario', 'Diferenca',
+                                                              'DiasAlterados']].sum()
+    for df in (df_lojas, df_tipos):
+        df.insert(df.columns.get_loc('Diferenca') + 1, 'DiferencaPercentual',
+                  df['Diferenca'] / df['VendasBase'].where(df['VendasBase'] > 0))
+    return df_lojas, df_tipos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simula um plano de promoções sobre a tabela de previsões.")
+    parser.add_argument('--inicio', required=True, help="Primeiro dia do plano (AAAA-MM-DD)")
+    parser.add_argument('--fim', required=True, help="Último dia do plano (AAAA-MM-DD)")
+    parser.add_argument('--lojas', type=int, nargs='*', default=None, help="Lojas do plano (padrão: todas)")
+    parser.add_argument('--tipos', nargs='*', default=None, help="Tipos de loja do plano (padrão: todos)")
+    parser.add_argument('--sem-promo', action='store_true', help="Retira a promoção em vez de aplicá-la")
+    argumentos = parser.parse_args(argv)
+
+    base = obter_base_simulacao()
+    if base is None:
+        raise SystemExit("Tabela de previsões ainda não gerada: python -m dashboard.previsao.tabela_previsoes")
+    lojas = pd.Series(base['pilha']['lojas'])
+    if argumentos.lojas:
+        lojas = lojas[lojas.isin(argumentos.lojas)]
+    if argumentos.tipos:
+        lojas = lojas[pd.Series(base['tipos']).isin(argumentos.tipos).to_numpy()[lojas.index]]
+    plano = montar_plano_promocoes(lojas, pd.date_range(argumentos.inicio, argumentos.fim),
+                                   promo=0 if argumentos.sem_promo else 1)
+
+    inicio = time.perf_counter()
+    df_lojas, df_tipos = simular_promocoes(plano)
+    print(f"{len(plano):,} linhas do plano, {len(df_lojas)} lojas simuladas em {time.perf_counter() - inicio:.3f} s")
+    print(df_tipos.to_string(index=False, float_format=lambda valor: f'{valor:,.2f}'))
+    total = df_tipos[['VendasBase', 'Diferenca']].sum()
+    print(f"Total: €{total['Diferenca']:+,.0f} ({total['Diferenca'] / total['VendasBase']:+.2%} no horizonte)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,349 @@
+# dashboard/previsao/tabela_previsoes.py
+"""
+Tabela materializada de previsões: job noturno que pontua todas as lojas para os próximos
+N dias e leitura da tabela pelo dashboard.
+
+O job grava a previsão pontual do modelo escolhido por loja (ver modelos_loja) e os
+quantis P10/P50/P90 do bootstrap dos resíduos da loja (ver intervalos_bootstrap). A cada
+execução, uma impressão digital do histórico de cada loja (hash das linhas usadas no
+treino) é comparada com a da execução anterior: só as lojas novas ou com dados alterados
+são retreinadas e pontuadas; as linhas das demais são copiadas da tabela anterior. Os
+modelos de todas as lojas são então empacotados no registro de modelos (ver registro_modelos).
+
+A tabela é gravada em Parquet (formato de troca) e em uma cópia Arrow IPC sem compressão,
+ordenada por (Store, Date). O dashboard mapeia essa cópia em memória (os workers do
+gunicorn compartilham as páginas do arquivo) e filtra com os mesmos filtros de data,
+tipo de loja, loja e feriado de filtrar_dataframe, convertendo para pandas só as linhas
+selecionadas. Nenhuma previsão é calculada dentro de callbacks.
+
+Uso:
+    python -m dashboard.previsao.tabela_previsoes --dias 42 --processos 8
+    python -m dashboard.previsao.tabela_previsoes --completo   # retreina todas as lojas
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from ..data_loader import processar_dados_brutos, ordenar_por_loja_e_data, construir_indice_lojas
+from .comum import (DIRETORIO_PREVISAO, HORIZONTE_PREVISAO, gravar_atomico, gravar_json_atomico, gravar_parquet_atomico,
+                    ler_parquet_em_cache)
+from .modelos_loja import (ALFA_RIDGE, COLUNAS_TREINO, DIRETORIO_MODELOS_LOJAS, MODELO_RIDGE,
+                           treinar_modelos_lojas)
+from .intervalos_bootstrap import CAMINHO_RESIDUOS, gravar_residuos, calcular_intervalos_bootstrap
+from .registro_modelos import DIRETORIO_REGISTRO_MODELOS, registrar_modelos_lojas
+
+logger = logging.getLogger(__name__)
+
+CAMINHO_TABELA_PREVISOES = DIRETORIO_PREVISAO / "previsoes.parquet"
+CAMINHO_TABELA_PREVISOES_ARROW = DIRETORIO_PREVISAO / "previsoes.arrow"
+CAMINHO_METRICAS_LOJAS = DIRETORIO_PREVISAO / "metricas_modelos_lojas.parquet"
+CAMINHO_MANIFESTO_PREVISOES = DIRETORIO_PREVISAO / "previsoes_manifesto.json"
+
+VERSAO_ESQUEMA_PREVISOES = 2  # mudanças de colunas invalidam a tabela anterior (recalcula todas as lojas)
+
+COLUNAS_TABELA_PREVISOES = ['Store', 'StoreType', 'Date', 'DayOfWeek', 'Promo', 'StateHoliday', 'SchoolHoliday',
+                            'Modelo', 'Previsao', 'P10', 'P50', 'P90', 'PrevisaoRidge', 'PrevisaoIngenuo']
+
+# Tabela mapeada em memória: {'modificacao', 'tabela', 'indice', 'datas', 'tipos'}
+_tabela_mapeada = {}
+
+
+# ==============================================================================
+# Job de materialização
+# ==============================================================================
+def calcular_impressoes_lojas(df):
+    """
+    Impressão digital do histórico de cada loja, para detectar quais lojas mudaram.
+
+    Combina o número de linhas e a soma (módulo 2^64) dos hashes das linhas nas colunas
+    usadas no treino. Qualquer linha nova, removida ou alterada muda a impressão da loja.
+
+    Args:
+        df (pd.DataFrame): Dataset processado
+
+    Returns:
+        dict: {loja: impressão em texto}
+    """
+    df_ordenado = ordenar_por_loja_e_data(df[COLUNAS_TREINO + ['StoreType']])
+    indice = construir_indice_lojas(df_ordenado)
+    if not indice:
+        return {}
+    hashes = pd.util.hash_pandas_object(df_ordenado, index=False).to_numpy()
+    lojas = np.fromiter(indice, dtype=np.int64, count=len(indice))
+    inicios = np.array([indice[loja][0] for loja in lojas], dtype=np.int64)
+    fins = np.array([indice[loja][1] for loja in lojas], dtype=np.int64)
+    somas = np.add.reduceat(hashes, inicios)  # uint64: a soma dá a volta, como esperado
+    return {int(loja): f'{fim - inicio}:{soma:016x}' for loja, inicio, fim, soma in zip(lojas, inicios, fins, somas)}
+
+
+def montar_linhas_previsao(df_previsoes, df_metricas, quantis):
+    """
+    Monta as linhas da tabela materializada a partir das saídas de treinar_modelos_lojas.
+
+    Args:
+        df_previsoes (pd.DataFrame): Previsões por loja e dia
+        df_metricas (pd.DataFrame): Modelo escolhido e RMSPE por loja
+        quantis (np.ndarray): P10/P50/P90 de cada linha de df_previsoes (calcular_intervalos_bootstrap)
+
+    Returns:
+        pd.DataFrame: Linhas com COLUNAS_TABELA_PREVISOES
+    """
+    metricas = df_metricas.set_index('Store')
+    lojas = df_previsoes['Store']
+    previsao = df_previsoes['Previsao'].to_numpy(dtype=np.float32)
+    datas = pd.DatetimeIndex(df_previsoes['Date'])
+    df_linhas = pd.DataFrame({
+        'Store': lojas.to_numpy(dtype=np.int64),
+        'StoreType': lojas.map(metricas['StoreType']).astype(str).to_numpy(),
+        'Date': datas,
+        'DayOfWeek': (datas.dayofweek + 1).to_numpy(dtype=np.uint8),
+        'Promo': df_previsoes['Promo'].to_numpy(dtype=np.uint8),
+        'StateHoliday': '0',  # feriados futuros não são conhecidos (ver construir_calendario_futuro)
+        'SchoolHoliday': np.zeros(len(df_previsoes), dtype=np.uint8),
+        'Modelo': lojas.map(metricas['Modelo']).to_numpy(),
+        'Previsao': previsao,
+        'P10': quantis[:, 0],
+        'P50': quantis[:, 1],
+        'P90': quantis[:, 2],
+        'PrevisaoRidge': df_previsoes['PrevisaoRidge'].to_numpy(dtype=np.float32),
+        'PrevisaoIngenuo': df_previsoes['PrevisaoIngenuo'].to_numpy(dtype=np.float32),
+    })
+    return df_linhas[COLUNAS_TABELA_PREVISOES]
+
+
+def gravar_arrow_atomico(df, caminho):
+    """Grava o DataFrame em Arrow IPC sem compressão (mapeável em memória), substituindo o arquivo de uma vez."""
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+
+    def gravar(temporario):
+        with pa.OSFile(str(temporario), 'wb') as destino, pa.ipc.new_file(destino, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+    gravar_atomico(caminho, gravar)
+
+
+def _ler_manifesto(caminho):
+    """Manifesto da execução anterior (None se não existir ou estiver ilegível)."""
+    try:
+        with open(caminho) as arquivo:
+            return json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+
+
+def atualizar_tabela_previsoes(df=None, dias=HORIZONTE_PREVISAO, processos=None, alfa=ALFA_RIDGE,
+                               completo=False, diretorio=DIRETORIO_PREVISAO):
+    """
+    Atualiza a tabela materializada, retreinando e pontuando só as lojas cujos dados mudaram.
+
+    Todas as lojas são recalculadas na primeira execução, com completo=True ou quando o
+    número de dias ou a regularização mudam em relação à execução anterior.
+
+    Args:
+        df (pd.DataFrame): Dataset processado (padrão: processar_dados_brutos, todas as lojas)
+        dias (int): Dias previstos a partir do fim do histórico de cada loja
+        processos (int): Processos do pool de treino (padrão: número de CPUs)
+        alfa (float): Regularização da Ridge
+        completo (bool): Ignora as impressões anteriores e recalcula todas as lojas
+        diretorio (Path): Diretório de saída
+
+    Returns:
+        tuple: (tabela de previsões, lojas recalculadas)
+    """
+    inicio = time.perf_counter()
+    if df is None:
+        df = processar_dados_brutos()
+    if df is None or df.empty:
+        raise RuntimeError("Dataset processado indisponível para gerar as previsões")
+
+    diretorio = Path(diretorio)
+    caminho_tabela = diretorio / CAMINHO_TABELA_PREVISOES.name
+    caminho_metricas = diretorio / CAMINHO_METRICAS_LOJAS.name
+    caminho_manifesto = diretorio / CAMINHO_MANIFESTO_PREVISOES.name
+
+    impressoes = calcular_impressoes_lojas(df)
+    manifesto = _ler_manifesto(caminho_manifesto)
+    reaproveitar = (not completo and manifesto is not None and manifesto.get('dias') == dias
+                    and manifesto.get('alfa_ridge') == alfa and manifesto.get('versao_esquema') == VERSAO_ESQUEMA_PREVISOES
+                    and caminho_tabela.exists() and caminho_metricas.exists()
+                    and (diretorio / CAMINHO_RESIDUOS.name).exists())
+    anteriores = manifesto['impressoes'] if reaproveitar else {}
+    lojas_recalcular = sorted(loja for loja, impressao in impressoes.items() if anteriores.get(str(loja)) != impressao)
+    lojas_removidas = set(int(loja) for loja in anteriores) - set(impressoes)
+
+    if reaproveitar and not lojas_recalcular and not lojas_removidas:
+        logger.info("Tabela de previsões já atualizada: nenhuma loja com dados novos")
+        return pd.read_parquet(caminho_tabela), []
+
+    df_previsoes, df_metricas, residuos = treinar_modelos_lojas(
+        df, processos=processos, alfa=alfa, diretorio_modelos=diretorio / DIRETORIO_MODELOS_LOJAS.name,
+        lojas=lojas_recalcular, dias=dias)
+    # Resíduos de todas as lojas em um único array: os das inalteradas vêm do arquivo anterior
+    mantidas = sorted(set(impressoes) - set(lojas_recalcular)) if reaproveitar else []
+    indice_residuos = gravar_residuos(residuos, mantidas, diretorio)
+    partes_tabela, partes_metricas = [], []
+    if lojas_recalcular:
+        quantis, df_totais = calcular_intervalos_bootstrap(df_previsoes, indice_residuos, processos, diretorio)
+        partes_tabela.append(montar_linhas_previsao(df_previsoes, df_metricas, quantis))
+        partes_metricas.append(df_metricas.merge(df_totais, on='Store', how='left'))
+    if reaproveitar:
+        # Linhas das lojas inalteradas vêm da tabela anterior
+        partes_tabela.append(pd.read_parquet(caminho_tabela, filters=[('Store', 'in', mantidas)]))
+        partes_metricas.append(pd.read_parquet(caminho_metricas, filters=[('Store', 'in', mantidas)]))
+
+    df_tabela = ordenar_por_loja_e_data(pd.concat(partes_tabela, ignore_index=True))
+    df_metricas = pd.concat(partes_metricas, ignore_index=True).sort_values('Store', ignore_index=True)
+
+    gravar_parquet_atomico(df_tabela, caminho_tabela)
+    gravar_arrow_atomico(df_tabela, diretorio / CAMINHO_TABELA_PREVISOES_ARROW.name)
+    gravar_parquet_atomico(df_metricas, caminho_metricas)
+    impressoes_texto = {str(loja): impressao for loja, impressao in impressoes.items()}
+    versao_dados = hashlib.sha1(json.dumps(impressoes_texto, sort_keys=True).encode()).hexdigest()
+    registrar_modelos_lojas(sorted(impressoes), versao_dados, {'alfa_ridge': alfa, 'dias': dias},
+                            diretorio / DIRETORIO_MODELOS_LOJAS.name, diretorio / DIRETORIO_REGISTRO_MODELOS.name)
+    # O manifesto é gravado por último: se o job parar antes, a próxima execução refaz as lojas
+    gravar_json_atomico({
+        'dias': dias,
+        'alfa_ridge': alfa,
+        'versao_esquema': VERSAO_ESQUEMA_PREVISOES,
+        'lojas': len(impressoes),
+        'lojas_recalculadas': len(lojas_recalcular),
+        'atualizado_em': pd.Timestamp.now().isoformat(timespec='seconds'),
+        'impressoes': impressoes_texto,
+    }, caminho_manifesto)
+
+    logger.info(f"Tabela de previsões atualizada em {time.perf_counter() - inicio:.1f} s: "
+                f"{len(lojas_recalcular)} de {len(impressoes)} lojas recalculadas, {len(lojas_removidas)} removidas")
+    return df_tabela, lojas_recalcular
+
+
+# ==============================================================================
+# Leitura pelo dashboard
+# ==============================================================================
+def carregar_metricas_lojas():
+    """Modelo escolhido e RMSPE de validação por loja (None se ainda não gerados)."""
+    return ler_parquet_em_cache(CAMINHO_METRICAS_LOJAS)
+
+
+def obter_tabela_previsoes():
+    """
+    Mapeia a tabela de previsões em memória, remapeando apenas quando o job regravar o arquivo.
+
+    A leitura não copia os dados: colunas numéricas e datas viram arrays numpy sobre o mapa.
+
+    Returns:
+        dict: 'tabela' (pa.Table), 'indice' ({loja: (inicio, fim)}), 'datas' (np.ndarray),
+              'tipos' ({loja: StoreType}); None se a tabela ainda não foi gerada
+    """
+    caminho = CAMINHO_TABELA_PREVISOES_ARROW
+    try:
+        modificacao = os.stat(caminho).st_mtime_ns
+    except OSError:
+        return None
+    if _tabela_mapeada.get('modificacao') != modificacao:
+        # O mapa continua válido enquanto houver referências à tabela, mesmo após o os.replace do job
+        tabela = pa.ipc.open_file(pa.memory_map(str(caminho))).read_all()
+        indice = construir_indice_lojas(pd.DataFrame({'Store': tabela.column('Store').to_numpy()}))
+        inicios = [inicio for inicio, _ in indice.values()]
+        tipos = tabela.column('StoreType').take(pa.array(inicios, type=pa.int64())).to_pylist()
+        _tabela_mapeada.update({
+            'modificacao': modificacao,
+            'tabela': tabela,
+            'indice': indice,
+            'datas': tabela.column('Date').to_numpy(),
+            'tipos': dict(zip(indice, tipos)),
+        })
+    return _tabela_mapeada
+
+
+def filtrar_previsoes(data_inicio, data_fim, tipos_loja, lojas_especificas, feriado_estadual='all', feriado_escolar='all'):
+    """
+    Equivalente a filtrar_dataframe sobre a tabela de previsões mapeada em memória.
+
+    Os recortes de loja e de datas são fatias da tabela ordenada por (Store, Date); apenas
+    as linhas selecionadas são convertidas para pandas.
+
+    Args:
+        data_inicio, data_fim (str ou datetime): Janela de datas (inclusiva)
+        tipos_loja (list): Tipos de loja (vazio: todos)
+        lojas_especificas (list): Lojas (vazio: todas)
+        feriado_estadual (str): 'all' ou valor de StateHoliday
+        feriado_escolar (str ou int): 'all' ou valor de SchoolHoliday
+
+    Returns:
+        pd.DataFrame: Previsões filtradas, agrupadas por loja e ordenadas por data
+    """
+    if not data_inicio or not data_fim:
+        return pd.DataFrame()
+
+    data_inicio_dt = pd.to_datetime(data_inicio)
+    data_fim_dt = pd.to_datetime(data_fim)
+
+    if data_inicio_dt > data_fim_dt:
+        return pd.DataFrame()
+
+    mapeada = obter_tabela_previsoes()
+    if mapeada is None:
+        return pd.DataFrame()
+    datas = mapeada['datas']
+    inicio_np, fim_np = np.datetime64(data_inicio_dt, 'ns'), np.datetime64(data_fim_dt, 'ns')
+
+    if not tipos_loja and not lojas_especificas:
+        posicoes = np.flatnonzero((datas >= inicio_np) & (datas <= fim_np))
+    else:
+        # Filtros de tipo de loja e loja específica cumulativos, como em filtrar_dataframe
+        lojas = sorted(set(lojas_especificas)) if lojas_especificas else sorted(mapeada['indice'])
+        if tipos_loja:
+            lojas = [loja for loja in lojas if mapeada['tipos'].get(loja) in tipos_loja]
+        trechos = []
+        for loja in lojas:
+            limites = mapeada['indice'].get(loja)
+            if limites is None:
+                continue
+            inicio, fim = limites
+            trechos.append(np.arange(inicio + np.searchsorted(datas[inicio:fim], inicio_np, side='left'),
+                                     inicio + np.searchsorted(datas[inicio:fim], fim_np, side='right')))
+        posicoes = np.concatenate(trechos) if trechos else np.empty(0, dtype=np.int64)
+
+    df_filtrado = mapeada['tabela'].take(pa.array(posicoes, type=pa.int64())).to_pandas()
+
+    # Aplica filtros de feriado
+    if feriado_estadual != 'all':
+        df_filtrado = df_filtrado[df_filtrado['StateHoliday'] == feriado_estadual]
+
+    if feriado_escolar != 'all':
+        df_filtrado = df_filtrado[df_filtrado['SchoolHoliday'] == int(feriado_escolar)]
+
+    return df_filtrado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera ou atualiza a tabela materializada de previsões por loja.")
+    parser.add_argument('--dias', type=int, default=HORIZONTE_PREVISAO, help="Dias previstos (padrão: 42)")
+    parser.add_argument('--processos', type=int, default=None, help="Processos em paralelo (padrão: nº de CPUs)")
+    parser.add_argument('--alfa', type=float, default=ALFA_RIDGE, help="Regularização da Ridge")
+    parser.add_argument('--completo', action='store_true', help="Retreina todas as lojas, mesmo sem dados novos")
+    argumentos = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    df_tabela, lojas_recalculadas = atualizar_tabela_previsoes(dias=argumentos.dias, processos=argumentos.processos,
+                                                               alfa=argumentos.alfa, completo=argumentos.completo)
+    print(f"{len(lojas_recalculadas)} lojas recalculadas em {time.perf_counter() - inicio:.1f} s")
+    print(f"Tabela: {len(df_tabela):,} linhas, {df_tabela['Store'].nunique()} lojas, "
+          f"{df_tabela['Date'].min():%d/%m/%Y} a {df_tabela['Date'].max():%d/%m/%Y}")
+    df_metricas = carregar_metricas_lojas()
+    if df_metricas is not None:
+        print(f"RMSPE de validação (mediana): {df_metricas['RMSPE'].median():.4f}")
+        print(f"Lojas com regressão: {(df_metricas['Modelo'] == MODELO_RIDGE).mean():.0%}")
+    print(f"Previsões gravadas em {CAMINHO_TABELA_PREVISOES}")
+
+
+if __name__ == '__main__':
+    main()
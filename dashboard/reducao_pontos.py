@@ -0,0 +1,177 @@
+# dashboard/reducao_pontos.py
+"""
+Redução de pontos de séries temporais para os gráficos de linha (Largest-Triangle-Three-Buckets).
+
+O LTTB mantém o formato visual da série (picos e vales) escolhendo, em cada balde, o ponto
+que forma o maior triângulo com o ponto escolhido no balde anterior e a média do próximo.
+A implementação trabalha sobre uma matriz (pontos x séries) compartilhando o eixo x, de modo
+que todas as séries de um gráfico são reduzidas juntas, balde a balde.
+"""
+import numpy as np
+import pandas as pd
+
+from .config import LARGURA_GRAFICO_PADRAO_PX, ORCAMENTO_PONTOS_FIGURA, PONTOS_MINIMOS_POR_TRACO
+
+
+def calcular_pontos_por_traco(n_series, largura_px=None):
+    """
+    Define quantos pontos cada traço pode ter: no máximo um por pixel de largura do gráfico
+    e, com muitas séries, o orçamento total da figura dividido entre elas.
+
+    Args:
+        n_series (int): Número de traços do gráfico
+        largura_px (int): Largura renderizada do gráfico em pixels (None usa a largura padrão)
+
+    Returns:
+        int: Máximo de pontos por traço
+    """
+    largura = int(largura_px) if largura_px else LARGURA_GRAFICO_PADRAO_PX
+    por_orcamento = ORCAMENTO_PONTOS_FIGURA // max(1, n_series)
+    return max(PONTOS_MINIMOS_POR_TRACO, min(largura, por_orcamento))
+
+
+def selecionar_indices_lttb(x, matriz_y, n_pontos):
+    """
+    Seleciona, para cada série, os índices dos pontos mantidos pelo LTTB.
+
+    Args:
+        x (np.ndarray): Eixo x numérico e crescente, forma (n,)
+        matriz_y (np.ndarray): Valores das séries, forma (n, s); NaN indica ausência de dado
+        n_pontos (int): Número de pontos desejado por série (>= 3)
+
+    Returns:
+        np.ndarray: Índices selecionados, forma (n_pontos, s) (ou (n, s) se n <= n_pontos)
+    """
+    n, n_series = matriz_y.shape
+    if n <= n_pontos or n_pontos < 3:
+        return np.repeat(np.arange(n)[:, None], n_series, axis=1)
+
+    x = np.asarray(x, dtype=np.float64)
+    matriz_y = np.asarray(matriz_y, dtype=np.float64)
+    validos = ~np.isnan(matriz_y)
+    y_zerado = np.where(validos, matriz_y, 0.0)
+    colunas = np.arange(n_series)
+
+    # Limites dos baldes: o primeiro e o último ponto são sempre mantidos
+    tamanho_balde = (n - 2) / (n_pontos - 2)
+    limites = np.floor(np.arange(n_pontos - 1) * tamanho_balde).astype(np.int64) + 1
+    limites[-1] = n - 1
+
+    # Somas acumuladas permitem a média do próximo balde em O(1) para todas as séries
+    soma_y = np.vstack([np.zeros(n_series), np.cumsum(y_zerado, axis=0)])
+    contagem_y = np.vstack([np.zeros(n_series), np.cumsum(validos, axis=0)])
+    soma_x = np.concatenate(([0.0], np.cumsum(x)))
+
+    indices = np.empty((n_pontos, n_series), dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    anterior = np.zeros(n_series, dtype=np.int64)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for balde in range(n_pontos - 2):
+            inicio, fim = limites[balde], limites[balde + 1]
+            proximo_fim = limites[balde + 2] if balde + 2 < len(limites) else n
+
+            media_x = (soma_x[proximo_fim] - soma_x[fim]) / (proximo_fim - fim)
+            media_y = (soma_y[proximo_fim] - soma_y[fim]) / (contagem_y[proximo_fim] - contagem_y[fim])
+
+            x_a = x[anterior]
+            y_a = matriz_y[anterior, colunas]
+            # Sem média disponível (próximo balde vazio), compara com uma reta horizontal pelo ponto anterior
+            media_y = np.where(np.isnan(media_y), y_a, media_y)
+
+            areas = np.abs(
+                (x_a - media_x) * (matriz_y[inicio:fim] - y_a)
+                - (x_a - x[inicio:fim, None]) * (media_y - y_a)
+            )
+            # Pontos ausentes nunca são escolhidos se houver algum valor no balde
+            areas = np.where(np.isnan(areas), -1.0, areas)
+            anterior = inicio + np.argmax(areas, axis=0)
+            indices[balde + 1] = anterior
+
+    return indices
+
+
+def reduzir_serie_larga(df_largo, n_pontos):
+    """
+    Reduz todas as colunas de um DataFrame largo (índice = eixo x, colunas = séries) com LTTB.
+
+    Args:
+        df_largo (pd.DataFrame): Índice ordenado (datas ou números) e uma coluna por série
+        n_pontos (int): Máximo de pontos por série
+
+    Returns:
+        pd.DataFrame: Formato longo com as colunas [nome do índice, nome das colunas, 'Value']
+    """
+    nome_x = df_largo.index.name or 'x'
+    nome_serie = df_largo.columns.name or 'serie'
+    if df_largo.empty:
+        return pd.DataFrame(columns=[nome_x, nome_serie, 'Value'])
+
+    indice = df_largo.index
+    if isinstance(indice, pd.DatetimeIndex):
+        x_numerico = indice.asi8.astype(np.float64)
+    else:
+        x_numerico = np.asarray(indice, dtype=np.float64)
+
+    valores = df_largo.to_numpy(dtype=np.float64, na_value=np.nan)
+    indices = selecionar_indices_lttb(x_numerico, valores, n_pontos)
+    colunas = np.arange(valores.shape[1])
+
+    # Monta o formato longo série a série (ordem das colunas preservada)
+    return pd.DataFrame({
+        nome_x: np.asarray(indice)[indices.T.ravel()],
+        nome_serie: np.repeat(df_largo.columns.to_numpy(), indices.shape[0]),
+        'Value': valores[indices, colunas].T.ravel(),
+    })
+
+
+def reduzir_serie(x, y, n_pontos):
+    """
+    Atalho para uma única série: retorna (x, y) reduzidos com LTTB.
+
+    Args:
+        x (array-like): Eixo x ordenado (datas ou números)
+        y (array-like): Valores da série
+        n_pontos (int): Máximo de pontos
+
+    Returns:
+        tuple: (x reduzido, y reduzido)
+    """
+    serie = pd.Series(np.asarray(y, dtype=np.float64), index=pd.Index(x))
+    if len(serie) <= n_pontos:
+        return serie.index, serie.to_numpy()
+    x_numerico = serie.index.asi8.astype(np.float64) if isinstance(serie.index, pd.DatetimeIndex) else serie.index.to_numpy(dtype=np.float64)
+    indices = selecionar_indices_lttb(x_numerico, serie.to_numpy()[:, None], n_pontos)[:, 0]
+    return serie.index[indices], serie.to_numpy()[indices]
+
+
+def recortar_intervalo_x(df_largo, dados_relayout):
+    """
+    Recorta o DataFrame largo ao intervalo x visível informado pelo relayoutData do Plotly.
+
+    Args:
+        df_largo (pd.DataFrame): Índice ordenado (eixo x)
+        dados_relayout (dict): relayoutData do dcc.Graph
+
+    Returns:
+        tuple: (DataFrame recortado, [x_inicio, x_fim] ou None se não houver zoom no eixo x)
+    """
+    if not dados_relayout:
+        return df_largo, None
+    if 'xaxis.range[0]' in dados_relayout and 'xaxis.range[1]' in dados_relayout:
+        intervalo = [dados_relayout['xaxis.range[0]'], dados_relayout['xaxis.range[1]']]
+    elif 'xaxis.range' in dados_relayout:
+        intervalo = list(dados_relayout['xaxis.range'])
+    else:
+        return df_largo, None
+
+    if isinstance(df_largo.index, pd.DatetimeIndex):
+        inicio, fim = pd.Timestamp(intervalo[0]), pd.Timestamp(intervalo[1])
+    else:
+        inicio, fim = float(intervalo[0]), float(intervalo[1])
+
+    # Inclui um ponto de cada lado para que a linha não seja cortada na borda do gráfico
+    posicao_inicio = max(0, int(df_largo.index.searchsorted(inicio, side='left')) - 1)
+    posicao_fim = min(len(df_largo), int(df_largo.index.searchsorted(fim, side='right')) + 1)
+    return df_largo.iloc[posicao_inicio:posicao_fim], intervalo
@@ -0,0 +1,114 @@
+# dashboard/tarefas_background.py
+"""
+Execução dos callbacks pesados em segundo plano (background callbacks do Dash).
+
+Com um DiskcacheManager, o callback roda em um processo separado e o worker do gunicorn
+apenas registra o job e responde; o navegador consulta o andamento a cada
+INTERVALO_CONSULTA_MS. Enquanto o job roda, a barra de progresso da página fica visível
+e é atualizada pelo próprio callback. Quando os filtros mudam com um job em andamento,
+o navegador envia o job antigo na nova requisição e o Dash o encerra; trocar de página
+cancela o job explicitamente.
+
+As dependências (diskcache, multiprocess e psutil, instaladas com dash[diskcache]) são
+opcionais: sem elas, ou com CALLBACKS_BACKGROUND=false, os mesmos callbacks são
+registrados como callbacks comuns. Nesse caso, chamadas idênticas simultâneas compartilham
+uma única execução e cada chamada de progresso vira um ponto de verificação: a chamada é
+descartada assim que a mesma aba dispara o callback de novo (ver concorrencia.py).
+"""
+import functools
+import logging
+import os
+from pathlib import Path
+
+from dash import Input, Output
+
+from .concorrencia import ID_ARMAZENAMENTO_ABA, executar_uma_vez, iniciar_geracao, normalizar_chave, verificar_geracao
+from .data_loader import DIRETORIO_BASE
+
+try:
+    import diskcache
+    from dash import DiskcacheManager
+except ImportError:  # dash[diskcache] não instalado
+    diskcache = None
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_CACHE_BACKGROUND = Path(os.environ.get('DIRETORIO_CACHE_BACKGROUND', DIRETORIO_BASE / 'cache-background'))
+INTERVALO_CONSULTA_MS = 500
+EXPIRACAO_RESULTADOS_S = 600
+ESTILO_PROGRESSO_VISIVEL = {'display': 'flex', 'height': '1.25rem'}
+ESTILO_PROGRESSO_OCULTO = {'display': 'none'}
+
+
+def criar_gerenciador_background(diretorio=None):
+    """
+    Cria o gerenciador de background callbacks sobre um diskcache local.
+
+    Args:
+        diretorio (str ou Path): Diretório do diskcache (padrão: DIRETORIO_CACHE_BACKGROUND)
+
+    Returns:
+        DiskcacheManager ou None se desativado ou se as dependências não estiverem instaladas
+    """
+    if os.environ.get('CALLBACKS_BACKGROUND', 'True').lower() != 'true':
+        logger.info("Callbacks em segundo plano desativados (CALLBACKS_BACKGROUND=false)")
+        return None
+    if diskcache is None:
+        logger.warning("diskcache não instalado: callbacks pesados serão executados de forma síncrona")
+        return None
+    try:
+        cache = diskcache.Cache(str(diretorio or DIRETORIO_CACHE_BACKGROUND))
+        return DiskcacheManager(cache, expire=EXPIRACAO_RESULTADOS_S)
+    except ImportError as erro:  # multiprocess/psutil ausentes
+        logger.warning(f"Gerenciador de background indisponível ({erro}): callbacks pesados serão síncronos")
+        return None
+
+
+def callback_pesado(aplicativo, *dependencias, id_progresso=None):
+    """
+    Decorador para registrar um callback pesado, em segundo plano quando houver gerenciador.
+
+    A função decorada recebe `definir_progresso` como primeiro argumento; ele aceita
+    (valor de 0 a 100, rótulo) e atualiza a barra `id_progresso` (ver criar_barra_progresso).
+    Na execução síncrona, ele não mostra progresso: verifica se a chamada foi superada.
+
+    Args:
+        aplicativo (dash.Dash): Aplicativo (o gerenciador vem de background_callback_manager)
+        *dependencias: Outputs, Inputs e States, como em aplicativo.callback
+        id_progresso (str): ID do dbc.Progress da página
+
+    Returns:
+        callable: Decorador
+    """
+    def decorador(funcao):
+        if getattr(aplicativo, '_background_manager', None) is None or id_progresso is None:
+            nome = funcao.__name__
+
+            # O identificador da aba chega como último argumento e não entra na chave da computação
+            @functools.wraps(funcao)
+            def sincrono(*argumentos):
+                *argumentos, aba = argumentos
+                geracao = iniciar_geracao(nome, aba)
+
+                def verificar_progresso(_valores):
+                    verificar_geracao(geracao)
+
+                resultado = executar_uma_vez((nome, normalizar_chave(argumentos)), funcao, verificar_progresso, *argumentos)
+                # Superada enquanto calculava ou esperava: evita serializar uma resposta descartada
+                verificar_geracao(geracao)
+                return resultado
+            return aplicativo.callback(*dependencias, Input(ID_ARMAZENAMENTO_ABA, 'data'))(sincrono)
+
+        # O aquecimento (aquecimento.py) chama a função de forma síncrona no processo mestre
+        aplicativo._callbacks_pesados = getattr(aplicativo, '_callbacks_pesados', []) + [(dependencias, funcao)]
+        return aplicativo.callback(
+            *dependencias,
+            background=True,
+            interval=INTERVALO_CONSULTA_MS,
+            progress=[Output(id_progresso, 'value'), Output(id_progresso, 'label')],
+            progress_default=[0, ''],
+            running=[(Output(id_progresso, 'style'), ESTILO_PROGRESSO_VISIVEL, ESTILO_PROGRESSO_OCULTO)],
+            # Sair da página cancela o job; filtros novos encerram o job anterior automaticamente
+            cancel=[Input('url', 'pathname')],
+        )(funcao)
+    return decorador
@@ -0,0 +1,430 @@
+# dashboard/teste_carga.py
+"""
+Gerador de carga que reproduz as requisições de callbacks do Dash contra um servidor em execução.
+
+Cada usuário virtual é uma thread que repete ações típicas de um analista, com pausas
+aleatórias entre elas:
+  - navegacao: troca de página (renderizar_conteudo_pagina, carregar_conteudo_pagina e os callbacks iniciais da página);
+  - filtro_dashboard: mudança de filtros no dashboard geral (KPIs, série temporal e comportamentos);
+  - clique_ranking: clique em uma ou duas lojas do ranking (detalhe e modal de comparação);
+  - pagina_3d: recálculo da base 3D seguido dos quatro gráficos 3D.
+
+Como no navegador, os callbacks disparados pela mesma mudança são enviados em paralelo
+(até 6 conexões por usuário) e cada usuário guarda os cookies recebidos (sessão). Os corpos das requisições são montados a partir de
+/_dash-dependencies do próprio servidor, então o teste acompanha o layout real.
+
+Ao final são reportados, por callback, vazão, percentis de latência e taxas de erro e
+de timeout, além das respostas sem atualização (204): chamadas descartadas pelo servidor
+por terem sido superadas por outra mais recente da mesma sessão ou páginas já carregadas. Uma conexão encerrada pelo servidor depois de pelo menos 90% do timeout conta
+como timeout (é o que o cliente vê quando o gunicorn mata um worker que estourou o limite).
+
+Uso (com o servidor rodando, ex.: gunicorn dashboard.app:server --workers 4 --timeout 120):
+    python -m dashboard.teste_carga --url http://localhost:8000 --usuarios 8 --duracao 120
+"""
+import argparse
+import json
+import random
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ROTA_CALLBACKS = '/_dash-update-component'
+ROTA_DEPENDENCIAS = '/_dash-dependencies'
+CONEXOES_POR_USUARIO = 6  # limite de conexões simultâneas por host dos navegadores
+FRACAO_TIMEOUT_DESCONEXAO = 0.9
+
+PESOS_CENARIOS_PADRAO = {'navegacao': 2, 'filtro_dashboard': 4, 'clique_ranking': 3, 'pagina_3d': 1}
+PAGINAS = ['/', '/limpeza-dados', '/analise-preliminar', '/dashboard', '/analise-lojas', '/analise-3d', '/previsao-vendas']
+TIPOS_LOJA = ['a', 'b', 'c', 'd']
+METRICAS_DASHBOARD = ['Sales', 'Customers', 'SalesPerCustomer']
+METRICAS_RANKING = ['Sales_sum', 'Sales_mean', 'Customers_sum', 'Customers_mean', 'SalesPerCustomer_mean']
+GRANULARIDADES = ['D', 'W', 'M', 'Y']
+
+
+def dividir_saidas(chave_saida):
+    """'..a.x...b.y..' -> ['a.x', 'b.y']; 'a.x' -> ['a.x']."""
+    if chave_saida.startswith('..'):
+        return chave_saida[2:-2].split('...')
+    return [chave_saida]
+
+
+def _especificacao(texto):
+    identificador, propriedade = texto.rsplit('.', 1)
+    return {'id': identificador, 'property': propriedade}
+
+
+def indexar_dependencias(dependencias):
+    """Mapeia cada 'id.propriedade' de saída para a dependência (callback) que a produz."""
+    indice = {}
+    for dependencia in dependencias:
+        if dependencia.get('clientside_function'):
+            continue
+        for saida in dividir_saidas(dependencia['output']):
+            indice[saida] = dependencia
+    return indice
+
+
+def montar_corpo(dependencia, valores, alterados=None):
+    """
+    Monta o corpo de /_dash-update-component para uma dependência de /_dash-dependencies.
+
+    Args:
+        dependencia (dict): Entrada de /_dash-dependencies
+        valores (dict): {'id.propriedade': valor} das entradas e estados (ausentes = None)
+        alterados (list): Propriedades que dispararam o callback (padrão: a primeira entrada)
+
+    Returns:
+        dict: Corpo JSON da requisição
+    """
+    saidas = [_especificacao(saida) for saida in dividir_saidas(dependencia['output'])]
+
+    def com_valor(item):
+        return {'id': item['id'], 'property': item['property'], 'value': valores.get(f"{item['id']}.{item['property']}")}
+
+    entradas = [com_valor(item) for item in dependencia['inputs']]
+    return {
+        'output': dependencia['output'],
+        'outputs': saidas if dependencia['output'].startswith('..') else saidas[0],
+        'inputs': entradas,
+        'state': [com_valor(item) for item in dependencia.get('state', [])],
+        'changedPropIds': alterados or [f"{entradas[0]['id']}.{entradas[0]['property']}"],
+    }
+
+
+class Estatisticas:
+    """Resultados de todas as requisições (tempo relativo, callback, duração, resultado, bytes)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.registros = []
+
+    def registrar(self, callback, inicio, duracao, resultado, n_bytes):
+        with self._lock:
+            self.registros.append((callback, inicio, duracao, resultado, n_bytes))
+
+    def resumir(self, duracao_total):
+        """
+        Agrega os registros por callback.
+
+        Returns:
+            dict: {callback: métricas} incluindo a chave 'TOTAL'
+        """
+        grupos = defaultdict(list)
+        for registro in self.registros:
+            grupos[registro[0]].append(registro)
+            grupos['TOTAL'].append(registro)
+
+        resumo = {}
+        for callback, registros in sorted(grupos.items()):
+            duracoes = np.array([registro[2] for registro in registros])
+            resultados = [registro[3] for registro in registros]
+            n = len(registros)
+            resumo[callback] = {
+                'requisicoes': n,
+                'ok': resultados.count('ok'),
+                'erros': resultados.count('erro'),
+                'timeouts': resultados.count('timeout'),
+                'sem_atualizacao': resultados.count('sem_atualizacao'),
+                'taxa_erro': resultados.count('erro') / n,
+                'taxa_timeout': resultados.count('timeout') / n,
+                'vazao_rps': n / duracao_total if duracao_total else 0.0,
+                'p50_s': float(np.percentile(duracoes, 50)),
+                'p90_s': float(np.percentile(duracoes, 90)),
+                'p95_s': float(np.percentile(duracoes, 95)),
+                'p99_s': float(np.percentile(duracoes, 99)),
+                'max_s': float(duracoes.max()),
+                'bytes_medios': float(np.mean([registro[4] for registro in registros])),
+            }
+        return resumo
+
+
+class UsuarioVirtual:
+    """Sessão de um analista: mantém o estado dos filtros e repete cenários até o fim do teste."""
+
+    def __init__(self, url, dependencias, estatisticas, configuracao, semente):
+        self.url = url.rstrip('/')
+        self.dependencias = dependencias
+        self.estatisticas = estatisticas
+        self.configuracao = configuracao
+        self.rng = random.Random(semente)
+        self.executor = ThreadPoolExecutor(max_workers=CONEXOES_POR_USUARIO)
+        self.abridor = urllib.request.build_opener(urllib.request.HTTPCookieProcessor())
+        self.dados_ranking = None
+        # Valores iniciais dos componentes, como no layout
+        inicio, fim = str(configuracao['data_inicio']), str(configuracao['data_fim'])
+        self.valores = {
+            'armazenamento-df-principal.data': {'modo': configuracao['modo_dados'], 'n_amostras': 50},
+            'largura-grafico-serie-temporal.data': 1200,
+            'filtro-granularidade.value': 'M',
+            'seletor-metrica-comportamento-promocao.value': 'SalesPerCustomer',
+            'seletor-metrica-sortimento.value': 'SalesPerCustomer',
+            'dashboard-filtro-metrica-temporal.value': 'Sales',
+            'seletor-metrica-ranking.value': 'Sales_sum',
+            'seletor-ordem-ranking.value': 'desc',
+            'armazenamento-paginas-carregadas.data': [],
+            'id-aba.data': f'{self.rng.getrandbits(128):032x}',  # cada usuário virtual é uma aba
+        }
+        for prefixo in ('dashboard-filtro', 'filtro'):
+            self.valores.update({
+                f'{prefixo}-data.start_date': inicio, f'{prefixo}-data.end_date': fim,
+                f'{prefixo}-tipo-loja.value': [], f'{prefixo}-loja-especifica.value': [],
+                f'{prefixo}-feriado-estadual.value': 'all', f'{prefixo}-feriado-escolar.value': 'all',
+            })
+        self.valores.update({'filtro-data-3d.start_date': inicio, 'filtro-data-3d.end_date': fim,
+                             'filtro-feriado-estadual-3d.value': 'all', 'filtro-feriado-escolar-3d.value': 'all'})
+
+    # --- Requisições ---
+    def _enviar(self, callback, corpo):
+        dados = json.dumps(corpo).encode('utf-8')
+        requisicao = urllib.request.Request(self.url + ROTA_CALLBACKS, data=dados,
+                                            headers={'Content-Type': 'application/json'})
+        inicio = time.perf_counter()
+        resultado, conteudo = 'erro', b''
+        try:
+            with self.abridor.open(requisicao, timeout=self.configuracao['timeout']) as resposta:
+                conteudo = resposta.read()
+                resultado = 'sem_atualizacao' if resposta.status == 204 else 'ok'
+        except urllib.error.HTTPError as erro:
+            resultado = 'timeout' if erro.code == 504 else 'erro'
+        except (socket.timeout, TimeoutError):
+            resultado = 'timeout'
+        except (urllib.error.URLError, ConnectionError, OSError) as erro:
+            if isinstance(getattr(erro, 'reason', None), (socket.timeout, TimeoutError)):
+                resultado = 'timeout'
+            elif time.perf_counter() - inicio >= FRACAO_TIMEOUT_DESCONEXAO * self.configuracao['timeout']:
+                resultado = 'timeout'
+        duracao = time.perf_counter() - inicio
+        self.estatisticas.registrar(callback, inicio - self.configuracao['inicio_teste'], duracao, resultado, len(dados) + len(conteudo))
+        if resultado == 'ok' and conteudo:
+            return json.loads(conteudo).get('response', {})
+        return None
+
+    def disparar(self, chamadas):
+        """
+        Envia em paralelo os callbacks disparados por uma mesma mudança.
+
+        Args:
+            chamadas (list): [(nome do callback, 'id.propriedade' de uma saída, propriedades alteradas)]
+
+        Returns:
+            list: Respostas ('response' do Dash) na mesma ordem, None em caso de falha
+        """
+        futuros = []
+        for nome, saida, alterados in chamadas:
+            dependencia = self.dependencias.get(saida)
+            if dependencia is None:
+                continue
+            corpo = montar_corpo(dependencia, self.valores, alterados)
+            futuros.append(self.executor.submit(self._enviar, nome, corpo))
+        return [futuro.result() for futuro in futuros]
+
+    # --- Cenários ---
+    def _sortear_periodo(self):
+        inicio, fim = self.configuracao['data_inicio'], self.configuracao['data_fim']
+        dias = int((fim - inicio).astype(int))
+        comeco = inicio + np.timedelta64(self.rng.randint(0, max(0, dias - 90)), 'D')
+        final = min(fim, comeco + np.timedelta64(self.rng.randint(90, max(91, dias)), 'D'))
+        return str(comeco), str(final)
+
+    def _chamadas_dashboard(self, alterado):
+        return [
+            ('atualizar_pagina_dashboard', 'linha-kpi-dashboard.children', [alterado]),
+            ('atualizar_grafico_serie_temporal', 'grafico-vendas-clientes-tempo-dashboard.figure', [alterado]),
+            ('atualizar_grafico_comportamento_promocao', 'grafico-comportamento-promocao-boxplot.figure', [alterado]),
+            ('atualizar_grafico_comportamento_sortimento', 'grafico-comportamento-sortimento-barras.figure', [alterado]),
+        ]
+
+    def _chamadas_3d(self):
+        return [(f'atualizar_grafico_{nome}_3d', f'grafico-{grafico}-3d.figure', ['armazenamento-dados-base-3d.data'])
+                for nome, grafico in [('superficie', 'superficie'), ('fatores', 'dispersao'),
+                                      ('promocao', 'dinamica-promocao'), ('correlacao', 'correlacao')]]
+
+    def navegacao(self):
+        pagina = self.rng.choice(PAGINAS)
+        self.valores['url.pathname'] = pagina
+        chamadas = [('renderizar_conteudo_pagina', 'conteudo-pagina-/.style', ['url.pathname']),
+                    ('carregar_conteudo_pagina', 'armazenamento-paginas-carregadas.data', ['url.pathname'])]
+        if pagina == '/analise-lojas':
+            chamadas.append(('atualizar_dados_ranking', 'armazenamento-dados-ranking.data', ['url.pathname']))
+        respostas = self.disparar(chamadas)
+        if respostas[1]:
+            self.valores['armazenamento-paginas-carregadas.data'] = respostas[1]['armazenamento-paginas-carregadas']['data']
+        if pagina == '/analise-lojas' and len(respostas) > 2 and respostas[2]:
+            self.dados_ranking = respostas[2]['armazenamento-dados-ranking']['data']
+        elif pagina == '/dashboard':
+            self.disparar(self._chamadas_dashboard('armazenamento-df-principal.data'))
+        elif pagina == '/analise-3d':
+            self.pagina_3d(alterado='conteudo-pagina-/analise-3d.style')
+
+    def filtro_dashboard(self):
+        filtro = self.rng.choice(['periodo', 'tipo_loja', 'metrica', 'granularidade', 'feriado'])
+        if filtro == 'periodo':
+            inicio, fim = self._sortear_periodo()
+            self.valores['dashboard-filtro-data.start_date'], self.valores['dashboard-filtro-data.end_date'] = inicio, fim
+            alterado = 'dashboard-filtro-data.start_date'
+        elif filtro == 'tipo_loja':
+            self.valores['dashboard-filtro-tipo-loja.value'] = self.rng.sample(TIPOS_LOJA, self.rng.randint(0, 2))
+            alterado = 'dashboard-filtro-tipo-loja.value'
+        elif filtro == 'metrica':
+            self.valores['dashboard-filtro-metrica-temporal.value'] = self.rng.choice(METRICAS_DASHBOARD)
+            alterado = 'dashboard-filtro-metrica-temporal.value'
+        elif filtro == 'granularidade':
+            self.valores['filtro-granularidade.value'] = self.rng.choice(GRANULARIDADES)
+            self.disparar([('atualizar_grafico_serie_temporal', 'grafico-vendas-clientes-tempo-dashboard.figure',
+                            ['filtro-granularidade.value'])])
+            return
+        else:
+            self.valores['dashboard-filtro-feriado-escolar.value'] = self.rng.choice(['all', '0', '1'])
+            alterado = 'dashboard-filtro-feriado-escolar.value'
+        self.disparar(self._chamadas_dashboard(alterado))
+
+    def clique_ranking(self):
+        if self.dados_ranking is None:
+            self.valores['url.pathname'] = '/analise-lojas'
+            self.valores['seletor-metrica-ranking.value'] = self.rng.choice(METRICAS_RANKING)
+            resposta = self.disparar([('atualizar_dados_ranking', 'armazenamento-dados-ranking.data', ['seletor-metrica-ranking.value'])])[0]
+            if not resposta:
+                return
+            self.dados_ranking = resposta['armazenamento-dados-ranking']['data']
+            self.valores['armazenamento-dados-ranking.data'] = self.dados_ranking
+
+        linhas = json.loads(self.dados_ranking).get('data', [])
+        if not linhas:
+            return
+        lojas_topo = [linha[0] for linha in linhas[:10]]
+        selecionadas = self.rng.sample(lojas_topo, min(len(lojas_topo), self.rng.choice([1, 1, 2])))
+        self.valores['armazenamento-dados-ranking.data'] = self.dados_ranking
+        self.valores['armazenamento-id-loja-selecionada.data'] = selecionadas
+        self.disparar([
+            ('atualizar_detalhes_loja', 'conteudo-detalhe-loja.children', ['armazenamento-id-loja-selecionada.data']),
+            ('atualizar_modal', 'modal-comparacao.is_open', ['armazenamento-id-loja-selecionada.data']),
+        ])
+
+    def pagina_3d(self, alterado='filtro-data-3d.start_date'):
+        self.valores['conteudo-pagina-/analise-3d.style'] = {'display': 'block'}
+        if alterado == 'filtro-data-3d.start_date':
+            self.valores['filtro-data-3d.start_date'], self.valores['filtro-data-3d.end_date'] = self._sortear_periodo()
+        resposta = self.disparar([('atualizar_dados_base_3d', 'armazenamento-dados-base-3d.data', [alterado])])[0]
+        if resposta and 'armazenamento-dados-base-3d' in resposta:
+            self.valores['armazenamento-dados-base-3d.data'] = resposta['armazenamento-dados-base-3d']['data']
+            self.disparar(self._chamadas_3d())
+
+    def executar(self, fim):
+        pesos = self.configuracao['pesos']
+        cenarios = list(pesos)
+        try:
+            while time.perf_counter() < fim:
+                getattr(self, self.rng.choices(cenarios, weights=[pesos[nome] for nome in cenarios])[0])()
+                pausa = self.rng.expovariate(1.0 / self.configuracao['pausa']) if self.configuracao['pausa'] > 0 else 0
+                time.sleep(max(0.0, min(pausa, fim - time.perf_counter())))
+        finally:
+            self.executor.shutdown(wait=True)
+
+
+def carregar_dependencias(url, timeout):
+    with urllib.request.urlopen(url.rstrip('/') + ROTA_DEPENDENCIAS, timeout=timeout) as resposta:
+        return indexar_dependencias(json.loads(resposta.read()))
+
+
+def executar_teste_carga(url, usuarios=4, duracao=60.0, rampa=5.0, pausa=2.0, timeout=120.0, pesos=None,
+                         modo_dados='amostras', data_inicio='2013-01-01', data_fim='2015-07-31', semente=42):
+    """
+    Executa o teste de carga e retorna o resumo por callback.
+
+    Args:
+        url (str): Endereço do servidor (ex.: http://localhost:8050)
+        usuarios (int): Número de usuários virtuais simultâneos
+        duracao (float): Duração do teste em segundos (a partir do início do primeiro usuário)
+        rampa (float): Segundos para iniciar todos os usuários
+        pausa (float): Pausa média entre ações de um usuário (distribuição exponencial)
+        timeout (float): Timeout das requisições (use o mesmo --timeout do gunicorn)
+        pesos (dict): Peso de cada cenário (padrão: PESOS_CENARIOS_PADRAO)
+        modo_dados (str): 'amostras' (padrão do app) ou 'completo'
+        data_inicio, data_fim (str): Período dos dados, usado para sortear filtros de data
+        semente (int): Semente dos usuários virtuais
+
+    Returns:
+        dict: {'parametros': ..., 'duracao_s': ..., 'callbacks': {callback: métricas}}
+    """
+    dependencias = carregar_dependencias(url, timeout)
+    estatisticas = Estatisticas()
+    inicio = time.perf_counter()
+    configuracao = {
+        'timeout': timeout, 'pausa': pausa, 'pesos': pesos or PESOS_CENARIOS_PADRAO, 'modo_dados': modo_dados,
+        'data_inicio': np.datetime64(data_inicio, 'D'), 'data_fim': np.datetime64(data_fim, 'D'), 'inicio_teste': inicio,
+    }
+    fim = inicio + duracao
+    threads = []
+    for indice in range(usuarios):
+        usuario = UsuarioVirtual(url, dependencias, estatisticas, configuracao, semente + indice)
+        thread = threading.Thread(target=usuario.executar, args=(fim,), daemon=True)
+        thread.start()
+        threads.append(thread)
+        if rampa and indice < usuarios - 1:
+            time.sleep(rampa / usuarios)
+    for thread in threads:
+        thread.join()
+
+    duracao_real = time.perf_counter() - inicio
+    return {
+        'parametros': {'url': url, 'usuarios': usuarios, 'duracao': duracao, 'rampa': rampa, 'pausa': pausa,
+                       'timeout': timeout, 'pesos': configuracao['pesos'], 'modo_dados': modo_dados},
+        'duracao_s': duracao_real,
+        'callbacks': estatisticas.resumir(duracao_real),
+    }
+
+
+def imprimir_resumo(resultado):
+    print(f"\n{'callback':<44} {'req':>6} {'req/s':>7} {'p50 (s)':>8} {'p95 (s)':>8} {'p99 (s)':>8} {'max (s)':>8} {'erro':>6} {'timeout':>8} {'204':>6}")
+    for callback, metricas in resultado['callbacks'].items():
+        print(f"{callback:<44} {metricas['requisicoes']:>6} {metricas['vazao_rps']:>7.2f} {metricas['p50_s']:>8.3f} "
+              f"{metricas['p95_s']:>8.3f} {metricas['p99_s']:>8.3f} {metricas['max_s']:>8.3f} "
+              f"{metricas['taxa_erro']:>6.1%} {metricas['taxa_timeout']:>8.1%} {metricas['sem_atualizacao']:>6}")
+
+
+def _ler_pesos(texto):
+    pesos = {}
+    for item in texto:
+        nome, _, peso = item.partition('=')
+        if nome not in PESOS_CENARIOS_PADRAO:
+            raise argparse.ArgumentTypeError(f"Cenário desconhecido: {nome} (opções: {', '.join(PESOS_CENARIOS_PADRAO)})")
+        pesos[nome] = float(peso or 1)
+    return pesos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga dos callbacks do dashboard.")
+    parser.add_argument('--url', default='http://localhost:8050', help="Endereço do servidor em execução")
+    parser.add_argument('--usuarios', type=int, default=4, help="Usuários virtuais simultâneos")
+    parser.add_argument('--duracao', type=float, default=60.0, help="Duração do teste em segundos")
+    parser.add_argument('--rampa', type=float, default=5.0, help="Segundos para iniciar todos os usuários")
+    parser.add_argument('--pausa', type=float, default=2.0, help="Pausa média entre ações de um usuário (s)")
+    parser.add_argument('--timeout', type=float, default=120.0, help="Timeout das requisições (s)")
+    parser.add_argument('--cenarios', nargs='+', default=None, metavar='NOME=PESO',
+                        help=f"Pesos dos cenários (padrão: {' '.join(f'{k}={v}' for k, v in PESOS_CENARIOS_PADRAO.items())})")
+    parser.add_argument('--modo-dados', choices=['amostras', 'completo'], default='amostras')
+    parser.add_argument('--data-inicio', default='2013-01-01')
+    parser.add_argument('--data-fim', default='2015-07-31')
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--saida', default=None, help="Grava o resumo em JSON")
+    argumentos = parser.parse_args(argv)
+
+    resultado = executar_teste_carga(
+        argumentos.url, argumentos.usuarios, argumentos.duracao, argumentos.rampa, argumentos.pausa,
+        argumentos.timeout, _ler_pesos(argumentos.cenarios) if argumentos.cenarios else None,
+        argumentos.modo_dados, argumentos.data_inicio, argumentos.data_fim, argumentos.semente)
+    imprimir_resumo(resultado)
+    if argumentos.saida:
+        with open(argumentos.saida, 'w') as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+        print(f"\nResumo gravado em {argumentos.saida}")
+
+
+if __name__ == '__main__':
+    main()
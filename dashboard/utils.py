@@ -2,8 +2,9 @@ import pandas as pd
 import plotly.graph_objects as go
 from dash import html
 import dash_bootstrap_components as dbc
-from .config import CINZA_NEUTRO, ALTURA_GRAFICO # Importar as novas constantes
-from .data_loader import get_principal_dataset, N_AMOSTRAS_PADRAO
+from .config import CINZA_NEUTRO, ALTURA_GRAFICO, LIMITE_PONTOS_WEBGL # Importar as novas constantes
+from .data_loader import get_principal_dataset, extrair_loja, extrair_lojas, N_AMOSTRAS_PADRAO
+from .concorrencia import executar_uma_vez
 
 def criar_figura_vazia(texto_titulo="Sem dados para os filtros selecionados", altura=ALTURA_GRAFICO): # Refatorar nome da função e parâmetros
     """Cria uma figura Plotly vazia com uma mensagem central."""
@@ -21,6 +22,41 @@ def criar_figura_vazia(texto_titulo="Sem dados para os filtros selecionados", al
     # O template 'rossmann_template' cuidará do resto do estilo
     return fig
 
+def contar_pontos_dispersao(fig):
+    """Conta os pontos de todos os traços de dispersão/linha (SVG ou WebGL) de uma figura."""
+    total = 0
+    for traco in fig.data:
+        if traco.type in ('scatter', 'scattergl'):
+            valores = traco.x if traco.x is not None else traco.y
+            total += len(valores) if valores is not None else 0
+    return total
+
+def aplicar_webgl(fig, limite_pontos=None):
+    """
+    Converte os traços Scatter de uma figura para Scattergl quando o total de pontos passa do limite.
+    Layout (incluindo o template 'rossmann_template') e demais traços são mantidos.
+
+    Args:
+        fig (go.Figure): Figura construída com plotly.express ou graph_objects
+        limite_pontos (int): Total de pontos a partir do qual usar WebGL (padrão: LIMITE_PONTOS_WEBGL)
+
+    Returns:
+        go.Figure: A própria figura (abaixo do limite) ou uma nova figura com traços WebGL
+    """
+    limite = LIMITE_PONTOS_WEBGL if limite_pontos is None else limite_pontos
+    if not any(traco.type == 'scatter' for traco in fig.data) or contar_pontos_dispersao(fig) <= limite:
+        return fig
+
+    novos_tracos = []
+    for traco in fig.data:
+        if traco.type == 'scatter':
+            propriedades = traco.to_plotly_json()
+            propriedades.pop('type', None)
+            # Atributos exclusivos do SVG (ex.: orientation, line.shape='spline') são descartados
+            traco = go.Scattergl(propriedades, skip_invalid=True)
+        novos_tracos.append(traco)
+    return go.Figure(data=novos_tracos, layout=fig.layout)
+
 def criar_icone_informacao(id_icone, texto_tooltip): # Refatorar nome da função e parâmetros
     """Cria um ícone de informação com uma tooltip associada."""
     return html.Span([
@@ -84,6 +120,65 @@ def filtrar_dataframe(df_original, data_inicio, data_fim, tipos_loja, lojas_espe
 
     return df_filtrado # Retornar novo nome de variável
 
+def filtrar_dataframe_compartilhado(df_original, data_inicio, data_fim, tipos_loja, lojas_especificas, feriado_estadual, feriado_escolar):
+    """
+    Igual a filtrar_dataframe, mas requisições simultâneas com o mesmo estado de filtros
+    (mesmo DataFrame de origem) compartilham uma única filtragem. O resultado pode ser
+    entregue a vários callbacks ao mesmo tempo e não deve ser alterado no lugar.
+    """
+    if not data_inicio or not data_fim:
+        return pd.DataFrame()
+
+    # A ordem das seleções e o formato das datas não mudam o resultado do filtro
+    chave = ('filtrar_dataframe', id(df_original), pd.Timestamp(data_inicio), pd.Timestamp(data_fim),
+             frozenset(tipos_loja or ()), frozenset(lojas_especificas or ()), feriado_estadual, str(feriado_escolar))
+    return executar_uma_vez(chave, filtrar_dataframe, df_original, data_inicio, data_fim, tipos_loja,
+                            lojas_especificas, feriado_estadual, feriado_escolar)
+
+def _filtrar_feriados(df_filtrado, feriado_estadual, feriado_escolar):
+    """Aplica os filtros de feriado estadual e escolar (comuns a todas as variantes de filtro)."""
+    if feriado_estadual != 'all':
+        df_filtrado = df_filtrado[df_filtrado['StateHoliday'] == feriado_estadual]
+
+    if feriado_escolar != 'all':
+        df_filtrado = df_filtrado[df_filtrado['SchoolHoliday'] == int(feriado_escolar)]
+
+    return df_filtrado
+
+def filtrar_dataframe_loja(df_original, id_loja, data_inicio, data_fim, feriado_estadual, feriado_escolar):
+    """
+    Equivalente a filtrar_dataframe para uma única loja, usando o índice de offsets por loja.
+    O recorte de loja e de datas é uma fatia contígua; só os filtros de feriado geram cópia.
+    """
+    if not data_inicio or not data_fim:
+        return pd.DataFrame()
+
+    data_inicio_dt = pd.to_datetime(data_inicio)
+    data_fim_dt = pd.to_datetime(data_fim)
+
+    if data_inicio_dt > data_fim_dt:
+        return pd.DataFrame()
+
+    df_filtrado = extrair_loja(df_original, id_loja, data_inicio_dt, data_fim_dt)
+    return _filtrar_feriados(df_filtrado, feriado_estadual, feriado_escolar)
+
+def filtrar_dataframe_lojas(df_original, ids_lojas, data_inicio, data_fim, feriado_estadual, feriado_escolar):
+    """
+    Equivalente a filtrar_dataframe para uma lista de lojas, extraindo todas em uma única leitura indexada.
+    O resultado fica agrupado por loja (ID crescente) e ordenado por data.
+    """
+    if not data_inicio or not data_fim or not ids_lojas:
+        return pd.DataFrame()
+
+    data_inicio_dt = pd.to_datetime(data_inicio)
+    data_fim_dt = pd.to_datetime(data_fim)
+
+    if data_inicio_dt > data_fim_dt:
+        return pd.DataFrame()
+
+    df_filtrado = extrair_lojas(df_original, ids_lojas, data_inicio_dt, data_fim_dt)
+    return _filtrar_feriados(df_filtrado, feriado_estadual, feriado_escolar)
+
 df_json_cache = None  # Cache para string JSON
 _df_principal_df_cache = None  # Cache para DataFrame resultante
 
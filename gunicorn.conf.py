@@ -0,0 +1,47 @@
+# gunicorn.conf.py
+"""
+Configuração do gunicorn para o dashboard (lida automaticamente a partir da raiz do projeto).
+
+Com preload_app, dashboard.app é importado uma única vez no processo mestre: dados,
+índices e layouts são carregados, os callbacks iniciais são executados com os filtros
+padrão (dashboard/aquecimento.py) e só então os workers são criados, compartilhando essa
+memória por cópia na escrita. Cada worker reabre apenas os recursos próprios do processo.
+
+Cada worker atende várias requisições em threads: chamadas simultâneas à API de previsões
+(/api/forecast) no mesmo worker são agrupadas em um único lote do modelo.
+
+Variáveis de ambiente: PORT, WEB_CONCURRENCY (nº de workers), GUNICORN_THREADS (threads por
+worker), GUNICORN_PRELOAD (false para carregar o aplicativo em cada worker) e
+AQUECER_PAGINAS (false para não aquecer).
+"""
+import gc
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8050')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', '4'))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+timeout = 120
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+
+def when_ready(server):
+    """Processo mestre, aplicativo já importado (preload) e antes de criar os workers."""
+    if not server.cfg.preload_app:
+        return
+    from dashboard.app import aplicativo, dados
+    if os.environ.get('AQUECER_PAGINAS', 'True').lower() == 'true':
+        from dashboard.aquecimento import aquecer_aplicativo
+        aquecer_aplicativo(aplicativo, dados)
+    # Objetos criados até aqui não são mais percorridos pelo coletor de lixo, que
+    # de outra forma escreveria nas páginas herdadas e desfaria a cópia na escrita
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Worker recém-criado: reinicia os recursos que não podem ser compartilhados."""
+    if not server.cfg.preload_app:
+        return
+    from dashboard.app import aplicativo
+    from dashboard.aquecimento import reiniciar_recursos_processo
+    reiniciar_recursos_processo(aplicativo)
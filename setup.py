@@ -6,7 +6,7 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     install_requires=[
-        "dash==2.14.2",
+        "dash[diskcache]==2.14.2",
         "dash-bootstrap-components==1.5.0",
         "pandas==2.1.4",
         "plotly==5.18.0",
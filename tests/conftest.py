@@ -0,0 +1,42 @@
+# tests/conftest.py
+"""
+Fixtures compartilhadas: um conjunto sintético pequeno (dashboard/dados_sinteticos.py) em um
+diretório temporário.
+
+DIRETORIO_DADOS e DIRETORIO_PREVISAO são lidos quando os módulos do dashboard são importados,
+então as variáveis de ambiente são definidas aqui, antes de qualquer import do pacote.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+DIRETORIO_TESTES = Path(tempfile.mkdtemp(prefix='rossmann-testes-'))
+os.environ['DIRETORIO_DADOS'] = str(DIRETORIO_TESTES / 'dados')
+os.environ['DIRETORIO_PREVISAO'] = str(DIRETORIO_TESTES / 'previsao')
+
+import pytest  # noqa: E402
+
+ESCALA_LOJAS = 0.02  # 22 lojas
+ESCALA_ANOS = 0.6    # 565 dias
+
+
+@pytest.fixture(scope='session')
+def dados_sinteticos():
+    """Gera train.parquet e store.parquet sintéticos em DIRETORIO_DADOS (uma vez por sessão)."""
+    from dashboard.dados_sinteticos import gerar_dados_sinteticos
+    return gerar_dados_sinteticos(ESCALA_LOJAS, ESCALA_ANOS, os.environ['DIRETORIO_DADOS'], sobrescrever=True)
+
+
+@pytest.fixture(scope='session')
+def df_processado(dados_sinteticos):
+    """Dataset processado das lojas sintéticas, ordenado por (Store, Date) como no dashboard."""
+    from dashboard.data_loader import ordenar_por_loja_e_data, processar_dados_brutos
+    return ordenar_por_loja_e_data(processar_dados_brutos())
+
+
+@pytest.fixture(scope='session')
+def df_vendas_brutas(dados_sinteticos):
+    """Vendas brutas, com os dias de loja fechada."""
+    from dashboard.data_loader import carregar_dados_brutos
+    df_vendas, _ = carregar_dados_brutos()
+    return df_vendas
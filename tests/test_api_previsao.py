@@ -0,0 +1,32 @@
+# tests/test_api_previsao.py
+import pandas as pd
+import pytest
+
+from dashboard.api_previsao import RequisicaoInvalida, normalizar_requisicao
+
+
+def _requisicao(**campos):
+    return {'loja': 1, 'data_inicio': '2015-08-01', 'data_fim': '2015-08-07', **campos}
+
+
+@pytest.mark.parametrize('campos', [
+    {'loja': True},
+    {'loja': 1.7},
+    {'loja': '1.7'},
+    {'loja': None},
+    {'data_inicio': None},
+    {'data_inicio': ''},
+    {'data_fim': None},
+    {'data_fim': 'NaT'},
+    {'promo': ['2015-08-02', None]},
+])
+def test_rejeita_campos_invalidos(campos):
+    with pytest.raises(RequisicaoInvalida):
+        normalizar_requisicao(_requisicao(**campos))
+
+
+@pytest.mark.parametrize('loja', [7, '7', 7.0])
+def test_aceita_loja_inteira(loja):
+    normalizada = normalizar_requisicao(_requisicao(loja=loja))
+    assert normalizada['loja'] == 7
+    assert normalizada['data_inicio'] == pd.Timestamp('2015-08-01')
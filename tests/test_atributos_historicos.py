@@ -0,0 +1,38 @@
+# tests/test_atributos_historicos.py
+import numpy as np
+import pandas as pd
+
+from dashboard.previsao.atributos_historicos import atualizar_atributos_historicos, carregar_atributos_historicos
+
+
+def test_atualizacoes_incrementais_iguais_a_reconstrucao(df_vendas_brutas, tmp_path):
+    """Partes gravadas em várias atualizações (com a revisão dos últimos dias) = uma reconstrução completa."""
+    ultima_data = df_vendas_brutas['Date'].max()
+    # Cortes a 1, 10 e 45 dias do anterior: dentro e fora da janela de revisão de LIMITE_DIAS_EVENTO
+    cortes = [ultima_data - pd.Timedelta(days=dias) for dias in (56, 46, 1)] + [ultima_data]
+    for corte in cortes:
+        atualizar_atributos_historicos(df_vendas_brutas[df_vendas_brutas['Date'] <= corte], tmp_path / 'incremental')
+    atualizar_atributos_historicos(df_vendas_brutas, tmp_path / 'completo', reconstruir=True)
+
+    incremental = carregar_atributos_historicos(diretorio=tmp_path / 'incremental')
+    completo = carregar_atributos_historicos(diretorio=tmp_path / 'completo')
+    assert len(list((tmp_path / 'incremental').glob('parte-*.parquet'))) == len(cortes)
+    pd.testing.assert_frame_equal(incremental, completo)
+
+
+def test_atualizacao_sem_datas_novas_nao_grava(df_vendas_brutas, tmp_path):
+    assert atualizar_atributos_historicos(df_vendas_brutas, tmp_path) > 0
+    assert atualizar_atributos_historicos(df_vendas_brutas, tmp_path) == 0
+
+
+def test_modelo_global_le_defasagem_anual_do_repositorio(df_processado, tmp_path):
+    from dashboard.previsao.modelo_global import adicionar_atributos_historicos
+
+    embaralhado = df_processado.sample(frac=1, random_state=0)
+    com_atributos = adicionar_atributos_historicos(embaralhado, diretorio=tmp_path)
+
+    assert (tmp_path / 'manifesto.json').exists()  # repositório criado na primeira leitura
+    pd.testing.assert_index_equal(com_atributos.index, embaralhado.index)
+    ano_anterior = df_processado[['Store', 'Date', 'Sales']].assign(Date=df_processado['Date'] + pd.Timedelta(days=364))
+    esperado = embaralhado[['Store', 'Date']].merge(ano_anterior, on=['Store', 'Date'], how='left')['Sales']
+    np.testing.assert_allclose(com_atributos['VendasLag364'].to_numpy(), esperado.to_numpy(), rtol=1e-6)
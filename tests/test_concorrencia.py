@@ -0,0 +1,37 @@
+# tests/test_concorrencia.py
+import flask
+import pytest
+
+from dashboard import concorrencia
+from dashboard.concorrencia import ComputacaoObsoleta, iniciar_geracao, verificar_geracao
+
+SESSAO = '0' * 32
+ABA_1, ABA_2 = '1' * 32, '2' * 32
+
+
+@pytest.fixture
+def requisicao(tmp_path, monkeypatch):
+    monkeypatch.setattr(concorrencia, 'DIRETORIO_GERACOES', tmp_path)
+    with flask.Flask(__name__).test_request_context():
+        flask.g.sessao_dashboard = SESSAO
+        yield
+
+
+def test_abas_do_mesmo_navegador_nao_se_superam(requisicao):
+    geracao_aba_1 = iniciar_geracao('callback', ABA_1)
+    geracao_aba_2 = iniciar_geracao('callback', ABA_2)
+    verificar_geracao(geracao_aba_1)
+    verificar_geracao(geracao_aba_2)
+
+
+def test_chamada_mais_recente_da_aba_supera_a_anterior(requisicao):
+    anterior = iniciar_geracao('callback', ABA_1)
+    atual = iniciar_geracao('callback', ABA_1)
+    with pytest.raises(ComputacaoObsoleta):
+        verificar_geracao(anterior)
+    verificar_geracao(atual)
+
+
+def test_identificador_de_aba_invalido_usa_a_geracao_da_sessao(requisicao):
+    caminho, _ = iniciar_geracao('callback', '../fora')
+    assert caminho.name == f'{SESSAO}-callback.geracao'
@@ -0,0 +1,45 @@
+# tests/test_intervalos_bootstrap.py
+import numpy as np
+import pandas as pd
+
+from dashboard.previsao.intervalos_bootstrap import MINIMO_RESIDUOS, calcular_intervalos_bootstrap, gravar_residuos
+
+
+def _previsoes_e_residuos(n_lojas=12, dias=42):
+    gerador = np.random.default_rng(0)
+    # A última loja tem poucos resíduos e fica sem intervalo
+    residuos = {loja: gerador.normal(0, 0.1, size=MINIMO_RESIDUOS - 1 if loja == n_lojas else 60 + 10 * loja)
+                for loja in range(1, n_lojas + 1)}
+    df_previsoes = pd.DataFrame({
+        'Store': np.repeat(np.arange(1, n_lojas + 1), dias),
+        'Date': np.tile(pd.date_range('2015-08-01', periods=dias), n_lojas),
+        'Previsao': gerador.uniform(3000, 9000, size=n_lojas * dias),
+    })
+    return df_previsoes, residuos
+
+
+def test_resultado_independe_do_numero_de_processos(tmp_path):
+    df_previsoes, residuos = _previsoes_e_residuos()
+    indice = gravar_residuos(residuos, diretorio=tmp_path)
+
+    quantis_1, totais_1 = calcular_intervalos_bootstrap(df_previsoes, indice, processos=1, diretorio=tmp_path, n_replicas=200)
+    quantis_3, totais_3 = calcular_intervalos_bootstrap(df_previsoes, indice, processos=3, diretorio=tmp_path, n_replicas=200)
+
+    np.testing.assert_array_equal(quantis_1, quantis_3)
+    pd.testing.assert_frame_equal(totais_1, totais_3)
+    assert np.isnan(quantis_1[df_previsoes['Store'].to_numpy() == 12]).all()
+    assert not np.isnan(quantis_1[df_previsoes['Store'].to_numpy() != 12]).any()
+
+
+def test_gravar_residuos_reaproveita_lojas_mantidas(tmp_path):
+    _, residuos = _previsoes_e_residuos()
+    gravar_residuos(residuos, diretorio=tmp_path)
+    novos = {3: np.zeros(50)}
+    indice = gravar_residuos(novos, lojas_mantidas=[1, 2], diretorio=tmp_path)
+
+    assert sorted(indice) == [1, 2, 3]
+    array = np.load(tmp_path / 'residuos_lojas.npy')
+    inicio, fim = indice[2]
+    np.testing.assert_allclose(array[inicio:fim], residuos[2].astype(np.float32))
+    inicio, fim = indice[3]
+    assert (array[inicio:fim] == 0).all() and fim - inicio == 50
@@ -0,0 +1,37 @@
+# tests/test_piramide_temporal.py
+import numpy as np
+import pytest
+
+from dashboard.piramide_temporal import calcular_inicio_periodo, consultar_piramide
+from dashboard.utils import filtrar_dataframe
+
+
+def _media_linhas_brutas(df, nivel, metrica, inicio, fim, tipos, lojas, feriado_estadual, feriado_escolar):
+    """Referência: filtrar_dataframe seguido de groupby por período e entidade sobre as linhas brutas."""
+    filtrado = filtrar_dataframe(df, inicio, fim, tipos, lojas, feriado_estadual, feriado_escolar)
+    entidade = 'Store' if lojas else 'StoreType'
+    periodo = calcular_inicio_periodo(filtrado['Date'], nivel).rename('Date_Period')
+    return filtrado.groupby([periodo, filtrado[entidade]], observed=True)[metrica].mean().unstack(entidade)
+
+
+@pytest.mark.parametrize('nivel', ['D', 'W', 'M', 'Y'])
+@pytest.mark.parametrize('filtros', [
+    ([], [], 'all', 'all'),
+    (['a', 'c'], [], 'all', '1'),
+    ([], [1, 5, 9], 'all', 'all'),
+    ([], [2, 3], '0', '0'),
+])
+def test_piramide_igual_groupby_das_linhas_brutas(df_processado, nivel, filtros):
+    tipos, lojas, feriado_estadual, feriado_escolar = filtros
+    # Intervalo que corta semanas, meses e anos nas duas pontas
+    inicio, fim = '2014-03-13', '2015-02-17'
+    for metrica in ('Sales', 'Customers', 'SalesPerCustomer'):
+        piramide = consultar_piramide(df_processado, nivel, metrica, inicio, fim, tipos, lojas,
+                                      feriado_estadual, feriado_escolar)
+        referencia = _media_linhas_brutas(df_processado, nivel, metrica, inicio, fim, tipos, lojas,
+                                          feriado_estadual, feriado_escolar)
+        colunas = [coluna for coluna in piramide.columns if piramide[coluna].notna().any()]
+        assert sorted(map(str, colunas)) == sorted(map(str, referencia.columns))
+        np.testing.assert_allclose(piramide[colunas].to_numpy(dtype=np.float64),
+                                   referencia[colunas].reindex(piramide.index).to_numpy(dtype=np.float64),
+                                   rtol=1e-6, equal_nan=True)  # métricas float32 no groupby
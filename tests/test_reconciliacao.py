@@ -0,0 +1,76 @@
+# tests/test_reconciliacao.py
+import numpy as np
+
+from dashboard.previsao.reconciliacao import construir_matriz_soma, estimar_lambda_encolhimento, reconciliar
+
+N_LOJAS = 30
+DIAS = 14
+
+
+def _hierarquia(gerador):
+    lojas = np.arange(1, N_LOJAS + 1)
+    tipos = gerador.choice(list('abcd'), size=N_LOJAS)
+    sortimentos = gerador.choice(list('abc'), size=N_LOJAS)
+    return construir_matriz_soma(lojas, tipos, sortimentos)[0]
+
+
+def _residuos(gerador, n_series, t=90):
+    escalas = gerador.uniform(50, 500, size=n_series)
+    comum = gerador.normal(size=(t, 1))  # correlação entre as séries, como nos resíduos reais
+    return (0.5 * comum + gerador.normal(size=(t, n_series))) * escalas
+
+
+def _mint_densa(previsoes_base, matriz_soma, residuos):
+    """ỹ = S(S'W⁻¹S)⁻¹S'W⁻¹ŷ com W = λ·D + (1 - λ)·Σ formado explicitamente."""
+    s = matriz_soma.toarray()
+    covariancia = residuos.T @ residuos / residuos.shape[0]
+    lambda_ = estimar_lambda_encolhimento(residuos)
+    w_inversa = np.linalg.inv(lambda_ * np.diag(np.diag(covariancia)) + (1 - lambda_) * covariancia)
+    return s @ np.linalg.solve(s.T @ w_inversa @ s, s.T @ w_inversa @ previsoes_base)
+
+
+def test_lambda_igual_a_formula_com_matriz_de_correlacao():
+    gerador = np.random.default_rng(1)
+    residuos = _residuos(gerador, 40)
+    t = residuos.shape[0]
+    padronizados = residuos / np.sqrt((residuos ** 2).mean(axis=0))
+    variancias = ((padronizados ** 2).T @ padronizados ** 2 - (padronizados.T @ padronizados) ** 2 / t) / (t * (t - 1))
+    correlacoes = (padronizados.T @ padronizados / t) ** 2
+    np.fill_diagonal(variancias, 0)
+    np.fill_diagonal(correlacoes, 0)
+    esperado = np.clip(variancias.sum() / correlacoes.sum(), 0, 1)
+    assert np.isclose(estimar_lambda_encolhimento(residuos), esperado, rtol=1e-10)
+
+
+def test_mint_igual_a_formula_densa():
+    gerador = np.random.default_rng(2)
+    matriz_soma = _hierarquia(gerador)
+    n_agregadas = matriz_soma.shape[0] - N_LOJAS
+    base_lojas = gerador.uniform(3000, 9000, size=(N_LOJAS, DIAS))
+    base_agregada = (matriz_soma[:n_agregadas] @ base_lojas) * gerador.uniform(0.95, 1.05, size=(n_agregadas, DIAS))
+    base = np.vstack([base_agregada, base_lojas])
+    residuos = _residuos(gerador, matriz_soma.shape[0])
+
+    reconciliadas, _ = reconciliar(base, matriz_soma, 'mint_shrink', residuos)
+    esperado = _mint_densa(base, matriz_soma, residuos)
+    assert (esperado > 0).all()  # sem correções, a projeção deve coincidir com a MinT
+    np.testing.assert_allclose(reconciliadas, esperado, rtol=1e-8)
+
+
+def test_mint_coerente_sem_negativos_e_zero_nos_dias_fechados():
+    gerador = np.random.default_rng(3)
+    matriz_soma = _hierarquia(gerador)
+    n_agregadas = matriz_soma.shape[0] - N_LOJAS
+    abertas = gerador.random((N_LOJAS, DIAS)) > 0.15
+    base_lojas = np.where(abertas, gerador.uniform(10, 9000, size=(N_LOJAS, DIAS)), 0)
+    # Agregados bem abaixo da soma das lojas: a projeção empurra as lojas pequenas para baixo de zero
+    base_agregada = 0.3 * (matriz_soma[:n_agregadas] @ base_lojas)
+    base = np.vstack([base_agregada, base_lojas])
+    residuos = _residuos(gerador, matriz_soma.shape[0])
+
+    reconciliadas, _ = reconciliar(base, matriz_soma, 'mint_shrink', residuos, abertas)
+    esperado = _mint_densa(base, matriz_soma, residuos)
+    assert (esperado[n_agregadas:] < 0).any() and (esperado[n_agregadas:][~abertas] != 0).any()
+    assert (reconciliadas >= 0).all()
+    assert (reconciliadas[n_agregadas:][~abertas] == 0).all()
+    np.testing.assert_allclose(reconciliadas, matriz_soma @ reconciliadas[n_agregadas:])
@@ -0,0 +1,85 @@
+# tests/test_tarefas_background.py
+import time
+
+import dash
+import pytest
+from dash import Input, Output, dcc, html
+
+pytest.importorskip('diskcache')
+pytest.importorskip('multiprocess')
+pytest.importorskip('psutil')
+
+from dashboard.tarefas_background import callback_pesado, criar_gerenciador_background  # noqa: E402
+
+ROTA = '/_dash-update-component'
+ESPERA_MAXIMA_S = 60
+
+
+def _criar_aplicativo(diretorio, monkeypatch):
+    monkeypatch.setenv('CALLBACKS_BACKGROUND', 'true')
+    gerenciador = criar_gerenciador_background(diretorio)
+    assert gerenciador is not None
+    aplicativo = dash.Dash(__name__, background_callback_manager=gerenciador, suppress_callback_exceptions=True)
+    # Como nas páginas sob demanda, os componentes do callback não estão no layout inicial
+    aplicativo.layout = html.Div([dcc.Location(id='url'), html.Div(id='conteudo')])
+
+    @callback_pesado(aplicativo, Output('saida', 'children'), Input('entrada', 'value'), id_progresso='progresso')
+    def calcular(definir_progresso, valor):
+        definir_progresso((50, 'Calculando'))
+        if valor == 'lento':
+            for _ in range(ESPERA_MAXIMA_S * 10):
+                time.sleep(0.1)
+        return f'resultado {valor}'
+
+    return aplicativo, gerenciador
+
+
+def _corpo(valor):
+    return {'output': 'saida.children', 'outputs': {'id': 'saida', 'property': 'children'},
+            'inputs': [{'id': 'entrada', 'property': 'value', 'value': valor}],
+            'changedPropIds': ['entrada.value'], 'state': []}
+
+
+def _consultar_ate_terminar(cliente, corpo, job):
+    """Consulta o job como o navegador, a cada intervalo, até a resposta final."""
+    progressos = []
+    limite = time.monotonic() + ESPERA_MAXIMA_S
+    while time.monotonic() < limite:
+        resposta = cliente.post(f"{ROTA}?cacheKey={job['cacheKey']}&job={job['job']}", json=corpo)
+        if resposta.status_code == 204:
+            return resposta, progressos
+        conteudo = resposta.get_json()
+        progressos.append(conteudo.get('progress'))
+        if 'response' in conteudo:
+            return resposta, progressos
+        time.sleep(0.1)
+    pytest.fail("O job em segundo plano não terminou a tempo")
+
+
+def test_callback_pesado_em_segundo_plano_com_progresso(tmp_path, monkeypatch):
+    aplicativo, _ = _criar_aplicativo(tmp_path, monkeypatch)
+    cliente = aplicativo.server.test_client()
+
+    job = cliente.post(ROTA, json=_corpo('rapido')).get_json()
+    assert job['running'] == {'progresso.style': {'display': 'flex', 'height': '1.25rem'}}
+    assert job['cancel'] == [{'id': 'url', 'property': 'pathname'}]
+
+    resposta, progressos = _consultar_ate_terminar(cliente, _corpo('rapido'), job)
+    assert resposta.get_json()['response'] == {'saida': {'children': 'resultado rapido'}}
+    assert {'progresso.value': 50, 'progresso.label': 'Calculando'} in progressos
+
+
+def test_trocar_de_pagina_cancela_o_job(tmp_path, monkeypatch):
+    aplicativo, gerenciador = _criar_aplicativo(tmp_path, monkeypatch)
+    cliente = aplicativo.server.test_client()
+    job = cliente.post(ROTA, json=_corpo('lento')).get_json()
+
+    # O navegador envia o job em andamento no callback de cancelamento registrado pelo Dash
+    cancelamento = {'output': 'url.id', 'outputs': {'id': 'url', 'property': 'id'},
+                    'inputs': [{'id': 'url', 'property': 'pathname', 'value': '/outra-pagina'}],
+                    'changedPropIds': ['url.pathname'], 'state': []}
+    assert cliente.post(f"{ROTA}?cancelJob={job['job']}", json=cancelamento).status_code == 204
+
+    resposta, _ = _consultar_ate_terminar(cliente, _corpo('lento'), job)
+    assert resposta.status_code == 204
+    assert not gerenciador.job_running(job['job'])